@@ -34,11 +34,12 @@ class Bursar(StaffAgent):
         
         if task_type == "get_overdue_list":
             try:
-                overdue = fee_ops.get_overdue_fees(school_id)
+                totals = fee_ops.get_overdue_totals(school_id)
+                overdue = fee_ops.get_overdue_fees(school_id, limit=5)
                 return {
-                    "count": len(overdue),
-                    "total_overdue_amount": sum(float(f['balance']) for f in overdue if f.get('balance')),
-                    "top_defaulters": overdue[:5] # Return first 5 for AI processing
+                    "count": int(totals.get('count') or 0),
+                    "total_overdue_amount": float(totals.get('total_overdue_amount') or 0),
+                    "top_defaulters": overdue["items"] # Return first 5 for AI processing
                 }
             except Exception as e:
                 print(f"Bursar Overdue Error: {e}")
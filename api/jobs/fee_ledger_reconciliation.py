@@ -0,0 +1,42 @@
+"""
+Fee Ledger Reconciliation Job
+Background task that verifies every school's fee balance ledger against the
+student_fees detail rows and repairs any drift (e.g. fees written by bulk
+imports with triggers disabled).
+"""
+import logging
+
+from api.services.database import get_db_manager
+from api.services.fee_ledger import FeeLedgerService
+
+logger = logging.getLogger("angels.jobs.fee_ledger")
+
+class FeeLedgerReconciliationJob:
+    def __init__(self, repair: bool = True):
+        self.db = get_db_manager()
+        self.repair = repair
+
+    async def run_reconciliation_cycle(self):
+        """Reconcile school by school so one failure does not stop the rest"""
+        logger.info("Starting fee ledger reconciliation...")
+
+        schools = self.db.execute_query("SELECT id FROM schools", fetch=True)
+        for school in schools:
+            try:
+                result = FeeLedgerService(str(school['id'])).reconcile(repair=self.repair)
+            except Exception as exc:
+                logger.error(f"Fee ledger reconciliation failed for school {school['id']}: {exc}")
+                continue
+
+            if result['students_mismatched']:
+                logger.warning(
+                    f"Fee ledger drift at school {school['id']}: "
+                    f"{result['students_mismatched']} students"
+                    f"{' (repaired)' if result['repaired'] else ''}"
+                )
+
+        logger.info(f"Fee ledger reconciliation finished for {len(schools)} schools.")
+
+async def start_fee_ledger_reconciliation():
+    job = FeeLedgerReconciliationJob()
+    await job.run_reconciliation_cycle()
@@ -0,0 +1,43 @@
+"""
+Financial Anomaly Scan Job
+Background task that runs the local anomaly detector over each school's new
+payments and expenses, so director dashboards open with flags already stored.
+"""
+import logging
+
+from api.services.database import get_db_manager
+from api.services.financial_anomalies import FinancialAnomalyDetector
+
+logger = logging.getLogger("angels.jobs.financial_anomalies")
+
+class FinancialAnomalyScanJob:
+    def __init__(self, max_batches: int = 20):
+        self.db = get_db_manager()
+        self.max_batches = max_batches
+
+    async def run_scan_cycle(self):
+        """Scan school by school until each is caught up (or max_batches is reached)"""
+        logger.info("Starting financial anomaly scan...")
+
+        schools = self.db.execute_query("SELECT id FROM schools", fetch=True)
+        for school in schools:
+            detector = FinancialAnomalyDetector(str(school['id']))
+            flagged = 0
+            try:
+                for _ in range(self.max_batches):
+                    result = detector.scan()
+                    flagged += sum(result['flagged'].values())
+                    if result['caught_up']:
+                        break
+            except Exception as exc:
+                logger.error(f"Financial anomaly scan failed for school {school['id']}: {exc}")
+                continue
+
+            if flagged:
+                logger.warning(f"{flagged} financial anomalies flagged at school {school['id']}")
+
+        logger.info(f"Financial anomaly scan finished for {len(schools)} schools.")
+
+async def start_financial_anomaly_scan():
+    job = FinancialAnomalyScanJob()
+    await job.run_scan_cycle()
@@ -0,0 +1,39 @@
+"""
+Report Snapshots Job
+Background task that rebuilds every school's government-report snapshots
+from the live tables. Triggers keep them current in between; this run
+corrects drift and seeds new schools.
+"""
+import logging
+
+from api.services.database import get_db_manager
+from api.services.government_reporting import GovernmentReportingService
+
+logger = logging.getLogger("angels.jobs.report_snapshots")
+
+class ReportSnapshotsJob:
+    def __init__(self):
+        self.db = get_db_manager()
+
+    async def run_refresh_cycle(self):
+        """Refresh snapshots school by school so one failure does not stop the rest"""
+        logger.info("Starting report snapshot refresh...")
+
+        schools = self.db.execute_query("SELECT id FROM schools", fetch=True)
+        refreshed = 0
+        for school in schools:
+            try:
+                result = GovernmentReportingService(str(school['id'])).refresh_snapshots()
+            except Exception as exc:
+                logger.error(f"Snapshot refresh failed for school {school['id']}: {exc}")
+                continue
+
+            refreshed += 1
+            for rollup, error in result.get('errors', {}).items():
+                logger.error(f"Snapshot refresh of {rollup} failed for school {school['id']}: {error}")
+
+        logger.info(f"Refreshed report snapshots for {refreshed}/{len(schools)} schools.")
+
+async def start_report_snapshots():
+    job = ReportSnapshotsJob()
+    await job.run_refresh_cycle()
@@ -0,0 +1,42 @@
+"""
+Student Summary Rebase Job
+Daily background task that moves every school's student summaries onto
+today's 30-day attendance window (the attendance trigger only adds and
+removes individual writes) and creates any rows that are missing.
+"""
+import logging
+
+from api.services.database import get_db_manager
+from api.services.student_summary import StudentSummaryService
+
+logger = logging.getLogger("angels.jobs.student_summary")
+
+class StudentSummaryRebaseJob:
+    def __init__(self):
+        self.db = get_db_manager()
+        self.summaries = StudentSummaryService()
+
+    async def run_rebase_cycle(self):
+        """Re-base school by school so one failure does not stop the rest"""
+        logger.info("Starting student summary rebase...")
+
+        schools = self.db.execute_query("SELECT id FROM schools", fetch=True)
+        rebased = 0
+        for school in schools:
+            try:
+                result = self.summaries.refresh(str(school['id']))
+            except Exception as exc:
+                logger.error(f"Student summary rebase failed for school {school['id']}: {exc}")
+                continue
+
+            rebased += 1
+            if result['created']:
+                logger.warning(
+                    f"Created {result['created']} missing student summaries at school {school['id']}"
+                )
+
+        logger.info(f"Re-based student summaries for {rebased}/{len(schools)} schools.")
+
+async def start_student_summary_rebase():
+    job = StudentSummaryRebaseJob()
+    await job.run_rebase_cycle()
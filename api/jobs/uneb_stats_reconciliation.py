@@ -0,0 +1,49 @@
+"""
+UNEB Stats Reconciliation Job
+Background task that verifies every school's uneb_performance_stats against
+uneb_results and repairs any drift (e.g. results corrected or deleted
+outside the import path, or exams imported before the stats table existed).
+"""
+import logging
+
+from api.services.database import get_db_manager
+from api.services.uneb import UNEBService
+
+logger = logging.getLogger("angels.jobs.uneb_stats")
+
+class UNEBStatsReconciliationJob:
+    def __init__(self, repair: bool = True):
+        self.db = get_db_manager()
+        self.repair = repair
+
+    async def run_reconciliation_cycle(self):
+        """Reconcile school by school so one failure does not stop the rest"""
+        logger.info("Starting UNEB performance stats reconciliation...")
+
+        schools = self.db.execute_query(
+            """
+            SELECT school_id FROM uneb_results
+            UNION
+            SELECT school_id FROM uneb_performance_stats
+            """,
+            fetch=True
+        )
+        for school in schools:
+            try:
+                result = UNEBService(str(school['school_id'])).reconcile_performance_stats(repair=self.repair)
+            except Exception as exc:
+                logger.error(f"UNEB stats reconciliation failed for school {school['school_id']}: {exc}")
+                continue
+
+            if result['exams_mismatched']:
+                logger.warning(
+                    f"UNEB stats drift at school {school['school_id']}: "
+                    f"{result['exams_mismatched']} exams"
+                    f"{' (repaired)' if result['repaired'] else ''}"
+                )
+
+        logger.info(f"UNEB performance stats reconciliation finished for {len(schools)} schools.")
+
+async def start_uneb_stats_reconciliation():
+    job = UNEBStatsReconciliationJob()
+    await job.run_reconciliation_cycle()
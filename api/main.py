@@ -93,7 +93,7 @@ from api.routes import (
     support, analytics, discounts, transport, boarding, 
     government_reporting, feeding, library, discipline, homework, events, 
     messaging, ussd, whatsapp, translation, uneb, monitoring, canteen, 
-    payroll, alumni, clarity, finance, experiments, reports
+    payroll, alumni, clarity, finance, experiments, reports, search
 )
 
 from api.routers import (
@@ -114,6 +114,7 @@ app.include_router(export.router, prefix="/api", tags=["Data Export"])
 app.include_router(multi_role.router, prefix="/api", tags=["Multi-Role"])
 app.include_router(multi_school.router, prefix="/api", tags=["Multi-School"])
 app.include_router(requirements.router, prefix="/api", tags=["School Requirements"])
+app.include_router(search.router, prefix="/api", tags=["Search"])
 
 app.include_router(students.router, prefix="/api/students", tags=["Students"])
 app.include_router(fees.router, prefix="/api/fees", tags=["Fees"])
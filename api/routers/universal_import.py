@@ -4,6 +4,7 @@ Handles file uploads and import preview/execution
 """
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from typing import Optional
 import tempfile
@@ -57,12 +58,17 @@ async def preview_import(
 async def execute_import(
     file: UploadFile = File(...),
     school_id: str = "demo-school",  # TODO: Get from auth
-    confirm: bool = True
+    confirm: bool = True,
+    dry_run: bool = False,
+    update_existing: bool = False
 ):
     """
     Execute the import after user confirms the preview
+    
+    Use dry_run=true to see which admission numbers already exist
+    without writing anything.
     """
-    if not confirm:
+    if not confirm and not dry_run:
         raise HTTPException(status_code=400, detail="Import not confirmed")
     
     # Save temporarily
@@ -73,19 +79,23 @@ async def execute_import(
     
     try:
         importer = UniversalImporter(school_id)
-        result = importer.execute_import(tmp_path)
+        result = importer.execute_import(
+            tmp_path, dry_run=dry_run, update_existing=update_existing
+        )
         
-        # TODO: Actually insert into database here
-        # For now, returning the data
+        if dry_run:
+            message = (
+                f"Dry run: {result['would_insert']} new students, "
+                f"{len(result['conflicts'])} already exist."
+            )
+        else:
+            message = f"Successfully imported {result['imported_count']} students!"
         
-        return JSONResponse({
+        return JSONResponse(jsonable_encoder({
             "status": "success",
-            "data": {
-                "imported_count": result['imported_count'],
-                "students": result['students'][:10]  # First 10 for confirmation
-            },
-            "message": f"Successfully imported {result['imported_count']} students!"
-        })
+            "data": result,
+            "message": message
+        }))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
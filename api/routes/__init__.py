@@ -34,6 +34,7 @@ from . import (
     payroll,
     requirements,
     schools,
+    search,
     student_portal,
     students,
     support,
@@ -81,6 +82,7 @@ __all__ = [
     "payroll",
     "requirements",
     "schools",
+    "search",
     "student_portal",
     "students",
     "support",
@@ -93,19 +93,20 @@ async def document_intelligence_batch(school_id: str, request: DocumentBatchRequ
         from api.services.ocr import OCRService
         
         ocr = OCRService()
-        results = []
-        
-        for doc in request.documents:
-            result = ocr.process_image(
-                image_data=doc.image_data,
-                image_type=doc.type
-            )
-            results.append({
-                "document_id": doc.id,
+        batch = ocr.process_batch([
+            {"id": doc.id, "image_data": doc.image_data, "type": doc.type}
+            for doc in request.documents
+        ])
+        results = [
+            {
+                "document_id": result["document_id"],
                 "success": result["success"],
                 "text_extracted": result.get("text", ""),
-                "confidence": result.get("confidence", 0)
-            })
+                "confidence": result.get("confidence", 0),
+                "cached": result.get("cached", False)
+            }
+            for result in batch
+        ]
         
         return {
             "success": True,
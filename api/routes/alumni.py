@@ -1,7 +1,7 @@
 """
 Alumni Tracking API Routes
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
@@ -54,13 +54,24 @@ async def search_alumni(
     school_id: str,
     graduation_year: Optional[int] = None,
     occupation: Optional[str] = None,
-    university: Optional[str] = None
+    university: Optional[str] = None,
+    query: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
 ):
-    """Search alumni"""
+    """Search alumni (paginated with next_cursor)"""
     service = get_alumni_service(school_id)
+    try:
+        page = service.search_alumni(
+            graduation_year, occupation, university, query=query, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "success": True,
-        "alumni": service.search_alumni(graduation_year, occupation, university)
+        "alumni": page["items"],
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
 
 
@@ -27,6 +27,13 @@ class BedsCreate(BaseModel):
     dormitory_id: str
     bed_count: int
     bed_prefix: str = "BED"
+    start_number: int = 1
+
+
+class DormitoryAssignmentPlan(BaseModel):
+    class_names: Optional[List[str]] = None
+    student_ids: Optional[List[str]] = None
+    apply: bool = False
 
 
 class BedAssignment(BaseModel):
@@ -81,7 +88,24 @@ async def create_beds(school_id: str, data: BedsCreate):
     return service.create_beds(
         dormitory_id=data.dormitory_id,
         bed_count=data.bed_count,
-        bed_prefix=data.bed_prefix
+        bed_prefix=data.bed_prefix,
+        start_number=data.start_number
+    )
+
+
+@router.post("/boarding/dormitories/{dormitory_id}/assignment-plan")
+async def plan_dormitory_assignment(school_id: str, dormitory_id: str, data: DormitoryAssignmentPlan):
+    """
+    Match unassigned boarders to free beds by class and gender
+    
+    Returns the plan only; send "apply": true to assign the beds.
+    """
+    service = get_boarding_service(school_id)
+    return service.plan_dormitory_assignment(
+        dormitory_id=dormitory_id,
+        class_names=data.class_names,
+        student_ids=data.student_ids,
+        apply=data.apply
     )
 
 
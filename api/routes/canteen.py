@@ -1,7 +1,7 @@
 """
 Canteen/Tuck Shop API Routes
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
@@ -177,10 +177,21 @@ async def get_popular_items(school_id: str, days: int = 7):
 
 
 @router.get("/canteen/analytics/low-balance-students")
-async def get_low_balance_students(school_id: str, threshold: float = 5000.0):
-    """Get students with low balance"""
+async def get_low_balance_students(
+    school_id: str,
+    threshold: float = 5000.0,
+    limit: int = 50,
+    cursor: Optional[str] = None
+):
+    """Get students with low balance (paginated with next_cursor)"""
     service = get_canteen_service(school_id)
+    try:
+        page = service.get_students_with_low_balance(threshold, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "success": True,
-        "students": service.get_students_with_low_balance(threshold)
+        "students": page["items"],
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
@@ -21,9 +21,10 @@ async def import_data_file(
     
     Supported formats:
     - CSV (Excel export)
-    - JSON
+    - Excel (.xlsx)
+    - JSON / JSON-lines
     - TSV
-    - Plain text (comma/tab separated)
+    - Plain text (comma/tab/semicolon separated)
     
     Supported data types (auto-detected):
     - Students
@@ -41,11 +42,10 @@ async def import_data_file(
     4. Handle duplicates intelligently
     """
     try:
-        content = await file.read()
-        
         migration_service = DataMigrationService(school_id)
+        # Stream from the (already disk-spooled) upload instead of reading it into memory
         result = await migration_service.import_data(
-            file_content=content,
+            file_content=file.file,
             filename=file.filename,
             data_type=data_type
         )
@@ -76,9 +76,8 @@ async def batch_import_files(
         migration_service = DataMigrationService(school_id)
         
         for file in files:
-            content = await file.read()
             result = await migration_service.import_data(
-                file_content=content,
+                file_content=file.file,
                 filename=file.filename,
                 data_type=None
             )
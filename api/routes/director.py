@@ -4,13 +4,19 @@ Director API Router
 Exposes the "Digital CEO" capabilities to the frontend Director Dashboard.
 """
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from pydantic import BaseModel
+from typing import Dict, Any, Optional
 
 from api.agents.staff.director import DigitalCEO
 from api.services.database import get_db_manager
+from api.services.financial_anomalies import FinancialAnomalyDetector
 
 router = APIRouter()
 
+class AnomalyReview(BaseModel):
+    status: str  # dismissed, confirmed
+    reviewed_by: str
+
 @router.get("/{school_id}/director/overview")
 async def get_director_overview(school_id: str) -> Dict[str, Any]:
     """
@@ -90,3 +96,38 @@ async def get_director_trends(school_id: str) -> Dict[str, Any]:
     except Exception as e:
         print(f"Director Trends Error: {e}")
         return {"success": False, "trends": [], "error": str(e)}
+
+@router.get("/{school_id}/director/anomalies")
+async def get_director_anomalies(
+    school_id: str,
+    anomaly_type: Optional[str] = None,
+    status: str = "open",
+    limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Flagged payments and expenses (duplicates, amount outliers, off-hours entries).
+    Flags are stored by FinancialAnomalyScanJob; scanned_at is when each source
+    last had new rows scanned.
+    """
+    try:
+        detector = FinancialAnomalyDetector(school_id)
+        flags = detector.get_flags(status=status, anomaly_type=anomaly_type, limit=limit)
+        return {
+            "success": True,
+            "scanned_at": detector.get_scanned_at(),
+            "flags": flags,
+            "count": len(flags)
+        }
+
+    except Exception as e:
+        print(f"Director Anomalies Error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch financial anomalies.")
+
+@router.post("/{school_id}/director/anomalies/{flag_id}/review")
+async def review_director_anomaly(school_id: str, flag_id: str, review: AnomalyReview) -> Dict[str, Any]:
+    """Dismiss or confirm a flagged payment/expense."""
+    result = FinancialAnomalyDetector(school_id).review_flag(flag_id, review.status, review.reviewed_by)
+    if not result["success"]:
+        status_code = 404 if result["error"] == "Flag not found" else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    return result
@@ -70,15 +70,52 @@ async def get_discount_rules(school_id: str, is_active: bool = True):
 
 
 @router.post("/discounts/sibling/calculate")
-async def calculate_sibling_discounts(school_id: str, parent_id: str):
+async def calculate_sibling_discounts(
+    school_id: str,
+    parent_id: str,
+    term: Optional[str] = None,
+    academic_year: Optional[str] = None
+):
     """
     Calculate and apply automatic sibling discounts
     
+    Fees already given a sibling discount (here or by a school-wide run)
+    are skipped. academic_year limits it to that year's fees.
+    
     Example:
     POST /discounts/sibling/calculate?school_id=abc&parent_id=xyz
     """
     service = get_discounts_service(school_id)
-    return service.calculate_sibling_discounts(parent_id)
+    return service.calculate_sibling_discounts(parent_id, term=term, academic_year=academic_year)
+
+
+@router.post("/discounts/sibling/apply-school")
+async def apply_sibling_discounts_for_school(
+    school_id: str,
+    term: str,
+    academic_year: str,
+    run_by: Optional[str] = None,
+    dry_run: bool = False
+):
+    """
+    Apply sibling discounts to every family at term start
+    
+    Safe to re-run: fees that already have a sibling discount (from any
+    term's run or a per-family request) are skipped.
+    Use dry_run=true to preview the totals.
+    """
+    service = get_discounts_service(school_id)
+    return service.apply_sibling_discounts_for_school(term, academic_year, run_by=run_by, dry_run=dry_run)
+
+
+@router.get("/discounts/sibling/runs")
+async def get_sibling_discount_runs(school_id: str, academic_year: Optional[str] = None):
+    """History of school-wide sibling discount runs"""
+    service = get_discounts_service(school_id)
+    return {
+        "success": True,
+        "runs": service.get_sibling_discount_runs(academic_year)
+    }
 
 
 @router.post("/discounts/early-payment/apply")
@@ -39,6 +39,7 @@ class ThreatAnalysisRequest(BaseModel):
 class PerformancePredictionRequest(BaseModel):
     school_id: str
     student_id: str
+    include_ai: bool = True
 
 
 class CurriculumReviewRequest(BaseModel):
@@ -234,7 +235,7 @@ async def predict_performance(payload: PerformancePredictionRequest):
     """
     try:
         service = get_domain_intelligence(payload.school_id)
-        result = await service.predict_student_performance(payload.student_id)
+        result = await service.predict_student_performance(payload.student_id, payload.include_ai)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -34,6 +34,15 @@ class BulkMealAttendance(BaseModel):
     meal_type: str
     meal_date: str
     student_ids: List[str]
+    attended: bool = True
+
+
+class GroupMealAttendance(BaseModel):
+    meal_type: str
+    meal_date: str
+    class_name: Optional[str] = None
+    dormitory_id: Optional[str] = None
+    except_student_ids: List[str] = []
 
 
 # ============================================================================
@@ -108,7 +117,31 @@ async def bulk_record_attendance(school_id: str, data: BulkMealAttendance):
     return service.bulk_record_meal_attendance(
         meal_type=data.meal_type,
         meal_date=data.meal_date,
-        student_ids=data.student_ids
+        student_ids=data.student_ids,
+        attended=data.attended
+    )
+
+
+@router.post("/feeding/attendance/group")
+async def record_group_attendance(school_id: str, data: GroupMealAttendance):
+    """
+    Mark a whole class or dormitory as attended, except the listed students
+    
+    Example:
+    {
+      "meal_type": "lunch",
+      "meal_date": "2025-02-15",
+      "dormitory_id": "...",
+      "except_student_ids": ["..."]
+    }
+    """
+    service = get_feeding_service(school_id)
+    return service.record_group_meal_attendance(
+        meal_type=data.meal_type,
+        meal_date=data.meal_date,
+        class_name=data.class_name,
+        dormitory_id=data.dormitory_id,
+        except_student_ids=data.except_student_ids
     )
 
 
@@ -1,16 +1,43 @@
 """Fee Management Endpoints"""
 from fastapi import APIRouter, HTTPException
 
+from api.services.fee_ledger import get_fee_ledger_service
+
 router = APIRouter()
 
 @router.get("/report/{school_id}")
 async def get_financial_report(school_id: str):
     try:
+        totals = get_fee_ledger_service(school_id).get_school_balance()
+        total_expected = float(totals['total_due'] or 0)
+        total_collected = float(totals['total_paid'] or 0)
         return {
             'school_id': school_id,
-            'collection_rate': 0,
-            'total_expected': 0,
-            'total_collected': 0
+            'collection_rate': round(total_collected / total_expected * 100, 2) if total_expected else 0,
+            'total_expected': total_expected,
+            'total_collected': total_collected,
+            'total_outstanding': float(totals['balance'] or 0)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ledger/{school_id}/student/{student_id}")
+async def get_student_balance(school_id: str, student_id: str):
+    try:
+        return get_fee_ledger_service(school_id).get_student_balance(student_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/ledger/{school_id}/reconcile")
+async def reconcile_ledger(school_id: str, repair: bool = True):
+    try:
+        return get_fee_ledger_service(school_id).reconcile(repair=repair)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ledger/{school_id}/reconciliations")
+async def get_reconciliations(school_id: str, limit: int = 20):
+    try:
+        return {"reconciliations": get_fee_ledger_service(school_id).get_reconciliations(limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
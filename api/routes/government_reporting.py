@@ -20,6 +20,7 @@ class ReportSave(BaseModel):
     report_year: int
     report_data: Dict[str, Any]
     submitted_by: str
+    report_key: Optional[str] = None
 
 
 # ============================================================================
@@ -85,10 +86,43 @@ async def save_report(school_id: str, data: ReportSave):
         report_type=data.report_type,
         report_year=data.report_year,
         report_data=data.report_data,
-        submitted_by=data.submitted_by
+        submitted_by=data.submitted_by,
+        report_key=data.report_key
     )
 
 
+@router.get("/government/reports/download/{report_type}")
+async def download_report(
+    school_id: str,
+    report_type: str,
+    year: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    regenerate: bool = False
+):
+    """
+    Stored report payload, generated and saved on first request
+    
+    report_type: annual_census (needs year), enrollment or financial_summary
+    (need start_date and end_date). Pass regenerate=true to rebuild it.
+    """
+    service = get_government_reporting_service(school_id)
+    return service.get_or_generate_report(
+        report_type,
+        year=year,
+        start_date=start_date,
+        end_date=end_date,
+        regenerate=regenerate
+    )
+
+
+@router.post("/government/reports/snapshots/refresh")
+async def refresh_report_snapshots(school_id: str):
+    """Rebuild the report snapshots for a school from the live tables"""
+    service = get_government_reporting_service(school_id)
+    return service.refresh_snapshots()
+
+
 @router.patch("/government/reports/{report_id}/submit")
 async def submit_report(school_id: str, report_id: str, submission_date: str):
     """Mark report as submitted to government"""
@@ -1,7 +1,7 @@
 """
 Library Management API Routes
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
@@ -57,13 +57,21 @@ async def search_books(
     school_id: str,
     search_term: Optional[str] = None,
     category: Optional[str] = None,
-    available_only: bool = False
+    available_only: bool = False,
+    limit: int = 50,
+    cursor: Optional[str] = None
 ):
-    """Search books in catalog"""
+    """Search books in catalog (ranked, paginated with next_cursor)"""
     service = get_library_service(school_id)
+    try:
+        page = service.search_books(search_term, category, available_only, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "success": True,
-        "books": service.search_books(search_term, category, available_only)
+        "books": page["items"],
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
 
 
@@ -144,12 +152,18 @@ async def get_overdue_books(school_id: str):
 
 
 @router.get("/library/fines/unpaid")
-async def get_unpaid_fines(school_id: str):
-    """Get all unpaid library fines"""
+async def get_unpaid_fines(school_id: str, limit: int = 50, cursor: Optional[str] = None):
+    """Get unpaid library fines, newest first (paginated with next_cursor)"""
     service = get_library_service(school_id)
+    try:
+        page = service.get_unpaid_fines(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "success": True,
-        "unpaid_fines": service.get_unpaid_fines()
+        "unpaid_fines": page["items"],
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
 
 
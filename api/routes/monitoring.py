@@ -3,7 +3,7 @@ Monitoring and Health Check Endpoints
 Production monitoring, metrics, and alerts
 """
 from fastapi import APIRouter, HTTPException, Response, status
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from api.services.monitoring import get_monitoring_service
 from api.services.audit import get_audit_logger
@@ -66,25 +66,32 @@ async def get_metrics() -> Dict[str, Any]:
 @router.get("/audit/recent")
 async def get_recent_audit_logs(
     school_id: str,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Get recent audit logs for a school
+    Get recent audit logs for a school (pass next_cursor for older logs)
     
     Requires authentication in production
     """
     audit = get_audit_logger()
     
-    logs = audit.get_audit_trail(
-        school_id=school_id,
-        limit=limit
-    )
+    try:
+        page = audit.get_audit_trail(
+            school_id=school_id,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "success": True,
         "school_id": school_id,
-        "logs": logs,
-        "total": len(logs)
+        "logs": page["items"],
+        "total": len(page["items"]),
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
 
 
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from api.services.database import get_db_manager
 from api.services.mobile_money import MobileMoneyService
 from api.services.notifications import NotificationService
+from api.services.pagination import NEWEST_FIRST, fetch_page
+from api.services.student_summary import attendance_stats, get_student_summary_service
 
 router = APIRouter()
 
@@ -94,51 +96,30 @@ async def get_parent_dashboard(school_id: str, parent_id: str):
         """
         notifications = db.execute_query(notifications_query, (school_id, parent_id), fetch=True)
         
-        # Get fee summary for all children
+        # Fee and 30-day attendance summaries for all children in one query
+        summaries = get_student_summary_service().get_summaries([child["id"] for child in children])
+        
         fee_summary = []
+        attendance_summary = []
         for child in children:
-            fee_query = """
-            SELECT SUM(amount_due) as total_due,
-                   SUM(amount_paid) as total_paid,
-                   SUM(balance) as total_balance
-            FROM student_fees
-            WHERE student_id = %s
-            """
-            fees = db.execute_query(fee_query, (child["id"],), fetch=True)
-            if fees and fees[0]["total_balance"]:
+            summary = summaries.get(str(child["id"]))
+            if not summary:
+                continue
+            student_name = f"{child['first_name']} {child['last_name']}"
+            
+            if summary["fee_balance"]:
                 fee_summary.append({
                     "student_id": child["id"],
-                    "student_name": f"{child['first_name']} {child['last_name']}",
-                    "total_balance": float(fees[0]["total_balance"]),
-                    "total_due": float(fees[0]["total_due"]),
-                    "total_paid": float(fees[0]["total_paid"])
+                    "student_name": student_name,
+                    "total_balance": float(summary["fee_balance"]),
+                    "total_due": float(summary["fee_total_due"]),
+                    "total_paid": float(summary["fee_total_paid"])
                 })
-        
-        # Get recent attendance for all children
-        attendance_summary = []
-        for child in children:
-            attendance_query = """
-            SELECT status, COUNT(*) as count
-            FROM attendance
-            WHERE student_id = %s
-            AND date >= CURRENT_DATE - INTERVAL '30 days'
-            GROUP BY status
-            """
-            attendance = db.execute_query(attendance_query, (child["id"],), fetch=True)
-            
-            stats = {"present": 0, "absent": 0, "late": 0}
-            for record in attendance:
-                stats[record["status"]] = record["count"]
             
             attendance_summary.append({
                 "student_id": child["id"],
-                "student_name": f"{child['first_name']} {child['last_name']}",
-                "stats": stats,
-                "attendance_rate": round(
-                    (stats["present"] / (stats["present"] + stats["absent"] + stats["late"]) * 100)
-                    if (stats["present"] + stats["absent"] + stats["late"]) > 0 else 0,
-                    1
-                )
+                "student_name": student_name,
+                **attendance_stats(summary)
             })
         
         return {
@@ -285,34 +266,37 @@ async def get_parent_notifications(
     school_id: str,
     parent_id: str,
     limit: int = 50,
-    offset: int = 0
+    cursor: Optional[str] = None
 ):
     """
-    Get all notifications for parent
+    Get notifications for parent, newest first
+    (pass next_cursor to fetch older ones)
     """
     try:
         db = get_db_manager()
         
-        query = """
+        select = """
         SELECT id, notification_type, title, message, priority, is_read,
                created_at, related_entity_type, related_entity_id
         FROM notifications
-        WHERE school_id = %s AND recipient_id = %s AND recipient_type = 'parent'
-        ORDER BY created_at DESC
-        LIMIT %s OFFSET %s
         """
-        notifications = db.execute_query(
-            query,
-            (school_id, parent_id, limit, offset),
-            fetch=True
+        page = fetch_page(
+            db, select,
+            ["school_id = %s", "recipient_id = %s", "recipient_type = 'parent'"],
+            [school_id, parent_id],
+            keys=NEWEST_FIRST, limit=limit, cursor=cursor
         )
         
         return {
             "success": True,
-            "notifications": notifications,
-            "count": len(notifications)
+            "notifications": page["items"],
+            "count": len(page["items"]),
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -3,7 +3,7 @@ Staff Payroll API Routes
 """
 from fastapi import APIRouter
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict
 
 from api.services.payroll import get_payroll_service
 
@@ -28,6 +28,14 @@ class PayrollProcess(BaseModel):
     deduction_reason: Optional[str] = None
 
 
+class PayrollRun(BaseModel):
+    month: str
+    year: int
+    bonuses: Dict[str, float] = {}  # staff_id -> bonus
+    deductions: Dict[str, float] = {}  # staff_id -> deduction
+    deduction_reasons: Dict[str, str] = {}
+
+
 @router.post("/payroll/salary/create")
 async def create_salary_structure(school_id: str, data: SalaryStructureCreate):
     """Create or update salary structure"""
@@ -55,6 +63,19 @@ async def process_payroll(school_id: str, data: PayrollProcess):
     )
 
 
+@router.post("/payroll/run")
+async def run_payroll(school_id: str, data: PayrollRun):
+    """Process the month's payroll for all staff in one run"""
+    service = get_payroll_service(school_id)
+    return service.run_payroll(
+        month=data.month,
+        year=data.year,
+        bonuses=data.bonuses,
+        deductions=data.deductions,
+        deduction_reasons=data.deduction_reasons
+    )
+
+
 @router.patch("/payroll/{payroll_id}/mark-paid")
 async def mark_as_paid(
     school_id: str,
@@ -0,0 +1,33 @@
+"""
+Global Search API Routes
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+from api.services.global_search import get_global_search_service
+
+
+router = APIRouter()
+
+
+@router.get("/search")
+async def global_search(
+    school_id: str,
+    q: str = Query(..., min_length=1),
+    types: Optional[str] = None,
+    limit: int = 20
+):
+    """
+    Search students, parents, teachers and receipts at once
+
+    Matches partial names, phone numbers (any format), admission/employee
+    numbers and receipt numbers. `types` is an optional comma-separated
+    subset of: student, parent, teacher, receipt.
+    """
+    service = get_global_search_service(school_id)
+    entity_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    try:
+        result = service.search(q, types=entity_types, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, **result}
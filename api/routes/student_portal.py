@@ -2,6 +2,8 @@
 Student Portal - Student-Facing Features
 Students view grades, attendance, schedule, assignments, achievements
 """
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from typing import Optional
 
@@ -313,59 +315,48 @@ async def report_student_concern(
 
 
 @router.get("/{school_id}/student/{student_id}/performance-analytics")
-async def get_student_performance_analytics(school_id: str, student_id: str):
+async def get_student_performance_analytics(school_id: str, student_id: str, include_ai: bool = True):
     """
-    AI-powered performance analytics for student
+    Performance analytics for student
+    
+    Per-subject moving averages, slopes, class comparison and at-risk flags
+    are computed locally (and cached until new marks arrive). With
+    include_ai, Clarity writes the narrative from that compact summary.
     """
     try:
-        from api.services.clarity import ClarityClient
-        
-        db = get_db_manager()
-        
-        # Gather performance data
-        performance_query = """
-        SELECT a.subject, a.date, a.max_marks, ar.marks_obtained,
-               (ar.marks_obtained / a.max_marks * 100) as percentage
-        FROM assessment_results ar
-        JOIN assessments a ON ar.assessment_id = a.id
-        WHERE ar.student_id = %s
-        AND a.date >= CURRENT_DATE - INTERVAL '6 months'
-        ORDER BY a.date ASC
-        """
-        performance_data = db.execute_query(performance_query, (student_id,), fetch=True)
-        
-        # Use Clarity to analyze performance trends
-        clarity = ClarityClient()
-        try:
-            analysis = clarity.analyze(
-                directive=f"""
-                Analyze this student's academic performance over 6 months.
-                Identify strengths, weaknesses, trends, and provide specific recommendations.
-                Be encouraging but honest. Format for student reading level.
-                
-                Performance data: {performance_data}
-                """,
-                domain="education"
-            )
-        finally:
-            clarity.close()
-        
-        # Calculate trend (improving/declining/stable)
-        if len(performance_data) >= 5:
-            recent_avg = sum([d["percentage"] for d in performance_data[-5:]]) / 5
-            older_avg = sum([d["percentage"] for d in performance_data[:5]]) / 5
-            if recent_avg > older_avg + 5:
-                trend = "improving"
-            elif recent_avg < older_avg - 5:
-                trend = "declining"
-            else:
-                trend = "stable"
-        else:
-            trend = "insufficient_data"
+        from api.services.performance_analytics import get_performance_analytics_service
+        
+        service = get_performance_analytics_service(school_id)
+        performance_data, summary = service.get_student_analytics(student_id)
+        
+        analysis = None
+        if include_ai and summary["assessments"]:
+            from api.core.mcp import MCPAgentRequest
+            from api.services.clarity import ClarityClient
+            
+            def _analyze():
+                clarity = ClarityClient()
+                try:
+                    return clarity.analyze(MCPAgentRequest(
+                        directive="""
+                        Analyze this student's academic performance over 6 months from the summary in context.
+                        Identify strengths, weaknesses, trends, and provide specific recommendations.
+                        Be encouraging but honest. Format for student reading level.
+                        """,
+                        domain="education",
+                        context={"performance_summary": summary}
+                    ))
+                finally:
+                    clarity.close()
+            
+            # The Clarity client is blocking; keep it off the event loop
+            response = await asyncio.to_thread(_analyze)
+            analysis = response.content
         
         return {
             "success": True,
-            "trend": trend,
+            "trend": summary["trend"],
+            "summary": summary,
             "analysis": analysis,
             "performance_data": performance_data
         }
@@ -1,5 +1,6 @@
 """Student Management Endpoints"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from typing import Optional
 
 from api.models.schemas import StudentRegistrationRequest
 from api.services.executive import ExecutiveAssistant
@@ -25,32 +26,49 @@ async def get_dashboard(school_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("")
-async def list_students(school_id: str = None, current_class: str = None, limit: int = 100):
-    """List students with optional filters"""
+async def list_students(
+    response: Response,
+    school_id: str = None,
+    current_class: str = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """
+    List students with optional filters, newest first
+
+    The body stays a plain list; the cursor for the next page is returned in
+    the X-Next-Cursor header (X-Has-More: true|false).
+    """
     # Quick implementation for load testing - in real app should be in services/ops
     if not school_id:
          raise HTTPException(status_code=400, detail="school_id required")
          
     from api.services.database import get_db, StudentOperations, DatabaseManager
+    from api.services.pagination import NEWEST_FIRST, fetch_page
     # We use a fresh DB manager or get_db dependency if available. 
     # For now, quick raw query or via Ops if they support list.
     
     # Ops list support? Unknown. Let's use DatabaseManager pattern.
     db = DatabaseManager()
     
-    query = "SELECT * FROM students WHERE school_id = %s"
+    conditions = ["school_id = %s"]
     params = [school_id]
     
     if current_class:
-        query += " AND class_name = %s"
+        conditions.append("class_name = %s")
         params.append(current_class)
-        
-    query += " LIMIT %s"
-    params.append(limit)
     
     try:
-        results = db.execute_query(query, tuple(params))
-        return results
+        page = fetch_page(
+            db, "SELECT * FROM students", conditions, params,
+            keys=NEWEST_FIRST, limit=limit, cursor=cursor, default=100
+        )
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+        response.headers["X-Has-More"] = "true" if page["has_more"] else "false"
+        return page["items"]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
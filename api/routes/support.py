@@ -75,10 +75,19 @@ def create_incident(school_id: str, payload: IncidentPayload):
 def get_incidents(
     school_id: str,
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
 ):
     try:
         service = _service(school_id)
-        return {"success": True, "incidents": service.list_incidents(limit=limit)}
+        page = service.list_incidents(limit=limit, cursor=cursor)
+        return {
+            "success": True,
+            "incidents": page["items"],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"],
+        }
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -130,10 +139,22 @@ def record_library_transaction(school_id: str, payload: LibraryTransactionPayloa
 
 
 @router.get("/{school_id}/library")
-def list_library_transactions(school_id: str, limit: int = Query(50, ge=1, le=200)):
+def list_library_transactions(
+    school_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
     try:
         service = _service(school_id)
-        return {"success": True, "transactions": service.list_library_transactions(limit=limit)}
+        page = service.list_library_transactions(limit=limit, cursor=cursor)
+        return {
+            "success": True,
+            "transactions": page["items"],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"],
+        }
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
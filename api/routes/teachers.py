@@ -5,11 +5,13 @@ Teachers use phones to snap photos of attendance, results, etc.
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from typing import Optional, List
 from datetime import date, datetime
+from collections import defaultdict
 import base64
 
 from api.services.ocr import OCRService
 from api.services.notifications import NotificationService
 from api.services.database import get_db_manager
+from api.services.roster_matcher import RosterIndex
 
 router = APIRouter()
 
@@ -51,78 +53,77 @@ async def process_attendance_photo(
         db = get_db_manager()
         notification_service = NotificationService()
         
+        # Resolve every OCR'd name against the class roster in one pass
+        roster = RosterIndex.load(db, school_id, class_name)
+        records = result["attendance"]
+        matches = roster.resolve([record["student_name"] for record in records])
+        matched = [
+            (record, match["student"])
+            for record, match in zip(records, matches)
+            if match["status"] == "matched"
+        ]
+        
         saved_records = []
         notification_results = []
         
-        for record in result["attendance"]:
-            student_name = record["student_name"]
-            status = record["status"]
-            
-            # Find student by name and class
-            student_query = """
-            SELECT id, first_name, last_name 
-            FROM students 
-            WHERE school_id = %s 
-            AND class_name = %s
-            AND (first_name || ' ' || last_name) ILIKE %s
-            LIMIT 1
-            """
-            students = db.execute_query(
-                student_query,
-                (school_id, class_name, f"%{student_name}%"),
-                fetch=True
-            )
-            
-            if not students:
-                continue
-            
-            student = students[0]
-            student_id = student["id"]
-            
-            # Save attendance record
-            attendance_query = """
-            INSERT INTO attendance (
-                school_id, student_id, date, status, marked_by, notes, marked_at
-            ) VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-            ON CONFLICT (student_id, date) 
-            DO UPDATE SET status = EXCLUDED.status, marked_by = EXCLUDED.marked_by
-            RETURNING id
-            """
-            attendance_result = db.execute_query(
-                attendance_query,
-                (school_id, student_id, date_str, status, teacher_id, record.get("notes", "")),
-                fetch=True
-            )
-            
-            saved_records.append({
-                "student_id": student_id,
-                "student_name": f"{student['first_name']} {student['last_name']}",
-                "status": status,
-                "attendance_id": attendance_result[0]["id"] if attendance_result else None
-            })
+        if matched:
+            # Save all attendance records in one statement
+            with db.transaction() as tx:
+                attendance_rows = tx.execute_values(
+                    """
+                    INSERT INTO attendance (
+                        school_id, student_id, date, status, marked_by, notes, marked_at
+                    ) VALUES %s
+                    ON CONFLICT (student_id, date) 
+                    DO UPDATE SET status = EXCLUDED.status, marked_by = EXCLUDED.marked_by
+                    RETURNING id, student_id
+                    """,
+                    [
+                        (school_id, student["id"], date_str, record["status"], teacher_id, record.get("notes", ""))
+                        for record, student in matched
+                    ],
+                    template="(%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)",
+                    fetch=True
+                )
+            attendance_ids = {str(row["student_id"]): row["id"] for row in attendance_rows}
             
-            # Get parents and notify them
+            # Get parents of every marked student
             parent_query = """
-            SELECT p.id, p.first_name, p.last_name, p.primary_phone
+            SELECT sp.student_id, p.id, p.first_name, p.last_name, p.primary_phone
             FROM parents p
             JOIN student_parents sp ON p.id = sp.parent_id
-            WHERE sp.student_id = %s
+            WHERE sp.student_id = ANY(%s::uuid[])
             """
-            parents = db.execute_query(parent_query, (student_id,), fetch=True)
+            parents_by_student = defaultdict(list)
+            for parent in db.execute_query(
+                parent_query, ([str(student["id"]) for _, student in matched],), fetch=True
+            ):
+                parents_by_student[str(parent["student_id"])].append(parent)
             
-            for parent in parents:
-                notif_result = await notification_service.notify_parent_attendance(
-                    school_id=school_id,
-                    student_id=student_id,
-                    parent_id=parent["id"],
-                    status=status,
-                    date=date_str
-                )
-                notification_results.append({
-                    "parent_id": parent["id"],
+            for record, student in matched:
+                student_id = student["id"]
+                status = record["status"]
+                
+                saved_records.append({
                     "student_id": student_id,
-                    "status": notif_result.get("success", False)
+                    "student_name": f"{student['first_name']} {student['last_name']}",
+                    "status": status,
+                    "attendance_id": attendance_ids.get(str(student_id))
                 })
+                
+                for parent in parents_by_student[str(student_id)]:
+                    notif_result = await notification_service.notify_parent_attendance(
+                        school_id=school_id,
+                        student_id=student_id,
+                        parent_id=parent["id"],
+                        status=status,
+                        date=date_str
+                    )
+                    notification_results.append({
+                        "parent_id": parent["id"],
+                        "student_id": student_id,
+                        "status": notif_result.get("success", False)
+                    })
         
         return {
             "success": True,
@@ -133,6 +134,8 @@ async def process_attendance_photo(
             "parents_notified": len(notification_results),
             "ocr_confidence": result.get("ocr_confidence", 0),
             "details": saved_records,
+            "ambiguous": [match for match in matches if match["status"] == "ambiguous"],
+            "unmatched": [match["name"] for match in matches if match["status"] == "unmatched"],
             "raw_text": result.get("raw_text", "")
         }
         
@@ -194,34 +197,21 @@ async def process_exam_results_photo(
         
         assessment_id = assessment_result[0]["id"]
         
-        # Save results for each student
+        # Resolve every OCR'd name against the class roster in one pass
+        roster = RosterIndex.load(db, school_id, class_name)
+        matches = roster.resolve([exam_result["student_name"] for exam_result in result["results"]])
+        
         saved_results = []
+        result_rows = []
         
-        for exam_result in result["results"]:
-            student_name = exam_result["student_name"]
-            marks = exam_result.get("marks_obtained", 0)
-            grade = exam_result.get("grade", "")
-            
-            # Find student
-            student_query = """
-            SELECT id, first_name, last_name 
-            FROM students 
-            WHERE school_id = %s 
-            AND class_name = %s
-            AND (first_name || ' ' || last_name) ILIKE %s
-            LIMIT 1
-            """
-            students = db.execute_query(
-                student_query,
-                (school_id, class_name, f"%{student_name}%"),
-                fetch=True
-            )
-            
-            if not students:
+        for exam_result, match in zip(result["results"], matches):
+            if match["status"] != "matched":
                 continue
             
-            student = students[0]
+            student = match["student"]
             student_id = student["id"]
+            marks = exam_result.get("marks_obtained", 0)
+            grade = exam_result.get("grade", "")
             
             # Calculate grade if not provided
             if not grade:
@@ -237,21 +227,7 @@ async def process_exam_results_photo(
                 else:
                     grade = "F"
             
-            # Save result
-            result_query = """
-            INSERT INTO assessment_results (
-                assessment_id, student_id, marks_obtained, grade, remarks
-            ) VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (assessment_id, student_id)
-            DO UPDATE SET marks_obtained = EXCLUDED.marks_obtained, grade = EXCLUDED.grade
-            RETURNING id
-            """
-            db.execute_query(
-                result_query,
-                (assessment_id, student_id, marks, grade, exam_result.get("remarks", "")),
-                fetch=False
-            )
-            
+            result_rows.append((assessment_id, student_id, marks, grade, exam_result.get("remarks", "")))
             saved_results.append({
                 "student_id": student_id,
                 "student_name": f"{student['first_name']} {student['last_name']}",
@@ -259,6 +235,20 @@ async def process_exam_results_photo(
                 "grade": grade
             })
         
+        if result_rows:
+            # Save all results in one statement
+            with db.transaction() as tx:
+                tx.execute_values(
+                    """
+                    INSERT INTO assessment_results (
+                        assessment_id, student_id, marks_obtained, grade, remarks
+                    ) VALUES %s
+                    ON CONFLICT (assessment_id, student_id)
+                    DO UPDATE SET marks_obtained = EXCLUDED.marks_obtained, grade = EXCLUDED.grade
+                    """,
+                    result_rows
+                )
+        
         return {
             "success": True,
             "message": "Exam results processed from photo",
@@ -269,6 +259,8 @@ async def process_exam_results_photo(
             "results_saved": len(saved_results),
             "ocr_confidence": result.get("ocr_confidence", 0),
             "details": saved_results,
+            "ambiguous": [match for match in matches if match["status"] == "ambiguous"],
+            "unmatched": [match["name"] for match in matches if match["status"] == "unmatched"],
             "raw_text": result.get("raw_text", "")
         }
         
@@ -1,9 +1,44 @@
 """Translation routes"""
 from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from typing import List
+
+from api.services.translation import get_translation_service
 
 router = APIRouter()
 
+MAX_BATCH_TEXTS = 500
+
+
+class BatchTranslationRequest(BaseModel):
+    texts: List[str] = Field(..., max_length=MAX_BATCH_TEXTS)
+    target_language: str
+    source_language: str = "en"
+
+
 @router.get("/translate")
 async def translate_text():
     """Translate text between languages"""
     return {"status": "available", "message": "Translation service ready"}
+
+
+@router.post("/translate/batch")
+async def translate_batch(data: BatchTranslationRequest):
+    """
+    Translate many texts at once (each distinct text resolved once, at most
+    MAX_BATCH_TEXTS per request)
+    
+    Example:
+    {
+      "texts": ["present today", "absent today"],
+      "target_language": "lg"
+    }
+    """
+    service = get_translation_service()
+    return {
+        "success": True,
+        "target_language": data.target_language,
+        "translations": service.translate_many(
+            data.texts, data.target_language, data.source_language
+        )
+    }
@@ -1,5 +1,7 @@
 """UNEB integration routes"""
-from fastapi import APIRouter
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+
+from api.services.uneb import get_uneb_service
 
 router = APIRouter()
 
@@ -7,3 +9,33 @@ router = APIRouter()
 async def uneb_status():
     """Check UNEB integration status"""
     return {"status": "available", "message": "UNEB service ready"}
+
+
+@router.post("/uneb/results/import-file")
+async def import_results_file(
+    school_id: str = Form(...),
+    exam_type: str = Form(...),
+    exam_year: int = Form(...),
+    file: UploadFile = File(...)
+):
+    """
+    Bulk import a UNEB results release (CSV or JSON)
+    
+    CSV columns: index_number (or student_id) plus one column per subject
+    holding the grade, e.g. index_number,English,Mathematics,Science,SST
+    """
+    if exam_type not in ('PLE', 'UCE', 'UACE'):
+        raise HTTPException(status_code=400, detail="exam_type must be PLE, UCE or UACE")
+    
+    service = get_uneb_service(school_id)
+    try:
+        return service.import_results_file(await file.read(), file.filename or "", exam_type, exam_year)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not read results file: {e}")
+
+
+@router.get("/uneb/performance/{exam_type}/{exam_year}")
+async def get_school_performance(school_id: str, exam_type: str, exam_year: int):
+    """School performance statistics for an exam"""
+    service = get_uneb_service(school_id)
+    return service.get_school_performance(exam_type, exam_year)
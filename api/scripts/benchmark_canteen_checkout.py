@@ -0,0 +1,178 @@
+"""
+Canteen checkout concurrency benchmark
+
+Simulates a lunch-break rush: TILLS threads hammer CanteenService.record_purchase
+for a handful of scarce items until they sell out, then checks that nothing
+was oversold and that stock, purchase lines and balances all agree.
+
+Usage:
+    DATABASE_URL=... python api/scripts/benchmark_canteen_checkout.py [school_id]
+
+All rows it creates are removed again at the end.
+"""
+import os
+import sys
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+# Add parent directory to path to allow importing from api
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from api.services.database import get_db_manager
+from api.services.canteen import CanteenService
+
+TILLS = 20
+STUDENTS = 200
+ITEMS = 5
+STOCK_PER_ITEM = 150
+PRICE = Decimal("500.00")
+STARTING_BALANCE = Decimal("10000.00")
+
+
+def _setup(db, school_id):
+    students = db.execute_query(
+        "SELECT id FROM students WHERE school_id = %s LIMIT %s",
+        (school_id, STUDENTS),
+        fetch=True
+    )
+    student_ids = [str(row['id']) for row in students]
+    if not student_ids:
+        raise SystemExit(f"School {school_id} has no students to buy with")
+
+    # Remember existing accounts so only the benchmark's own rows are dropped
+    existing = db.execute_query(
+        "SELECT school_id, student_id, balance FROM student_canteen_accounts WHERE student_id = ANY(%s::uuid[])",
+        (student_ids,),
+        fetch=True
+    )
+    item_ids = [str(uuid.uuid4()) for _ in range(ITEMS)]
+    with db.transaction() as tx:
+        tx.execute_values(
+            """
+            INSERT INTO canteen_items (id, school_id, item_name, category, price, stock_quantity)
+            VALUES %s
+            """,
+            [(item_id, school_id, f"Benchmark item {n}", "snacks", PRICE, STOCK_PER_ITEM)
+             for n, item_id in enumerate(item_ids)]
+        )
+        tx.execute_values(
+            """
+            INSERT INTO student_canteen_accounts (school_id, student_id, balance)
+            VALUES %s
+            ON CONFLICT (student_id) DO UPDATE SET balance = EXCLUDED.balance
+            """,
+            [(school_id, student_id, STARTING_BALANCE) for student_id in student_ids]
+        )
+    return student_ids, item_ids, existing
+
+
+def _teardown(db, student_ids, item_ids, existing):
+    with db.transaction() as tx:
+        tx.execute("DELETE FROM canteen_purchases WHERE item_id = ANY(%s::uuid[])", (item_ids,), fetch=False)
+        tx.execute("DELETE FROM canteen_items WHERE id = ANY(%s::uuid[])", (item_ids,), fetch=False)
+        tx.execute(
+            "DELETE FROM student_canteen_accounts WHERE student_id = ANY(%s::uuid[])",
+            (student_ids,),
+            fetch=False
+        )
+        if existing:
+            tx.execute_values(
+                "INSERT INTO student_canteen_accounts (school_id, student_id, balance) VALUES %s",
+                [(row['school_id'], row['student_id'], row['balance']) for row in existing]
+            )
+
+
+def run_benchmark(school_id):
+    db = get_db_manager()
+    service = CanteenService(school_id)
+    student_ids, item_ids, existing = _setup(db, school_id)
+
+    def till(till_number):
+        rng = random.Random(till_number)
+        outcomes = {"sold": 0, "rejected": 0, "errors": 0, "latencies": []}
+        while True:
+            basket = [
+                {"item_id": item_id, "quantity": rng.randint(1, 3)}
+                for item_id in rng.sample(item_ids, rng.randint(1, 3))
+            ]
+            started = time.perf_counter()
+            try:
+                result = service.record_purchase(rng.choice(student_ids), basket)
+            except Exception:
+                outcomes["errors"] += 1
+                if outcomes["errors"] > 50:
+                    return outcomes
+                continue
+            finally:
+                outcomes["latencies"].append(time.perf_counter() - started)
+
+            if result["success"]:
+                outcomes["sold"] += 1
+            else:
+                outcomes["rejected"] += 1
+                # Stop once the shelves are empty
+                remaining = db.execute_query(
+                    "SELECT COALESCE(SUM(stock_quantity), 0) AS left FROM canteen_items WHERE id = ANY(%s::uuid[])",
+                    (item_ids,),
+                    fetch=True
+                )[0]['left']
+                if remaining == 0:
+                    return outcomes
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=TILLS) as pool:
+            results = list(pool.map(till, range(TILLS)))
+        elapsed = time.perf_counter() - started
+
+        stock = db.execute_query(
+            "SELECT id, stock_quantity FROM canteen_items WHERE id = ANY(%s::uuid[])",
+            (item_ids,),
+            fetch=True
+        )
+        sold_units = db.execute_query(
+            """
+            SELECT COALESCE(SUM(quantity), 0) AS units, COALESCE(SUM(total_amount), 0) AS revenue
+            FROM canteen_purchases WHERE item_id = ANY(%s::uuid[])
+            """,
+            (item_ids,),
+            fetch=True
+        )[0]
+        spent = db.execute_query(
+            """
+            SELECT COALESCE(SUM(%s - balance), 0) AS spent FROM student_canteen_accounts
+            WHERE student_id = ANY(%s::uuid[])
+            """,
+            (STARTING_BALANCE, student_ids),
+            fetch=True
+        )[0]['spent']
+
+        checkouts = sum(r["sold"] for r in results)
+        latencies = sorted(l for r in results for l in r["latencies"])
+        print(f"Tills: {TILLS}, checkouts: {checkouts}, rejected: {sum(r['rejected'] for r in results)}, "
+              f"errors: {sum(r['errors'] for r in results)}")
+        print(f"Elapsed: {elapsed:.2f}s ({checkouts / elapsed:.1f} checkouts/s), "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms")
+
+        assert all(row['stock_quantity'] >= 0 for row in stock), "Negative stock: oversold"
+        assert sold_units['units'] == ITEMS * STOCK_PER_ITEM - sum(r['stock_quantity'] for r in stock), \
+            "Purchase lines do not match stock movement"
+        assert spent == sold_units['revenue'], "Balances debited do not match purchase lines"
+        print("OK: no overselling, stock, purchase lines and balances agree")
+    finally:
+        _teardown(db, student_ids, item_ids, existing)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        target_school = sys.argv[1]
+    else:
+        target_school = str(get_db_manager().execute_query("SELECT id FROM schools LIMIT 1", fetch=True)[0]['id'])
+    run_benchmark(target_school)
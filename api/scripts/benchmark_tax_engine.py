@@ -0,0 +1,39 @@
+"""
+TaxEngine micro-benchmark
+
+Times PAYE for a salary-review style simulation (10k scenarios) through the
+per-salary API and through calculate_paye_many / calculate_net_salary_many.
+
+Usage:
+    python api/scripts/benchmark_tax_engine.py [scenarios]
+"""
+import os
+import sys
+import random
+import timeit
+
+# Add parent directory to path to allow importing from api
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+from api.services.tax_engine import TaxEngine
+
+
+def run_benchmark(scenarios: int = 10000, repeat: int = 5):
+    rng = random.Random(42)
+    salaries = [rng.uniform(150000, 15000000) for _ in range(scenarios)]
+    engine = TaxEngine()
+
+    timings = {
+        "engine per salary (old payroll pattern)": lambda: [TaxEngine().calculate_paye(s) for s in salaries],
+        "calculate_paye loop": lambda: [engine.calculate_paye(s) for s in salaries],
+        "calculate_paye_many": lambda: engine.calculate_paye_many(salaries),
+        "calculate_net_salary_many": lambda: engine.calculate_net_salary_many(salaries),
+    }
+
+    print(f"{scenarios} salaries, best of {repeat}:")
+    for label, fn in timings.items():
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        print(f"  {label:<40} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -2,10 +2,27 @@
 Alumni Tracking Service
 Alumni database, career tracking, networking, mentorship programs
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 from api.services.database import get_db_manager
+from api.services.text_search import TextSearch, like_escape
+
+
+ALUMNI_SEARCH = TextSearch(
+    table="alumni",
+    columns="""
+        id, first_name, last_name, graduation_year, graduation_class,
+        email, phone, current_occupation, employer, university_attended
+    """,
+    fields=[
+        ("(first_name || ' ' || last_name)", 1.0),
+        ("current_occupation", 0.7),
+        ("employer", 0.7),
+        ("university_attended", 0.7),
+    ],
+    browse_order=[("COALESCE(graduation_year, 0)", True), ("last_name", False)]
+)
 
 
 class AlumniService:
@@ -88,34 +105,29 @@ class AlumniService:
         self,
         graduation_year: Optional[int] = None,
         occupation: Optional[str] = None,
-        university: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
-        """Search alumni by criteria"""
-        query = """
-        SELECT 
-            id, first_name, last_name, graduation_year, graduation_class,
-            email, phone, current_occupation, employer, university_attended
-        FROM alumni
-        WHERE school_id = %s
+        university: Optional[str] = None,
+        query: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        
-        params = [self.school_id]
+        Search alumni by criteria and/or free text (name, occupation,
+        employer, university), one page at a time
+        """
+        conditions = []
         
         if graduation_year:
-            query += " AND graduation_year = %s"
-            params.append(graduation_year)
+            conditions.append(("graduation_year = %s", (graduation_year,)))
         
         if occupation:
-            query += " AND current_occupation ILIKE %s"
-            params.append(f"%{occupation}%")
+            conditions.append(("current_occupation ILIKE %s", (f"%{like_escape(occupation)}%",)))
         
         if university:
-            query += " AND university_attended ILIKE %s"
-            params.append(f"%{university}%")
+            conditions.append(("university_attended ILIKE %s", (f"%{like_escape(university)}%",)))
         
-        query += " ORDER BY graduation_year DESC, last_name"
-        
-        return self.db.execute_query(query, tuple(params), fetch=True)
+        return ALUMNI_SEARCH.search(
+            self.db, self.school_id, term=query, conditions=conditions, limit=limit, cursor=cursor
+        )
     
     def get_alumni_statistics(self) -> Dict[str, Any]:
         """Get alumni statistics"""
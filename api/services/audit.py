@@ -8,6 +8,7 @@ import json
 import psycopg2.extras
 
 from api.services.database import get_db_manager
+from api.services.pagination import NEWEST_FIRST, fetch_page
 
 
 class AuditLogger:
@@ -196,10 +197,11 @@ class AuditLogger:
         user_id: Optional[str] = None,
         action: Optional[str] = None,
         days: int = 30,
-        limit: int = 100
-    ) -> List[Dict[str, Any]]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Get audit trail with filters
+        Get audit trail with filters, newest first
         
         Args:
             school_id: School to query
@@ -209,9 +211,10 @@ class AuditLogger:
             action: Filter by action type
             days: Look back period (default 30 days)
             limit: Max records to return
+            cursor: next_cursor of the previous page
         
         Returns:
-            List of audit log entries
+            Page of audit log entries (items, next_cursor, has_more)
         """
         conditions = ["school_id = %s", "created_at >= %s"]
         params = [school_id, datetime.now() - timedelta(days=days)]
@@ -232,36 +235,39 @@ class AuditLogger:
             conditions.append("action = %s")
             params.append(action)
         
-        query = f"""
+        select = """
         SELECT 
             id, user_id, school_id, action, resource_type, resource_id,
             changes, ip_address, user_agent, metadata, created_at
         FROM audit_logs
-        WHERE {' AND '.join(conditions)}
-        ORDER BY created_at DESC
-        LIMIT %s
         """
+        page = fetch_page(
+            self.db, select, conditions, params,
+            keys=NEWEST_FIRST, limit=limit, cursor=cursor, default=100
+        )
         
-        params.append(limit)
-        
-        results = self.db.execute_query(query, tuple(params))
-        
-        return [
+        page["items"] = [
             {
-                "id": row[0],
-                "user_id": row[1],
-                "school_id": row[2],
-                "action": row[3],
-                "resource_type": row[4],
-                "resource_id": row[5],
-                "changes": json.loads(row[6]) if row[6] else None,
-                "ip_address": row[7],
-                "user_agent": row[8],
-                "metadata": json.loads(row[9]) if row[9] else None,
-                "created_at": row[10].isoformat() if row[10] else None
+                "id": row["id"],
+                "user_id": row["user_id"],
+                "school_id": row["school_id"],
+                "action": row["action"],
+                "resource_type": row["resource_type"],
+                "resource_id": row["resource_id"],
+                "changes": self._json_field(row["changes"]),
+                "ip_address": row["ip_address"],
+                "user_agent": row["user_agent"],
+                "metadata": self._json_field(row["metadata"]),
+                "created_at": row["created_at"].isoformat() if row["created_at"] else None
             }
-            for row in results
-        ] if results else []
+            for row in page["items"]
+        ]
+        return page
+    
+    @staticmethod
+    def _json_field(value: Any) -> Any:
+        # JSONB columns arrive decoded; TEXT ones as strings
+        return json.loads(value) if isinstance(value, str) else value
     
     def get_user_activity(
         self,
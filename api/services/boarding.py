@@ -73,36 +73,166 @@ class BoardingService:
         self,
         dormitory_id: str,
         bed_count: int,
-        bed_prefix: str = "BED"
+        bed_prefix: str = "BED",
+        start_number: int = 1
     ) -> Dict[str, Any]:
-        """Create multiple beds in a dormitory"""
-        beds_created = []
+        """
+        Create multiple beds in a dormitory
         
-        for i in range(1, bed_count + 1):
-            bed_number = f"{bed_prefix}-{i:03d}"
-            
-            query = """
-            INSERT INTO dormitory_beds (school_id, dormitory_id, bed_number)
-            VALUES (%s, %s, %s)
-            RETURNING id
+        One INSERT over generate_series; bed numbers that already exist in the
+        dormitory are skipped, so a wing can be extended with start_number.
+        """
+        query = """
+        INSERT INTO dormitory_beds (school_id, dormitory_id, bed_number)
+        SELECT d.school_id, d.id, %s || '-' || lpad(n::text, GREATEST(3, length(n::text)), '0')
+        FROM dormitories d
+        CROSS JOIN generate_series(%s::int, %s::int) AS n
+        WHERE d.id = %s AND d.school_id = %s
+        ON CONFLICT (dormitory_id, bed_number) DO NOTHING
+        RETURNING id, bed_number
+        """
+        
+        result = self.db.execute_query(
+            query,
+            (bed_prefix, start_number, start_number + bed_count - 1, dormitory_id, self.school_id),
+            fetch=True
+        )
+        
+        beds_created = [
+            {"bed_id": row['id'], "bed_number": row['bed_number']}
+            for row in sorted(result, key=lambda row: (len(row['bed_number']), row['bed_number']))
+        ]
+        
+        return {
+            "success": True,
+            "dormitory_id": dormitory_id,
+            "beds_created": len(beds_created),
+            "beds": beds_created
+        }
+    
+    def plan_dormitory_assignment(
+        self,
+        dormitory_id: str,
+        class_names: Optional[List[str]] = None,
+        student_ids: Optional[List[str]] = None,
+        apply: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Match unassigned boarders to the dormitory's free beds in one statement
+        
+        Candidates are active students without a bed, limited to class_names
+        and/or student_ids when given, and to the dormitory's gender (boys /
+        girls; mixed takes anyone). Students are ordered by class then name and
+        beds by number, so classmates end up in neighbouring beds.
+        
+        With apply=False the plan is only returned; with apply=True the beds
+        are assigned in the same statement.
+        """
+        plan_query = """
+        WITH dorm AS (
+            SELECT id, LOWER(COALESCE(dormitory_type, 'mixed')) AS dormitory_type
+            FROM dormitories
+            WHERE id = %s AND school_id = %s
+        ),
+        free_beds AS (
+            SELECT db.id AS bed_id, db.bed_number,
+                   ROW_NUMBER() OVER (ORDER BY length(db.bed_number), db.bed_number) AS rn
+            FROM dormitory_beds db
+            JOIN dorm ON dorm.id = db.dormitory_id
+            WHERE NOT COALESCE(db.is_occupied, false)
+        ),
+        boarders AS (
+            SELECT s.id AS student_id, s.first_name, s.last_name, s.class_name, s.gender,
+                   ROW_NUMBER() OVER (ORDER BY s.class_name, s.last_name, s.first_name) AS rn
+            FROM students s
+            CROSS JOIN dorm
+            WHERE s.school_id = %s
+              AND s.status = 'active'
+              AND (%s::text[] IS NULL OR s.class_name = ANY(%s::text[]))
+              AND (%s::uuid[] IS NULL OR s.id = ANY(%s::uuid[]))
+              AND NOT EXISTS (SELECT 1 FROM dormitory_beds b WHERE b.student_id = s.id)
+              AND CASE dorm.dormitory_type
+                      WHEN 'boys' THEN LOWER(LEFT(s.gender, 1)) = 'm'
+                      WHEN 'girls' THEN LOWER(LEFT(s.gender, 1)) = 'f'
+                      ELSE true
+                  END
+        ),
+        plan AS (
+            SELECT f.bed_id, f.bed_number, b.student_id, b.first_name, b.last_name, b.class_name
+            FROM boarders b
+            FULL JOIN free_beds f ON f.rn = b.rn
+        )
+        """
+        
+        if apply:
+            query = plan_query + """
+            , applied AS (
+                UPDATE dormitory_beds db
+                SET student_id = plan.student_id,
+                    is_occupied = true,
+                    assigned_at = CURRENT_TIMESTAMP
+                FROM plan
+                WHERE db.id = plan.bed_id
+                  AND plan.student_id IS NOT NULL
+                  AND NOT COALESCE(db.is_occupied, false)
+                RETURNING db.id
+            )
+            SELECT plan.*, plan.bed_id IN (SELECT id FROM applied) AS applied
+            FROM plan
             """
-            
-            result = self.db.execute_query(
-                query,
-                (self.school_id, dormitory_id, bed_number),
+        else:
+            query = plan_query + """
+            SELECT plan.*, false AS applied
+            FROM plan
+            """
+        
+        rows = self.db.execute_query(
+            query,
+            (
+                dormitory_id, self.school_id, self.school_id,
+                class_names, class_names,
+                student_ids, student_ids
+            ),
+            fetch=True
+        )
+        
+        if not rows:
+            dormitory = self.db.execute_query(
+                "SELECT 1 FROM dormitories WHERE id = %s AND school_id = %s",
+                (dormitory_id, self.school_id),
                 fetch=True
             )
-            
-            beds_created.append({
-                "bed_id": result[0]['id'],
-                "bed_number": bed_number
-            })
+            if not dormitory:
+                return {"success": False, "error": "Dormitory not found"}
+        
+        assignments = [
+            {
+                "bed_id": row['bed_id'],
+                "bed_number": row['bed_number'],
+                "student_id": row['student_id'],
+                "student_name": f"{row['first_name']} {row['last_name']}",
+                "class_name": row['class_name'],
+                "applied": row['applied']
+            }
+            for row in rows if row['bed_id'] and row['student_id']
+        ]
+        assignments.sort(key=lambda a: (len(a['bed_number']), a['bed_number']))
         
         return {
             "success": True,
             "dormitory_id": dormitory_id,
-            "beds_created": len(beds_created),
-            "beds": beds_created
+            "applied": apply,
+            "assigned_count": sum(1 for a in assignments if a['applied']),
+            "assignments": assignments,
+            "unplaced_students": [
+                {
+                    "student_id": row['student_id'],
+                    "student_name": f"{row['first_name']} {row['last_name']}",
+                    "class_name": row['class_name']
+                }
+                for row in rows if not row['bed_id']
+            ],
+            "free_beds_remaining": sum(1 for row in rows if not row['student_id'])
         }
     
     # ============================================================================
@@ -115,28 +245,29 @@ class BoardingService:
         bed_id: str
     ) -> Dict[str, Any]:
         """Assign student to a bed"""
-        # Check if bed is available
-        check_query = """
-        SELECT is_occupied FROM dormitory_beds WHERE id = %s
-        """
-        bed = self.db.execute_query(check_query, (bed_id,), fetch=True)
-        
-        if not bed:
-            return {"success": False, "error": "Bed not found"}
-        
-        if bed[0]['is_occupied']:
-            return {"success": False, "error": "Bed is already occupied"}
-        
-        # Assign bed
-        update_query = """
-        UPDATE dormitory_beds
-        SET student_id = %s,
-            is_occupied = true,
-            assigned_at = CURRENT_TIMESTAMP
-        WHERE id = %s
-        """
-        
-        self.db.execute_query(update_query, (student_id, bed_id))
+        with self.db.transaction() as tx:
+            # Check if bed is available (locked until the assignment commits)
+            check_query = """
+            SELECT is_occupied FROM dormitory_beds WHERE id = %s FOR UPDATE
+            """
+            bed = tx.fetch_one(check_query, (bed_id,))
+            
+            if not bed:
+                return {"success": False, "error": "Bed not found"}
+            
+            if bed['is_occupied']:
+                return {"success": False, "error": "Bed is already occupied"}
+            
+            # Assign bed
+            update_query = """
+            UPDATE dormitory_beds
+            SET student_id = %s,
+                is_occupied = true,
+                assigned_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """
+            
+            tx.execute(update_query, (student_id, bed_id), fetch=False)
         
         return {
             "success": True,
@@ -17,6 +17,7 @@ from uuid import uuid4
 
 from api.services.database import get_db_manager
 from api.services.notifications import NotificationService
+from api.services.translation import TranslationService
 
 
 class BulkOperationsService:
@@ -26,6 +27,7 @@ class BulkOperationsService:
         self.school_id = school_id
         self.db = get_db_manager()
         self.notification_service = NotificationService()
+        self.translation_service = TranslationService()
     
     # ============================================================================
     # BULK ATTENDANCE
@@ -428,7 +430,8 @@ class BulkOperationsService:
         channels: List[str] = None
     ) -> Dict[str, Any]:
         """
-        Send message to multiple recipients
+        Send message to multiple recipients (parents get it in their
+        preferred language, translated once per language)
         
         Args:
             recipient_type: "all_parents", "all_teachers", "all_students", "class_parents"
@@ -443,7 +446,7 @@ class BulkOperationsService:
         # Get recipients based on type
         if recipient_type == "all_parents":
             recipients = self.db.execute_query(
-                "SELECT id, first_name, last_name FROM parents WHERE school_id = %s",
+                "SELECT id, first_name, last_name, preferred_language FROM parents WHERE school_id = %s",
                 (self.school_id,),
                 fetch=True
             )
@@ -472,7 +475,7 @@ class BulkOperationsService:
             
             recipients = self.db.execute_query(
                 """
-                SELECT DISTINCT p.id, p.first_name, p.last_name
+                SELECT DISTINCT p.id, p.first_name, p.last_name, p.preferred_language
                 FROM parents p
                 JOIN student_parents sp ON sp.parent_id = p.id
                 JOIN students s ON s.id = sp.student_id
@@ -485,16 +488,25 @@ class BulkOperationsService:
         else:
             return {"success": False, "error": f"Unknown recipient_type: {recipient_type}"}
         
+        # Translate once per language in the audience, not once per recipient
+        language_of = self.translation_service.language_code
+        localized = {}
+        for language in {language_of(r.get("preferred_language")) for r in recipients}:
+            localized[language] = self.translation_service.translate_many(
+                [title, message], language, keep_untranslated=True
+            )
+        
         # Send to all recipients
         sent_count = 0
         for recipient in recipients:
+            texts = localized[language_of(recipient.get("preferred_language"))]
             await self.notification_service.send_notification(
                 school_id=self.school_id,
                 recipient_id=recipient["id"],
                 recipient_type=recipient_role,
                 notification_type="announcement",
-                title=title,
-                message=message,
+                title=texts[title],
+                message=texts[message],
                 channels=channels,
                 priority="normal"
             )
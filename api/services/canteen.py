@@ -7,6 +7,15 @@ from datetime import datetime
 from decimal import Decimal
 
 from api.services.database import get_db_manager
+from api.services.pagination import fetch_page
+
+
+class _CheckoutRejected(Exception):
+    """Raised inside a checkout transaction to roll it back with a result"""
+    
+    def __init__(self, result: Optional[Dict[str, Any]] = None):
+        super().__init__((result or {}).get("error"))
+        self.result = result
 
 
 class CanteenService:
@@ -224,106 +233,158 @@ class CanteenService:
         student_id: str,
         items: List[Dict[str, Any]]  # [{item_id: "abc", quantity: 2}]
     ) -> Dict[str, Any]:
-        """Record canteen purchase"""
-        # Get student balance
-        balance_query = """
-        SELECT balance FROM student_canteen_accounts WHERE student_id = %s
         """
-        balance_result = self.db.execute_query(balance_query, (student_id,), fetch=True)
-        
-        if not balance_result:
-            return {"success": False, "error": "Student account not found"}
-        
-        current_balance = float(balance_result[0]['balance'])
+        Record canteen purchase (POS checkout)
         
-        # Calculate total cost and check stock
-        total_cost = 0.0
-        purchase_items = []
+        Two round trips in one transaction, whatever the basket size:
+        1. Lock the student account and the basket's items (in id order, so
+           concurrent tills never deadlock) and decrement all stock with one
+           UPDATE ... FROM unnest(...) guarded by stock_quantity >= quantity
+        2. Debit the balance and insert every purchase line in one statement
         
-        for item in items:
-            item_query = """
-            SELECT id, item_name, price, stock_quantity
-            FROM canteen_items
-            WHERE id = %s AND school_id = %s
-            """
-            item_result = self.db.execute_query(item_query, (item['item_id'], self.school_id), fetch=True)
-            
-            if not item_result:
-                return {"success": False, "error": f"Item {item['item_id']} not found"}
-            
-            item_data = item_result[0]
-            quantity = item['quantity']
-            
-            if item_data['stock_quantity'] < quantity:
-                return {
-                    "success": False,
-                    "error": f"Insufficient stock for {item_data['item_name']}. Available: {item_data['stock_quantity']}"
-                }
-            
-            item_total = float(item_data['price']) * quantity
-            total_cost += item_total
-            
-            purchase_items.append({
-                "item_id": item['item_id'],
-                "item_name": item_data['item_name'],
-                "quantity": quantity,
-                "unit_price": float(item_data['price']),
-                "total": item_total
-            })
-        
-        # Check if student has enough balance
-        if current_balance < total_cost:
-            return {
-                "success": False,
-                "error": "Insufficient balance",
-                "required": total_cost,
-                "available": current_balance,
-                "shortfall": total_cost - current_balance
-            }
-        
-        # Record purchase
-        for item in purchase_items:
-            purchase_query = """
-            INSERT INTO canteen_purchases (
-                school_id, student_id, item_id, quantity, unit_price, total_amount
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            
-            self.db.execute_query(
-                purchase_query,
-                (self.school_id, student_id, item['item_id'], item['quantity'],
-                 item['unit_price'], item['total'])
-            )
-            
-            # Update stock
-            self.update_stock(item['item_id'], item['quantity'], 'subtract')
-        
-        # Deduct from balance
-        deduct_query = """
-        UPDATE student_canteen_accounts
-        SET balance = balance - %s,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE student_id = %s
-        RETURNING balance
+        Any shortfall rolls the whole checkout back.
         """
-        
-        new_balance_result = self.db.execute_query(
-            deduct_query,
-            (total_cost, student_id),
-            fetch=True
-        )
-        
-        new_balance = float(new_balance_result[0]['balance'])
+        quantities: Dict[str, int] = {}
+        for item in items:
+            item_id = str(item['item_id'])
+            quantities[item_id] = quantities.get(item_id, 0) + int(item['quantity'])
+        
+        if not quantities:
+            return {"success": False, "error": "No items in purchase"}
+        
+        try:
+            with self.db.transaction() as tx:
+                sold = tx.execute(
+                    """
+                    WITH account AS (
+                        SELECT balance FROM student_canteen_accounts
+                        WHERE student_id = %s AND school_id = %s
+                        FOR UPDATE
+                    ),
+                    cart AS (
+                        SELECT * FROM unnest(%s::uuid[], %s::int[]) AS cart (item_id, quantity)
+                    ),
+                    locked AS (
+                        SELECT ci.id FROM canteen_items ci, account
+                        WHERE ci.id IN (SELECT item_id FROM cart) AND ci.school_id = %s
+                        ORDER BY ci.id
+                        FOR UPDATE OF ci
+                    )
+                    UPDATE canteen_items ci
+                    SET stock_quantity = ci.stock_quantity - cart.quantity,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM cart, locked, account
+                    WHERE ci.id = cart.item_id
+                      AND ci.id = locked.id
+                      AND ci.stock_quantity >= cart.quantity
+                    RETURNING ci.id, ci.item_name, ci.price, cart.quantity, account.balance
+                    """,
+                    (student_id, self.school_id, list(quantities), list(quantities.values()), self.school_id)
+                )
+                
+                if len(sold) < len(quantities):
+                    raise _CheckoutRejected()
+                
+                current_balance = sold[0]['balance']
+                purchase_items = []
+                total_cost = Decimal(0)
+                for row in sold:
+                    item_total = row['price'] * row['quantity']
+                    total_cost += item_total
+                    purchase_items.append({
+                        "item_id": str(row['id']),
+                        "item_name": row['item_name'],
+                        "quantity": row['quantity'],
+                        "unit_price": float(row['price']),
+                        "total": float(item_total)
+                    })
+                
+                # Check if student has enough balance
+                if current_balance < total_cost:
+                    raise _CheckoutRejected({
+                        "success": False,
+                        "error": "Insufficient balance",
+                        "required": float(total_cost),
+                        "available": float(current_balance),
+                        "shortfall": float(total_cost - current_balance)
+                    })
+                
+                new_balance_result = tx.fetch_one(
+                    """
+                    WITH debit AS (
+                        UPDATE student_canteen_accounts
+                        SET balance = balance - %s,
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE student_id = %s AND school_id = %s
+                        RETURNING balance
+                    ),
+                    lines AS (
+                        INSERT INTO canteen_purchases (
+                            school_id, student_id, item_id, item_name,
+                            quantity, unit_price, total_amount
+                        )
+                        SELECT %s::uuid, %s::uuid, line.*
+                        FROM unnest(%s::uuid[], %s::text[], %s::int[], %s::numeric[], %s::numeric[])
+                            AS line (item_id, item_name, quantity, unit_price, total_amount)
+                        RETURNING id
+                    )
+                    SELECT balance, (SELECT COUNT(*) FROM lines) AS lines FROM debit
+                    """,
+                    (
+                        total_cost, student_id, self.school_id,
+                        self.school_id, student_id,
+                        [item['item_id'] for item in purchase_items],
+                        [item['item_name'] for item in purchase_items],
+                        [item['quantity'] for item in purchase_items],
+                        [item['unit_price'] for item in purchase_items],
+                        [item['total'] for item in purchase_items]
+                    )
+                )
+        except _CheckoutRejected as rejected:
+            return rejected.result or self._explain_rejected_checkout(student_id, quantities)
         
         return {
             "success": True,
             "student_id": student_id,
             "items_purchased": purchase_items,
-            "total_cost": total_cost,
-            "previous_balance": current_balance,
-            "new_balance": new_balance
+            "total_cost": float(total_cost),
+            "previous_balance": float(current_balance),
+            "new_balance": float(new_balance_result['balance'])
         }
     
+    def _explain_rejected_checkout(self, student_id: str, quantities: Dict[str, int]) -> Dict[str, Any]:
+        """Work out why the stock update did not cover the whole basket"""
+        account = self.db.execute_query(
+            "SELECT 1 FROM student_canteen_accounts WHERE student_id = %s AND school_id = %s",
+            (student_id, self.school_id),
+            fetch=True
+        )
+        if not account:
+            return {"success": False, "error": "Student account not found"}
+        
+        rows = self.db.execute_query(
+            """
+            SELECT id, item_name, stock_quantity FROM canteen_items
+            WHERE id = ANY(%s::uuid[]) AND school_id = %s
+            """,
+            (list(quantities), self.school_id),
+            fetch=True
+        ) or []
+        stock = {str(row['id']): row for row in rows}
+        
+        for item_id, quantity in quantities.items():
+            item = stock.get(item_id)
+            if not item:
+                return {"success": False, "error": f"Item {item_id} not found"}
+            if (item['stock_quantity'] or 0) < quantity:
+                return {
+                    "success": False,
+                    "error": f"Insufficient stock for {item['item_name']}. Available: {item['stock_quantity']}"
+                }
+        
+        # Stock was sold by another till between the update and this check
+        return {"success": False, "error": "Stock changed during checkout, please retry"}
+    
     def get_student_purchase_history(
         self,
         student_id: str,
@@ -390,9 +451,14 @@ class CanteenService:
         
         return self.db.execute_query(query, (self.school_id, days), fetch=True)
     
-    def get_students_with_low_balance(self, threshold: float = 5000.0) -> List[Dict[str, Any]]:
-        """Get students with low canteen balance"""
-        query = """
+    def get_students_with_low_balance(
+        self,
+        threshold: float = 5000.0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get a page of students with low canteen balance, lowest first"""
+        select = """
         SELECT 
             sca.student_id,
             sca.balance,
@@ -401,12 +467,12 @@ class CanteenService:
             s.class_name
         FROM student_canteen_accounts sca
         JOIN students s ON s.id = sca.student_id
-        WHERE sca.school_id = %s
-        AND sca.balance < %s
-        ORDER BY sca.balance ASC
         """
         
-        return self.db.execute_query(query, (self.school_id, threshold), fetch=True)
+        return fetch_page(
+            self.db, select, ["sca.school_id = %s", "sca.balance < %s"], [self.school_id, threshold],
+            keys=[("sca.balance", False), ("sca.student_id", False)], limit=limit, cursor=cursor
+        )
 
 
 def get_canteen_service(school_id: str) -> CanteenService:
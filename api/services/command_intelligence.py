@@ -7,24 +7,35 @@ Examples:
 - "Record 85 marks for Mary in Math exam" → Records grade
 - "John paid 50000 for school fees" → Records payment
 """
-import re
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, date
 from uuid import uuid4
 
+from api.core.mcp import MCPAgentRequest
 from api.services.clarity import ClarityClient
+from api.services.command_parser import (
+    CONFIDENCE_THRESHOLD, INTENTS, interpret_ai_parse, normalize_command, parse_command
+)
 from api.services.database import get_db_manager
 from api.services.notifications import NotificationService
 from api.services.bulk_operations import get_bulk_service
 
 
+# Confidence reported for intents supplied by Clarity
+AI_CONFIDENCE = 0.8
+AI_CACHE_SIZE = 1024
+
+
 class CommandIntelligenceService:
     """Autonomous command execution from natural language"""
     
+    # (day, normalized command) -> Clarity's parse, or None if it had none
+    _ai_parses: Dict[Tuple[date, str], Optional[Dict[str, Any]]] = {}
+    
     def __init__(self, school_id: str):
         self.school_id = school_id
         self.db = get_db_manager()
-        self.clarity = ClarityClient()
         self.notification_service = NotificationService()
     
     async def execute_command(self, command: str, user_id: str, user_role: str) -> Dict[str, Any]:
@@ -40,8 +51,8 @@ class CommandIntelligenceService:
             Execution result with success status and details
         """
         try:
-            # Step 1: Parse command with Clarity AI
-            parsed = self._parse_command(command)
+            # Step 1: Parse command (local grammars, Clarity only when unsure)
+            parsed = await self._parse_command(command)
             
             # Step 2: Identify intent and extract entities
             intent = parsed.get("intent")
@@ -66,6 +77,8 @@ class CommandIntelligenceService:
                 "command": command,
                 "intent": intent,
                 "entities": entities,
+                "confidence": parsed.get("confidence"),
+                "parsed_by": parsed.get("source"),
                 "result": result,
                 "executed_at": datetime.now().isoformat()
             }
@@ -78,146 +91,72 @@ class CommandIntelligenceService:
                 "executed_at": datetime.now().isoformat()
             }
     
-    def _parse_command(self, command: str) -> Dict[str, Any]:
-        """Parse natural language command using Clarity AI"""
+    async def _parse_command(self, command: str) -> Dict[str, Any]:
+        """
+        Parse a command with the local grammars, asking Clarity only when
+        the local parse is not confident (unrecognised phrasing or a
+        missing required entity). Both kinds of parse are cached per phrasing.
+        """
+        parsed = parse_command(command)
+        if parsed["confidence"] >= CONFIDENCE_THRESHOLD:
+            return parsed
+
+        key = (date.today(), normalize_command(command))
+        if key in self._ai_parses:
+            ai_parse = self._ai_parses[key]
+        else:
+            ai_parse = await self._parse_with_clarity(command)
+            if len(self._ai_parses) >= AI_CACHE_SIZE:
+                self._ai_parses.clear()
+            self._ai_parses[key] = ai_parse
+
+        if not ai_parse:
+            return parsed
+        return {
+            "intent": ai_parse["intent"],
+            "entities": {**parsed["entities"], **ai_parse["entities"]},
+            "confidence": AI_CONFIDENCE,
+            "source": "clarity"
+        }
+    
+    async def _parse_with_clarity(self, command: str) -> Optional[Dict[str, Any]]:
+        """Intent and entities from Clarity, or None if it cannot say"""
+        clarity = ClarityClient()
         try:
-            response = self.clarity.analyze(
-                directive=f"""
-                Parse this command and extract:
-                1. Intent (what action to perform)
-                2. Entities (student names, values, dates, etc.)
-                
-                Command: "{command}"
-                
-                Return JSON format:
-                {{
-                    "intent": "mark_attendance|record_grade|record_payment|create_incident|send_message",
-                    "entities": {{
-                        "student_name": "name",
-                        "status": "present|absent|late",
-                        "subject": "subject name",
-                        "marks": number,
-                        "amount": number,
-                        "date": "YYYY-MM-DD",
-                        "message": "message text"
+            response = await asyncio.to_thread(
+                clarity.analyze,
+                MCPAgentRequest(
+                    directive=f"""
+                    Parse this command and extract:
+                    1. Intent (what action to perform)
+                    2. Entities (student names, values, dates, etc.)
+                    
+                    Command: "{command}"
+                    
+                    Return JSON format:
+                    {{
+                        "intent": "{'|'.join(INTENTS)}",
+                        "entities": {{
+                            "student_name": "name",
+                            "class_name": "class name",
+                            "status": "present|absent|late",
+                            "subject": "subject name",
+                            "marks": number,
+                            "amount": number,
+                            "date": "YYYY-MM-DD",
+                            "message": "message text"
+                        }}
                     }}
-                }}
-                """,
-                domain="data-science"
+                    """,
+                    domain="data-science"
+                )
             )
-            
-            # Extract from Clarity response
-            analysis = response.get("analysis", {})
-            summary = analysis.get("summary", "")
-            
-            # Parse intent from command keywords
-            intent = self._extract_intent(command.lower())
-            entities = self._extract_entities(command, intent)
-            
-            return {
-                "intent": intent,
-                "entities": entities,
-                "clarity_analysis": summary
-            }
-            
+            return interpret_ai_parse(response.content)
+        except Exception as e:
+            print(f"Warning: Clarity command parse failed: {e}")
+            return None
         finally:
-            self.clarity.close()
-    
-    def _extract_intent(self, command: str) -> str:
-        """Extract intent from command using keywords"""
-        command_lower = command.lower()
-        
-        # Bulk attendance intents (must check BEFORE single attendance)
-        if any(phrase in command_lower for phrase in ["mark all", "mark entire", "all students", "whole class"]):
-            return "bulk_mark_attendance"
-        
-        # Attendance intents
-        if any(word in command_lower for word in ["mark", "present", "absent", "attendance", "late"]):
-            return "mark_attendance"
-        
-        # Grade/marks intents
-        if any(word in command_lower for word in ["grade", "marks", "score", "result", "exam", "test"]):
-            return "record_grade"
-        
-        # Payment intents
-        if any(word in command_lower for word in ["pay", "paid", "payment", "fee", "money"]):
-            return "record_payment"
-        
-        # Health/sickbay intents
-        if any(word in command_lower for word in ["sick", "sickbay", "health", "ill", "unwell"]):
-            return "record_health_visit"
-        
-        # Incident intents
-        if any(word in command_lower for word in ["incident", "report", "issue", "problem", "fight", "damage"]):
-            return "create_incident"
-        
-        # Bulk message intents (must check BEFORE single message)
-        if any(phrase in command_lower for phrase in ["send to all", "notify all", "message all", "tell everyone"]):
-            return "bulk_send_message"
-        
-        # Message intents
-        if any(word in command_lower for word in ["send", "message", "notify", "tell", "inform"]):
-            return "send_message"
-        
-        # Inventory intents
-        if any(word in command_lower for word in ["inventory", "stock", "supply", "add item", "remove item"]):
-            return "manage_inventory"
-        
-        return "unknown"
-    
-    def _extract_entities(self, command: str, intent: str) -> Dict[str, Any]:
-        """Extract entities from command based on intent"""
-        entities = {}
-        
-        # Extract student name (capitalized words)
-        name_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b'
-        names = re.findall(name_pattern, command)
-        if names:
-            entities["student_name"] = names[0]
-        
-        # Extract status for attendance
-        if intent == "mark_attendance":
-            if "present" in command.lower():
-                entities["status"] = "present"
-            elif "absent" in command.lower():
-                entities["status"] = "absent"
-            elif "late" in command.lower():
-                entities["status"] = "late"
-        
-        # Extract numbers (marks, amounts)
-        numbers = re.findall(r'\b(\d+(?:\.\d+)?)\b', command)
-        if numbers:
-            if intent == "record_grade":
-                entities["marks"] = float(numbers[0])
-            elif intent == "record_payment":
-                entities["amount"] = float(numbers[0])
-        
-        # Extract subject (words after "in" or "for")
-        subject_pattern = r'(?:in|for)\s+([A-Za-z\s]+?)(?:\s+exam|\s+test|$)'
-        subject_match = re.search(subject_pattern, command, re.IGNORECASE)
-        if subject_match:
-            entities["subject"] = subject_match.group(1).strip()
-        
-        # Extract class name (e.g., "Class 5A", "Primary 3", "Form 2")
-        class_pattern = r'\b((?:Class|Primary|Secondary|Form)\s+\d+[A-Z]?)\b'
-        class_match = re.search(class_pattern, command, re.IGNORECASE)
-        if class_match:
-            entities["class_name"] = class_match.group(1)
-        
-        # Extract date (today, yesterday, or specific date)
-        if "today" in command.lower():
-            entities["date"] = date.today().isoformat()
-        elif "yesterday" in command.lower():
-            from datetime import timedelta
-            entities["date"] = (date.today() - timedelta(days=1)).isoformat()
-        
-        # Extract message content (text after "send" or "tell")
-        message_pattern = r'(?:send|tell|notify).*?["\'](.*?)["\']'
-        message_match = re.search(message_pattern, command, re.IGNORECASE)
-        if message_match:
-            entities["message"] = message_match.group(1)
-        
-        return entities
+            clarity.close()
     
     def _check_permissions(self, intent: str, user_role: str) -> bool:
         """Check if user role has permission for intent"""
@@ -0,0 +1,341 @@
+"""
+Command Parser - Local intent and entity extraction for typed commands
+
+Compiled grammars recognise the common phrasings (attendance, grades,
+payments, health visits, incidents, messages and their bulk variants) with
+high confidence; anything else falls back to keyword matching with a lower
+score. Callers only need to ask the AI when the confidence is below
+CONFIDENCE_THRESHOLD. Parses are cached per phrasing.
+
+Examples:
+- "Mark John Okello as present today" -> mark_attendance
+- "Mark all students in Primary 5A present" -> bulk_mark_attendance
+- "Record 85 marks for Mary in Math exam" -> record_grade
+- "John paid 50,000 for school fees" -> record_payment
+"""
+import json
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import groupby
+from typing import Dict, Any, Optional, Tuple
+
+
+INTENTS = (
+    "bulk_mark_attendance", "mark_attendance", "record_grade", "record_payment",
+    "record_health_visit", "create_incident", "bulk_send_message", "send_message",
+    "manage_inventory",
+)
+
+GRAMMAR_CONFIDENCE = 0.95
+KEYWORD_CONFIDENCE = 0.6
+# Recognised intent but a required entity is missing
+PARTIAL_CONFIDENCE = 0.3
+# Below this the caller should fall back to the AI parser
+CONFIDENCE_THRESHOLD = 0.5
+CACHE_SIZE = 2048
+
+# Entities an intent cannot be executed without
+REQUIRED_ENTITIES = {
+    "bulk_mark_attendance": ("class_name",),
+    "mark_attendance": ("student_name", "status"),
+    "record_grade": ("student_name", "marks"),
+    "record_payment": ("student_name", "amount"),
+    "record_health_visit": ("student_name",),
+    "create_incident": (),
+    "bulk_send_message": ("message",),
+    "send_message": ("message",),
+    "manage_inventory": (),
+}
+
+# Words a lazy name capture can pick up that are never part of a student's name
+NOT_NAMES = {"all", "everyone", "everybody", "class", "them", "students", "pupils", "the", "a", "an"}
+# Capitalised words in a command that are instructions, not names ("Mark", "Present")
+COMMAND_WORDS = NOT_NAMES | {
+    "mark", "take", "record", "enter", "log", "report", "send", "message", "notify", "tell", "inform",
+    "present", "absent", "late", "excused", "attendance", "today", "yesterday", "as", "is", "was",
+    "primary", "secondary", "senior", "form", "whole", "entire",
+}
+
+# ----------------------------------------------------------------------------
+# Grammar fragments
+# ----------------------------------------------------------------------------
+# Up to three words; an apostrophe is part of a name unless it is a possessive 's
+NAME = r"(?P<student_name>[a-z](?:[a-z\-]|'(?!s\b))*(?:\s+[a-z](?:[a-z\-]|'(?!s\b))*){0,2}?)"
+CLASS = r"(?P<class_name>(?:class|primary|secondary|senior|form|p|s)\s*\d+[a-z]?)"
+STATUS = r"(?P<status>present|absent|late|excused)"
+DATE = r"(?:\s+(?:on\s+|for\s+)?(?P<date>today|yesterday|\d{4}-\d{2}-\d{2}))?"
+MARKS = r"(?P<marks>\d+(?:\.\d+)?)(?:\s*(?:marks|points|%|percent))?(?:\s*(?:/|out\s+of)\s*100)?"
+SUBJECT = r"(?P<subject>[a-z][a-z ]*?)(?:\s+(?:exam|test|paper|quiz))?"
+AMOUNT = r"(?:(?:ugx|ushs|shs)\.?\s*)?(?P<amount>\d[\d,]*(?:\.\d+)?)(?:\s*(?:ugx|ushs|shs|shillings|/=))?"
+FEES = r"(?:\s+(?:for|as|towards)\s+(?:the\s+)?(?:school\s+)?(?:fees?|tuition)(?:\s+payment)?)?"
+# Message text after a colon, or in quotes
+MESSAGE = r"(?:\s*:\s*[\"“']?|\s*,?\s+[\"“'])(?P<message>.+?)[\"”']?"
+SEND = r"(?:send|message|notify|tell)\s+(?:to\s+)?"
+ALL_STUDENTS = r"(?:all|everyone|everybody|(?:the\s+)?(?:whole|entire)\s+class)(?:\s+(?:students|pupils|learners))?"
+
+# Tried in order against the whole command; bulk variants come first
+GRAMMARS = [
+    (intent, re.compile(pattern, re.IGNORECASE))
+    for intent, pattern in [
+        ("bulk_mark_attendance", rf"mark\s+{ALL_STUDENTS}(?:\s+(?:in|of)\s+{CLASS})?\s+(?:as\s+)?{STATUS}{DATE}"),
+        ("bulk_mark_attendance", rf"(?:mark\s+)?{CLASS}(?:\s+(?:students|pupils|learners))?\s+(?:(?:is|are|as)\s+)?(?:all\s+)?{STATUS}{DATE}"),
+        ("bulk_mark_attendance", rf"{ALL_STUDENTS}(?:\s+(?:in|of)\s+{CLASS})?\s+(?:is|are|were)\s+{STATUS}{DATE}"),
+        ("mark_attendance", rf"mark\s+{NAME}\s+(?:as\s+)?{STATUS}{DATE}"),
+        ("mark_attendance", rf"{NAME}\s+(?:is|was)\s+{STATUS}{DATE}"),
+        ("record_grade", rf"(?:record|enter|add|give|put)\s+{MARKS}\s+(?:for|to)\s+{NAME}\s+(?:in|for)\s+{SUBJECT}{DATE}"),
+        ("record_grade", rf"{NAME}\s+(?:scored|got|obtained)\s+{MARKS}\s+(?:in|for)\s+{SUBJECT}{DATE}"),
+        ("record_grade", rf"(?:record|enter)\s+{SUBJECT}\s+(?:marks?|score|grade)\s+(?:of\s+)?{MARKS}\s+for\s+{NAME}{DATE}"),
+        ("record_payment", rf"{NAME}\s+(?:has\s+)?paid\s+{AMOUNT}{FEES}{DATE}"),
+        ("record_payment", rf"(?:record|receive|received|log)\s+(?:a\s+)?(?:payment|fees?)\s+(?:of\s+)?{AMOUNT}\s+(?:from|for|by)\s+{NAME}{DATE}"),
+        ("record_payment", rf"(?:record|receive|received)\s+{AMOUNT}{FEES}\s+(?:from|for|by)\s+{NAME}{DATE}"),
+        ("record_health_visit", rf"{NAME}\s+(?:is|was|feels?)\s+(?:sick|unwell|ill)(?:\s+with\s+(?P<message>.+))?"),
+        ("record_health_visit", rf"{NAME}\s+(?:went|was\s+sent|was\s+taken|is)\s+(?:to|in)\s+(?:the\s+)?sickbay(?:\s+with\s+(?P<message>.+))?"),
+        ("create_incident", rf"(?:(?:report|log|record)\s+(?:an?\s+)?)?incident{MESSAGE}"),
+        ("bulk_send_message", rf"{SEND}(?:all|everyone|everybody)(?:\s+parents)?(?:\s+(?:in|of)\s+{CLASS})?(?:\s+parents)?{MESSAGE}"),
+        ("bulk_send_message", rf"{SEND}{CLASS}\s+parents{MESSAGE}"),
+        ("send_message", rf"{SEND}{NAME}(?:'s\s+parents?)?{MESSAGE}"),
+    ]
+]
+
+
+def normalize_command(command: str) -> str:
+    """Collapse whitespace and drop trailing punctuation (the cache key)"""
+    return re.sub(r"\s+", " ", command).strip().rstrip(".!")
+
+
+def _clean_entities(groups: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    entities: Dict[str, Any] = {}
+    for key, value in groups.items():
+        if value is None:
+            continue
+        value = value.strip()
+        if key in ("marks", "amount"):
+            entities[key] = float(value.replace(",", ""))
+        elif key == "status":
+            entities[key] = value.lower()
+        elif key == "date":
+            entities[key] = value.lower()
+        elif key == "class_name":
+            entities[key] = re.sub(r"\s+", " ", value)
+        elif value:
+            entities[key] = value
+    return entities
+
+
+def match_grammar(command: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Intent and entities from the first grammar matching the whole command"""
+    for intent, pattern in GRAMMARS:
+        match = pattern.fullmatch(command)
+        if not match:
+            continue
+        entities = _clean_entities(match.groupdict())
+        if NOT_NAMES.intersection(entities.get("student_name", "").lower().split()):
+            continue
+        return intent, entities
+    return None
+
+
+def keyword_intent(command: str) -> str:
+    """Extract intent from command using keywords"""
+    command_lower = command.lower()
+
+    # Bulk attendance intents (must check BEFORE single attendance)
+    if any(phrase in command_lower for phrase in ["mark all", "mark entire", "all students", "whole class"]):
+        return "bulk_mark_attendance"
+
+    # Attendance intents
+    if any(word in command_lower for word in ["mark", "present", "absent", "attendance", "late"]):
+        return "mark_attendance"
+
+    # Grade/marks intents
+    if any(word in command_lower for word in ["grade", "marks", "score", "result", "exam", "test"]):
+        return "record_grade"
+
+    # Payment intents
+    if any(word in command_lower for word in ["pay", "paid", "payment", "fee", "money"]):
+        return "record_payment"
+
+    # Health/sickbay intents
+    if any(word in command_lower for word in ["sick", "sickbay", "health", "ill", "unwell"]):
+        return "record_health_visit"
+
+    # Incident intents
+    if any(word in command_lower for word in ["incident", "report", "issue", "problem", "fight", "damage"]):
+        return "create_incident"
+
+    # Bulk message intents (must check BEFORE single message)
+    if any(phrase in command_lower for phrase in ["send to all", "notify all", "message all", "tell everyone"]):
+        return "bulk_send_message"
+
+    # Message intents
+    if any(word in command_lower for word in ["send", "message", "notify", "tell", "inform"]):
+        return "send_message"
+
+    # Inventory intents
+    if any(word in command_lower for word in ["inventory", "stock", "supply", "add item", "remove item"]):
+        return "manage_inventory"
+
+    return "unknown"
+
+
+def keyword_entities(command: str, intent: str) -> Dict[str, Any]:
+    """Extract entities from command based on intent"""
+    entities = {}
+
+    # Extract student name (the first run of capitalized words that are not instructions)
+    name_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b'
+    for run in re.findall(name_pattern, command):
+        names = [
+            " ".join(words)
+            for is_name, words in groupby(run.split(), key=lambda word: word.lower() not in COMMAND_WORDS)
+            if is_name
+        ]
+        if names:
+            entities["student_name"] = names[0]
+            break
+
+    # Extract status for attendance
+    if intent == "mark_attendance":
+        if "present" in command.lower():
+            entities["status"] = "present"
+        elif "absent" in command.lower():
+            entities["status"] = "absent"
+        elif "late" in command.lower():
+            entities["status"] = "late"
+
+    # Extract numbers (marks, amounts)
+    numbers = re.findall(r'\b(\d+(?:\.\d+)?)\b', command)
+    if numbers:
+        if intent == "record_grade":
+            entities["marks"] = float(numbers[0])
+        elif intent == "record_payment":
+            entities["amount"] = float(numbers[0])
+
+    # Extract subject (words after "in" or "for")
+    subject_pattern = r'(?:in|for)\s+([A-Za-z\s]+?)(?:\s+exam|\s+test|$)'
+    subject_match = re.search(subject_pattern, command, re.IGNORECASE)
+    if subject_match:
+        entities["subject"] = subject_match.group(1).strip()
+
+    # Extract class name (e.g., "Class 5A", "Primary 3", "Form 2")
+    class_pattern = r'\b((?:Class|Primary|Secondary|Form)\s+\d+[A-Z]?)\b'
+    class_match = re.search(class_pattern, command, re.IGNORECASE)
+    if class_match:
+        entities["class_name"] = class_match.group(1)
+
+    # Extract date (today or yesterday; resolved when the parse is returned)
+    if "today" in command.lower():
+        entities["date"] = "today"
+    elif "yesterday" in command.lower():
+        entities["date"] = "yesterday"
+
+    # Extract message content (text after "send" or "tell")
+    message_pattern = r'(?:send|tell|notify).*?["\'](.*?)["\']'
+    message_match = re.search(message_pattern, command, re.IGNORECASE)
+    if message_match:
+        entities["message"] = message_match.group(1)
+
+    return entities
+
+
+def has_required_entities(intent: str, entities: Dict[str, Any]) -> bool:
+    return intent in REQUIRED_ENTITIES and all(entities.get(key) for key in REQUIRED_ENTITIES[intent])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_normalized(command: str) -> Tuple[str, Tuple[Tuple[str, Any], ...], float, str]:
+    matched = match_grammar(command)
+    if matched:
+        intent, entities = matched
+        confidence = GRAMMAR_CONFIDENCE if has_required_entities(intent, entities) else PARTIAL_CONFIDENCE
+        return intent, tuple(entities.items()), confidence, "grammar"
+
+    intent = keyword_intent(command)
+    entities = keyword_entities(command, intent)
+    if intent == "unknown":
+        confidence = 0.0
+    elif has_required_entities(intent, entities):
+        confidence = KEYWORD_CONFIDENCE
+    else:
+        confidence = PARTIAL_CONFIDENCE
+    return intent, tuple(entities.items()), confidence, "keywords"
+
+
+def resolve_date(value: str) -> str:
+    """'today' / 'yesterday' to an ISO date; anything else unchanged"""
+    if value == "today":
+        return date.today().isoformat()
+    if value == "yesterday":
+        return (date.today() - timedelta(days=1)).isoformat()
+    return value
+
+
+def parse_command(command: str) -> Dict[str, Any]:
+    """
+    Parse a command locally
+
+    Returns intent, entities, confidence (0-1) and source ("grammar" or
+    "keywords"). Relative dates are resolved on every call, so cached
+    parses stay correct across days.
+    """
+    intent, entity_items, confidence, source = _parse_normalized(normalize_command(command))
+    entities = dict(entity_items)
+    if "date" in entities:
+        entities["date"] = resolve_date(entities["date"])
+    return {
+        "intent": intent,
+        "entities": entities,
+        "confidence": confidence,
+        "source": source
+    }
+
+
+def _find_parse(content: Any, depth: int = 0) -> Optional[Dict[str, Any]]:
+    if depth > 3:
+        return None
+    if isinstance(content, str):
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        if not match:
+            return None
+        try:
+            content = json.loads(match.group(0))
+        except ValueError:
+            return None
+    if isinstance(content, dict):
+        if content.get("intent") in INTENTS:
+            return content
+        for value in content.values():
+            if isinstance(value, (dict, str)):
+                found = _find_parse(value, depth + 1)
+                if found:
+                    return found
+    return None
+
+
+def interpret_ai_parse(content: Any) -> Optional[Dict[str, Any]]:
+    """
+    Intent and entities from an AI response (a dict, or text holding JSON)
+
+    Returns None when no known intent can be found.
+    """
+    found = _find_parse(content)
+    if not found:
+        return None
+
+    entities = {}
+    for key, value in (found.get("entities") or {}).items():
+        if value in (None, "", "name", "number"):
+            continue
+        if key in ("marks", "amount"):
+            try:
+                value = float(str(value).replace(",", ""))
+            except ValueError:
+                continue
+        entities[key] = value
+    return {"intent": found["intent"], "entities": entities}
+
+
+def clear_cache() -> None:
+    """Drop cached parses (grammar changes in tests)"""
+    _parse_normalized.cache_clear()
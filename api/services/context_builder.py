@@ -0,0 +1,195 @@
+"""
+Context Builder
+Compact statistical summaries of a school's recent rows for AI prompts
+
+Each dataset is summarised in SQL in one round trip (totals, percentiles,
+weekly series, top categories and robust z-score outlier rows), so prompts
+stay small and bounded however many rows the period holds, while still
+covering all of them.
+"""
+import json
+import re
+import statistics
+from typing import Dict, Any, List, Optional, Sequence
+
+from api.services.database import get_db_manager
+
+
+# Iglewicz & Hoaglin's cut-off for the modified z-score
+OUTLIER_Z = 3.5
+PERCENTILES = (0.25, 0.5, 0.75, 0.9, 0.99)
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def _identifier(name: str) -> str:
+    """Table and column names are interpolated, so only plain identifiers pass"""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return name
+
+
+def robust_z_scores(values: Sequence[float]) -> List[float]:
+    """
+    Modified z-scores: distance from the median in units of the scaled
+    median absolute deviation (falling back to the mean absolute deviation
+    when more than half the values are identical)
+    """
+    if not values:
+        return []
+    median = statistics.median(values)
+    deviations = [abs(v - median) for v in values]
+    scale = 1.4826 * statistics.median(deviations) or 1.2533 * (sum(deviations) / len(deviations))
+    if not scale:
+        return [0.0] * len(values)
+    return [(v - median) / scale for v in values]
+
+
+class ContextBuilder:
+    """Builds bounded prompt context for a school"""
+
+    def __init__(self, school_id: str, db=None):
+        self.school_id = school_id
+        self.db = db or get_db_manager()
+
+    def summarize(
+        self,
+        table: str,
+        date_column: str,
+        days: int,
+        amount_column: Optional[str] = None,
+        category_columns: Sequence[str] = (),
+        outlier_columns: Sequence[str] = (),
+        top_n: int = 10,
+        outlier_limit: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Summarise a table's rows for the school over the last `days` days
+
+        With an amount column: count, total, min/max/mean, percentiles and
+        the rows whose amount has |robust z| > OUTLIER_Z (largest first,
+        with outlier_columns for context). Always: weekly counts (and
+        totals), top_n values per category column, and weeks whose count is
+        itself an outlier.
+        """
+        table = _identifier(table)
+        date_column = _identifier(date_column)
+        categories = [_identifier(c) for c in category_columns]
+        details = [_identifier(c) for c in outlier_columns]
+        amount = _identifier(amount_column) if amount_column else None
+
+        selected = [f"{date_column}::date AS day"]
+        if amount:
+            selected.append(f"{amount}::numeric AS amount")
+        selected += [f"{c}::text AS {c}" for c in dict.fromkeys(categories + details)]
+
+        ctes = [f"""
+        rows AS (
+            SELECT {', '.join(selected)}
+            FROM {table}
+            WHERE school_id = %(school_id)s
+            AND {date_column} >= CURRENT_DATE - %(days)s * INTERVAL '1 day'
+        )"""]
+        fields = ["'rows', (SELECT COUNT(*) FROM rows)"]
+
+        if amount:
+            ctes.append("""
+        stats AS (
+            SELECT
+                SUM(amount) AS total, MIN(amount) AS min, MAX(amount) AS max,
+                ROUND(AVG(amount), 2) AS mean,
+                percentile_cont(%(percentiles)s::float8[]) WITHIN GROUP (ORDER BY amount) AS percentiles,
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY amount) AS median
+            FROM rows
+        ),
+        spread AS (
+            SELECT COALESCE(
+                NULLIF(1.4826 * percentile_cont(0.5) WITHIN GROUP (ORDER BY ABS(r.amount - s.median)), 0),
+                NULLIF(1.2533 * AVG(ABS(r.amount - s.median)), 0)
+            ) AS scale
+            FROM rows r CROSS JOIN stats s
+        ),
+        outliers AS (
+            SELECT r.*, ROUND(((r.amount - s.median) / sp.scale)::numeric, 2) AS robust_z
+            FROM rows r CROSS JOIN stats s CROSS JOIN spread sp
+            WHERE ABS((r.amount - s.median) / sp.scale) > %(outlier_z)s
+            ORDER BY ABS((r.amount - s.median) / sp.scale) DESC
+            LIMIT %(outlier_limit)s
+        ),
+        outlier_count AS (
+            SELECT COUNT(*) AS n
+            FROM rows r CROSS JOIN stats s CROSS JOIN spread sp
+            WHERE ABS((r.amount - s.median) / sp.scale) > %(outlier_z)s
+        )""")
+            fields += [
+                "'total', (SELECT total FROM stats)",
+                "'min', (SELECT min FROM stats)",
+                "'max', (SELECT max FROM stats)",
+                "'mean', (SELECT mean FROM stats)",
+                "'percentiles', (SELECT percentiles FROM stats)",
+                "'outlier_count', (SELECT n FROM outlier_count)",
+                "'outliers', (SELECT COALESCE(json_agg(o), '[]'::json) FROM outliers o)",
+            ]
+
+        weekly_total = ", SUM(amount) AS total" if amount else ""
+        ctes.append(f"""
+        weekly AS (
+            SELECT date_trunc('week', day)::date AS week, COUNT(*) AS count{weekly_total}
+            FROM rows
+            GROUP BY 1
+            ORDER BY 1
+        )""")
+        fields.append("'weekly', (SELECT COALESCE(json_agg(w ORDER BY w.week), '[]'::json) FROM weekly w)")
+
+        category_total = ", SUM(amount) AS total" if amount else ""
+        for column in categories:
+            ctes.append(f"""
+        by_{column} AS (
+            SELECT {column} AS value, COUNT(*) AS count{category_total}
+            FROM rows
+            GROUP BY 1
+            ORDER BY 2 DESC
+            LIMIT %(top_n)s
+        )""")
+            fields.append(
+                f"'by_{column}', (SELECT COALESCE(json_agg(c ORDER BY c.count DESC), '[]'::json) FROM by_{column} c)"
+            )
+
+        query = "WITH " + ",".join(ctes) + f"\nSELECT json_build_object({', '.join(fields)}) AS context"
+        result = self.db.execute_query(
+            query,
+            {
+                "school_id": self.school_id,
+                "days": days,
+                "percentiles": list(PERCENTILES),
+                "outlier_z": OUTLIER_Z,
+                "outlier_limit": outlier_limit,
+                "top_n": top_n
+            },
+            fetch=True
+        )
+        context = result[0]['context'] if result else {"rows": 0, "weekly": []}
+
+        if context.get('percentiles'):
+            context['percentiles'] = {
+                f"p{int(p * 100)}": value for p, value in zip(PERCENTILES, context['percentiles'])
+            }
+
+        weekly = context.get('weekly') or []
+        context['unusual_weeks'] = [
+            {"week": week['week'], "count": week['count'], "robust_z": round(z, 2)}
+            for week, z in zip(weekly, robust_z_scores([w['count'] for w in weekly]))
+            if abs(z) > OUTLIER_Z
+        ]
+        context['period_days'] = days
+        return context
+
+    @staticmethod
+    def render(**sections: Dict[str, Any]) -> str:
+        """Compact JSON for interpolation into a prompt"""
+        return json.dumps(sections, separators=(",", ":"), default=str)
+
+
+def get_context_builder(school_id: str) -> ContextBuilder:
+    """Helper to get context builder instance"""
+    return ContextBuilder(school_id)
@@ -7,14 +7,36 @@ Uses Clarity Engine to understand any data format and map to our schema
 import csv
 import json
 import io
-from typing import Dict, Any, List, Optional
+import itertools
+import tempfile
+from typing import Dict, Any, List, Optional, Iterator, Iterable, Union, BinaryIO
 from uuid import uuid4
 import re
 
+from psycopg2.extras import execute_values
+
 from api.services.clarity import ClarityClient
 from api.services.database import get_db_manager
 
 
+# Uploads larger than this are spooled to a temp file instead of RAM
+SPOOL_MAX_MEMORY = 5 * 1024 * 1024
+# Rows per multi-row INSERT; keeps memory flat for 100k-row migrations
+IMPORT_BATCH_SIZE = 1000
+# Bytes read to sniff the CSV dialect
+SNIFF_SAMPLE_BYTES = 64 * 1024
+
+
+def _batched(rows: Iterable[Dict], size: int = IMPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Yield lists of up to `size` rows from an iterator"""
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 class DataMigrationService:
     """Import and auto-organize data from external systems"""
     
@@ -29,7 +51,7 @@ class DataMigrationService:
     
     async def import_data(
         self,
-        file_content: bytes,
+        file_content: Union[bytes, BinaryIO],
         filename: str,
         data_type: Optional[str] = None
     ) -> Dict[str, Any]:
@@ -37,54 +59,65 @@ class DataMigrationService:
         Import data from ANY format and auto-organize
         
         Args:
-            file_content: File content (CSV, Excel, JSON, etc.)
+            file_content: File content (CSV, Excel, JSON, etc.) as bytes or a
+                binary file object (e.g. UploadFile.file); read as a stream
             filename: Original filename
             data_type: Optional hint (auto-detected if not provided)
         
         Returns:
             Import summary with counts
         """
-        # Step 1: Parse file format
-        parsed_data = await self._parse_file(file_content, filename)
-        
-        if not parsed_data:
-            return {
-                "success": False,
-                "error": "Could not parse file format"
-            }
-        
-        # Step 2: Auto-detect data type if not provided
-        if not data_type:
-            data_type = await self._detect_data_type(parsed_data)
-        
-        # Step 3: Use Clarity to understand the schema
-        schema_result = await self.clarity.analyze(
-            directive=f"""
-            Analyze this data and determine:
-            1. What type of data is this (students, grades, payments, attendance, etc.)?
-            2. What fields are present?
-            3. How should this data be mapped to a school database?
+        # Step 1: Parse file format (streamed; only a sample is held in memory)
+        stream = self._spool(file_content)
+        try:
+            try:
+                rows = self._iter_rows(stream, filename)
+                sample = list(itertools.islice(rows, 10))
+            except Exception as e:
+                print(f"Error parsing file: {e}")
+                sample = []
             
-            Data sample (first 5 rows):
-            {json.dumps(parsed_data[:5], indent=2)}
+            if not sample:
+                return {
+                    "success": False,
+                    "error": "Could not parse file format"
+                }
             
-            Data type hint: {data_type}
+            # Step 2: Auto-detect data type if not provided
+            if not data_type:
+                data_type = await self._detect_data_type(sample)
             
-            Return a JSON mapping with:
-            - detected_type: The type of data
-            - field_mappings: How to map each field to our database
-            - confidence: Your confidence level (0-1)
-            """,
-            domain="data-science"
-        )
-        
-        # Step 4: Map and import data
-        mapping = self._extract_mapping(schema_result)
-        import_result = await self._import_with_mapping(
-            data=parsed_data,
-            mapping=mapping,
-            data_type=data_type
-        )
+            # Step 3: Use Clarity to understand the schema
+            schema_result = await self.clarity.analyze(
+                directive=f"""
+                Analyze this data and determine:
+                1. What type of data is this (students, grades, payments, attendance, etc.)?
+                2. What fields are present?
+                3. How should this data be mapped to a school database?
+                
+                Data sample (first 5 rows):
+                {json.dumps(sample[:5], indent=2)}
+                
+                Data type hint: {data_type}
+                
+                Return a JSON mapping with:
+                - detected_type: The type of data
+                - field_mappings: How to map each field to our database
+                - confidence: Your confidence level (0-1)
+                """,
+                domain="data-science"
+            )
+            
+            # Step 4: Map and import data, consuming the rest of the stream in batches
+            mapping = self._extract_mapping(schema_result)
+            import_result = await self._import_with_mapping(
+                data=itertools.chain(sample, rows),
+                mapping=mapping,
+                data_type=data_type
+            )
+        finally:
+            if stream is not file_content:
+                stream.close()
         
         return {
             "success": True,
@@ -93,62 +126,108 @@ class DataMigrationService:
             "import_result": import_result
         }
     
-    async def _parse_file(self, content: bytes, filename: str) -> Optional[List[Dict]]:
-        """Parse file content into list of dictionaries"""
-        filename_lower = filename.lower()
-        
+    async def _parse_file(self, content: Union[bytes, BinaryIO], filename: str) -> Optional[List[Dict]]:
+        """Parse file content into list of dictionaries (small files only)"""
+        stream = self._spool(content)
         try:
-            # CSV files
-            if filename_lower.endswith('.csv'):
-                content_str = content.decode('utf-8')
-                csv_file = io.StringIO(content_str)
-                reader = csv.DictReader(csv_file)
-                return list(reader)
-            
-            # JSON files
-            elif filename_lower.endswith('.json'):
-                content_str = content.decode('utf-8')
-                data = json.loads(content_str)
-                # If it's a list, return it; if dict, wrap in list
-                return data if isinstance(data, list) else [data]
-            
-            # TSV files
-            elif filename_lower.endswith('.tsv'):
-                content_str = content.decode('utf-8')
-                lines = content_str.split('\n')
-                if not lines:
-                    return None
-                headers = lines[0].split('\t')
-                data = []
-                for line in lines[1:]:
-                    if line.strip():
-                        values = line.split('\t')
-                        data.append(dict(zip(headers, values)))
-                return data
-            
-            # Plain text (try to parse)
-            else:
-                content_str = content.decode('utf-8')
-                # Try to detect delimiter and parse
-                lines = content_str.split('\n')
-                if not lines:
-                    return None
-                
-                # Detect delimiter
-                first_line = lines[0]
-                delimiter = ',' if ',' in first_line else '\t' if '\t' in first_line else ' '
-                
-                headers = first_line.split(delimiter)
-                data = []
-                for line in lines[1:]:
-                    if line.strip():
-                        values = line.split(delimiter)
-                        data.append(dict(zip(headers, values)))
-                return data
-                
+            return list(self._iter_rows(stream, filename)) or None
         except Exception as e:
             print(f"Error parsing file: {e}")
             return None
+        finally:
+            if stream is not content:
+                stream.close()
+    
+    def _spool(self, content: Union[bytes, BinaryIO]) -> BinaryIO:
+        """
+        Wrap raw bytes in a spooled temp file (RAM until SPOOL_MAX_MEMORY,
+        then disk). File objects are used as-is from the start.
+        """
+        if isinstance(content, (bytes, bytearray)):
+            spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+            spooled.write(content)
+            spooled.seek(0)
+            return spooled
+        content.seek(0)
+        return content
+    
+    def _iter_rows(self, stream: BinaryIO, filename: str) -> Iterator[Dict]:
+        """
+        Stream rows as dicts from CSV, TSV, JSON / JSON-lines or XLSX
+        
+        Nothing here reads the whole file into memory except a .json document,
+        which has no streaming form in the standard library.
+        """
+        filename_lower = filename.lower()
+        
+        if filename_lower.endswith(('.xlsx', '.xlsm')):
+            return self._iter_xlsx_rows(stream)
+        if filename_lower.endswith(('.jsonl', '.ndjson')):
+            return self._iter_json_lines(stream)
+        if filename_lower.endswith('.json'):
+            return self._iter_json_document(stream)
+        
+        delimiter = '\t' if filename_lower.endswith('.tsv') else None
+        return self._iter_delimited_rows(stream, delimiter)
+    
+    def _iter_delimited_rows(self, stream: BinaryIO, delimiter: Optional[str] = None) -> Iterator[Dict]:
+        """CSV/TSV/plain text; dialect is sniffed once from the first block"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+        sample = text.read(SNIFF_SAMPLE_BYTES)
+        text.seek(0)
+        
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=delimiter or ',\t;|')
+        except csv.Error:
+            dialect = csv.excel_tab if delimiter == '\t' else csv.excel
+        
+        reader = csv.DictReader(text, dialect=dialect)
+        for row in reader:
+            if any(value and value.strip() for value in row.values() if isinstance(value, str)):
+                yield {k.strip() if k else k: v for k, v in row.items()}
+        text.detach()
+    
+    def _iter_json_document(self, stream: BinaryIO) -> Iterator[Dict]:
+        """A JSON array of objects, or a single object"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace')
+        data = json.load(text)
+        text.detach()
+        # If it's a list, return it; if dict, wrap in list
+        yield from (data if isinstance(data, list) else [data])
+    
+    def _iter_json_lines(self, stream: BinaryIO) -> Iterator[Dict]:
+        """One JSON object per line"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace')
+        for line in text:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        text.detach()
+    
+    def _iter_xlsx_rows(self, stream: BinaryIO) -> Iterator[Dict]:
+        """First worksheet of an Excel workbook, read in openpyxl's streaming mode"""
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("XLSX import requires openpyxl (pip install openpyxl)")
+        
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            headers = next(rows, None)
+            if not headers:
+                return
+            headers = [str(h).strip() if h is not None else f"column_{i}" for i, h in enumerate(headers)]
+            for values in rows:
+                if values is None or all(v is None or v == '' for v in values):
+                    continue
+                yield {
+                    header: (str(value) if value is not None else None)
+                    for header, value in zip(headers, values)
+                }
+        finally:
+            workbook.close()
     
     async def _detect_data_type(self, data: List[Dict]) -> str:
         """Auto-detect what type of data this is"""
@@ -216,7 +295,7 @@ class DataMigrationService:
     
     async def _import_with_mapping(
         self,
-        data: List[Dict],
+        data: Iterable[Dict],
         mapping: Dict,
         data_type: str
     ) -> Dict[str, Any]:
@@ -246,7 +325,7 @@ class DataMigrationService:
         else:
             return {
                 "imported": 0,
-                "failed": len(data),
+                "failed": sum(1 for _ in data),
                 "note": "Data type not recognized"
             }
     
@@ -254,13 +333,50 @@ class DataMigrationService:
     # TYPE-SPECIFIC IMPORTERS
     # ============================================================================
     
-    async def _import_students(self, data: List[Dict], mapping: Dict) -> Dict[str, Any]:
+    def _insert_batch(self, query: str, values: List[tuple]) -> int:
+        """
+        Insert a batch with one multi-row statement; if the batch is rejected,
+        retry row by row so one bad row only fails itself
+        """
+        if not values:
+            return 0
+        try:
+            with self.db.get_cursor() as cur:
+                execute_values(cur, query, values, page_size=len(values))
+            return len(values)
+        except Exception as e:
+            print(f"Batch insert failed, retrying row by row: {e}")
+        
+        inserted = 0
+        for row in values:
+            try:
+                with self.db.get_cursor() as cur:
+                    execute_values(cur, query, [row])
+                inserted += 1
+            except Exception as e:
+                print(f"Failed to import row: {e}")
+        return inserted
+    
+    async def _import_students(self, data: Iterable[Dict], mapping: Dict) -> Dict[str, Any]:
         """Import student records"""
         imported = 0
         failed = 0
         
-        for row in data:
-            try:
+        query = """
+        INSERT INTO students (
+            id, school_id, first_name, last_name, admission_number,
+            class_name, gender, date_of_birth, status
+        ) VALUES %s
+        ON CONFLICT (school_id, admission_number) DO UPDATE
+        SET first_name = EXCLUDED.first_name,
+            last_name = EXCLUDED.last_name,
+            class_name = EXCLUDED.class_name
+        """
+        
+        for batch in _batched(data):
+            # Last row wins for admission numbers repeated within a batch
+            values: Dict[str, tuple] = {}
+            for row in batch:
                 student_id = str(uuid4())
                 
                 # Map fields (with fallbacks)
@@ -271,23 +387,14 @@ class DataMigrationService:
                 gender = row.get('gender') or row.get('Gender') or row.get('sex') or None
                 dob = row.get('date_of_birth') or row.get('dob') or row.get('DOB') or None
                 
-                self.db.execute_query(
-                    """
-                    INSERT INTO students (
-                        id, school_id, first_name, last_name, admission_number,
-                        class_name, gender, date_of_birth, status
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'active')
-                    ON CONFLICT (admission_number) DO UPDATE
-                    SET first_name = EXCLUDED.first_name,
-                        last_name = EXCLUDED.last_name,
-                        class_name = EXCLUDED.class_name
-                    """,
-                    (student_id, self.school_id, first_name, last_name, admission_number, class_name, gender, dob)
+                values[admission_number] = (
+                    student_id, self.school_id, first_name, last_name, admission_number,
+                    class_name, gender, dob, 'active'
                 )
-                imported += 1
-            except Exception as e:
-                failed += 1
-                print(f"Failed to import student: {e}")
+            
+            written = self._insert_batch(query, list(values.values()))
+            imported += written
+            failed += len(values) - written
         
         return {
             "imported": imported,
@@ -295,54 +402,56 @@ class DataMigrationService:
             "type": "students"
         }
     
-    async def _import_payments(self, data: List[Dict], mapping: Dict) -> Dict[str, Any]:
+    async def _import_payments(self, data: Iterable[Dict], mapping: Dict) -> Dict[str, Any]:
         """Import payment records"""
         imported = 0
         failed = 0
         
-        for row in data:
-            try:
-                # Find student by name or ID
-                student_identifier = row.get('student') or row.get('student_name') or row.get('admission_number')
+        query = """
+        INSERT INTO payments (
+            id, school_id, student_id, amount, payment_method,
+            payment_date, status, reference_number
+        ) VALUES %s
+        """
+        
+        for batch in _batched(data):
+            identifiers = [
+                row.get('student') or row.get('student_name') or row.get('admission_number')
+                for row in batch
+            ]
+            student_ids = self._resolve_students([i for i in identifiers if i])
+            
+            values = []
+            for row, student_identifier in zip(batch, identifiers):
                 if not student_identifier:
                     failed += 1
                     continue
                 
-                students = self.db.execute_query(
-                    """
-                    SELECT id FROM students
-                    WHERE school_id = %s
-                    AND (admission_number = %s OR CONCAT(first_name, ' ', last_name) ILIKE %s)
-                    LIMIT 1
-                    """,
-                    (self.school_id, student_identifier, f"%{student_identifier}%"),
-                    fetch=True
-                )
+                student_id = student_ids.get(student_identifier.strip().lower())
+                if not student_id:
+                    # Partial names: fall back to a fuzzy lookup for this row only
+                    student_id = self._find_student_fuzzy(student_identifier)
+                if not student_id:
+                    failed += 1
+                    continue
                 
-                if not students:
+                try:
+                    amount = float(row.get('amount') or row.get('Amount') or row.get('paid') or 0)
+                except (TypeError, ValueError):
                     failed += 1
                     continue
                 
-                student_id = students[0]["id"]
                 payment_id = str(uuid4())
-                
-                amount = float(row.get('amount') or row.get('Amount') or row.get('paid') or 0)
                 method = row.get('method') or row.get('payment_method') or 'cash'
                 date = row.get('date') or row.get('payment_date') or None
-                
-                self.db.execute_query(
-                    """
-                    INSERT INTO payments (
-                        id, school_id, student_id, amount, payment_method,
-                        payment_date, status, reference_number
-                    ) VALUES (%s, %s, %s, %s, %s, %s, 'completed', %s)
-                    """,
-                    (payment_id, self.school_id, student_id, amount, method, date, f"IMP-{payment_id[:8]}")
-                )
-                imported += 1
-            except Exception as e:
-                failed += 1
-                print(f"Failed to import payment: {e}")
+                values.append((
+                    payment_id, self.school_id, student_id, amount, method,
+                    date, 'completed', f"IMP-{payment_id[:8]}"
+                ))
+            
+            written = self._insert_batch(query, values)
+            imported += written
+            failed += len(values) - written
         
         return {
             "imported": imported,
@@ -350,32 +459,82 @@ class DataMigrationService:
             "type": "payments"
         }
     
-    async def _import_grades(self, data: List[Dict], mapping: Dict) -> Dict[str, Any]:
+    def _resolve_students(self, identifiers: List[str]) -> Dict[str, str]:
+        """
+        Map admission numbers / exact full names to student ids in one query
+        
+        Returns keys lowercased so lookups are case-insensitive.
+        """
+        if not identifiers:
+            return {}
+        keys = list({i.strip().lower() for i in identifiers})
+        rows = self.db.execute_query(
+            """
+            SELECT id, LOWER(admission_number) AS admission_key,
+                   LOWER(CONCAT(first_name, ' ', last_name)) AS name_key
+            FROM students
+            WHERE school_id = %s
+            AND (LOWER(admission_number) = ANY(%s)
+                 OR LOWER(CONCAT(first_name, ' ', last_name)) = ANY(%s))
+            """,
+            (self.school_id, keys, keys),
+            fetch=True
+        ) or []
+        
+        resolved: Dict[str, str] = {}
+        for row in rows:
+            # Admission numbers take precedence over name matches
+            resolved.setdefault(row['name_key'], str(row['id']))
+        for row in rows:
+            resolved[row['admission_key']] = str(row['id'])
+        return resolved
+    
+    def _find_student_fuzzy(self, identifier: str) -> Optional[str]:
+        students = self.db.execute_query(
+            """
+            SELECT id FROM students
+            WHERE school_id = %s
+            AND CONCAT(first_name, ' ', last_name) ILIKE %s
+            LIMIT 1
+            """,
+            (self.school_id, f"%{identifier}%"),
+            fetch=True
+        )
+        return str(students[0]["id"]) if students else None
+    
+    async def _import_grades(self, data: Iterable[Dict], mapping: Dict) -> Dict[str, Any]:
         """Import grade records"""
         # Similar to payments - find student, record grade
         return {
             "imported": 0,
-            "failed": len(data),
+            "failed": sum(1 for _ in data),
             "type": "grades",
             "note": "Grade import needs assessment context"
         }
     
-    async def _import_attendance(self, data: List[Dict], mapping: Dict) -> Dict[str, Any]:
+    async def _import_attendance(self, data: Iterable[Dict], mapping: Dict) -> Dict[str, Any]:
         """Import attendance records"""
         return {
             "imported": 0,
-            "failed": len(data),
+            "failed": sum(1 for _ in data),
             "type": "attendance",
             "note": "Attendance import coming soon"
         }
     
-    async def _import_teachers(self, data: List[Dict], mapping: Dict) -> Dict[str, Any]:
+    async def _import_teachers(self, data: Iterable[Dict], mapping: Dict) -> Dict[str, Any]:
         """Import teacher records"""
         imported = 0
         failed = 0
         
-        for row in data:
-            try:
+        query = """
+        INSERT INTO teachers (
+            id, school_id, first_name, last_name, email, phone, subjects_taught
+        ) VALUES %s
+        """
+        
+        for batch in _batched(data):
+            values = []
+            for row in batch:
                 teacher_id = str(uuid4())
                 
                 first_name = row.get('first_name') or row.get('FirstName') or 'Unknown'
@@ -384,17 +543,11 @@ class DataMigrationService:
                 phone = row.get('phone') or row.get('Phone') or None
                 subjects = row.get('subjects') or row.get('subject_taught') or None
                 
-                self.db.execute_query(
-                    """
-                    INSERT INTO teachers (
-                        id, school_id, first_name, last_name, email, phone, subjects_taught
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (teacher_id, self.school_id, first_name, last_name, email, phone, subjects)
-                )
-                imported += 1
-            except Exception as e:
-                failed += 1
+                values.append((teacher_id, self.school_id, first_name, last_name, email, phone, subjects))
+            
+            written = self._insert_batch(query, values)
+            imported += written
+            failed += len(values) - written
         
         return {
             "imported": imported,
@@ -402,41 +555,46 @@ class DataMigrationService:
             "type": "teachers"
         }
     
-    async def _import_parents(self, data: List[Dict], mapping: Dict) -> Dict[str, Any]:
+    async def _import_parents(self, data: Iterable[Dict], mapping: Dict) -> Dict[str, Any]:
         """Import parent records"""
         return {
             "imported": 0,
-            "failed": len(data),
+            "failed": sum(1 for _ in data),
             "type": "parents",
             "note": "Parent import coming soon"
         }
     
-    async def _import_expenses(self, data: List[Dict], mapping: Dict) -> Dict[str, Any]:
+    async def _import_expenses(self, data: Iterable[Dict], mapping: Dict) -> Dict[str, Any]:
         """Import expense records"""
         imported = 0
         failed = 0
         
-        for row in data:
-            try:
+        query = """
+        INSERT INTO expenses (
+            id, school_id, category, amount, description, expense_date, vendor
+        ) VALUES %s
+        """
+        
+        for batch in _batched(data):
+            values = []
+            for row in batch:
                 expense_id = str(uuid4())
                 
                 category = row.get('category') or row.get('Category') or 'General'
-                amount = float(row.get('amount') or row.get('Amount') or row.get('cost') or 0)
+                try:
+                    amount = float(row.get('amount') or row.get('Amount') or row.get('cost') or 0)
+                except (TypeError, ValueError):
+                    failed += 1
+                    continue
                 description = row.get('description') or row.get('Description') or row.get('purpose') or ''
                 date = row.get('date') or row.get('Date') or None
                 vendor = row.get('vendor') or row.get('Vendor') or row.get('payee') or None
                 
-                self.db.execute_query(
-                    """
-                    INSERT INTO expenses (
-                        id, school_id, category, amount, description, expense_date, vendor
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (expense_id, self.school_id, category, amount, description, date, vendor)
-                )
-                imported += 1
-            except Exception as e:
-                failed += 1
+                values.append((expense_id, self.school_id, category, amount, description, date, vendor))
+            
+            written = self._insert_batch(query, values)
+            imported += written
+            failed += len(values) - written
         
         return {
             "imported": imported,
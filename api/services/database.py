@@ -4,16 +4,114 @@ Handles all database connections and common operations
 """
 
 import os
-from typing import Optional, List, Dict, Any
+import threading
+from typing import Optional, List, Dict, Any, Iterator, Sequence
 from contextlib import contextmanager
 from decimal import Decimal
 import psycopg2
+from psycopg2 import extras
 from psycopg2.extras import RealDictCursor
 from psycopg2.pool import ThreadedConnectionPool
 from datetime import datetime
 import json
 
 from api.core.config import get_settings
+from api.services.pagination import NEWEST_FIRST, fetch_page
+
+# Non-null sort keys for nullable columns, placing NULLs where the old ORDER BY
+# did. Finite sentinels rather than 'infinity': psycopg2 reads infinity back as
+# date.max, which would not round-trip through a cursor.
+OVERDUE_DUE_SORT = "COALESCE(sf.due_date, DATE '9999-12-31')"
+INCIDENT_OCCURRED_SORT = "COALESCE(occurred_at, TIMESTAMPTZ '0001-01-01 00:00:00+00')"
+
+# Overdue fees of active students with a primary contact; the list and its
+# totals must count the same rows
+OVERDUE_FEES_FROM = """
+FROM student_fees sf
+JOIN students s ON sf.student_id = s.id
+JOIN student_parent_relationships spr ON s.id = spr.student_id AND spr.is_primary_contact = true
+JOIN parents p ON spr.parent_id = p.id
+"""
+OVERDUE_FEES_CONDITIONS = (
+    "s.school_id = %s",
+    "sf.payment_status = 'overdue'",
+    "s.enrollment_status = 'active'",
+    "s.deleted_at IS NULL"
+)
+
+
+class UnitOfWork:
+    """
+    A group of statements running on one connection and committed once
+    
+    Obtained from DatabaseManager.transaction(); mirrors the execute_query /
+    execute_many API so service code reads the same inside and outside a
+    transaction.
+    """
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor(cursor_factory=RealDictCursor)
+        self._savepoint_counter = 0
+    
+    def execute(self, query: str, params: Any = None, fetch: bool = True) -> Optional[List[Dict]]:
+        """Execute a statement; returns rows if fetch=True"""
+        self.cursor.execute(query, params)
+        if fetch:
+            return self.cursor.fetchall()
+        return None
+    
+    def fetch_one(self, query: str, params: Any = None) -> Optional[Dict]:
+        """Execute a statement and return its first row (or None)"""
+        self.cursor.execute(query, params)
+        return self.cursor.fetchone()
+    
+    def execute_batch(self, query: str, data: Sequence[Sequence[Any]], page_size: int = 100) -> int:
+        """
+        Run one statement for many parameter sets, `page_size` per round trip
+        
+        Returns:
+            Number of parameter sets sent
+        """
+        extras.execute_batch(self.cursor, query, data, page_size=page_size)
+        return len(data)
+    
+    def execute_values(self, query: str, data: Sequence[Sequence[Any]],
+                       template: Optional[str] = None, page_size: int = 1000,
+                       fetch: bool = False) -> Optional[List[Dict]]:
+        """Multi-row statement with a single `VALUES %s` placeholder"""
+        return extras.execute_values(
+            self.cursor, query, data, template=template, page_size=page_size, fetch=fetch
+        )
+    
+    @contextmanager
+    def savepoint(self, name: Optional[str] = None) -> Iterator["UnitOfWork"]:
+        """
+        Nested step that can fail without aborting the whole transaction
+        
+        Usage:
+            with db.transaction() as tx:
+                tx.execute(...)
+                try:
+                    with tx.savepoint():
+                        tx.execute(...)  # rolled back alone on error
+                except Exception:
+                    pass
+        """
+        self._savepoint_counter += 1
+        name = name or f"sp_{self._savepoint_counter}"
+        self.cursor.execute(f"SAVEPOINT {name}")
+        try:
+            yield self
+        except Exception:
+            self.cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            raise
+        else:
+            self.cursor.execute(f"RELEASE SAVEPOINT {name}")
+    
+    @property
+    def rowcount(self) -> int:
+        return self.cursor.rowcount
 
 
 class DatabaseManager:
@@ -52,6 +150,7 @@ class DatabaseManager:
             self.database_url
         )
         print(f"DB Pool v3.5 initialized ({min_conn}-{max_conn} connections)")
+        self._local = threading.local()
     
     @contextmanager
     def get_connection(self):
@@ -109,6 +208,44 @@ class DatabaseManager:
                 return cur.fetchall()
             return None
     
+    @contextmanager
+    def transaction(self) -> Iterator[UnitOfWork]:
+        """
+        Unit of work: every statement inside runs on one pooled connection
+        and is committed once (or rolled back together on error)
+        
+        Usage:
+            with db.transaction() as tx:
+                row = tx.fetch_one("SELECT ... FOR UPDATE", (...))
+                tx.execute("UPDATE ...", (...), fetch=False)
+        
+        Nested calls on the same thread join the outer transaction as a
+        savepoint, so service methods can be composed.
+        """
+        current = getattr(self._local, 'unit_of_work', None)
+        if current is not None:
+            with current.savepoint():
+                yield current
+            return
+        
+        with self.get_connection() as conn:
+            unit_of_work = UnitOfWork(conn)
+            self._local.unit_of_work = unit_of_work
+            try:
+                yield unit_of_work
+            finally:
+                self._local.unit_of_work = None
+                unit_of_work.cursor.close()
+    
+    def execute_batch(self, query: str, data: List[tuple], page_size: int = 100) -> int:
+        """
+        Execute one statement for many parameter sets in a single transaction,
+        sending `page_size` statements per round trip (much faster than
+        execute_many for large lists)
+        """
+        with self.transaction() as tx:
+            return tx.execute_batch(query, data, page_size=page_size)
+    
     def execute_many(self, query: str, data: List[tuple]) -> int:
         """
         Execute query multiple times with different parameters
@@ -284,7 +421,11 @@ class ParentOperations:
             cur.execute(query, (student_id, parent_id, relationship_type, is_primary, is_fee_payer))
             result = cur.fetchone()
             print(f"✅ Parent-Student relationship created: {relationship_type}")
-            return dict(result)
+        
+        # USSD caches phone -> children; a new link changes that mapping
+        from api.services.ussd import invalidate_ussd_children_cache
+        invalidate_ussd_children_cache()
+        return dict(result)
     
     def get_parents_for_grade(self, school_id: str, grade: str) -> List[Dict]:
         """Get all parents of students in a specific grade"""
@@ -333,7 +474,12 @@ class FeeOperations:
     def assign_fee_to_student(self, student_id: str, fee_structure_id: str,
                              discount_percentage: float = 0.0,
                              discount_reason: str = None) -> Dict:
-        """Assign a fee structure to a student"""
+        """
+        Assign a fee structure to a student
+        
+        The student_fees trigger adds the fee to the balance ledger in the
+        same statement.
+        """
         # First get the fee structure to calculate final amount
         fee_structure = self.db.execute_query(
             "SELECT * FROM fee_structures WHERE id = %s",
@@ -361,7 +507,14 @@ class FeeOperations:
             return dict(result)
     
     def record_payment(self, payment_data: Dict[str, Any]) -> Dict:
-        """Record a fee payment"""
+        """
+        Record a fee payment
+        
+        The payment row and the fee it settles are written in one
+        transaction; the student_fees trigger moves the fee balance ledger
+        with them. Callers (mobile money settlement) must not adjust the
+        student_fees row themselves.
+        """
         query = """
         INSERT INTO fee_payments (
             student_fee_id, student_id, school_id, amount,
@@ -375,36 +528,69 @@ class FeeOperations:
         RETURNING *;
         """
         
-        with self.db.get_cursor() as cur:
-            cur.execute(query, payment_data)
-            result = cur.fetchone()
-            print(f"✅ Payment recorded: {result['amount']} via {result['payment_method']}")
-            return dict(result)
+        with self.db.transaction() as tx:
+            result = tx.fetch_one(query, payment_data)
+            tx.execute(
+                """
+                UPDATE student_fees
+                SET amount_paid = COALESCE(amount_paid, 0) + %(amount)s,
+                    balance = balance - %(amount)s,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = %(student_fee_id)s
+                """,
+                payment_data,
+                fetch=False
+            )
+        print(f"✅ Payment recorded: {result['amount']} via {result['payment_method']}")
+        return dict(result)
     
-    def get_overdue_fees(self, school_id: str) -> List[Dict]:
-        """Get all overdue fees with student and parent information"""
-        query = """
+    def get_overdue_fees(
+        self,
+        school_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of overdue fees with student and parent information,
+        earliest due first (items, next_cursor, has_more)
+        """
+        select = f"""
         SELECT 
             sf.*,
             s.first_name, s.last_name, s.admission_number, s.current_grade,
             p.primary_phone, p.whatsapp_number, p.email,
             p.first_name as parent_first_name, p.last_name as parent_last_name,
-            p.preferred_language, p.preferred_contact_method
-        FROM student_fees sf
-        JOIN students s ON sf.student_id = s.id
-        JOIN student_parent_relationships spr ON s.id = spr.student_id AND spr.is_primary_contact = true
-        JOIN parents p ON spr.parent_id = p.id
-        WHERE s.school_id = %s 
-        AND sf.payment_status = 'overdue'
-        AND s.enrollment_status = 'active'
-        AND s.deleted_at IS NULL
-        ORDER BY sf.due_date ASC
+            p.preferred_language, p.preferred_contact_method,
+            {OVERDUE_DUE_SORT} AS due_sort
+        {OVERDUE_FEES_FROM}
+        """
+        return fetch_page(
+            self.db, select, OVERDUE_FEES_CONDITIONS, [school_id],
+            keys=[(OVERDUE_DUE_SORT, False, "due_sort"), ("sf.id", False)],
+            limit=limit, cursor=cursor
+        )
+    
+    def get_overdue_totals(self, school_id: str) -> Dict[str, Any]:
+        """Count and total balance of overdue fees, without fetching them"""
+        query = f"""
+        SELECT COUNT(*) as count, COALESCE(SUM(sf.balance), 0) as total_overdue_amount
+        {OVERDUE_FEES_FROM}
+        WHERE {" AND ".join(OVERDUE_FEES_CONDITIONS)}
         """
         results = self.db.execute_query(query, (school_id,))
-        return [dict(r) for r in results]
+        return dict(results[0]) if results else {"count": 0, "total_overdue_amount": 0}
     
     def get_fee_collection_summary(self, school_id: str, academic_term: str = None) -> Dict:
-        """Get fee collection statistics"""
+        """
+        Get fee collection statistics
+        
+        Without a term only the money totals are returned, summed from
+        fee_balance_ledger; a term filter still aggregates the matching
+        student_fees rows with status counts.
+        """
+        if not academic_term:
+            return self._get_ledger_collection_summary(school_id)
+        
         term_filter = "AND fs.academic_term = %s" if academic_term else ""
         params = (school_id, academic_term) if academic_term else (school_id,)
         
@@ -431,6 +617,21 @@ class FeeOperations:
         
         results = self.db.execute_query(query, params)
         return dict(results[0]) if results else {}
+    
+    def _get_ledger_collection_summary(self, school_id: str) -> Dict:
+        """Whole-school money totals summed from the per-student fee ledger"""
+        query = """
+        SELECT 
+            SUM(total_due) as total_expected,
+            SUM(total_paid) as total_collected,
+            SUM(balance) as total_outstanding,
+            ROUND(SUM(total_paid) / NULLIF(SUM(total_due), 0) * 100, 2) as collection_rate_percentage
+        FROM fee_balance_ledger
+        WHERE school_id = %s
+        """
+        
+        results = self.db.execute_query(query, (school_id,))
+        return dict(results[0]) if results else {}
 
 
 class MessageOperations:
@@ -725,16 +926,19 @@ class IncidentOperations:
             print(f"✅ Incident logged: {result['id']} ({result['category']})")
             return dict(result)
 
-    def list_incidents(self, school_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        query = """
-        SELECT *
-        FROM incidents
-        WHERE school_id = %s
-        ORDER BY occurred_at DESC NULLS LAST, created_at DESC
-        LIMIT %s
+    def list_incidents(
+        self, school_id: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        results = self.db.execute_query(query, (school_id, limit))
-        return [dict(row) for row in results]
+        One page of incidents, latest occurrence first with undated ones last
+        (items, next_cursor, has_more)
+        """
+        return fetch_page(
+            self.db, f"SELECT *, {INCIDENT_OCCURRED_SORT} AS occurred_sort FROM incidents",
+            ["school_id = %s"], [school_id],
+            keys=[(INCIDENT_OCCURRED_SORT, True, "occurred_sort"), *NEWEST_FIRST],
+            limit=limit, cursor=cursor
+        )
 
 
 class InventoryOperations:
@@ -868,16 +1072,14 @@ class LibraryOperations:
             print(f"✅ Library {result['action']} recorded for {result['book_title']}")
             return dict(result)
 
-    def list_transactions(self, school_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        query = """
-        SELECT *
-        FROM library_transactions
-        WHERE school_id = %s
-        ORDER BY created_at DESC
-        LIMIT %s
-        """
-        results = self.db.execute_query(query, (school_id, limit))
-        return [dict(row) for row in results]
+    def list_transactions(
+        self, school_id: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One page of library transactions, newest first (items, next_cursor, has_more)"""
+        return fetch_page(
+            self.db, "SELECT * FROM library_transactions", ["school_id = %s"], [school_id],
+            keys=NEWEST_FIRST, limit=limit, cursor=cursor
+        )
 
 
 class TransportOperations:
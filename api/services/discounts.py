@@ -9,6 +9,36 @@ from decimal import Decimal
 from api.services.database import get_db_manager
 
 
+# Records and applies the priced sibling discounts of DiscountsService._sibling_discounts;
+# a fee gets at most one sibling discount ever (unique index on student_discounts.fee_id)
+SIBLING_DISCOUNT_WRITES = """
+,
+logged AS (
+    INSERT INTO student_discounts (
+        school_id, student_id, fee_id, discount_type, discount_amount,
+        reason, applied_by, term, academic_year
+    )
+    SELECT
+        %(school_id)s, student_id, fee_id, 'sibling', discount_amount,
+        'Sibling discount (' || percentage || '%%) - Child #' || position,
+        %(run_by)s, %(term)s, COALESCE(%(academic_year)s, academic_year)
+    FROM discounts
+    WHERE discount_amount > 0
+    ON CONFLICT (fee_id) WHERE discount_type = 'sibling'
+    DO NOTHING
+    RETURNING fee_id, student_id, discount_amount
+),
+applied AS (
+    UPDATE student_fees sf
+    SET balance = sf.balance - l.discount_amount,
+        updated_at = CURRENT_TIMESTAMP
+    FROM logged l
+    WHERE sf.id = l.fee_id
+    RETURNING sf.id
+)
+"""
+
+
 class DiscountsService:
     """Service for fee discounts and payment plans"""
     
@@ -75,7 +105,12 @@ class DiscountsService:
         
         return self.db.execute_query(query, (self.school_id, is_active), fetch=True)
     
-    def calculate_sibling_discounts(self, parent_id: str) -> Dict[str, Any]:
+    def calculate_sibling_discounts(
+        self,
+        parent_id: str,
+        term: Optional[str] = None,
+        academic_year: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Calculate automatic sibling discounts for a family
         
@@ -84,21 +119,24 @@ class DiscountsService:
         - 2nd child: 10% discount
         - 3rd child: 20% discount
         - 4th+ child: 30% discount
+        
+        Uses the same statement as apply_sibling_discounts_for_school, limited
+        to this parent's children: each outstanding fee (of academic_year, if
+        given) is discounted once, so neither path re-discounts the other's fees.
         """
         # Get all children for parent
         children_query = """
         SELECT 
             s.id, s.first_name, s.last_name, s.class_name,
-            COALESCE(SUM(sf.balance), 0) as fee_balance
+            COALESCE(l.balance, 0) as fee_balance
         FROM students s
         JOIN student_parents sp ON sp.student_id = s.id
-        LEFT JOIN student_fees sf ON sf.student_id = s.id
-        WHERE sp.parent_id = %s AND s.status = 'active'
-        GROUP BY s.id, s.first_name, s.last_name, s.class_name
-        ORDER BY s.created_at ASC
+        LEFT JOIN fee_balance_ledger l ON l.student_id = s.id
+        WHERE sp.parent_id = %s AND s.school_id = %s AND s.status = 'active'
+        ORDER BY s.created_at ASC, s.id ASC
         """
         
-        children = self.db.execute_query(children_query, (parent_id,), fetch=True)
+        children = self.db.execute_query(children_query, (parent_id, self.school_id), fetch=True)
         
         if len(children) <= 1:
             return {
@@ -108,10 +146,22 @@ class DiscountsService:
                 "message": "No sibling discount (only 1 child)"
             }
         
-        # Apply discounts
-        discounts_applied = []
-        total_discount_amount = 0
+        applied = self.db.execute_query(
+            self._sibling_discounts("AND sp.parent_id = %(parent_id)s", academic_year)
+            + SIBLING_DISCOUNT_WRITES + """
+            SELECT student_id, SUM(discount_amount) AS discount_amount
+            FROM logged
+            GROUP BY student_id
+            """,
+            {
+                "school_id": self.school_id, "parent_id": parent_id, "term": term,
+                "academic_year": academic_year, "run_by": None
+            },
+            fetch=True
+        )
+        discounted = {str(row['student_id']): float(row['discount_amount']) for row in applied}
         
+        discounts_applied = []
         for i, child in enumerate(children):
             position = i + 1
             discount_percentage = 0
@@ -126,17 +176,7 @@ class DiscountsService:
                 discount_percentage = 30
             
             fee_balance = float(child['fee_balance'])
-            discount_amount = fee_balance * (discount_percentage / 100)
-            
-            if discount_amount > 0:
-                # Apply discount to student_fees
-                self._apply_discount_to_student(
-                    child['id'],
-                    discount_amount,
-                    f"Sibling discount ({discount_percentage}%) - Child #{position}"
-                )
-                
-                total_discount_amount += discount_amount
+            discount_amount = discounted.get(str(child['id']), 0)
             
             discounts_applied.append({
                 "student_id": child['id'],
@@ -151,10 +191,153 @@ class DiscountsService:
         return {
             "success": True,
             "children_count": len(children),
-            "total_discount_amount": total_discount_amount,
+            "total_discount_amount": sum(discounted.values()),
             "discounts_applied": discounts_applied
         }
     
+    def _sibling_discounts(self, family_filter: str = "", academic_year: Optional[str] = None) -> str:
+        """
+        CTEs ranking siblings (ranked, positions), pricing their outstanding
+        fees that have no sibling discount yet (discounts) and counting
+        families; append SIBLING_DISCOUNT_WRITES to apply them
+        
+        Children are ranked per parent by enrolment (ROW_NUMBER() OVER
+        (PARTITION BY parent ORDER BY created_at)); a child linked to two
+        parents keeps their lowest position. Parameters are named: school_id,
+        term, academic_year, run_by, plus any used by family_filter.
+        """
+        year_filter = "AND fs.academic_year::text = %(academic_year)s" if academic_year else ""
+        return f"""
+        WITH ranked AS (
+            SELECT
+                sp.parent_id, sp.student_id,
+                ROW_NUMBER() OVER (PARTITION BY sp.parent_id ORDER BY s.created_at, s.id) AS position
+            FROM student_parents sp
+            JOIN students s ON s.id = sp.student_id
+            WHERE s.school_id = %(school_id)s AND s.status = 'active'
+            {family_filter}
+        ),
+        positions AS (
+            SELECT student_id, MIN(position) AS position
+            FROM ranked
+            GROUP BY student_id
+            HAVING MIN(position) > 1
+        ),
+        discounts AS (
+            SELECT
+                sf.id AS fee_id, sf.student_id, p.position, r.percentage,
+                fs.academic_year::text AS academic_year,
+                ROUND(sf.balance * r.percentage / 100, 2) AS discount_amount
+            FROM positions p
+            CROSS JOIN LATERAL (
+                SELECT CASE p.position WHEN 2 THEN 10 WHEN 3 THEN 20 ELSE 30 END AS percentage
+            ) r
+            JOIN student_fees sf ON sf.student_id = p.student_id
+            LEFT JOIN fee_structures fs ON fs.id = sf.fee_structure_id
+            WHERE sf.balance > 0
+              {year_filter}
+              AND NOT EXISTS (
+                  SELECT 1 FROM student_discounts sd
+                  WHERE sd.fee_id = sf.id AND sd.discount_type = 'sibling'
+              )
+        ),
+        families AS (
+            SELECT COUNT(*) AS families FROM (
+                SELECT parent_id FROM ranked GROUP BY parent_id HAVING COUNT(*) > 1
+            ) f
+        )
+        """
+    
+    def apply_sibling_discounts_for_school(
+        self,
+        term: str,
+        academic_year: str,
+        run_by: Optional[str] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Apply sibling discounts to every family in the school in one statement
+        
+        Rates match calculate_sibling_discounts and are applied to each
+        outstanding fee of the academic year that has not had a sibling
+        discount yet, so re-running a term, or running the next term, only
+        picks up new fees. Every run is recorded in sibling_discount_runs.
+        """
+        params = {
+            "school_id": self.school_id, "term": term,
+            "academic_year": academic_year, "run_by": run_by
+        }
+        
+        if dry_run:
+            preview = self.db.execute_query(
+                self._sibling_discounts(academic_year=academic_year) + """
+                SELECT
+                    (SELECT families FROM families) AS families,
+                    COUNT(DISTINCT student_id) AS students_discounted,
+                    COUNT(*) AS fees_discounted,
+                    COALESCE(SUM(discount_amount), 0) AS total_discount
+                FROM discounts
+                """,
+                params,
+                fetch=True
+            )[0]
+            return {
+                "success": True,
+                "dry_run": True,
+                "term": term,
+                "academic_year": academic_year,
+                "families": preview['families'],
+                "students_discounted": preview['students_discounted'],
+                "fees_discounted": preview['fees_discounted'],
+                "total_discount_amount": float(preview['total_discount'])
+            }
+        
+        run = self.db.execute_query(
+            self._sibling_discounts(academic_year=academic_year) + SIBLING_DISCOUNT_WRITES + """
+            INSERT INTO sibling_discount_runs (
+                school_id, term, academic_year, families,
+                students_discounted, fees_discounted, total_discount, run_by
+            )
+            SELECT
+                %(school_id)s, %(term)s, %(academic_year)s, (SELECT families FROM families),
+                COUNT(DISTINCT student_id), COUNT(*), COALESCE(SUM(discount_amount), 0), %(run_by)s
+            FROM logged
+            RETURNING id, families, students_discounted, fees_discounted, total_discount
+            """,
+            params,
+            fetch=True
+        )[0]
+        
+        return {
+            "success": True,
+            "dry_run": False,
+            "run_id": run['id'],
+            "term": term,
+            "academic_year": academic_year,
+            "families": run['families'],
+            "students_discounted": run['students_discounted'],
+            "fees_discounted": run['fees_discounted'],
+            "total_discount_amount": float(run['total_discount'])
+        }
+    
+    def get_sibling_discount_runs(self, academic_year: Optional[str] = None) -> List[Dict[str, Any]]:
+        """History of school-wide sibling discount runs"""
+        query = """
+        SELECT id, term, academic_year, families, students_discounted,
+               fees_discounted, total_discount, run_by, created_at
+        FROM sibling_discount_runs
+        WHERE school_id = %s
+        """
+        params = [self.school_id]
+        
+        if academic_year:
+            query += " AND academic_year = %s"
+            params.append(academic_year)
+        
+        query += " ORDER BY created_at DESC"
+        
+        return self.db.execute_query(query, tuple(params), fetch=True)
+    
     def apply_early_payment_discount(
         self,
         student_id: str,
@@ -166,9 +349,9 @@ class DiscountsService:
         """
         # Get fee details
         fee_query = """
-        SELECT balance FROM student_fees WHERE id = %s
+        SELECT balance FROM student_fees WHERE id = %s AND student_id = %s
         """
-        fee = self.db.execute_query(fee_query, (fee_id,), fetch=True)
+        fee = self.db.execute_query(fee_query, (fee_id, student_id), fetch=True)
         
         if not fee:
             return {"success": False, "error": "Fee not found"}
@@ -179,8 +362,10 @@ class DiscountsService:
         # Apply discount
         self._apply_discount_to_student(
             student_id,
+            fee_id,
             discount_amount,
-            f"Early payment discount ({discount_percentage}%)"
+            f"Early payment discount ({discount_percentage}%)",
+            'early_payment'
         )
         
         return {
@@ -192,30 +377,39 @@ class DiscountsService:
     def _apply_discount_to_student(
         self,
         student_id: str,
+        fee_id: str,
         discount_amount: float,
-        reason: str
+        reason: str,
+        discount_type: str
     ) -> None:
-        """Apply discount to student's fees"""
+        """
+        Apply discount to one of a student's fees
+        
+        The discount record and the balance change commit together; the
+        student_fees trigger moves the fee balance ledger in the same
+        transaction.
+        """
         # Record in student_discounts
         query = """
         INSERT INTO student_discounts (
-            school_id, student_id, discount_amount, reason
-        ) VALUES (%s, %s, %s, %s)
+            school_id, student_id, fee_id, discount_type, discount_amount, reason
+        ) VALUES (%s, %s, %s, %s, %s, %s)
         """
         
-        self.db.execute_query(
-            query,
-            (self.school_id, student_id, discount_amount, reason)
-        )
-        
         # Update student_fees balance
         update_query = """
         UPDATE student_fees
         SET balance = balance - %s
-        WHERE student_id = %s
+        WHERE id = %s AND student_id = %s
         """
         
-        self.db.execute_query(update_query, (discount_amount, student_id))
+        with self.db.transaction() as tx:
+            tx.execute(
+                query,
+                (self.school_id, student_id, fee_id, discount_type, discount_amount, reason),
+                fetch=False
+            )
+            tx.execute(update_query, (discount_amount, fee_id, student_id), fetch=False)
     
     # ============================================================================
     # PAYMENT PLANS
@@ -14,9 +14,14 @@ Domains:
 9. Data-entry - Professional data extraction
 10. Expenses - Expense tracking, budget optimization
 """
+import asyncio
 from typing import Dict, Any, List, Optional
+
+from api.core.mcp import MCPAgentRequest
 from api.services.clarity import ClarityClient
+from api.services.context_builder import ContextBuilder
 from api.services.database import get_db_manager
+from api.services.performance_analytics import PerformanceAnalyticsService
 
 
 class DomainIntelligenceService:
@@ -26,6 +31,15 @@ class DomainIntelligenceService:
         self.school_id = school_id
         self.clarity = ClarityClient()
         self.db = get_db_manager()
+        self.context = ContextBuilder(school_id, self.db)
+    
+    async def _ask(self, directive: str, domain: str, context: Optional[Dict[str, Any]] = None) -> Any:
+        """Run a Clarity request off the event loop (the client is blocking)"""
+        response = await asyncio.to_thread(
+            self.clarity.analyze,
+            MCPAgentRequest(directive=directive, domain=domain, context=context or {})
+        )
+        return response.content
     
     # ============================================================================
     # LEGAL INTELLIGENCE
@@ -110,41 +124,35 @@ class DomainIntelligenceService:
         )
     
     async def detect_financial_anomalies(self) -> Dict[str, Any]:
-        """Detect unusual patterns in financial data"""
-        # Get recent financial transactions
-        payments = self.db.execute_query(
-            """
-            SELECT amount, payment_date, payment_method
-            FROM payments
-            WHERE school_id = %s
-            AND payment_date >= CURRENT_DATE - INTERVAL '90 days'
-            ORDER BY payment_date DESC
-            """,
-            (self.school_id,),
-            fetch=True
-        )
+        """
+        Detect unusual patterns in financial data
         
-        expenses = self.db.execute_query(
-            """
-            SELECT amount, expense_date, category
-            FROM expenses
-            WHERE school_id = %s
-            AND expense_date >= CURRENT_DATE - INTERVAL '90 days'
-            ORDER BY expense_date DESC
-            """,
-            (self.school_id,),
-            fetch=True
+        Covers all 90 days of payments and expenses through SQL summaries
+        (percentiles, weekly totals, categories, robust z-score outliers)
+        rather than a truncated slice of raw rows.
+        """
+        payments = self.context.summarize(
+            "payments", "payment_date", days=90,
+            amount_column="amount",
+            category_columns=["payment_method"],
+            outlier_columns=["payment_method"]
+        )
+        expenses = self.context.summarize(
+            "expenses", "expense_date", days=90,
+            amount_column="amount",
+            category_columns=["category"],
+            outlier_columns=["category"]
         )
         
-        return await self.clarity.analyze(
+        return await self._ask(
             directive=f"""
-            Analyze financial transactions for anomalies:
-            
-            Payments (Income):
-            {payments[:50]}
+            Analyze financial transactions for anomalies.
+            The data below summarises every payment and expense in the last
+            90 days: totals, percentiles, weekly totals, per-category totals,
+            rows already flagged as outliers by robust z-score, and weeks
+            with unusual volume.
             
-            Expenses:
-            {expenses[:50]}
+            {ContextBuilder.render(payments_income=payments, expenses=expenses)}
             
             Detect:
             1. Unusual patterns
@@ -162,25 +170,18 @@ class DomainIntelligenceService:
     
     async def assess_school_safety(self) -> Dict[str, Any]:
         """Comprehensive safety and security assessment"""
-        # Get incidents data
-        incidents = self.db.execute_query(
-            """
-            SELECT type, severity, description, date
-            FROM incidents
-            WHERE school_id = %s
-            AND date >= CURRENT_DATE - INTERVAL '6 months'
-            ORDER BY date DESC
-            """,
-            (self.school_id,),
-            fetch=True
+        incidents = self.context.summarize(
+            "incidents", "date", days=183,
+            category_columns=["type", "severity"]
         )
         
-        return await self.clarity.analyze(
+        return await self._ask(
             directive=f"""
-            Perform comprehensive school safety assessment:
+            Perform comprehensive school safety assessment.
+            Summary of all incidents in the last 6 months (weekly counts,
+            counts by type and severity, unusually busy weeks):
             
-            Recent Incidents:
-            {incidents}
+            {ContextBuilder.render(incidents=incidents)}
             
             Analyze:
             1. Overall Safety Score (0-100)
@@ -219,24 +220,19 @@ class DomainIntelligenceService:
     
     async def analyze_health_trends(self) -> Dict[str, Any]:
         """Analyze student health patterns"""
-        health_visits = self.db.execute_query(
-            """
-            SELECT symptoms, diagnosis, date, treatment
-            FROM health_visits
-            WHERE school_id = %s
-            AND date >= CURRENT_DATE - INTERVAL '3 months'
-            ORDER BY date DESC
-            """,
-            (self.school_id,),
-            fetch=True
+        health_visits = self.context.summarize(
+            "health_visits", "date", days=92,
+            category_columns=["diagnosis", "symptoms", "treatment"]
         )
         
-        return await self.clarity.analyze(
+        return await self._ask(
             directive=f"""
-            Analyze health data and identify trends:
+            Analyze health data and identify trends.
+            Summary of all health visits in the last 3 months (weekly
+            counts, most common diagnoses, symptoms and treatments, and
+            weeks with unusual visit volume):
             
-            Health Visits:
-            {health_visits}
+            {ContextBuilder.render(health_visits=health_visits)}
             
             Provide:
             1. Common Health Issues
@@ -253,42 +249,44 @@ class DomainIntelligenceService:
     # DATA SCIENCE INTELLIGENCE
     # ============================================================================
     
-    async def predict_student_performance(self, student_id: str) -> Dict[str, Any]:
-        """Predict future performance using ML"""
-        # Get student data
-        grades = self.db.execute_query(
-            """
-            SELECT ar.marks_obtained, ar.grade, a.subject, a.date
-            FROM assessment_results ar
-            JOIN assessments a ON a.id = ar.assessment_id
-            WHERE ar.student_id = %s
-            ORDER BY a.date DESC
-            """,
-            (student_id,),
-            fetch=True
-        )
+    async def predict_student_performance(self, student_id: str, include_ai: bool = True) -> Dict[str, Any]:
+        """
+        Predict future performance
+        
+        Trends, class z-scores and at-risk subjects are computed locally by
+        PerformanceAnalyticsService; Clarity (optional) only receives that
+        summary plus attendance counts.
+        """
+        summary = PerformanceAnalyticsService(self.school_id).get_student_summary(student_id)
         
         attendance = self.db.execute_query(
             """
-            SELECT status, date
+            SELECT status, COUNT(*) as days
             FROM attendance
             WHERE student_id = %s
             AND date >= CURRENT_DATE - INTERVAL '6 months'
-            ORDER BY date DESC
+            GROUP BY status
             """,
             (student_id,),
             fetch=True
         )
+        attendance_counts = {row['status']: row['days'] for row in attendance}
         
-        return await self.clarity.analyze(
-            directive=f"""
-            Predict student performance using data science:
-            
-            Grades History:
-            {grades}
-            
-            Attendance:
-            {attendance}
+        result = {
+            "success": True,
+            "student_id": student_id,
+            "performance": summary,
+            "attendance": attendance_counts
+        }
+        if not include_ai:
+            return result
+        
+        result["analysis"] = await self._ask(
+            directive="""
+            Predict student performance from the summary in context
+            (per-subject averages, moving averages, slopes in points per
+            assessment, z-scores against the class, at-risk flags, and
+            attendance day counts for 6 months).
             
             Provide:
             1. Performance Trend (Improving/Stable/Declining)
@@ -297,8 +295,10 @@ class DomainIntelligenceService:
             4. Intervention Recommendations
             5. Confidence Level
             """,
-            domain="data-science"
+            domain="data-science",
+            context={"performance": summary, "attendance": attendance_counts}
         )
+        return result
     
     async def analyze_enrollment_trends(self) -> Dict[str, Any]:
         """Predict enrollment patterns"""
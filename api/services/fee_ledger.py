@@ -0,0 +1,214 @@
+"""
+Fee Ledger Service
+Running fee balances per student (summed per school), and reconciliation
+of the ledger against the student_fees detail rows
+"""
+from typing import Dict, Any, List
+
+from api.services.database import get_db_manager
+
+
+# Per-student totals recomputed from student_fees next to the ledger row;
+# only students whose figures disagree are returned
+MISMATCH_QUERY = """
+WITH detail AS (
+    SELECT
+        sf.student_id,
+        SUM(fee_due_amount(to_jsonb(sf))) AS total_due,
+        COALESCE(SUM(sf.amount_paid), 0) AS total_paid,
+        COALESCE(SUM(sf.balance), 0) AS balance,
+        COUNT(*) AS fee_count
+    FROM student_fees sf
+    JOIN students s ON s.id = sf.student_id
+    WHERE s.school_id = %(school_id)s
+    GROUP BY sf.student_id
+),
+ledger AS (
+    SELECT student_id, total_due, total_paid, balance, fee_count
+    FROM fee_balance_ledger
+    WHERE school_id = %(school_id)s
+)
+SELECT
+    COALESCE(d.student_id, l.student_id) AS student_id,
+    l.balance AS ledger_balance,
+    d.balance AS detail_balance,
+    (SELECT COUNT(*) FROM detail) AS students_checked
+FROM detail d
+FULL JOIN ledger l ON l.student_id = d.student_id
+WHERE (COALESCE(d.total_due, 0), COALESCE(d.total_paid, 0), COALESCE(d.balance, 0), COALESCE(d.fee_count, 0))
+    IS DISTINCT FROM
+    (COALESCE(l.total_due, 0), COALESCE(l.total_paid, 0), COALESCE(l.balance, 0), COALESCE(l.fee_count, 0))
+"""
+
+
+class FeeLedgerService:
+    """Service for ledger-backed fee balances"""
+
+    def __init__(self, school_id: str):
+        self.school_id = school_id
+        self.db = get_db_manager()
+
+    # ============================================================================
+    # BALANCE READS
+    # ============================================================================
+
+    def get_student_balance(self, student_id: str) -> Dict[str, Any]:
+        """Fee totals for one student"""
+        return self.get_student_balances([student_id]).get(str(student_id), {
+            "student_id": student_id,
+            "total_due": 0,
+            "total_paid": 0,
+            "balance": 0,
+            "fee_count": 0
+        })
+
+    def get_student_balances(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fee totals for many students, keyed by student id"""
+        if not student_ids:
+            return {}
+
+        rows = self.db.execute_query(
+            """
+            SELECT student_id, total_due, total_paid, balance, fee_count
+            FROM fee_balance_ledger
+            WHERE student_id = ANY(%s::uuid[])
+            """,
+            ([str(student_id) for student_id in student_ids],),
+            fetch=True
+        )
+        return {str(row['student_id']): row for row in rows}
+
+    def get_school_balance(self) -> Dict[str, Any]:
+        """Fee totals for the whole school, summed from its students' ledger rows"""
+        rows = self.db.execute_query(
+            """
+            SELECT
+                COALESCE(SUM(total_due), 0) AS total_due,
+                COALESCE(SUM(total_paid), 0) AS total_paid,
+                COALESCE(SUM(balance), 0) AS balance,
+                MAX(updated_at) AS updated_at
+            FROM fee_balance_ledger
+            WHERE school_id = %s
+            """,
+            (self.school_id,),
+            fetch=True
+        )
+        return rows[0] if rows else {"total_due": 0, "total_paid": 0, "balance": 0, "updated_at": None}
+
+    # ============================================================================
+    # RECONCILIATION
+    # ============================================================================
+
+    def reconcile(self, repair: bool = True) -> Dict[str, Any]:
+        """
+        Verify the ledger against student_fees and optionally correct it
+
+        Mismatched student rows are locked before being recomputed, so a
+        payment committing mid-run is either already in the recomputed
+        figures or applies its delta after the repair. School totals are
+        sums of the student rows and need no repair of their own. Every run
+        is logged in fee_ledger_reconciliations.
+        """
+        with self.db.transaction() as tx:
+            mismatches = tx.execute(MISMATCH_QUERY, {"school_id": self.school_id})
+            students_checked = mismatches[0]['students_checked'] if mismatches else tx.fetch_one(
+                """
+                SELECT COUNT(DISTINCT sf.student_id) AS students
+                FROM student_fees sf
+                JOIN students s ON s.id = sf.student_id
+                WHERE s.school_id = %s
+                """,
+                (self.school_id,)
+            )['students']
+            student_ids = [str(row['student_id']) for row in mismatches]
+            repaired = repair and bool(student_ids)
+
+            if repaired:
+                tx.execute(
+                    """
+                    SELECT student_id FROM fee_balance_ledger
+                    WHERE student_id = ANY(%s::uuid[])
+                    ORDER BY student_id
+                    FOR UPDATE
+                    """,
+                    (student_ids,)
+                )
+                tx.execute(
+                    """
+                    INSERT INTO fee_balance_ledger (
+                        student_id, school_id, total_due, total_paid, balance, fee_count, updated_at
+                    )
+                    SELECT
+                        s.id, s.school_id,
+                        COALESCE(d.total_due, 0), COALESCE(d.total_paid, 0),
+                        COALESCE(d.balance, 0), COALESCE(d.fee_count, 0),
+                        CURRENT_TIMESTAMP
+                    FROM students s
+                    LEFT JOIN LATERAL (
+                        SELECT
+                            SUM(fee_due_amount(to_jsonb(sf))) AS total_due,
+                            SUM(sf.amount_paid) AS total_paid,
+                            SUM(sf.balance) AS balance,
+                            COUNT(*) AS fee_count
+                        FROM student_fees sf
+                        WHERE sf.student_id = s.id
+                    ) d ON true
+                    WHERE s.id = ANY(%s::uuid[])
+                    ON CONFLICT (student_id) DO UPDATE SET
+                        school_id = EXCLUDED.school_id,
+                        total_due = EXCLUDED.total_due,
+                        total_paid = EXCLUDED.total_paid,
+                        balance = EXCLUDED.balance,
+                        fee_count = EXCLUDED.fee_count,
+                        updated_at = EXCLUDED.updated_at
+                    """,
+                    (student_ids,),
+                    fetch=False
+                )
+
+            run = tx.fetch_one(
+                """
+                INSERT INTO fee_ledger_reconciliations (
+                    school_id, students_checked, students_mismatched, repaired
+                ) VALUES (%s, %s, %s, %s)
+                RETURNING id, created_at
+                """,
+                (
+                    self.school_id, students_checked, len(student_ids), repaired
+                )
+            )
+
+        return {
+            "success": True,
+            "reconciliation_id": run['id'],
+            "students_checked": students_checked,
+            "students_mismatched": len(student_ids),
+            "repaired": repaired,
+            "mismatches": [
+                {
+                    "student_id": row['student_id'],
+                    "ledger_balance": float(row['ledger_balance'] or 0),
+                    "detail_balance": float(row['detail_balance'] or 0)
+                }
+                for row in mismatches[:50]
+            ]
+        }
+
+    def get_reconciliations(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Recent reconciliation runs"""
+        return self.db.execute_query(
+            """
+            SELECT id, students_checked, students_mismatched, repaired, created_at
+            FROM fee_ledger_reconciliations
+            WHERE school_id = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            (self.school_id, limit),
+            fetch=True
+        )
+
+
+def get_fee_ledger_service(school_id: str) -> FeeLedgerService:
+    """Helper to get fee ledger service instance"""
+    return FeeLedgerService(school_id)
@@ -143,19 +143,27 @@ class FeedingService:
         self,
         meal_type: str,
         meal_date: str,
-        student_ids: List[str]
+        student_ids: List[str],
+        attended: bool = True
     ) -> Dict[str, Any]:
-        """Record meal attendance for multiple students"""
-        recorded = []
+        """Record meal attendance for multiple students (one upsert for all ids)"""
+        query = """
+        INSERT INTO meal_attendance (
+            school_id, student_id, meal_type, meal_date, attended
+        )
+        SELECT DISTINCT s.school_id, s.id, %s, %s::date, %s
+        FROM unnest(%s::uuid[]) AS ids(student_id)
+        JOIN students s ON s.id = ids.student_id AND s.school_id = %s
+        ON CONFLICT (student_id, meal_date, meal_type) DO UPDATE
+        SET attended = EXCLUDED.attended
+        RETURNING student_id
+        """
         
-        for student_id in student_ids:
-            result = self.record_meal_attendance(
-                student_id=student_id,
-                meal_type=meal_type,
-                meal_date=meal_date,
-                attended=True
-            )
-            recorded.append(result)
+        recorded = self.db.execute_query(
+            query,
+            (meal_type, meal_date, attended, list(student_ids), self.school_id),
+            fetch=True
+        )
         
         return {
             "success": True,
@@ -164,6 +172,71 @@ class FeedingService:
             "students_recorded": len(recorded)
         }
     
+    def record_group_meal_attendance(
+        self,
+        meal_type: str,
+        meal_date: str,
+        class_name: Optional[str] = None,
+        dormitory_id: Optional[str] = None,
+        except_student_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Mark a whole class or dormitory as having eaten, except the listed students
+        
+        The group is resolved in the database; excluded students are recorded
+        as not attended so they show up in get_students_not_eating.
+        """
+        if bool(class_name) == bool(dormitory_id):
+            return {"success": False, "error": "Provide either class_name or dormitory_id"}
+        
+        if class_name:
+            group_query = """
+            SELECT id FROM students
+            WHERE school_id = %s AND class_name = %s AND status = 'active'
+            """
+            group_params = (self.school_id, class_name)
+        else:
+            group_query = """
+            SELECT db.student_id AS id
+            FROM dormitory_beds db
+            JOIN dormitories d ON d.id = db.dormitory_id
+            WHERE d.school_id = %s AND d.id = %s AND db.student_id IS NOT NULL
+            """
+            group_params = (self.school_id, dormitory_id)
+        
+        query = f"""
+        WITH grp AS ({group_query})
+        INSERT INTO meal_attendance (
+            school_id, student_id, meal_type, meal_date, attended
+        )
+        SELECT %s, grp.id, %s, %s::date, NOT (grp.id = ANY(%s::uuid[]))
+        FROM grp
+        ON CONFLICT (student_id, meal_date, meal_type) DO UPDATE
+        SET attended = EXCLUDED.attended
+        RETURNING attended
+        """
+        
+        recorded = self.db.execute_query(
+            query,
+            group_params + (
+                self.school_id, meal_type, meal_date,
+                [str(student_id) for student_id in (except_student_ids or [])]
+            ),
+            fetch=True
+        )
+        attended_count = sum(1 for row in recorded if row['attended'])
+        
+        return {
+            "success": True,
+            "meal_type": meal_type,
+            "meal_date": meal_date,
+            "class_name": class_name,
+            "dormitory_id": dormitory_id,
+            "students_recorded": len(recorded),
+            "attended": attended_count,
+            "absent": len(recorded) - attended_count
+        }
+    
     def get_meal_attendance_for_date(
         self,
         meal_date: str,
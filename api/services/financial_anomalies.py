@@ -0,0 +1,330 @@
+"""
+Financial Anomaly Detector
+Deterministic checks over payments and expenses - duplicates within a time
+window, amount outliers per payment method / expense category (median
+absolute deviation), and entries made outside working hours. Runs
+incrementally from a per-school watermark and stores flags for the director
+dashboard; no network calls.
+"""
+import json
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Sequence
+
+from api.services.context_builder import OUTLIER_Z
+from api.services.database import get_db_manager
+
+
+DUPLICATE_WINDOW = timedelta(minutes=30)
+# Entries created from OFF_HOURS_START until OFF_HOURS_END are flagged
+OFF_HOURS_START = 20
+OFF_HOURS_END = 6
+# Sunday (isoweekday 7) entries are flagged as off-hours too
+OFF_HOURS_WEEKDAYS = (7,)
+# Working hours are the school's; created_at is stored in the database's
+# zone (a TIMESTAMP without zone in the migrations), so it is converted first
+LOCAL_TIMEZONE = "Africa/Kampala"
+BASELINE_DAYS = 180
+# Groups with fewer rows than this in the baseline are not scored
+MIN_BASELINE_ROWS = 10
+# How far back the first scan of a school starts
+INITIAL_LOOKBACK_DAYS = 90
+BATCH_SIZE = 5000
+# created_at is stamped when a row's transaction starts, not when it commits,
+# so a row can become visible behind the watermark. Only rows older than this
+# are scanned, which covers any transaction that commits within the lag.
+SCAN_LAG = timedelta(minutes=5)
+
+# Per source: the column amounts are grouped by, and the columns that make
+# two rows inside DUPLICATE_WINDOW a suspected duplicate
+SOURCES = {
+    "payments": {
+        "group_column": "payment_method",
+        "duplicate_columns": ("student_id", "amount"),
+    },
+    "expenses": {
+        "group_column": "category",
+        "duplicate_columns": ("category", "amount", "description"),
+    },
+}
+
+
+def detect_anomalies(
+    rows: Sequence[Dict[str, Any]],
+    baselines: Dict[str, Dict[str, Any]],
+    duplicates: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Flags for a batch of new rows
+
+    rows: id, amount, grp, created_at, entered_at (created_at in LOCAL_TIMEZONE)
+    baselines: grp -> {median, scale, rows} over the baseline period
+    duplicates: row id -> {duplicate_of, created_at} of the closest earlier match
+    """
+    flags = []
+    for row in rows:
+        record_id = str(row['id'])
+        amount = float(row['amount']) if row['amount'] is not None else None
+
+        match = duplicates.get(record_id)
+        if match:
+            flags.append({
+                "record_id": record_id,
+                "anomaly_type": "duplicate",
+                "severity": "high",
+                "amount": amount,
+                "details": {
+                    "duplicate_of": str(match['duplicate_of']),
+                    "minutes_apart": round((row['created_at'] - match['created_at']).total_seconds() / 60, 1)
+                }
+            })
+
+        baseline = baselines.get(row['grp'])
+        if amount is not None and baseline and baseline['rows'] >= MIN_BASELINE_ROWS and baseline['scale']:
+            z = (amount - float(baseline['median'])) / float(baseline['scale'])
+            if abs(z) > OUTLIER_Z:
+                flags.append({
+                    "record_id": record_id,
+                    "anomaly_type": "amount_outlier",
+                    "severity": "high" if abs(z) > 2 * OUTLIER_Z else "medium",
+                    "amount": amount,
+                    "details": {
+                        "group": row['grp'],
+                        "median": float(baseline['median']),
+                        "robust_z": round(z, 2)
+                    }
+                })
+
+        entered_at = row['entered_at']
+        if (entered_at.hour >= OFF_HOURS_START or entered_at.hour < OFF_HOURS_END
+                or entered_at.isoweekday() in OFF_HOURS_WEEKDAYS):
+            flags.append({
+                "record_id": record_id,
+                "anomaly_type": "off_hours",
+                "severity": "low",
+                "amount": amount,
+                "details": {"entered_at": entered_at.isoformat()}
+            })
+
+    return flags
+
+
+class FinancialAnomalyDetector:
+    """Incremental anomaly scans and flag review for a school"""
+
+    def __init__(self, school_id: str):
+        self.school_id = school_id
+        self.db = get_db_manager()
+
+    # ============================================================================
+    # SCANNING
+    # ============================================================================
+
+    def scan(self, sources: Optional[Sequence[str]] = None, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+        """Scan rows added since the last run, one batch per source"""
+        results = {}
+        for source in sources or SOURCES:
+            if source not in SOURCES:
+                raise ValueError(f"Unknown source: {source}")
+            results[source] = self._scan_source(source, batch_size)
+
+        return {
+            "success": True,
+            "school_id": self.school_id,
+            "scanned": {source: r["scanned"] for source, r in results.items()},
+            "flagged": {source: r["flagged"] for source, r in results.items()},
+            "caught_up": all(r["scanned"] < batch_size for r in results.values())
+        }
+
+    def _scan_source(self, source: str, batch_size: int) -> Dict[str, int]:
+        config = SOURCES[source]
+        group_column = config['group_column']
+        duplicate_columns = config['duplicate_columns']
+
+        watermark = self.db.execute_query(
+            """
+            SELECT last_created_at, last_id FROM financial_anomaly_watermarks
+            WHERE school_id = %s AND source_table = %s
+            """,
+            (self.school_id, source),
+            fetch=True
+        )
+        if watermark:
+            position = "AND (created_at, id) > (%s, %s)"
+            params = (
+                LOCAL_TIMEZONE, self.school_id, SCAN_LAG,
+                watermark[0]['last_created_at'], watermark[0]['last_id'], batch_size
+            )
+        else:
+            position = f"AND created_at >= CURRENT_DATE - INTERVAL '{INITIAL_LOOKBACK_DAYS} days'"
+            params = (LOCAL_TIMEZONE, self.school_id, SCAN_LAG, batch_size)
+
+        # created_at::timestamptz reads a zoneless value in the session zone
+        # and leaves a zoned one (consolidated schema) as it is
+        rows = self.db.execute_query(
+            f"""
+            SELECT id, amount, {group_column} AS grp, created_at,
+                   created_at::timestamptz AT TIME ZONE %s AS entered_at
+            FROM {source}
+            WHERE school_id = %s AND created_at IS NOT NULL
+            AND created_at < CURRENT_TIMESTAMP - %s
+            {position}
+            ORDER BY created_at, id
+            LIMIT %s
+            """,
+            params,
+            fetch=True
+        )
+        if not rows:
+            return {"scanned": 0, "flagged": 0}
+
+        row_ids = [str(row['id']) for row in rows]
+
+        baselines = {
+            row['grp']: row
+            for row in self.db.execute_query(
+                f"""
+                WITH base AS (
+                    SELECT {group_column} AS grp, amount
+                    FROM {source}
+                    WHERE school_id = %s
+                    AND created_at >= CURRENT_DATE - INTERVAL '{BASELINE_DAYS} days'
+                    AND amount IS NOT NULL
+                ),
+                medians AS (
+                    SELECT grp, percentile_cont(0.5) WITHIN GROUP (ORDER BY amount) AS median, COUNT(*) AS rows
+                    FROM base
+                    GROUP BY grp
+                )
+                SELECT
+                    m.grp, m.median, m.rows,
+                    COALESCE(
+                        NULLIF(1.4826 * percentile_cont(0.5) WITHIN GROUP (ORDER BY ABS(b.amount - m.median)), 0),
+                        NULLIF(1.2533 * AVG(ABS(b.amount - m.median)), 0)
+                    ) AS scale
+                FROM base b
+                JOIN medians m ON m.grp IS NOT DISTINCT FROM b.grp
+                GROUP BY m.grp, m.median, m.rows
+                """,
+                (self.school_id,),
+                fetch=True
+            )
+        }
+
+        same_key = " AND ".join(f"p.{column} IS NOT DISTINCT FROM n.{column}" for column in duplicate_columns)
+        duplicates = {
+            str(row['id']): row
+            for row in self.db.execute_query(
+                f"""
+                SELECT DISTINCT ON (n.id) n.id, p.id AS duplicate_of, p.created_at
+                FROM {source} n
+                JOIN {source} p
+                    ON p.school_id = n.school_id
+                    AND {same_key}
+                    AND p.created_at >= n.created_at - %s
+                    AND (p.created_at, p.id) < (n.created_at, n.id)
+                WHERE n.id = ANY(%s::uuid[])
+                ORDER BY n.id, p.created_at DESC
+                """,
+                (DUPLICATE_WINDOW, row_ids),
+                fetch=True
+            )
+        }
+
+        flags = detect_anomalies(rows, baselines, duplicates)
+        last = rows[-1]
+
+        with self.db.transaction() as tx:
+            if flags:
+                tx.execute_values(
+                    """
+                    INSERT INTO financial_anomaly_flags (
+                        school_id, source_table, record_id, anomaly_type, severity, amount, details
+                    ) VALUES %s
+                    ON CONFLICT (source_table, record_id, anomaly_type) DO NOTHING
+                    """,
+                    [
+                        (self.school_id, source, flag['record_id'], flag['anomaly_type'],
+                         flag['severity'], flag['amount'], json.dumps(flag['details']))
+                        for flag in flags
+                    ]
+                )
+            tx.execute(
+                """
+                INSERT INTO financial_anomaly_watermarks (school_id, source_table, last_created_at, last_id)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (school_id, source_table) DO UPDATE SET
+                    last_created_at = EXCLUDED.last_created_at,
+                    last_id = EXCLUDED.last_id,
+                    scanned_at = CURRENT_TIMESTAMP
+                WHERE (financial_anomaly_watermarks.last_created_at, financial_anomaly_watermarks.last_id)
+                    < (EXCLUDED.last_created_at, EXCLUDED.last_id)
+                """,
+                (self.school_id, source, last['created_at'], str(last['id'])),
+                fetch=False
+            )
+
+        return {"scanned": len(rows), "flagged": len(flags)}
+
+    def get_scanned_at(self) -> Dict[str, Any]:
+        """When each source's scan last moved past new rows (missing if never)"""
+        rows = self.db.execute_query(
+            """
+            SELECT source_table, scanned_at FROM financial_anomaly_watermarks
+            WHERE school_id = %s
+            """,
+            (self.school_id,),
+            fetch=True
+        )
+        return {row['source_table']: row['scanned_at'] for row in rows}
+
+    # ============================================================================
+    # FLAGS
+    # ============================================================================
+
+    def get_flags(
+        self,
+        status: str = 'open',
+        anomaly_type: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Flags for the director dashboard, newest first"""
+        query = """
+        SELECT id, source_table, record_id, anomaly_type, severity, amount, details,
+               status, reviewed_by, reviewed_at, detected_at
+        FROM financial_anomaly_flags
+        WHERE school_id = %s AND status = %s
+        """
+        params = [self.school_id, status]
+
+        if anomaly_type:
+            query += " AND anomaly_type = %s"
+            params.append(anomaly_type)
+
+        query += " ORDER BY detected_at DESC LIMIT %s"
+        params.append(limit)
+
+        return self.db.execute_query(query, tuple(params), fetch=True)
+
+    def review_flag(self, flag_id: str, status: str, reviewed_by: str) -> Dict[str, Any]:
+        """Mark a flag dismissed or confirmed"""
+        if status not in ('dismissed', 'confirmed'):
+            return {"success": False, "error": "status must be 'dismissed' or 'confirmed'"}
+
+        result = self.db.execute_query(
+            """
+            UPDATE financial_anomaly_flags
+            SET status = %s, reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND school_id = %s
+            RETURNING id
+            """,
+            (status, reviewed_by, flag_id, self.school_id),
+            fetch=True
+        )
+        if not result:
+            return {"success": False, "error": "Flag not found"}
+        return {"success": True, "flag_id": flag_id, "status": status}
+
+
+def get_financial_anomaly_detector(school_id: str) -> FinancialAnomalyDetector:
+    """Helper to get financial anomaly detector instance"""
+    return FinancialAnomalyDetector(school_id)
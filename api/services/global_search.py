@@ -0,0 +1,126 @@
+"""
+Global Search Service
+Find students, parents, teachers and receipts by partial name, phone,
+admission/employee number or receipt number in one query
+
+Reads the trigger-maintained search_index table (migration 022): terms of
+three or more characters match by substring or word similarity through its
+trigram index, shorter ones by name prefix; exact number/phone matches rank
+first.
+"""
+import re
+import time
+from typing import Dict, Any, Optional, Sequence
+
+from api.services.database import get_db_manager
+from api.services.text_search import MIN_TRIGRAM_LENGTH, like_escape
+
+
+ENTITY_TYPES = ("student", "parent", "teacher", "receipt")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+EXACT_BONUS = 1.0
+PREFIX_BONUS = 0.5
+
+_PHONE_LIKE = re.compile(r"^\+?[\d\s\-()]+$")
+
+
+def phone_key(value: str) -> Optional[str]:
+    """Same normalisation as search_phone_key() in SQL: national digits only"""
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith("256") and len(digits) >= 12:
+        digits = digits[3:]
+    return digits.lstrip("0") or None
+
+
+def search_terms(query: str) -> Dict[str, Any]:
+    """Lowercased match term and the exact keys a query could equal"""
+    term = re.sub(r"\s+", " ", query or "").strip().lower()
+    exact = [term] if term else []
+    if _PHONE_LIKE.match(term) and sum(c.isdigit() for c in term) >= MIN_TRIGRAM_LENGTH:
+        key = phone_key(term)
+        if key:
+            # Phone keys are stored without spaces, country code or leading 0
+            term = key
+            exact.append(key)
+    return {"term": term, "exact": exact}
+
+
+class GlobalSearchService:
+    """Cross-entity search for a school"""
+
+    def __init__(self, school_id: str):
+        self.school_id = school_id
+        self.db = get_db_manager()
+
+    def search(
+        self,
+        query: str,
+        types: Optional[Sequence[str]] = None,
+        limit: int = DEFAULT_LIMIT
+    ) -> Dict[str, Any]:
+        """Ranked, typed hits for a query"""
+        started = time.perf_counter()
+        terms = search_terms(query)
+        term = terms["term"]
+        if not term:
+            return {"query": query, "hits": [], "took_ms": 0.0}
+
+        unknown = set(types or ()) - set(ENTITY_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown entity types: {', '.join(sorted(unknown))}")
+
+        escaped = like_escape(term)
+        params = {
+            "school_id": self.school_id,
+            "term": term,
+            "exact": terms["exact"],
+            "prefix": f"{escaped}%",
+            "contains": f"%{escaped}%",
+            "types": list(types or ()),
+            "limit": max(1, min(limit, MAX_LIMIT))
+        }
+
+        if len(term) >= MIN_TRIGRAM_LENGTH:
+            match = "(search_text LIKE %(contains)s OR %(term)s <%% search_text OR exact_keys && %(exact)s::text[])"
+        else:
+            match = "(name_key LIKE %(prefix)s OR exact_keys && %(exact)s::text[])"
+        type_filter = "AND entity_type = ANY(%(types)s)" if types else ""
+
+        rows = self.db.execute_query(
+            f"""
+            SELECT
+                entity_type, entity_id, title, subtitle,
+                word_similarity(%(term)s, search_text)
+                    + CASE WHEN exact_keys && %(exact)s::text[] THEN {EXACT_BONUS} ELSE 0 END
+                    + CASE WHEN name_key LIKE %(prefix)s THEN {PREFIX_BONUS} ELSE 0 END AS rank
+            FROM search_index
+            WHERE school_id = %(school_id)s
+            AND {match}
+            {type_filter}
+            ORDER BY rank DESC, name_key
+            LIMIT %(limit)s
+            """,
+            params,
+            fetch=True
+        )
+
+        return {
+            "query": query,
+            "hits": [
+                {
+                    "type": row["entity_type"],
+                    "id": row["entity_id"],
+                    "title": row["title"],
+                    "subtitle": row["subtitle"],
+                    "score": round(float(row["rank"]), 3)
+                }
+                for row in rows
+            ],
+            "took_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+
+def get_global_search_service(school_id: str) -> GlobalSearchService:
+    """Helper to get global search service instance"""
+    return GlobalSearchService(school_id)
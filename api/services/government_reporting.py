@@ -2,12 +2,29 @@
 Government Reporting Service
 Annual school census, student enrollment reports, teacher data, infrastructure reports
 """
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import json
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 
 from api.services.database import get_db_manager
 
 
+def _month_range(start_date: str, end_date: str) -> Optional[Tuple[date, date]]:
+    """
+    First days of the first and last months when the period covers whole
+    months exactly (e.g. 2025-01-01 to 2025-03-31), otherwise None.
+    Only whole-month periods can be answered from the monthly snapshots.
+    """
+    try:
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+    except (TypeError, ValueError):
+        return None
+    if start.day != 1 or (end + timedelta(days=1)).day != 1 or end < start:
+        return None
+    return start, end.replace(day=1)
+
+
 class GovernmentReportingService:
     """Service for government reporting and compliance"""
     
@@ -24,18 +41,20 @@ class GovernmentReportingService:
         Generate annual school census report
         (Required by Ministry of Education)
         """
-        # Student enrollment by class
+        self._ensure_snapshots()
+        
+        # Student enrollment by class (active students enrolled up to the year)
         enrollment_query = """
         SELECT 
-            class_name,
-            COUNT(*) as total_students,
-            COUNT(CASE WHEN gender = 'male' THEN 1 END) as male_count,
-            COUNT(CASE WHEN gender = 'female' THEN 1 END) as female_count
-        FROM students
+            NULLIF(class_name, '') as class_name,
+            SUM(active_count) as total_students,
+            COALESCE(SUM(active_count) FILTER (WHERE gender = 'male'), 0) as male_count,
+            COALESCE(SUM(active_count) FILTER (WHERE gender = 'female'), 0) as female_count
+        FROM enrollment_snapshots
         WHERE school_id = %s
-        AND status = 'active'
-        AND EXTRACT(YEAR FROM created_at) <= %s
+        AND enrolled_month < make_date(%s + 1, 1, 1)
         GROUP BY class_name
+        HAVING SUM(active_count) > 0
         ORDER BY class_name
         """
         enrollment = self.db.execute_query(enrollment_query, (self.school_id, year), fetch=True)
@@ -89,21 +108,45 @@ class GovernmentReportingService:
         start_date: str,
         end_date: str
     ) -> Dict[str, Any]:
-        """Generate student enrollment report for a period"""
-        query = """
-        SELECT 
-            DATE_TRUNC('month', created_at) as month,
-            COUNT(*) as new_enrollments,
-            COUNT(CASE WHEN gender = 'male' THEN 1 END) as male,
-            COUNT(CASE WHEN gender = 'female' THEN 1 END) as female
-        FROM students
-        WHERE school_id = %s
-        AND created_at BETWEEN %s AND %s
-        GROUP BY DATE_TRUNC('month', created_at)
-        ORDER BY month
         """
+        Generate student enrollment report for a period
+        
+        Whole-month periods are read from enrollment_snapshots; any other
+        range falls back to counting the students table.
+        """
+        months = _month_range(start_date, end_date)
+        if months:
+            self._ensure_snapshots()
+            query = """
+            SELECT 
+                enrolled_month as month,
+                SUM(total_count) as new_enrollments,
+                COALESCE(SUM(total_count) FILTER (WHERE gender = 'male'), 0) as male,
+                COALESCE(SUM(total_count) FILTER (WHERE gender = 'female'), 0) as female
+            FROM enrollment_snapshots
+            WHERE school_id = %s
+            AND enrolled_month BETWEEN %s AND %s
+            GROUP BY enrolled_month
+            HAVING SUM(total_count) > 0
+            ORDER BY month
+            """
+            params = (self.school_id, months[0], months[1])
+        else:
+            query = """
+            SELECT 
+                DATE_TRUNC('month', created_at) as month,
+                COUNT(*) as new_enrollments,
+                COUNT(CASE WHEN gender = 'male' THEN 1 END) as male,
+                COUNT(CASE WHEN gender = 'female' THEN 1 END) as female
+            FROM students
+            WHERE school_id = %s
+            AND created_at BETWEEN %s AND %s
+            GROUP BY DATE_TRUNC('month', created_at)
+            ORDER BY month
+            """
+            params = (self.school_id, start_date, end_date)
         
-        data = self.db.execute_query(query, (self.school_id, start_date, end_date), fetch=True)
+        data = self.db.execute_query(query, params, fetch=True)
         
         return {
             "success": True,
@@ -194,30 +237,64 @@ class GovernmentReportingService:
         start_date: str,
         end_date: str
     ) -> Dict[str, Any]:
-        """Generate financial summary for government audit"""
-        # Fee collection
-        fees_query = """
-        SELECT 
-            SUM(total_amount) as total_fees_charged,
-            SUM(amount_paid) as total_collected,
-            SUM(balance) as outstanding_balance
-        FROM student_fees
-        WHERE school_id = %s
-        AND term_start_date BETWEEN %s AND %s
         """
-        fees = self.db.execute_query(fees_query, (self.school_id, start_date, end_date), fetch=True)
+        Generate financial summary for government audit
         
-        # Expenses
-        expenses_query = """
-        SELECT 
-            category,
-            SUM(amount) as total
-        FROM expenses
-        WHERE school_id = %s
-        AND expense_date BETWEEN %s AND %s
-        GROUP BY category
+        Fees and expenses come from the monthly snapshots for whole-month
+        periods; payroll is one row per staff member per month and is
+        summed live.
         """
-        expenses = self.db.execute_query(expenses_query, (self.school_id, start_date, end_date), fetch=True)
+        months = _month_range(start_date, end_date)
+        if months:
+            self._ensure_snapshots()
+            fees_query = """
+            SELECT 
+                SUM(fees_charged) as total_fees_charged,
+                SUM(amount_collected) as total_collected,
+                SUM(outstanding_balance) as outstanding_balance
+            FROM fee_snapshots
+            WHERE school_id = %s
+            AND fee_month BETWEEN %s AND %s
+            """
+            expenses_query = """
+            SELECT 
+                category,
+                SUM(total_amount) as total
+            FROM expense_snapshots
+            WHERE school_id = %s
+            AND expense_month BETWEEN %s AND %s
+            GROUP BY category
+            HAVING SUM(total_amount) <> 0
+            """
+            params = (self.school_id, months[0], months[1])
+        else:
+            # Same months and amounts as the snapshots, on either student_fees layout
+            fees_query = """
+            SELECT 
+                SUM(fee_due_amount(to_jsonb(sf))) as total_fees_charged,
+                SUM(sf.amount_paid) as total_collected,
+                SUM(sf.balance) as outstanding_balance
+            FROM student_fees sf
+            JOIN students s ON s.id = sf.student_id
+            WHERE s.school_id = %s
+            AND COALESCE(sf.due_date, sf.created_at::date) BETWEEN %s AND %s
+            """
+            expenses_query = """
+            SELECT 
+                category,
+                SUM(amount) as total
+            FROM expenses
+            WHERE school_id = %s
+            AND expense_date BETWEEN %s AND %s
+            GROUP BY category
+            """
+            params = (self.school_id, start_date, end_date)
+        
+        # Fee collection
+        fees = self.db.execute_query(fees_query, params, fetch=True)
+        
+        # Expenses
+        expenses = self.db.execute_query(expenses_query, params, fetch=True)
         
         # Payroll
         payroll_query = """
@@ -238,28 +315,183 @@ class GovernmentReportingService:
             "total_payroll": payroll[0]['total_payroll'] if payroll else 0
         }
     
+    # ============================================================================
+    # REPORT SNAPSHOTS
+    # ============================================================================
+    
+    def refresh_snapshots(self) -> Dict[str, Any]:
+        """
+        Rebuild this school's report snapshots from the live tables
+        
+        Triggers keep the snapshots current between runs; the scheduled
+        refresh corrects any drift and seeds schools seen for the first time.
+        Each rollup is rebuilt under its own savepoint, so a failure in one
+        (e.g. fees on a drifted student_fees table) leaves the others and
+        the census that reads enrollment_snapshots working.
+        """
+        rollups = (
+            ("enrollment_buckets", "enrollment_snapshots", self._rebuild_enrollment_snapshots),
+            ("fee_buckets", "fee_snapshots", self._rebuild_fee_snapshots),
+            ("expense_buckets", "expense_snapshots", self._rebuild_expense_snapshots),
+        )
+        counts: Dict[str, Optional[int]] = {}
+        errors: Dict[str, str] = {}
+        
+        with self.db.transaction() as tx:
+            tx.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                (f"report_snapshots:{self.school_id}",)
+            )
+            
+            for name, table, rebuild in rollups:
+                try:
+                    with tx.savepoint():
+                        tx.execute(f"DELETE FROM {table} WHERE school_id = %s", (self.school_id,), fetch=False)
+                        counts[name] = rebuild(tx)
+                except Exception as exc:
+                    counts[name] = None
+                    errors[name] = str(exc)
+            
+            state = tx.fetch_one(
+                """
+                INSERT INTO report_snapshot_state (school_id, refreshed_at)
+                VALUES (%s, CURRENT_TIMESTAMP)
+                ON CONFLICT (school_id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+                RETURNING refreshed_at
+                """,
+                (self.school_id,)
+            )
+        
+        result = {
+            "success": not errors,
+            "school_id": self.school_id,
+            "refreshed_at": state['refreshed_at'],
+            **counts
+        }
+        if errors:
+            result["errors"] = errors
+        return result
+    
+    def _rebuild_enrollment_snapshots(self, tx) -> int:
+        tx.execute(
+            """
+            INSERT INTO enrollment_snapshots (
+                school_id, enrolled_month, class_name, gender, total_count, active_count
+            )
+            SELECT 
+                school_id,
+                DATE_TRUNC('month', created_at)::date,
+                COALESCE(class_name, ''),
+                COALESCE(gender, ''),
+                COUNT(*),
+                COUNT(*) FILTER (WHERE status = 'active')
+            FROM students
+            WHERE school_id = %s AND created_at IS NOT NULL
+            GROUP BY 1, 2, 3, 4
+            """,
+            (self.school_id,),
+            fetch=False
+        )
+        return tx.rowcount
+    
+    def _rebuild_fee_snapshots(self, tx) -> int:
+        # Replays the school's fee rows through the trigger's
+        # fee_snapshot_add, which reads them as JSONB, so the rebuild
+        # tolerates the same student_fees drift (school_id, the amount
+        # column) the trigger does
+        tx.execute(
+            """
+            SELECT fee_snapshot_add(ARRAY(
+                SELECT to_jsonb(sf)
+                FROM student_fees sf
+                LEFT JOIN students s ON s.id = sf.student_id
+                WHERE COALESCE((to_jsonb(sf)->>'school_id')::uuid, s.school_id) = %s
+            ), '{}')
+            """,
+            (self.school_id,),
+            fetch=False
+        )
+        buckets = tx.fetch_one(
+            "SELECT COUNT(*) AS buckets FROM fee_snapshots WHERE school_id = %s",
+            (self.school_id,)
+        )
+        return buckets['buckets']
+    
+    def _rebuild_expense_snapshots(self, tx) -> int:
+        tx.execute(
+            """
+            INSERT INTO expense_snapshots (school_id, expense_month, category, total_amount)
+            SELECT 
+                school_id,
+                DATE_TRUNC('month', expense_date)::date,
+                category,
+                COALESCE(SUM(amount), 0)
+            FROM expenses
+            WHERE school_id = %s
+            GROUP BY 1, 2, 3
+            """,
+            (self.school_id,),
+            fetch=False
+        )
+        return tx.rowcount
+    
+    def _ensure_snapshots(self):
+        """Seed the snapshots on first use if the scheduled job has not yet"""
+        state = self.db.execute_query(
+            "SELECT refreshed_at FROM report_snapshot_state WHERE school_id = %s",
+            (self.school_id,),
+            fetch=True
+        )
+        if not state:
+            self.refresh_snapshots()
+    
     # ============================================================================
     # REPORT STORAGE & SUBMISSION
     # ============================================================================
     
+    @staticmethod
+    def report_key(
+        report_type: str,
+        year: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> str:
+        """Deterministic key a stored report is found by, e.g. 'enrollment:2025-01-01:2025-03-31'"""
+        if report_type == "annual_census":
+            return f"{report_type}:{year}"
+        return f"{report_type}:{start_date}:{end_date}"
+    
     def save_report(
         self,
         report_type: str,
         report_year: int,
         report_data: Dict[str, Any],
-        submitted_by: str
+        submitted_by: Optional[str] = None,
+        report_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Save generated report to database"""
+        """
+        Save generated report to database
+        
+        With a report_key the payload replaces any report stored under the
+        same key, so get_or_generate_report can serve it again.
+        """
         query = """
         INSERT INTO government_reports (
-            school_id, report_type, report_year, report_data, submitted_by
-        ) VALUES (%s, %s, %s, %s, %s)
+            school_id, report_type, report_year, report_data, submitted_by, report_key
+        ) VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (school_id, report_key) WHERE report_key IS NOT NULL DO UPDATE SET
+            report_data = EXCLUDED.report_data,
+            submitted_by = COALESCE(EXCLUDED.submitted_by, government_reports.submitted_by),
+            created_at = CURRENT_TIMESTAMP
         RETURNING id
         """
         
         result = self.db.execute_query(
             query,
-            (self.school_id, report_type, report_year, report_data, submitted_by),
+            (
+                self.school_id, report_type, report_year,
+                json.dumps(report_data, default=str), submitted_by, report_key
+            ),
             fetch=True
         )
         
@@ -267,7 +499,71 @@ class GovernmentReportingService:
             "success": True,
             "report_id": result[0]['id'],
             "report_type": report_type,
-            "report_year": report_year
+            "report_year": report_year,
+            "report_key": report_key
+        }
+    
+    def get_saved_report(self, report_key: str) -> Optional[Dict[str, Any]]:
+        """Stored report for a key, if one has been saved"""
+        result = self.db.execute_query(
+            """
+            SELECT id, report_type, report_year, report_data, status, created_at
+            FROM government_reports
+            WHERE school_id = %s AND report_key = %s
+            """,
+            (self.school_id, report_key),
+            fetch=True
+        )
+        return result[0] if result else None
+    
+    def get_or_generate_report(
+        self,
+        report_type: str,
+        year: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        submitted_by: Optional[str] = None,
+        regenerate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Return the stored payload for a report, generating and saving it the
+        first time (or when regenerate is set)
+        """
+        if report_type == "annual_census":
+            if year is None:
+                return {"success": False, "error": "year is required for annual_census"}
+            report_year = year
+        elif report_type in ("enrollment", "financial_summary"):
+            if not start_date or not end_date:
+                return {"success": False, "error": f"start_date and end_date are required for {report_type}"}
+            report_year = int(start_date[:4])
+        else:
+            return {"success": False, "error": f"Unsupported report type: {report_type}"}
+        
+        key = self.report_key(report_type, year, start_date, end_date)
+        if not regenerate:
+            saved = self.get_saved_report(key)
+            if saved:
+                return {
+                    "success": True,
+                    "report_id": saved['id'],
+                    "cached": True,
+                    "report": saved['report_data']
+                }
+        
+        if report_type == "annual_census":
+            report = self.generate_annual_census(year)
+        elif report_type == "enrollment":
+            report = self.generate_enrollment_report(start_date, end_date)
+        else:
+            report = self.generate_financial_summary_report(start_date, end_date)
+        
+        saved = self.save_report(report_type, report_year, report, submitted_by, report_key=key)
+        return {
+            "success": True,
+            "report_id": saved['report_id'],
+            "cached": False,
+            "report": report
         }
     
     def mark_report_submitted(
@@ -11,6 +11,15 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, date, timedelta
 
 from api.services.database import get_db_manager
+from api.services.pagination import fetch_page
+from api.services.text_search import TextSearch
+
+BOOK_SEARCH = TextSearch(
+    table="library_books",
+    columns="*",
+    fields=[("title", 1.0), ("author", 0.8)],
+    browse_order=[("title", False)]
+)
 
 class LibraryService:
     # FINE_PER_DAY is now managed dynamically via 'library_settings' table
@@ -72,95 +81,99 @@ class LibraryService:
         2. Book exists and has available copies.
         3. Student doesn't have overdue books (Policy).
         """
-        # 1. Check availability
-        book = self.get_book_by_id(book_id)
-        if not book:
-            return {"success": False, "error": "Book not found"}
-        if book['available_copies'] < 1:
-            return {"success": False, "error": "No copies available. Please reserve."}
-
-        # 2. Check student standing (Simulated policy: Max 3 books)
-        current_loans = self.get_student_borrowings(student_id)
-        active_loans = [l for l in current_loans if l['status'] == 'active']
-        if len(active_loans) >= 3:
-             return {"success": False, "error": "Borrowing limit reached (Max 3 books)."}
-
-        # 3. Create Transaction
-        query = """
-        INSERT INTO library_transactions (
-            school_id, student_id, book_id, borrow_date, 
-            due_date, status
-        ) VALUES (%s, %s, %s, CURRENT_DATE, %s, 'active')
-        RETURNING id
-        """
-        tx = self.db.execute_query(
-            query, 
-            (self.school_id, student_id, book_id, due_date), 
-            fetch=True
-        )
-        
-        # 4. Decrement Stock
-        self.db.execute_query(
-            "UPDATE library_books SET available_copies = available_copies - 1 WHERE id = %s",
-            (book_id,)
-        )
+        with self.db.transaction() as tx:
+            # 1. Check availability (row locked so two desks can't lend the last copy)
+            book = tx.fetch_one(
+                "SELECT available_copies FROM library_books WHERE id = %s AND school_id = %s FOR UPDATE",
+                (book_id, self.school_id)
+            )
+            if not book:
+                return {"success": False, "error": "Book not found"}
+            if book['available_copies'] < 1:
+                return {"success": False, "error": "No copies available. Please reserve."}
+
+            # 2. Check student standing (Simulated policy: Max 3 books)
+            active_loans = tx.fetch_one(
+                "SELECT COUNT(*) AS c FROM library_transactions WHERE student_id = %s AND status = 'active'",
+                (student_id,)
+            )['c']
+            if active_loans >= 3:
+                 return {"success": False, "error": "Borrowing limit reached (Max 3 books)."}
+
+            # 3. Create Transaction
+            query = """
+            INSERT INTO library_transactions (
+                school_id, student_id, book_id, borrow_date, 
+                due_date, status
+            ) VALUES (%s, %s, %s, CURRENT_DATE, %s, 'active')
+            RETURNING id
+            """
+            tx_row = tx.fetch_one(query, (self.school_id, student_id, book_id, due_date))
+            
+            # 4. Decrement Stock
+            tx.execute(
+                "UPDATE library_books SET available_copies = available_copies - 1 WHERE id = %s",
+                (book_id,),
+                fetch=False
+            )
         
-        return {"success": True, "transaction_id": tx[0]['id']}
+        return {"success": True, "transaction_id": tx_row['id']}
 
     def return_book(self, transaction_id: str) -> Dict[str, Any]:
         """
         Return a book.
         Calculates fines if overdue.
         """
-        # Get Tx
-        tx = self.db.execute_query(
-            "SELECT * FROM library_transactions WHERE id = %s", 
-            (transaction_id,), fetch=True
-        )
-        if not tx:
-             return {"success": False, "error": "Transaction not found"}
-        tx = tx[0]
-        
-        if tx['status'] == 'returned':
-             return {"success": False, "error": "Book already returned"}
-
-        # Calculate Dates
-        due_date = tx['due_date'] # datetime.date object usually from driver
-        if isinstance(due_date, str):
-            due_date = datetime.strptime(due_date, '%Y-%m-%d').date()
-            
-        today = date.today()
-        
-        fine = 0.0
-        if today > due_date:
-            # Get configured fine rate
-            settings = self.get_settings()
-            fine_rate = settings["fine_per_day"]
+        with self.db.transaction() as uow:
+            # Get Tx (locked so a double-scan can't return the book twice)
+            tx = uow.fetch_one(
+                "SELECT * FROM library_transactions WHERE id = %s FOR UPDATE", 
+                (transaction_id,)
+            )
+            if not tx:
+                 return {"success": False, "error": "Transaction not found"}
             
-            overdue_days = (today - due_date).days
-            fine = overdue_days * fine_rate
+            if tx['status'] in ('returned', 'returned_with_fine'):
+                 return {"success": False, "error": "Book already returned"}
+
+            # Calculate Dates
+            due_date = tx['due_date'] # datetime.date object usually from driver
+            if isinstance(due_date, str):
+                due_date = datetime.strptime(due_date, '%Y-%m-%d').date()
+                
+            today = date.today()
             
-        # Update Tx
-        status = 'returned'
-        if fine > 0:
-            status = 'returned_with_fine'
+            fine = 0.0
+            if today > due_date:
+                # Get configured fine rate
+                settings = self.get_settings()
+                fine_rate = settings["fine_per_day"]
+                
+                overdue_days = (today - due_date).days
+                fine = overdue_days * fine_rate
+                
+            # Update Tx
+            status = 'returned'
+            if fine > 0:
+                status = 'returned_with_fine'
+                
+            update_query = """
+            UPDATE library_transactions 
+            SET return_date = CURRENT_DATE, 
+                status = %s, 
+                fine_amount = %s,
+                fine_status = %s
+            WHERE id = %s
+            """
+            fine_status = 'unpaid' if fine > 0 else 'none'
+            uow.execute(update_query, (status, fine, fine_status, transaction_id), fetch=False)
             
-        update_query = """
-        UPDATE library_transactions 
-        SET return_date = CURRENT_DATE, 
-            status = %s, 
-            fine_amount = %s,
-            fine_status = %s
-        WHERE id = %s
-        """
-        fine_status = 'unpaid' if fine > 0 else 'none'
-        self.db.execute_query(update_query, (status, fine, fine_status, transaction_id))
-        
-        # Increment Stock
-        self.db.execute_query(
-            "UPDATE library_books SET available_copies = available_copies + 1 WHERE id = %s",
-            (tx['book_id'],)
-        )
+            # Increment Stock
+            uow.execute(
+                "UPDATE library_books SET available_copies = available_copies + 1 WHERE id = %s",
+                (tx['book_id'],),
+                fetch=False
+            )
         
         return {
             "success": True, 
@@ -185,20 +198,28 @@ class LibraryService:
         )
         return res[0] if res else None
 
-    def search_books(self, term: str = None, category: str = None, available: bool = False) -> List[Dict]:
-        query = "SELECT * FROM library_books WHERE school_id = %s"
-        params = [self.school_id]
-        
-        if term:
-            query += " AND (title ILIKE %s OR author ILIKE %s)"
-            params.extend([f"%{term}%", f"%{term}%"])
+    def search_books(
+        self,
+        term: str = None,
+        category: str = None,
+        available: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Ranked title/author search (alphabetical without a term), one page
+        at a time; pass the returned next_cursor to get the following page
+        """
+        conditions = []
         if category:
-            query += " AND category = %s"
-            params.append(category)
+            conditions.append(("category = %s", (category,)))
         if available:
-            query += " AND available_copies > 0"
-            
-        return self.db.execute_query(query, tuple(params), fetch=True)
+            # Matches the predicate of idx_library_books_available
+            conditions.append(("available_copies > 0", ()))
+
+        return BOOK_SEARCH.search(
+            self.db, self.school_id, term=term, conditions=conditions, limit=limit, cursor=cursor
+        )
 
     def get_student_borrowings(self, student_id: str, include_returned: bool = False) -> List[Dict]:
         query = """
@@ -212,15 +233,18 @@ class LibraryService:
             
         return self.db.execute_query(query, (student_id,), fetch=True)
     
-    def get_unpaid_fines(self) -> List[Dict]:
-         query = """
-         SELECT lt.id, s.first_name, s.last_name, lb.title, lt.fine_amount
+    def get_unpaid_fines(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+         """One page of unpaid fines, newest first (items, next_cursor, has_more)"""
+         select = """
+         SELECT lt.id, s.first_name, s.last_name, lb.title, lt.fine_amount, lt.created_at
          FROM library_transactions lt
          JOIN students s ON lt.student_id = s.id
          JOIN library_books lb ON lt.book_id = lb.id
-         WHERE lt.fine_status = 'unpaid'
          """
-         return self.db.execute_query(query, (), fetch=True)
+         return fetch_page(
+             self.db, select, ["lt.school_id = %s", "lt.fine_status = 'unpaid'"], [self.school_id],
+             keys=[("lt.created_at", True), ("lt.id", True)], limit=limit, cursor=cursor
+         )
 
     def get_library_statistics(self) -> Dict:
         # Simple stats
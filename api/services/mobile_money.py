@@ -92,9 +92,12 @@ class MobileMoneyService:
             "amount": str(amount) if amount is not None else transaction["amount"],
         }
 
+        already_settled = transaction["status"] == "success"
         updated = self.ops.update_transaction(reference, update_payload)
 
-        if status == "success":
+        # record_payment settles the fee row, so a retried callback must not
+        # post the same payment twice
+        if status == "success" and not already_settled:
             self._record_fee_payment(updated)
 
         return {"success": True, "transaction": updated}
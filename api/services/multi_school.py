@@ -4,10 +4,11 @@ Handles cross-school access for parents with children in different schools
 Enables single login, school switching, and combined views
 """
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from api.services.database import get_db_manager
 from api.services.notifications import NotificationService
+from api.services.student_summary import get_student_summary_service
 
 
 class MultiSchoolService:
@@ -50,34 +51,35 @@ class MultiSchoolService:
         
         schools = self.db.execute_query(query, (self.user_id,), fetch=True)
         
-        # For each school, get children if user is a parent
+        # Children at every school the user is a parent at, in one query
+        parent_school_ids = [str(school['school_id']) for school in schools if school['role'] == 'parent']
+        children_by_school = {}
+        if parent_school_ids:
+            children_query = """
+            SELECT 
+                pcg.school_id,
+                s.id, s.first_name, s.last_name, s.class_name, 
+                s.admission_number, s.photo_url,
+                pcg.relationship, pcg.is_primary
+            FROM parent_children_global pcg
+            JOIN students s ON s.id = pcg.child_student_id
+            WHERE pcg.parent_user_id = %s AND pcg.school_id = ANY(%s::uuid[])
+            ORDER BY s.first_name
+            """
+            for child in self.db.execute_query(
+                children_query,
+                (self.user_id, parent_school_ids),
+                fetch=True
+            ):
+                child = dict(child)
+                children_by_school.setdefault(str(child.pop('school_id')), []).append(child)
+        
         result = []
         for school in schools:
             school_data = dict(school)
-            
-            if school['role'] == 'parent':
-                # Get children at this school
-                children_query = """
-                SELECT 
-                    s.id, s.first_name, s.last_name, s.class_name, 
-                    s.admission_number, s.photo_url,
-                    pcg.relationship, pcg.is_primary
-                FROM parent_children_global pcg
-                JOIN students s ON s.id = pcg.child_student_id
-                WHERE pcg.parent_user_id = %s AND pcg.school_id = %s
-                ORDER BY s.first_name
-                """
-                children = self.db.execute_query(
-                    children_query, 
-                    (self.user_id, school['school_id']), 
-                    fetch=True
-                )
-                school_data['children'] = children
-                school_data['children_count'] = len(children)
-            else:
-                school_data['children'] = []
-                school_data['children_count'] = 0
-            
+            children = children_by_school.get(str(school['school_id']), []) if school['role'] == 'parent' else []
+            school_data['children'] = children
+            school_data['children_count'] = len(children)
             result.append(school_data)
         
         return {
@@ -90,9 +92,24 @@ class MultiSchoolService:
         """
         Get combined dashboard for all schools
         Shows all children across all schools in one view
+        
+        Costs a fixed number of queries however many schools and children
+        the parent has: schools, children, summaries, recent grades and
+        notifications are each fetched once for everything.
         """
         schools_data = self.get_user_schools()
         
+        child_ids = [
+            str(child['id'])
+            for school in schools_data['schools'] if school['role'] == 'parent'
+            for child in school['children']
+        ]
+        summaries = get_student_summary_service().get_summaries(child_ids)
+        recent_grades = self._get_recent_grades(child_ids)
+        notifications_by_school = self._get_school_notifications(
+            [str(school['school_id']) for school in schools_data['schools']]
+        )
+        
         combined_data = {
             "user_id": self.user_id,
             "total_schools": schools_data['total_schools'],
@@ -101,6 +118,7 @@ class MultiSchoolService:
         
         total_fees = 0
         total_notifications = 0
+        today = date.today()
         
         for school in schools_data['schools']:
             school_summary = {
@@ -111,20 +129,29 @@ class MultiSchoolService:
             }
             
             if school['role'] == 'parent':
-                # Get detailed info for each child
                 for child in school['children']:
-                    child_data = self._get_child_summary(
-                        child['id'], 
-                        school['school_id']
+                    summary = summaries.get(str(child['id']), {})
+                    attendance_today = (
+                        summary.get('last_attendance_status')
+                        if summary.get('last_attendance_date') == today else None
                     )
-                    school_summary['children'].append(child_data)
+                    fee_balance = float(summary['fee_balance']) if summary.get('fee_balance') else 0
                     
-                    # Add to totals
-                    if 'fee_balance' in child_data:
-                        total_fees += child_data['fee_balance']
+                    school_summary['children'].append({
+                        "id": child['id'],
+                        "first_name": child['first_name'],
+                        "last_name": child['last_name'],
+                        "class_name": child['class_name'],
+                        "admission_number": child['admission_number'],
+                        "photo_url": child['photo_url'],
+                        "attendance_today": attendance_today or 'unknown',
+                        "fee_balance": fee_balance,
+                        "recent_grade": recent_grades.get(str(child['id']))
+                    })
+                    total_fees += fee_balance
             
-            # Get recent notifications for this school
-            notifications = self._get_school_notifications(school['school_id'])
+            # Recent notifications for this school
+            notifications = notifications_by_school.get(str(school['school_id']), [])
             school_summary['recent_notifications'] = notifications
             total_notifications += len(notifications)
             
@@ -135,70 +162,51 @@ class MultiSchoolService:
         
         return combined_data
     
-    def _get_child_summary(self, student_id: str, school_id: str) -> Dict[str, Any]:
-        """Get summary data for a child"""
-        # Student basic info
-        student_query = """
-        SELECT id, first_name, last_name, class_name, admission_number, photo_url
-        FROM students WHERE id = %s
-        """
-        student = self.db.execute_query(student_query, (student_id,), fetch=True)[0]
-        
-        # Today's attendance
-        attendance_query = """
-        SELECT status FROM attendance
-        WHERE student_id = %s AND date = CURRENT_DATE
-        LIMIT 1
-        """
-        attendance = self.db.execute_query(attendance_query, (student_id,), fetch=True)
-        attendance_today = attendance[0]['status'] if attendance else 'unknown'
-        
-        # Fee balance
-        fee_query = """
-        SELECT SUM(balance) as balance
-        FROM student_fees
-        WHERE student_id = %s
-        """
-        fees = self.db.execute_query(fee_query, (student_id,), fetch=True)
-        fee_balance = float(fees[0]['balance']) if fees and fees[0]['balance'] else 0
+    def _get_recent_grades(self, student_ids: List[str]) -> Dict[str, Dict]:
+        """Latest assessment result per student"""
+        if not student_ids:
+            return {}
         
-        # Recent grade
-        grade_query = """
-        SELECT a.subject, ar.marks_obtained, a.max_marks, ar.grade
+        query = """
+        SELECT DISTINCT ON (ar.student_id)
+            ar.student_id, a.subject, ar.marks_obtained, a.max_marks, ar.grade
         FROM assessment_results ar
         JOIN assessments a ON a.id = ar.assessment_id
-        WHERE ar.student_id = %s
-        ORDER BY a.date DESC
-        LIMIT 1
+        WHERE ar.student_id = ANY(%s::uuid[])
+        ORDER BY ar.student_id, a.date DESC
         """
-        recent_grade = self.db.execute_query(grade_query, (student_id,), fetch=True)
         
-        return {
-            "id": student['id'],
-            "first_name": student['first_name'],
-            "last_name": student['last_name'],
-            "class_name": student['class_name'],
-            "admission_number": student['admission_number'],
-            "photo_url": student['photo_url'],
-            "attendance_today": attendance_today,
-            "fee_balance": fee_balance,
-            "recent_grade": recent_grade[0] if recent_grade else None
-        }
+        grades = {}
+        for row in self.db.execute_query(query, (student_ids,), fetch=True):
+            row = dict(row)
+            grades[str(row.pop('student_id'))] = row
+        return grades
     
-    def _get_school_notifications(self, school_id: str, limit: int = 5) -> List[Dict]:
-        """Get recent notifications for a school"""
+    def _get_school_notifications(self, school_ids: List[str], limit: int = 5) -> Dict[str, List[Dict]]:
+        """Recent notifications for each school, keyed by school id"""
+        if not school_ids:
+            return {}
+        
         query = """
-        SELECT id, notification_type, title, message, priority, is_read, created_at
-        FROM notifications
-        WHERE school_id = %s 
-        AND recipient_type = 'parent'
-        AND created_at >= CURRENT_DATE - INTERVAL '7 days'
+        SELECT id, school_id, notification_type, title, message, priority, is_read, created_at
+        FROM (
+            SELECT 
+                n.*,
+                ROW_NUMBER() OVER (PARTITION BY n.school_id ORDER BY n.created_at DESC) as rn
+            FROM notifications n
+            WHERE n.school_id = ANY(%s::uuid[])
+            AND n.recipient_type = 'parent'
+            AND n.created_at >= CURRENT_DATE - INTERVAL '7 days'
+        ) ranked
+        WHERE rn <= %s
         ORDER BY created_at DESC
-        LIMIT %s
         """
         
-        notifications = self.db.execute_query(query, (school_id, limit), fetch=True)
-        return notifications
+        by_school = {}
+        for row in self.db.execute_query(query, (school_ids, limit), fetch=True):
+            row = dict(row)
+            by_school.setdefault(str(row.pop('school_id')), []).append(row)
+        return by_school
     
     def switch_school(self, school_id: str) -> Dict[str, Any]:
         """
@@ -3,8 +3,12 @@ OCR Service - Real Photo Processing
 Handles attendance sheets, exam results, documents, inventory, library records
 """
 import base64
+import hashlib
 import io
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from PIL import Image
 import json
@@ -19,6 +23,35 @@ from api.core.config import get_settings
 from api.services.clarity import ClarityClient
 
 
+# OCR-friendly upload size: long side in pixels. Phone photos of registers are
+# often 4000px+, which only slows the upload without improving recognition.
+OCR_MAX_DIMENSION = 1600
+OCR_JPEG_QUALITY = 85
+OCR_BATCH_CONCURRENCY = 4
+OCR_CACHE_SIZE = 256
+
+# Results cache keyed by SHA-256 of the original image bytes, shared by all
+# OCRService instances in the process so re-uploaded sheets cost nothing.
+_ocr_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+
+def _cache_get(content_hash: str) -> Optional[Dict[str, Any]]:
+    with _ocr_cache_lock:
+        result = _ocr_cache.get(content_hash)
+        if result is not None:
+            _ocr_cache.move_to_end(content_hash)
+        return result
+
+
+def _cache_put(content_hash: str, result: Dict[str, Any]) -> None:
+    with _ocr_cache_lock:
+        _ocr_cache[content_hash] = result
+        _ocr_cache.move_to_end(content_hash)
+        while len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+
+
 class OCRService:
     """Production OCR service using Google Cloud Vision + Clarity fallback"""
     
@@ -44,22 +77,8 @@ class OCRService:
             Dict with extracted text and confidence
         """
         try:
-            if image_type == "base64":
-                # Remove data URL prefix if present
-                if "base64," in image_data:
-                    image_data = image_data.split("base64,")[1]
-                image_bytes = base64.b64decode(image_data)
-            else:
-                with open(image_data, 'rb') as f:
-                    image_bytes = f.read()
-            
-            # Try Google Vision first
-            if self.vision_client:
-                return self._google_vision_ocr(image_bytes)
-            
-            # Fallback to Clarity
-            return self._clarity_ocr(image_bytes)
-            
+            image_bytes = self._load_image_bytes(image_data, image_type)
+            return self._ocr_bytes(image_bytes)
         except Exception as e:
             return {
                 "success": False,
@@ -68,6 +87,135 @@ class OCRService:
                 "confidence": 0.0
             }
     
+    def process_batch(self, documents: List[Dict[str, Any]],
+                      max_concurrency: int = OCR_BATCH_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        OCR a batch of documents concurrently
+        
+        Identical pages (same content hash) are sent to the provider once, and
+        pages already OCR'd by this process are served from the cache.
+        
+        Args:
+            documents: List of dicts with id, image_data and type ("base64" or "file")
+            max_concurrency: Maximum provider calls in flight at once
+            
+        Returns:
+            One result per input document, in input order, each carrying
+            document_id, content_hash and cached flag alongside the OCR result
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        hash_to_indexes: Dict[str, List[int]] = OrderedDict()
+        hash_to_bytes: Dict[str, bytes] = {}
+        
+        for index, doc in enumerate(documents):
+            try:
+                image_bytes = self._load_image_bytes(doc["image_data"], doc.get("type", "base64"))
+            except Exception as e:
+                results[index] = {
+                    "document_id": doc.get("id"),
+                    "success": False,
+                    "error": str(e),
+                    "text": "",
+                    "confidence": 0.0
+                }
+                continue
+            content_hash = hashlib.sha256(image_bytes).hexdigest()
+            hash_to_indexes.setdefault(content_hash, []).append(index)
+            hash_to_bytes.setdefault(content_hash, image_bytes)
+        
+        # Keep the cached value itself: a concurrent batch may evict it
+        ocr_by_hash: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for content_hash in hash_to_indexes:
+            cached = _cache_get(content_hash)
+            if cached is not None:
+                ocr_by_hash[content_hash] = cached
+            else:
+                pending.append(content_hash)
+        cached_hashes = set(ocr_by_hash)
+        
+        def run(content_hash: str) -> Dict[str, Any]:
+            try:
+                return self._ocr_bytes(hash_to_bytes[content_hash], content_hash=content_hash)
+            except Exception as e:
+                return {"success": False, "error": str(e), "text": "", "confidence": 0.0}
+        
+        if pending:
+            workers = max(1, min(max_concurrency, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for content_hash, result in zip(pending, executor.map(run, pending)):
+                    ocr_by_hash[content_hash] = result
+        
+        for content_hash, indexes in hash_to_indexes.items():
+            ocr_result = ocr_by_hash[content_hash]
+            for position, index in enumerate(indexes):
+                results[index] = {
+                    **ocr_result,
+                    "document_id": documents[index].get("id"),
+                    "content_hash": content_hash,
+                    "cached": content_hash in cached_hashes or position > 0
+                }
+        
+        return results
+    
+    def _load_image_bytes(self, image_data: str, image_type: str = "base64") -> bytes:
+        """Decode a base64 payload (with or without data URL prefix) or read a file"""
+        if image_type == "base64":
+            # Remove data URL prefix if present
+            if "base64," in image_data:
+                image_data = image_data.split("base64,")[1]
+            return base64.b64decode(image_data)
+        with open(image_data, 'rb') as f:
+            return f.read()
+    
+    def _ocr_bytes(self, image_bytes: bytes, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Run OCR on raw image bytes, consulting and filling the results cache"""
+        content_hash = content_hash or hashlib.sha256(image_bytes).hexdigest()
+        cached = _cache_get(content_hash)
+        if cached is not None:
+            return dict(cached)
+        
+        prepared = self.prepare_image(image_bytes)
+        
+        # Try Google Vision first, fallback to Clarity
+        if self.vision_client:
+            result = self._google_vision_ocr(prepared)
+        else:
+            result = self._clarity_ocr(prepared)
+        
+        if result.get("success"):
+            _cache_put(content_hash, result)
+        return dict(result)
+    
+    @staticmethod
+    def prepare_image(image_bytes: bytes, max_dimension: int = OCR_MAX_DIMENSION) -> bytes:
+        """
+        Shrink and grayscale an image before upload
+        
+        Text recognition does not need colour or more than ~1600px on the long
+        side. The result is a JPEG (cheap to encode, small for photos); when it
+        is not smaller than the original, the original bytes are sent instead.
+        Images PIL cannot open are returned untouched so the provider can still
+        try them.
+        """
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                img = img.convert("L")
+                if max(img.size) > max_dimension:
+                    img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+                buffer = io.BytesIO()
+                img.save(buffer, format="JPEG", quality=OCR_JPEG_QUALITY)
+                prepared = buffer.getvalue()
+        except Exception:
+            return image_bytes
+        return prepared if len(prepared) < len(image_bytes) else image_bytes
+    
+    @staticmethod
+    def _image_mime(image_bytes: bytes) -> str:
+        if image_bytes.startswith(b"\xff\xd8"):
+            return "image/jpeg"
+        return "image/png"
+    
     def _google_vision_ocr(self, image_bytes: bytes) -> Dict[str, Any]:
         """Use Google Cloud Vision for OCR"""
         image = vision.Image(content=image_bytes)
@@ -117,13 +265,14 @@ class OCRService:
         try:
             # Convert to base64 for Clarity
             b64_image = base64.b64encode(image_bytes).decode()
+            mime = self._image_mime(image_bytes)
             
             result = clarity.analyze(
                 directive="Extract all text from this image. Return structured data.",
                 domain="data-entry",
                 files=[{
-                    "filename": "document.png",
-                    "data": f"data:image/png;base64,{b64_image}"
+                    "filename": f"document.{mime.split('/')[1]}",
+                    "data": f"data:{mime};base64,{b64_image}"
                 }]
             )
             
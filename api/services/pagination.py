@@ -0,0 +1,148 @@
+"""
+Keyset Pagination
+Opaque cursors and seek conditions for list endpoints
+
+A page is fetched with `WHERE <keyset condition> ORDER BY <keys> LIMIT n + 1`;
+the extra row only tells whether another page exists. The cursor carries the
+sort keys of the last row returned, so page 50 costs the same index seek as
+page 1 (unlike OFFSET, which reads and discards every earlier row).
+"""
+import base64
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Newest first - the order of most list endpoints
+NEWEST_FIRST = (("created_at", True), ("id", True))
+
+
+def page_size(limit: Optional[int], default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Requested page size clamped to 1..MAX_PAGE_SIZE"""
+    if not limit:
+        return default
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque token for the sort keys of a row"""
+    payload = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, length: int) -> List[Any]:
+    """Sort keys from a token; ValueError if it is not one of ours"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_condition(keys: Sequence[Tuple], values: Sequence[Any]) -> Tuple[str, List[Any]]:
+    """
+    SQL condition selecting the rows after `values` in the order given by
+    keys: (expression, descending[, column]) tuples, the last of which must
+    be unique
+
+    Same-direction keys become a row comparison, which can use a matching
+    composite index; mixed directions are expanded into OR-ed prefixes.
+    """
+    expressions = [key[0] for key in keys]
+    directions = {key[1] for key in keys}
+    if len(directions) == 1:
+        operator = "<" if directions.pop() else ">"
+        placeholders = ", ".join(["%s"] * len(keys))
+        return f"({', '.join(expressions)}) {operator} ({placeholders})", list(values)
+
+    clauses = []
+    params: List[Any] = []
+    for position, (expression, descending, *_) in enumerate(keys):
+        parts = [f"{prefix} = %s" for prefix in expressions[:position]]
+        parts.append(f"{expression} {'<' if descending else '>'} %s")
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:position + 1])
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def order_clause(keys: Sequence[Tuple]) -> str:
+    return ", ".join(f"{expression} {'DESC' if descending else 'ASC'}" for expression, descending, *_ in keys)
+
+
+def build_page(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    cursor_of: Callable[[Dict[str, Any]], Sequence[Any]]
+) -> Dict[str, Any]:
+    """Trim a limit + 1 fetch to a page and attach the next cursor"""
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(cursor_of(items[-1])) if has_more and items else None,
+        "has_more": has_more
+    }
+
+
+def key_column(key: Tuple) -> str:
+    """
+    Result column of a key: the explicit column of a computed key, otherwise
+    the (possibly table-qualified) expression itself
+    """
+    if len(key) > 2:
+        return key[2]
+    return key[0].rsplit(".", 1)[-1]
+
+
+def fetch_page(
+    db,
+    select: str,
+    conditions: Sequence[str],
+    params: Sequence[Any],
+    keys: Sequence[Tuple] = NEWEST_FIRST,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    default: int = DEFAULT_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    One page of `select` (SELECT ... FROM ..., without WHERE) filtered by
+    conditions and ordered by keys
+
+    Every key must be a selected column, so the cursor can be read back off
+    the last row. A key over a nullable column needs a non-null expression
+    (NULLs never satisfy the seek condition and would end the listing early):
+    give it as (expression, descending, column), select the expression AS
+    column, and the column is dropped from the returned items. Raises
+    ValueError for a cursor that is not one of ours.
+    """
+    limit = page_size(limit, default)
+    where = list(conditions)
+    values = list(params)
+    if cursor:
+        condition, cursor_params = keyset_condition(keys, decode_cursor(cursor, len(keys)))
+        where.append(condition)
+        values.extend(cursor_params)
+
+    query = f"""
+    {select}
+    {'WHERE ' + ' AND '.join(where) if where else ''}
+    ORDER BY {order_clause(keys)}
+    LIMIT %s
+    """
+    rows = db.execute_query(query, tuple(values + [limit + 1]), fetch=True) or []
+    columns = [key_column(key) for key in keys]
+    page = build_page(
+        [dict(row) for row in rows],
+        limit,
+        lambda row: [row[column] for column in columns]
+    )
+    computed = [key[2] for key in keys if len(key) > 2]
+    for item in page["items"]:
+        for column in computed:
+            item.pop(column, None)
+    return page
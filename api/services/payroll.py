@@ -9,6 +9,22 @@ from decimal import Decimal
 from api.services.database import get_db_manager
 
 
+MONTHLY_SUMMARY_QUERY = """
+SELECT 
+    COUNT(*) as staff_count,
+    SUM(gross_salary) as total_gross,
+    SUM(bonus) as total_bonus,
+    SUM(deductions) as total_deductions,
+    SUM(paye_tax) as total_paye,
+    SUM(nssf) as total_nssf,
+    SUM(net_salary) as total_net,
+    COUNT(CASE WHEN payment_status = 'paid' THEN 1 END) as paid_count,
+    COUNT(CASE WHEN payment_status = 'pending' THEN 1 END) as pending_count
+FROM payroll_transactions
+WHERE school_id = %s AND month = %s AND year = %s
+"""
+
+
 class PayrollService:
     """Service for staff payroll management"""
     
@@ -66,7 +82,7 @@ class PayrollService:
         deduction_reason: Optional[str] = None
     ) -> Dict[str, Any]:
         """Process monthly payroll for a staff member"""
-        from api.services.tax_engine import TaxEngine
+        from api.services.tax_engine import get_tax_engine
         
         # Get salary structure
         salary_query = """
@@ -81,7 +97,7 @@ class PayrollService:
         taxable_income = gross_salary + bonus # Bonuses are taxable
         
         # Use Enterprise Tax Engine
-        engine = TaxEngine() # Defaults to UG config
+        engine = get_tax_engine() # Defaults to UG config
         
         # 1. Calculate NSSF (5% Employee, 10% Employer)
         nssf_breakdown = engine.calculate_nssf(gross_salary) # NSSF usually on basic+allowances (gross)
@@ -130,6 +146,92 @@ class PayrollService:
             }
         }
     
+    def run_payroll(
+        self,
+        month: str,
+        year: int,
+        bonuses: Optional[Dict[str, float]] = None,
+        deductions: Optional[Dict[str, float]] = None,
+        deduction_reasons: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Process the month's payroll for every staff member in one transaction
+        
+        Salary structures are loaded in one query (staff already paid for the
+        month are skipped, so a run can be repeated after adding staff), PAYE
+        is computed for the whole list in one pass over the engine's compiled
+        bracket tables, and all
+        payroll_transactions are written with one multi-row insert.
+        
+        bonuses / deductions / deduction_reasons are keyed by staff_id.
+        """
+        from api.services.tax_engine import get_tax_engine
+        
+        bonuses = bonuses or {}
+        deductions = deductions or {}
+        deduction_reasons = deduction_reasons or {}
+        engine = get_tax_engine()
+        
+        with self.db.transaction() as tx:
+            # Serialise runs for the same school and month
+            tx.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                (f"payroll:{self.school_id}:{month}:{year}",)
+            )
+            
+            salaries = tx.execute(
+                """
+                SELECT ss.staff_id, ss.gross_salary
+                FROM staff_salaries ss
+                WHERE ss.school_id = %s
+                  AND ss.staff_id IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM payroll_transactions pt
+                      WHERE pt.school_id = ss.school_id AND pt.staff_id = ss.staff_id
+                        AND pt.month = %s AND pt.year = %s
+                  )
+                """,
+                (self.school_id, month, year)
+            )
+            
+            staff_ids = [str(salary['staff_id']) for salary in salaries]
+            grosses = [float(salary['gross_salary']) for salary in salaries]
+            staff_bonuses = [float(bonuses.get(staff_id, 0.0)) for staff_id in staff_ids]
+            # Bonuses are taxable; NSSF is on gross only
+            payes = engine.calculate_paye_many([g + b for g, b in zip(grosses, staff_bonuses)])
+            
+            rows = []
+            for staff_id, gross_salary, bonus, paye in zip(staff_ids, grosses, staff_bonuses, payes):
+                deduction = float(deductions.get(staff_id, 0.0))
+                nssf_employee = engine.calculate_nssf(gross_salary)["employee"]
+                net_salary = gross_salary + bonus - paye - nssf_employee - deduction
+                
+                rows.append((
+                    self.school_id, staff_id, month, year, gross_salary, bonus,
+                    deduction, deduction_reasons.get(staff_id), paye, nssf_employee, net_salary
+                ))
+            
+            if rows:
+                tx.execute_values(
+                    """
+                    INSERT INTO payroll_transactions (
+                        school_id, staff_id, month, year, gross_salary, bonus,
+                        deductions, deduction_reason, paye_tax, nssf, net_salary
+                    ) VALUES %s
+                    """,
+                    rows
+                )
+            
+            summary = tx.fetch_one(MONTHLY_SUMMARY_QUERY, (self.school_id, month, year))
+        
+        return {
+            "success": True,
+            "month": month,
+            "year": year,
+            "staff_processed": len(rows),
+            "summary": summary or {}
+        }
+    
     def mark_as_paid(
         self,
         payroll_id: str,
@@ -191,22 +293,7 @@ class PayrollService:
     
     def get_monthly_payroll_summary(self, month: str, year: int) -> Dict[str, Any]:
         """Get payroll summary for a month"""
-        query = """
-        SELECT 
-            COUNT(*) as staff_count,
-            SUM(gross_salary) as total_gross,
-            SUM(bonus) as total_bonus,
-            SUM(deductions) as total_deductions,
-            SUM(paye_tax) as total_paye,
-            SUM(nssf) as total_nssf,
-            SUM(net_salary) as total_net,
-            COUNT(CASE WHEN payment_status = 'paid' THEN 1 END) as paid_count,
-            COUNT(CASE WHEN payment_status = 'pending' THEN 1 END) as pending_count
-        FROM payroll_transactions
-        WHERE school_id = %s AND month = %s AND year = %s
-        """
-        
-        result = self.db.execute_query(query, (self.school_id, month, year), fetch=True)
+        result = self.db.execute_query(MONTHLY_SUMMARY_QUERY, (self.school_id, month, year), fetch=True)
         
         return {
             "success": True,
@@ -0,0 +1,230 @@
+"""
+Performance Analytics Service
+Per-subject trends, class comparison and at-risk flags computed locally from
+a student's recent results, so AI analysis (when asked for) only sees a
+compact summary instead of raw mark rows
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from api.services.database import get_db_manager
+
+
+MOVING_AVERAGE_WINDOW = 3
+PASS_PERCENTAGE = 50.0
+# Percentage points lost per assessment before a subject counts as declining
+DECLINE_SLOPE = -5.0
+# Standard deviations below the class mean before a subject is flagged
+BELOW_CLASS_Z = -1.0
+CACHE_TTL_SECONDS = 3600
+
+# The student's results for the window, each carrying the class distribution
+# for its subject: classmates' per-subject averages over the same window
+RESULTS_QUERY = """
+WITH mine AS (
+    SELECT
+        a.subject, a.class_name, a.date, a.max_marks, ar.marks_obtained,
+        (ar.marks_obtained / NULLIF(a.max_marks, 0) * 100) AS percentage
+    FROM assessment_results ar
+    JOIN assessments a ON ar.assessment_id = a.id
+    WHERE ar.student_id = %(student_id)s
+    AND a.date >= CURRENT_DATE - INTERVAL '6 months'
+),
+peers AS (
+    SELECT a.subject, ar.student_id, AVG(ar.marks_obtained / NULLIF(a.max_marks, 0) * 100) AS average
+    FROM assessment_results ar
+    JOIN assessments a ON ar.assessment_id = a.id
+    WHERE a.school_id = %(school_id)s
+    AND a.class_name IN (SELECT DISTINCT class_name FROM mine)
+    AND a.subject IN (SELECT DISTINCT subject FROM mine)
+    AND a.date >= CURRENT_DATE - INTERVAL '6 months'
+    GROUP BY a.subject, ar.student_id
+),
+class_stats AS (
+    SELECT subject, AVG(average) AS class_mean, STDDEV_POP(average) AS class_std, COUNT(*) AS class_size
+    FROM peers
+    GROUP BY subject
+)
+SELECT
+    m.subject, m.date, m.max_marks, m.marks_obtained, m.percentage,
+    cs.class_mean, cs.class_std, cs.class_size
+FROM mine m
+LEFT JOIN class_stats cs ON cs.subject = m.subject
+ORDER BY m.date ASC
+"""
+
+# Changes whenever a mark for the student is added, edited or removed
+FINGERPRINT_QUERY = """
+SELECT COUNT(*) AS results, COALESCE(SUM(marks_obtained), 0) AS marks, MAX(updated_at) AS last_change
+FROM assessment_results
+WHERE student_id = %s
+"""
+
+
+def summarize_performance(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compact performance summary from date-ordered result rows, in one pass
+
+    Per subject: average, moving average of the last MOVING_AVERAGE_WINDOW
+    results, least-squares slope (percentage points per assessment),
+    z-score of the subject average against the class distribution, and
+    at-risk flags. The overall trend keeps the portal's original rule:
+    last five vs first five results, +/- 5 points.
+    """
+    subjects: Dict[str, Dict[str, Any]] = {}
+    first_five: List[float] = []
+    last_five: deque = deque(maxlen=5)
+    total = 0.0
+    counted = 0
+
+    for row in rows:
+        if row.get('percentage') is None:
+            continue
+        pct = float(row['percentage'])
+        total += pct
+        counted += 1
+        if len(first_five) < 5:
+            first_five.append(pct)
+        last_five.append(pct)
+
+        s = subjects.get(row['subject'])
+        if s is None:
+            s = subjects[row['subject']] = {
+                "n": 0, "sum": 0.0, "sum_x": 0.0, "sum_xx": 0.0, "sum_xy": 0.0,
+                "window": deque(maxlen=MOVING_AVERAGE_WINDOW),
+                "class_mean": row.get('class_mean'), "class_std": row.get('class_std'),
+                "class_size": row.get('class_size') or 0
+            }
+        x = s["n"]
+        s["n"] += 1
+        s["sum"] += pct
+        s["sum_x"] += x
+        s["sum_xx"] += x * x
+        s["sum_xy"] += x * pct
+        s["window"].append(pct)
+        s["latest"] = pct
+
+    if len(first_five) == 5:
+        recent_avg = sum(last_five) / 5
+        older_avg = sum(first_five) / 5
+        if recent_avg > older_avg + 5:
+            trend = "improving"
+        elif recent_avg < older_avg - 5:
+            trend = "declining"
+        else:
+            trend = "stable"
+    else:
+        trend = "insufficient_data"
+
+    summaries = []
+    for subject, s in subjects.items():
+        n = s["n"]
+        average = s["sum"] / n
+        denominator = n * s["sum_xx"] - s["sum_x"] ** 2
+        slope = (n * s["sum_xy"] - s["sum_x"] * s["sum"]) / denominator if denominator else 0.0
+        moving_average = sum(s["window"]) / len(s["window"])
+
+        z_score = None
+        if s["class_mean"] is not None and s["class_std"] and s["class_size"] > 1:
+            z_score = (average - float(s["class_mean"])) / float(s["class_std"])
+
+        flags = []
+        if moving_average < PASS_PERCENTAGE:
+            flags.append("below_pass")
+        if n >= 3 and slope <= DECLINE_SLOPE:
+            flags.append("declining")
+        if z_score is not None and z_score <= BELOW_CLASS_Z:
+            flags.append("below_class")
+
+        summaries.append({
+            "subject": subject,
+            "assessments": n,
+            "average": round(average, 1),
+            "moving_average": round(moving_average, 1),
+            "latest": round(s["latest"], 1),
+            "slope": round(slope, 2),
+            "class_average": round(float(s["class_mean"]), 1) if s["class_mean"] is not None else None,
+            "z_score": round(z_score, 2) if z_score is not None and math.isfinite(z_score) else None,
+            "flags": flags
+        })
+
+    summaries.sort(key=lambda item: item["average"])
+    at_risk_subjects = [item["subject"] for item in summaries if item["flags"]]
+
+    return {
+        "assessments": counted,
+        "overall_average": round(total / counted, 1) if counted else None,
+        "trend": trend,
+        "subjects": summaries,
+        "at_risk": bool(at_risk_subjects),
+        "at_risk_subjects": at_risk_subjects
+    }
+
+
+class PerformanceAnalyticsService:
+    """Cached local performance analytics per student"""
+
+    # student_id -> (expires_at, fingerprint, rows, summary)
+    _cache: Dict[str, Tuple[float, tuple, List[Dict[str, Any]], Dict[str, Any]]] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, school_id: str, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.school_id = school_id
+        self.ttl_seconds = ttl_seconds
+        self.db = get_db_manager()
+
+    def get_student_analytics(self, student_id: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Result rows and summary for a student
+
+        Served from cache while the student's marks are unchanged (checked
+        with one aggregate over their results) and the entry is younger than
+        the TTL, which bounds how stale the class comparison can get.
+        """
+        fingerprint_row = self.db.execute_query(FINGERPRINT_QUERY, (student_id,), fetch=True)
+        fingerprint = (
+            time.strftime("%Y-%m-%d"),
+            tuple(fingerprint_row[0].values()) if fingerprint_row else ()
+        )
+        now = time.monotonic()
+
+        with self._cache_lock:
+            cached = self._cache.get(str(student_id))
+        if cached and cached[0] > now and cached[1] == fingerprint:
+            return cached[2], cached[3]
+
+        rows = self.db.execute_query(
+            RESULTS_QUERY,
+            {"student_id": student_id, "school_id": self.school_id},
+            fetch=True
+        )
+        summary = summarize_performance(rows)
+        performance_data = [
+            {key: row[key] for key in ("subject", "date", "max_marks", "marks_obtained", "percentage")}
+            for row in rows
+        ]
+
+        with self._cache_lock:
+            self._cache[str(student_id)] = (now + self.ttl_seconds, fingerprint, performance_data, summary)
+        return performance_data, summary
+
+    def get_student_summary(self, student_id: str) -> Dict[str, Any]:
+        """Just the compact summary"""
+        return self.get_student_analytics(student_id)[1]
+
+    @classmethod
+    def invalidate(cls, student_id: Optional[str] = None) -> None:
+        """Drop one student's cached analytics, or all of them"""
+        with cls._cache_lock:
+            if student_id is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(str(student_id), None)
+
+
+def get_performance_analytics_service(school_id: str) -> PerformanceAnalyticsService:
+    """Helper to get performance analytics service instance"""
+    return PerformanceAnalyticsService(school_id)
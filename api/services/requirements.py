@@ -369,36 +369,80 @@ class SchoolRequirementsService:
         Mark requirement as submitted for all students in a class
         
         Example: "Mark all Class 5A students as having brought toilet paper"
+        
+        One INSERT ... SELECT FROM students ... ON CONFLICT DO UPDATE covers the
+        whole class (minus exclusions); fee-type requirements with a payment
+        are verified in the same statement, as submit_requirement would.
         """
-        # Get all students in class
         query = """
-        SELECT id FROM students
-        WHERE school_id = %s AND class_name = %s AND status = 'active'
+        WITH requirement AS (
+            SELECT id, requirement_type FROM school_requirements
+            WHERE id = %s AND school_id = %s
+        ),
+        upserted AS (
+            INSERT INTO student_requirement_submissions (
+                school_id, requirement_id, student_id,
+                quantity_submitted, amount_paid,
+                submission_date, payment_date,
+                verified, verified_by, verified_at
+            )
+            SELECT
+                s.school_id, r.id, s.id,
+                %s, %s,
+                %s, %s,
+                (r.requirement_type = 'fee' AND %s), NULL,
+                CASE WHEN r.requirement_type = 'fee' AND %s THEN CURRENT_TIMESTAMP END
+            FROM requirement r
+            JOIN students s ON s.school_id = %s
+            WHERE s.class_name = %s
+              AND s.status = 'active'
+              AND NOT (s.id = ANY(%s::uuid[]))
+            ON CONFLICT (requirement_id, student_id)
+            DO UPDATE SET
+                quantity_submitted = COALESCE(EXCLUDED.quantity_submitted, student_requirement_submissions.quantity_submitted),
+                amount_paid = COALESCE(EXCLUDED.amount_paid, student_requirement_submissions.amount_paid),
+                submission_date = COALESCE(EXCLUDED.submission_date, student_requirement_submissions.submission_date),
+                payment_date = COALESCE(EXCLUDED.payment_date, student_requirement_submissions.payment_date),
+                verified = student_requirement_submissions.verified OR EXCLUDED.verified,
+                verified_by = CASE WHEN EXCLUDED.verified THEN NULL ELSE student_requirement_submissions.verified_by END,
+                verified_at = CASE WHEN EXCLUDED.verified THEN EXCLUDED.verified_at ELSE student_requirement_submissions.verified_at END,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING (xmax = 0) AS inserted, verified
+        )
+        SELECT
+            (SELECT COUNT(*) FROM requirement) AS requirement_found,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE inserted) AS inserted,
+            COUNT(*) FILTER (WHERE verified) AS verified
+        FROM upserted
         """
         
-        if exclude_students:
-            query += f" AND id NOT IN ({','.join(['%s'] * len(exclude_students))})"
-            params = [self.school_id, class_name] + exclude_students
-        else:
-            params = [self.school_id, class_name]
+        today = str(date.today())
+        auto_verify = bool(amount_paid)
         
-        students = self.db.execute_query(query, tuple(params), fetch=True)
+        counts = self.db.execute_query(
+            query,
+            (
+                requirement_id, self.school_id,
+                quantity_submitted, amount_paid,
+                today, today,
+                auto_verify, auto_verify,
+                self.school_id, class_name,
+                [str(student_id) for student_id in (exclude_students or [])]
+            ),
+            fetch=True
+        )[0]
         
-        success_count = 0
-        for student in students:
-            result = self.submit_requirement(
-                requirement_id=requirement_id,
-                student_id=student['id'],
-                quantity_submitted=quantity_submitted,
-                amount_paid=amount_paid
-            )
-            if result.get('success'):
-                success_count += 1
+        if not counts['requirement_found']:
+            return {"success": False, "error": "Requirement not found"}
         
         return {
             "success": True,
-            "total_students": len(students),
-            "submitted_count": success_count,
+            "total_students": counts['total'],
+            "submitted_count": counts['total'],
+            "new_submissions": counts['inserted'],
+            "updated_submissions": counts['total'] - counts['inserted'],
+            "verified_count": counts['verified'],
             "class_name": class_name,
             "requirement_id": requirement_id
         }
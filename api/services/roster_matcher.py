@@ -0,0 +1,173 @@
+"""
+Roster Matcher
+Resolves OCR'd student names against a class roster held in memory
+
+Names are normalised to tokens (case, accents and punctuation dropped) and
+indexed by trigram. Each OCR name is compared token by token with the
+candidates sharing a trigram, using edit distance, so word order, dropped
+middle names and small OCR misreads still match. A name that fits more than
+one student about equally well is reported as ambiguous instead of being
+guessed.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Any, List, Sequence, Set
+
+
+# Minimum score (0-1) for a roster student to be accepted as the match
+MATCH_THRESHOLD = 0.8
+# A runner-up within this margin of the best score makes the match ambiguous
+AMBIGUITY_MARGIN = 0.05
+
+
+def name_tokens(name: str) -> List[str]:
+    """Lowercase ASCII word tokens of a name"""
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    return re.findall(r"[a-z]+", ascii_name.lower())
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def token_similarity(a: str, b: str) -> float:
+    """1 - normalised edit distance; a lone letter is an initial"""
+    if a == b:
+        return 1.0
+    if len(a) == 1:
+        return 1.0 if b.startswith(a) else 0.0
+    return 1 - edit_distance(a, b) / max(len(a), len(b))
+
+
+def name_score(query: Sequence[str], candidate: Sequence[str]) -> float:
+    """
+    How well an OCR name fits a roster name: each query token against its
+    best candidate token, averaged. Order-insensitive, and a partial name
+    ("John") fits every student it is part of equally.
+    """
+    if not query or not candidate:
+        return 0.0
+    return sum(max(token_similarity(q, c) for c in candidate) for q in query) / len(query)
+
+
+class RosterIndex:
+    """In-memory index of a class roster for name resolution"""
+
+    def __init__(self, students: List[Dict[str, Any]]):
+        self.students = students
+        self.tokens = [
+            name_tokens(f"{student.get('first_name') or ''} {student.get('last_name') or ''}")
+            for student in students
+        ]
+        self.positions = {str(student["id"]): position for position, student in enumerate(students)}
+        self.index: Dict[str, Set[int]] = defaultdict(set)
+        for position, tokens in enumerate(self.tokens):
+            for token in tokens:
+                for gram in trigrams(token):
+                    self.index[gram].add(position)
+
+    @classmethod
+    def load(cls, db, school_id: str, class_name: str) -> "RosterIndex":
+        """Index every student in a class (one query)"""
+        students = db.execute_query(
+            """
+            SELECT id, first_name, last_name
+            FROM students
+            WHERE school_id = %s AND class_name = %s
+            """,
+            (school_id, class_name),
+            fetch=True
+        )
+        return cls(students)
+
+    def match(self, name: str) -> Dict[str, Any]:
+        """
+        Resolve one name
+
+        Returns status "matched" (with student and score), "ambiguous" (with
+        the close candidates) or "unmatched".
+        """
+        query = name_tokens(name)
+        candidates = set()
+        for token in query:
+            for gram in trigrams(token):
+                candidates |= self.index.get(gram, set())
+
+        scored = sorted(
+            ((name_score(query, self.tokens[position]), position) for position in candidates),
+            key=lambda item: (-item[0], item[1])
+        )
+        if not scored or scored[0][0] < MATCH_THRESHOLD:
+            return {"name": name, "status": "unmatched"}
+
+        best_score = scored[0][0]
+        close = [
+            (score, position) for score, position in scored
+            if score >= MATCH_THRESHOLD and score >= best_score - AMBIGUITY_MARGIN
+        ]
+        if len(close) > 1:
+            return {
+                "name": name,
+                "status": "ambiguous",
+                "candidates": [self._describe(position, score) for score, position in close]
+            }
+        return {
+            "name": name,
+            "status": "matched",
+            "student": self.students[scored[0][1]],
+            "score": round(best_score, 3)
+        }
+
+    def resolve(self, names: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Resolve every OCR row in one pass
+
+        Rows that resolve to a student another row also resolved to are
+        marked ambiguous too, so one sheet never writes a student twice.
+        """
+        results = [self.match(name) for name in names]
+
+        rows_by_student: Dict[str, List[int]] = defaultdict(list)
+        for row, result in enumerate(results):
+            if result["status"] == "matched":
+                rows_by_student[str(result["student"]["id"])].append(row)
+
+        for rows in rows_by_student.values():
+            if len(rows) < 2:
+                continue
+            for row in rows:
+                result = results[row]
+                results[row] = {
+                    "name": result["name"],
+                    "status": "ambiguous",
+                    "reason": "student matched by several rows",
+                    "candidates": [self._describe(self.positions[str(result["student"]["id"])], result["score"])]
+                }
+        return results
+
+    def _describe(self, position: int, score: float) -> Dict[str, Any]:
+        student = self.students[position]
+        return {
+            "student_id": student["id"],
+            "student_name": f"{student['first_name']} {student['last_name']}",
+            "score": round(score, 3)
+        }
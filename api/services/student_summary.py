@@ -0,0 +1,116 @@
+"""
+Student Summary Service
+Per-student fee totals and 30-day attendance, read for many students at once
+"""
+from typing import Dict, Any, List
+
+from api.services.database import get_db_manager
+
+
+# Rows are created with each student and moved by the attendance trigger
+# (migration 018), and fee totals are joined from the fee balance ledger, so a
+# batch of students costs one read-only round trip.
+SUMMARY_QUERY = """
+SELECT
+    ss.*,
+    COALESCE(l.total_due, 0) AS fee_total_due,
+    COALESCE(l.total_paid, 0) AS fee_total_paid,
+    COALESCE(l.balance, 0) AS fee_balance
+FROM student_summaries ss
+LEFT JOIN fee_balance_ledger l ON l.student_id = ss.student_id
+WHERE ss.student_id = ANY(%(student_ids)s::uuid[])
+"""
+
+# Takes away the attendance that fell out of each stale row's 30-day window.
+# Runs under the row lock and only if attendance_as_of is still the value the
+# delta was computed from, so it never overwrites a concurrent trigger delta.
+REBASE_QUERY = """
+UPDATE student_summaries ss
+SET present_30d = ss.present_30d - d.present,
+    absent_30d = ss.absent_30d - d.absent,
+    late_30d = ss.late_30d - d.late,
+    excused_30d = ss.excused_30d - d.excused,
+    attendance_as_of = CURRENT_DATE,
+    updated_at = CURRENT_TIMESTAMP
+FROM (
+    SELECT
+        stale.student_id, stale.attendance_as_of,
+        COUNT(a.id) FILTER (WHERE a.status = 'present') AS present,
+        COUNT(a.id) FILTER (WHERE a.status = 'absent') AS absent,
+        COUNT(a.id) FILTER (WHERE a.status = 'late') AS late,
+        COUNT(a.id) FILTER (WHERE a.status = 'excused') AS excused
+    FROM student_summaries stale
+    LEFT JOIN attendance a
+        ON a.student_id = stale.student_id
+        AND a.date >= stale.attendance_as_of - 30
+        AND a.date < CURRENT_DATE - 30
+    WHERE stale.school_id = %(school_id)s
+    AND stale.attendance_as_of < CURRENT_DATE
+    GROUP BY stale.student_id, stale.attendance_as_of
+) d
+WHERE ss.student_id = d.student_id
+AND ss.attendance_as_of = d.attendance_as_of
+"""
+
+
+def attendance_stats(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """30-day attendance counts and rate from a summary row"""
+    stats = {
+        "present": summary.get('present_30d') or 0,
+        "absent": summary.get('absent_30d') or 0,
+        "late": summary.get('late_30d') or 0
+    }
+    if summary.get('excused_30d'):
+        stats["excused"] = summary['excused_30d']
+
+    total = stats["present"] + stats["absent"] + stats["late"]
+    return {
+        "stats": stats,
+        "attendance_rate": round(stats["present"] / total * 100, 1) if total > 0 else 0
+    }
+
+
+class StudentSummaryService:
+    """Batched per-student summaries for dashboards (any mix of schools)"""
+
+    def __init__(self):
+        self.db = get_db_manager()
+
+    def get_summaries(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Summary rows keyed by student id, in one query"""
+        if not student_ids:
+            return {}
+
+        rows = self.db.execute_query(
+            SUMMARY_QUERY,
+            {"student_ids": [str(student_id) for student_id in student_ids]},
+            fetch=True
+        )
+        return {str(row['student_id']): row for row in rows}
+
+    def refresh(self, school_id: str) -> Dict[str, Any]:
+        """
+        Re-base a school's 30-day windows to today and create any missing rows
+        (e.g. students loaded with triggers disabled); run daily
+        """
+        with self.db.transaction() as tx:
+            created = tx.fetch_one(
+                """
+                SELECT student_summary_seed(ARRAY(
+                    SELECT s.id
+                    FROM students s
+                    LEFT JOIN student_summaries ss ON ss.student_id = s.id
+                    WHERE s.school_id = %(school_id)s AND ss.student_id IS NULL
+                )) AS created
+                """,
+                {"school_id": school_id}
+            )
+            tx.execute(REBASE_QUERY, {"school_id": school_id}, fetch=False)
+            rebased = tx.rowcount
+
+        return {"school_id": school_id, "created": created['created'], "rebased": rebased}
+
+
+def get_student_summary_service() -> StudentSummaryService:
+    """Helper to get student summary service instance"""
+    return StudentSummaryService()
@@ -49,8 +49,8 @@ class SupportService:
         }
         return self.incidents.create_incident(payload)
 
-    def list_incidents(self, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.incidents.list_incidents(self.school_id, limit=limit)
+    def list_incidents(self, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self.incidents.list_incidents(self.school_id, limit=limit, cursor=cursor)
 
     # --- Inventory & Expenses ------------------------------------------------
     def adjust_inventory(
@@ -130,8 +130,8 @@ class SupportService:
         }
         return self.library.record_transaction(payload)
 
-    def list_library_transactions(self, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.library.list_transactions(self.school_id, limit=limit)
+    def list_library_transactions(self, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        return self.library.list_transactions(self.school_id, limit=limit, cursor=cursor)
 
     # --- Transport -----------------------------------------------------------
     def record_transport_event(
@@ -162,11 +162,11 @@ class SupportService:
 
     # --- Consolidated Reporting ----------------------------------------------
     def generate_support_report(self) -> Dict[str, Any]:
-        incidents = self.list_incidents(limit=100)
+        incidents = self.list_incidents(limit=100)["items"]
         health = self.list_health_visits(limit=100)
         transport = self.list_transport_events(limit=100)
         inventory_snapshot = self.inventory_snapshot()
-        library = self.list_library_transactions(limit=100)
+        library = self.list_library_transactions(limit=100)["items"]
 
         clarity_payload = {
             "incidents": incidents,
@@ -8,7 +8,8 @@ Supports:
 3. Health Insurance Levies (NHIF/SHIF).
 4. Local Service Tax (LST).
 """
-from typing import List, Dict, Optional
+from bisect import bisect_left
+from typing import List, Dict, Optional, Sequence
 from decimal import Decimal
 
 # Default Tax Configuration (UGANDA FY 2024/2025)
@@ -38,42 +39,62 @@ DEFAULT_TAX_CONFIG = {
 class TaxEngine:
     def __init__(self, config: Optional[Dict] = None):
         self.config = config or DEFAULT_TAX_CONFIG
+        self._compile_paye_bands()
 
-    def calculate_paye(self, chargeable_income: float) -> float:
+    def _compile_paye_bands(self) -> None:
         """
-        Calculate generic Progressive PAYE based on configured bands.
-        Logic: Find the band the income false into, apply rate to excess + base tax.
-        Actually, simplified logic often used:
-        Iterate bands. If income > band_threshold of previous, tax the difference.
-        
-        Using the standard "Bracket" logic from the config:
-        The config structure implies:
-        Start from highest band? Or cumulative?
-        
-        Let's use the explicit standard logic:
-        Income falls into a specific bracket range.
+        Compile the PAYE bands once into parallel arrays:
+        upper thresholds (sorted), band floors, rates and the cumulative tax
+        due at each floor. A salary then needs one bisect to find its band.
         """
-        income = chargeable_income
-        bands = self.config["paye_bands"]
+        bands = sorted(self.config["paye_bands"], key=lambda band: band["threshold"])
         
-        # Uganda Specific Logic (Iterative Progressive) works best for generic engines
-        # But here we have specific 'base_tax' defined in config for speed.
+        self._paye_thresholds: List[float] = []
+        self._paye_floors: List[float] = []
+        self._paye_rates: List[float] = []
+        self._paye_cumulative: List[float] = []
         
-        # 1. Find the applicable top logical band
-        # (This relies on the config being correct)
-        tax = 0.0
+        floor = 0.0
+        cumulative = 0.0
+        for band in bands:
+            self._paye_thresholds.append(band["threshold"])
+            self._paye_floors.append(floor)
+            self._paye_rates.append(band["rate"])
+            self._paye_cumulative.append(cumulative)
+            if band["threshold"] != float('inf'):
+                cumulative = round(cumulative + (band["threshold"] - floor) * band["rate"], 2)
+                floor = band["threshold"]
         
-        # Logic for provided config (Standard UG Calculation):
-        if income <= 235000:
+        # The top band is open-ended, so bisect can never run off the end
+        self._paye_thresholds[-1] = float('inf')
+
+    def calculate_paye(self, chargeable_income: float) -> float:
+        """
+        Progressive PAYE from the configured bands.
+        Income up to and including a band's threshold falls in that band:
+        tax = cumulative tax below the band + (income - band floor) * band rate
+        """
+        if chargeable_income <= 0:
             return 0.0
-        elif income <= 335000:
-            return (income - 235000) * 0.10
-        elif income <= 410000:
-            return (income - 335000) * 0.20 + 10000
-        elif income <= 10000000:
-            return (income - 410000) * 0.30 + 25000
-        else:
-            return (income - 10000000) * 0.40 + 2902000
+        i = bisect_left(self._paye_thresholds, chargeable_income)
+        return self._paye_cumulative[i] + (chargeable_income - self._paye_floors[i]) * self._paye_rates[i]
+
+    def calculate_paye_many(self, incomes: Sequence[float]) -> List[float]:
+        """PAYE for many salaries (payroll runs, salary-review simulations)"""
+        thresholds = self._paye_thresholds
+        floors = self._paye_floors
+        rates = self._paye_rates
+        cumulative = self._paye_cumulative
+        
+        taxes = []
+        append = taxes.append
+        for income in incomes:
+            if income <= 0:
+                append(0.0)
+            else:
+                i = bisect_left(thresholds, income)
+                append(cumulative[i] + (income - floors[i]) * rates[i])
+        return taxes
             
     def calculate_nssf(self, gross_salary: float) -> Dict[str, float]:
         """
@@ -126,3 +147,44 @@ class TaxEngine:
             "total_deductions": total_deductions,
             "net": net
         }
+
+    def calculate_net_salary_many(
+        self,
+        grosses: Sequence[float],
+        deductions: Optional[Sequence[float]] = None
+    ) -> List[Dict[str, float]]:
+        """calculate_net_salary over a sequence of gross salaries"""
+        conf = self.config["nssf"]
+        employee_rate = conf["employee_rate"]
+        employer_rate = conf["employer_rate"]
+        cap = conf.get("cap", float('inf'))
+        
+        payes = self.calculate_paye_many(grosses)
+        results = []
+        for n, (gross, paye) in enumerate(zip(grosses, payes)):
+            insurable = min(gross, cap)
+            nssf_employee = round(insurable * employee_rate, 2)
+            nssf_employer = round(insurable * employer_rate, 2)
+            other = deductions[n] if deductions is not None else 0
+            total_deductions = nssf_employee + paye + other
+            results.append({
+                "gross": gross,
+                "nssf_employee": nssf_employee,
+                "nssf_employer": nssf_employer,
+                "paye": paye,
+                "other_deductions": other,
+                "total_deductions": total_deductions,
+                "net": gross - total_deductions
+            })
+        return results
+
+
+_default_engine: Optional[TaxEngine] = None
+
+
+def get_tax_engine() -> TaxEngine:
+    """Shared engine for the default config (bands compiled once per process)"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = TaxEngine()
+    return _default_engine
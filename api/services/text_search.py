@@ -0,0 +1,135 @@
+"""
+Text Search
+Ranked, paginated search over a school's rows using pg_trgm
+
+Terms of three or more characters match any field by substring (ILIKE) or
+by word similarity (the `<%` operator), both answered from the fields'
+trigram GIN indexes; shorter terms match field prefixes. Hits are ranked by
+weighted word similarity, with a bonus when the first field starts with the
+term, and paged with keyset cursors. Without a term, rows are listed in the
+engine's browse order.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from api.services.pagination import (
+    build_page, decode_cursor, keyset_condition, order_clause, page_size
+)
+
+
+# Shortest term the trigram indexes can serve; shorter terms match prefixes
+MIN_TRIGRAM_LENGTH = 3
+PREFIX_BONUS = 0.5
+
+
+def like_escape(term: str) -> str:
+    """Escape LIKE wildcards so a term only ever matches literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class TextSearch:
+    """Search definition for one table"""
+
+    def __init__(
+        self,
+        table: str,
+        columns: str,
+        fields: Sequence[Tuple[str, float]],
+        browse_order: Sequence[Tuple[str, bool]],
+        id_column: str = "id"
+    ):
+        """
+        columns: SELECT list of the returned rows
+        fields: (SQL expression, weight) pairs searched and ranked; each
+            expression needs a matching `gin_trgm_ops` index
+        browse_order: (SQL expression, descending) pairs used without a term,
+            before the id tie-breaker
+        """
+        self.table = table
+        self.columns = columns
+        self.fields = list(fields)
+        self.browse_order = list(browse_order)
+        self.id_column = id_column
+
+    def search(
+        self,
+        db,
+        school_id: str,
+        term: Optional[str] = None,
+        conditions: Sequence[Tuple[str, Sequence[Any]]] = (),
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of matching rows
+
+        conditions: extra (SQL, params) filters ANDed to the match
+        Returns items, next_cursor and has_more; with a term each item
+        carries its search_rank.
+        """
+        limit = page_size(limit)
+        term = (term or "").strip()
+
+        where = ["school_id = %s"]
+        params: List[Any] = [school_id]
+        for sql, values in conditions:
+            where.append(sql)
+            params.extend(values)
+
+        if term:
+            escaped = like_escape(term)
+            expressions = [expression for expression, _ in self.fields]
+            if len(term) >= MIN_TRIGRAM_LENGTH:
+                matches = [f"{expression} ILIKE %s" for expression in expressions]
+                matches += [f"%s <%% {expression}" for expression in expressions]
+                params += [f"%{escaped}%"] * len(expressions) + [term] * len(expressions)
+            else:
+                matches = [f"{expression} ILIKE %s" for expression in expressions]
+                params += [f"{escaped}%"] * len(expressions)
+            where.append("(" + " OR ".join(matches) + ")")
+
+            similarities = ", ".join(
+                f"word_similarity(%s, {expression}) * {weight}" for expression, weight in self.fields
+            )
+            rank = (
+                f"ROUND((GREATEST({similarities})"
+                f" + CASE WHEN {expressions[0]} ILIKE %s THEN {PREFIX_BONUS} ELSE 0 END)::numeric, 6)"
+            )
+            rank_params = [term] * len(self.fields) + [f"{escaped}%"]
+            keys = [(rank, True), (self.id_column, True)]
+        else:
+            rank_params = []
+            keys = self.browse_order + [(self.id_column, False)]
+
+        key_columns = [(f"_k{position}", descending) for position, (_, descending) in enumerate(keys)]
+        outer_where = ""
+        outer_params: List[Any] = []
+        if cursor:
+            values = decode_cursor(cursor, len(keys))
+            condition, outer_params = keyset_condition(key_columns, values)
+            outer_where = f"WHERE {condition}"
+
+        key_select = ", ".join(f"{expression} AS _k{position}" for position, (expression, _) in enumerate(keys))
+        query = f"""
+        SELECT * FROM (
+            SELECT {self.columns}, {key_select}
+            FROM {self.table}
+            WHERE {' AND '.join(where)}
+        ) ranked
+        {outer_where}
+        ORDER BY {order_clause(key_columns)}
+        LIMIT %s
+        """
+        # Key expressions come first in the SELECT list, so their params lead
+        rows = db.execute_query(
+            query,
+            tuple(rank_params + params + outer_params + [limit + 1]),
+            fetch=True
+        )
+
+        page = build_page(rows, limit, lambda row: [row[name] for name, _ in key_columns])
+        for item in page["items"]:
+            if term:
+                item["search_rank"] = float(item["_k0"])
+            for name, _ in key_columns:
+                item.pop(name, None)
+        return page
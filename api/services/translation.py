@@ -3,12 +3,38 @@ Translation Service
 Multi-language support for Luganda, Swahili, and English
 Uses Clarity AI for translation (user's API)
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable
+from collections import OrderedDict
 import hashlib
+import threading
 
 from api.services.database import get_db_manager
 
 
+# In-process tier in front of the translations table. Keyed by the same
+# text_key the table uses, so a hit here never touches the DB.
+TRANSLATION_CACHE_SIZE = 4096
+
+_translation_cache: "OrderedDict[str, str]" = OrderedDict()
+_translation_cache_lock = threading.Lock()
+
+
+def _cache_get(text_key: str) -> Optional[str]:
+    with _translation_cache_lock:
+        value = _translation_cache.get(text_key)
+        if value is not None:
+            _translation_cache.move_to_end(text_key)
+        return value
+
+
+def _cache_put(text_key: str, translated_text: str) -> None:
+    with _translation_cache_lock:
+        _translation_cache[text_key] = translated_text
+        _translation_cache.move_to_end(text_key)
+        while len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+            _translation_cache.popitem(last=False)
+
+
 class TranslationService:
     """Service for multi-language translation"""
     
@@ -55,9 +81,37 @@ class TranslationService:
         }
     }
     
+    # Pre-translated message templates (English source → target languages)
+    MESSAGE_TEMPLATES = {
+        'attendance_present': {
+            'en': "{student_name} is present today",
+            'lg': "{student_name} ali mu ssomero leero",
+            'sw': "{student_name} yupo shuleni leo",
+        },
+        'attendance_absent': {
+            'en': "{student_name} is absent today",
+            'lg': "{student_name} tali mu ssomero leero",
+            'sw': "{student_name} hayupo shuleni leo",
+        },
+        'fee_balance': {
+            'en': "Fee balance for {student_name}: {balance} UGX",
+            'lg': "Omusigadde gw'ebbisale bya {student_name}: {balance} UGX",
+            'sw': "Salio la ada kwa {student_name}: {balance} UGX",
+        },
+    }
+    
+    # parents.preferred_language holds codes or names depending on the schema
+    LANGUAGE_CODES = {'english': 'en', 'luganda': 'lg', 'swahili': 'sw'}
+    
     def __init__(self):
         self.db = get_db_manager()
     
+    @classmethod
+    def language_code(cls, language: Optional[str]) -> str:
+        """'lg', 'Luganda' → 'lg'; empty → 'en'"""
+        value = (language or 'en').strip().lower()
+        return cls.LANGUAGE_CODES.get(value, value)
+    
     # ============================================================================
     # TRANSLATION
     # ============================================================================
@@ -87,35 +141,118 @@ class TranslationService:
         if target_language == 'en':
             return text
         
-        # Check cache first
+        # Check cache first (process memory, then translations table)
         cached = self._get_cached_translation(text, source_language, target_language)
         if cached:
             return cached
         
         # Try hardcoded translations first (faster)
-        translation_key = f"{source_language}_{target_language}"
-        if translation_key in self.TRANSLATIONS:
-            # Try word-by-word translation for simple phrases
-            words = text.lower().split()
-            translated_words = []
-            
-            for word in words:
-                if word in self.TRANSLATIONS[translation_key]:
-                    translated_words.append(self.TRANSLATIONS[translation_key][word])
-                else:
-                    translated_words.append(word)  # Keep untranslated
-            
-            if len(translated_words) == len(words):
-                # All words translated
-                result = ' '.join(translated_words)
-                self._cache_translation(text, source_language, target_language, result, 'manual', 1.0)
-                return result
+        result = self._translate_locally(text, source_language, target_language)
+        if result is not None:
+            self._cache_translation(text, source_language, target_language, result, 'manual', 1.0)
+            return result
         
         # If not in hardcoded, use Clarity AI (user's API)
         # TODO: User will provide Clarity API key for translation
         # translated = self._translate_via_clarity_api(text, source_language, target_language)
         
         # For now, return English + note
+        return self._pending(text, target_language)
+    
+    def translate_many(
+        self,
+        texts: Iterable[str],
+        target_language: str,
+        source_language: str = 'en',
+        keep_untranslated: bool = False
+    ) -> Dict[str, str]:
+        """
+        Translate a batch of texts, resolving each distinct text once
+        
+        Memory cache first, then a single ``= ANY`` query against the
+        translations table for everything still missing, then the built-in
+        dictionary. New dictionary translations are written back in one
+        statement.
+        
+        Args:
+            keep_untranslated: Map texts with no translation to themselves
+                instead of the "pending" note (for messages sent to people)
+        
+        Returns:
+            Mapping of source text → translated text
+        """
+        distinct = list(dict.fromkeys(texts))
+        if source_language == target_language or target_language == 'en':
+            return {text: text for text in distinct}
+        
+        results: Dict[str, str] = {}
+        missing: Dict[str, str] = {}  # text_key -> text
+        for text in distinct:
+            text_key = self._generate_key(text, source_language, target_language)
+            cached = _cache_get(text_key)
+            if cached is not None:
+                results[text] = cached
+            else:
+                missing[text_key] = text
+        
+        if missing:
+            query = """
+            SELECT text_key, translated_text
+            FROM translations
+            WHERE text_key = ANY(%s)
+            AND source_language = %s
+            AND target_language = %s
+            """
+            rows = self.db.execute_query(
+                query, (list(missing.keys()), source_language, target_language), fetch=True
+            ) or []
+            for row in rows:
+                text = missing.pop(row['text_key'], None)
+                if text is not None:
+                    _cache_put(row['text_key'], row['translated_text'])
+                    results[text] = row['translated_text']
+        
+        new_rows = []
+        for text_key, text in missing.items():
+            translated = self._translate_locally(text, source_language, target_language)
+            if translated is None:
+                results[text] = text if keep_untranslated else self._pending(text, target_language)
+                continue
+            _cache_put(text_key, translated)
+            results[text] = translated
+            new_rows.append((text_key, source_language, target_language, text, translated, 'manual', 1.0))
+        
+        if new_rows:
+            self.db.execute_many(
+                """
+                INSERT INTO translations (
+                    text_key, source_language, target_language,
+                    source_text, translated_text, translation_service, confidence_score
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (text_key, source_language, target_language) DO NOTHING
+                """,
+                new_rows
+            )
+        
+        return results
+    
+    def _translate_locally(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str
+    ) -> Optional[str]:
+        """Word-by-word translation from the built-in dictionary, if complete"""
+        dictionary = self.TRANSLATIONS.get(f"{source_language}_{target_language}")
+        if not dictionary:
+            return None
+        
+        words = text.lower().split()
+        if not words or any(word not in dictionary for word in words):
+            return None
+        return ' '.join(dictionary[word] for word in words)
+    
+    def _pending(self, text: str, target_language: str) -> str:
         return f"{text} (Translation to {target_language} pending)"
     
     def translate_template(
@@ -205,6 +342,10 @@ class TranslationService:
         """Get translation from cache"""
         text_key = self._generate_key(text, source_lang, target_lang)
         
+        cached = _cache_get(text_key)
+        if cached is not None:
+            return cached
+        
         query = """
         SELECT translated_text
         FROM translations
@@ -217,6 +358,7 @@ class TranslationService:
         result = self.db.execute_query(query, (text_key, source_lang, target_lang), fetch=True)
         
         if result:
+            _cache_put(text_key, result[0]['translated_text'])
             return result[0]['translated_text']
         
         return None
@@ -232,6 +374,7 @@ class TranslationService:
     ) -> None:
         """Cache translation for future use"""
         text_key = self._generate_key(source_text, source_lang, target_lang)
+        _cache_put(text_key, translated_text)
         
         query = """
         INSERT INTO translations (
@@ -249,7 +392,8 @@ class TranslationService:
             (text_key, source_lang, target_lang, source_text, translated_text, service, confidence)
         )
     
-    def _generate_key(self, text: str, source_lang: str, target_lang: str) -> str:
+    @staticmethod
+    def _generate_key(text: str, source_lang: str, target_lang: str) -> str:
         """Generate unique key for translation"""
         combined = f"{source_lang}_{target_lang}_{text}"
         return hashlib.md5(combined.encode()).hexdigest()[:50]
@@ -260,32 +404,17 @@ class TranslationService:
     
     def get_attendance_message(self, student_name: str, status: str, language: str) -> str:
         """Get pre-translated attendance message"""
-        templates = {
-            'en': {
-                'present': f"{student_name} is present today",
-                'absent': f"{student_name} is absent today"
-            },
-            'lg': {
-                'present': f"{student_name} ali mu ssomero leero",
-                'absent': f"{student_name} tali mu ssomero leero"
-            },
-            'sw': {
-                'present': f"{student_name} yupo shuleni leo",
-                'absent': f"{student_name} hayupo shuleni leo"
-            }
-        }
-        
-        return templates.get(language, templates['en']).get(status, '')
+        template = self.MESSAGE_TEMPLATES.get(f"attendance_{status}")
+        if template is None:
+            return ''
+        return template.get(language, template['en']).format(student_name=student_name)
     
     def get_fee_message(self, student_name: str, balance: float, language: str) -> str:
         """Get pre-translated fee message"""
-        templates = {
-            'en': f"Fee balance for {student_name}: {balance:,.0f} UGX",
-            'lg': f"Omusigadde gw'ebbisale bya {student_name}: {balance:,.0f} UGX",
-            'sw': f"Salio la ada kwa {student_name}: {balance:,.0f} UGX"
-        }
-        
-        return templates.get(language, templates['en'])
+        template = self.MESSAGE_TEMPLATES['fee_balance']
+        return template.get(language, template['en']).format(
+            student_name=student_name, balance=f"{balance:,.0f}"
+        )
 
 
 def get_translation_service() -> TranslationService:
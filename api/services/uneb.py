@@ -3,12 +3,90 @@ UNEB Service
 Uganda National Examinations Board integration
 Handles PLE, UCE, UACE registration, results, and report cards
 """
-from typing import Dict, Any, List, Optional
+import csv
+import io
+import json
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 
+from psycopg2.extras import Json
+
 from api.services.database import get_db_manager
 
 
+# Grade -> count bucket (distinctions / credits / passes / fails) per exam
+GRADE_CATEGORIES: Dict[str, Dict[str, str]] = {
+    'PLE': {
+        'D1': 'distinctions', 'D2': 'distinctions',
+        'C3': 'credits', 'C4': 'credits', 'C5': 'credits', 'C6': 'credits',
+        'P7': 'passes', 'P8': 'passes',
+        'F9': 'fails',
+    },
+    'UACE': {
+        'A': 'distinctions', 'B': 'distinctions', 'C': 'distinctions',
+        'D': 'credits', 'E': 'credits',
+        'O': 'passes',
+        'F': 'fails',
+    },
+}
+GRADE_CATEGORIES['UCE'] = GRADE_CATEGORIES['PLE']
+
+# Results-file columns that are not subjects
+RESULT_FILE_META_COLUMNS = {
+    'student_id', 'name', 'candidate_name', 'student_name', 'sex', 'gender',
+    'exam_type', 'exam_year', 'center_number', 'centre_number', 'division', 'aggregate',
+}
+RESULT_FILE_INDEX_COLUMNS = ('index_number', 'index_no', 'index', 'candidate_number')
+
+# exam_type -> (loaded_at, {grade: {points, description}}) read from
+# uneb_grade_mapping. The table is reference data that changes with syllabus
+# reviews, so a map is reused for GRADE_MAP_TTL_SECONDS; empty maps are never
+# cached so a school that has not loaded its grades yet picks them up at once.
+GRADE_MAP_TTL_SECONDS = 600
+_grade_maps: Dict[str, Tuple[float, Dict[str, Dict[str, Any]]]] = {}
+_grade_maps_lock = threading.Lock()
+
+# Totals over uneb_results in uneb_performance_stats column order; the source
+# of truth the stats rows are seeded and reconciled from
+PERFORMANCE_TOTALS = """
+    COUNT(*) AS total_candidates,
+    COALESCE(SUM(aggregate), 0) AS aggregate_sum, COUNT(aggregate) AS aggregate_count,
+    COUNT(CASE WHEN division LIKE 'Division 1%%' OR division = 'Grade 1' THEN 1 END) AS division_1,
+    COUNT(CASE WHEN division LIKE 'Division 2%%' OR division = 'Grade 2' THEN 1 END) AS division_2,
+    COUNT(CASE WHEN division LIKE 'Division 3%%' OR division = 'Grade 3' THEN 1 END) AS division_3,
+    COUNT(CASE WHEN division LIKE 'Division 4%%' OR division = 'Grade 4' THEN 1 END) AS division_4,
+    COALESCE(SUM(distinction_count), 0) AS total_distinctions,
+    COALESCE(SUM(credit_count), 0) AS total_credits
+"""
+
+PERFORMANCE_COLUMNS = (
+    "total_candidates", "aggregate_sum", "aggregate_count",
+    "division_1", "division_2", "division_3", "division_4",
+    "total_distinctions", "total_credits"
+)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _division_bucket(division: Optional[str]) -> Optional[int]:
+    """1-4 for Division/Grade 1-4 (as counted by get_school_performance)"""
+    if not division:
+        return None
+    for n in (1, 2, 3, 4):
+        if division.startswith(f'Division {n}') or division == f'Grade {n}':
+            return n
+    return None
+
+
 class UNEBService:
     """Service for UNEB exam management"""
     
@@ -160,13 +238,6 @@ class UNEBService:
             index_number: UNEB index number
             subject_results: {subject: grade} e.g., {"English": "D1", "Math": "D2"}
         """
-        # Calculate aggregate
-        aggregate = self._calculate_aggregate(exam_type, subject_results)
-        division = self._get_division(exam_type, aggregate)
-        
-        # Count distinctions, credits, passes
-        counts = self._count_grades(exam_type, subject_results)
-        
         # Get registration
         reg_query = """
         SELECT id FROM uneb_registrations
@@ -176,42 +247,361 @@ class UNEBService:
         reg = self.db.execute_query(reg_query, (student_id, exam_type, exam_year), fetch=True)
         registration_id = reg[0]['id'] if reg else None
         
-        # Insert results
-        query = """
-        INSERT INTO uneb_results (
-            school_id, student_id, registration_id, exam_type, exam_year,
-            index_number, subject_results, aggregate, division,
-            distinction_count, credit_count, pass_count, fail_count
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (student_id, exam_type, exam_year)
-        DO UPDATE SET
-            subject_results = EXCLUDED.subject_results,
-            aggregate = EXCLUDED.aggregate,
-            division = EXCLUDED.division,
-            distinction_count = EXCLUDED.distinction_count,
-            credit_count = EXCLUDED.credit_count,
-            pass_count = EXCLUDED.pass_count,
-            fail_count = EXCLUDED.fail_count
-        RETURNING id
+        result = self._upsert_results(exam_type, exam_year, [{
+            "student_id": student_id,
+            "registration_id": registration_id,
+            "index_number": index_number,
+            "subject_results": subject_results
+        }])[0]
+        
+        return {
+            "success": True,
+            "result_id": result['result_id'],
+            "exam_type": exam_type,
+            "aggregate": result['aggregate'],
+            "division": result['division'],
+            **result['counts']
+        }
+    
+    def import_results_file(
+        self,
+        file_content: Union[bytes, str],
+        filename: str,
+        exam_type: str,
+        exam_year: int
+    ) -> Dict[str, Any]:
         """
+        Bulk import a results release from a CSV or JSON file
         
-        result = self.db.execute_query(
-            query,
-            (
-                self.school_id, student_id, registration_id, exam_type, exam_year,
-                index_number, subject_results, aggregate, division,
-                counts['distinctions'], counts['credits'], counts['passes'], counts['fails']
-            ),
+        CSV: one row per candidate, an index number column (or student_id)
+        and one column per subject holding the grade.
+        JSON: a list (or {"results": [...]}) of objects, either flat like the
+        CSV rows or with a "subject_results" {subject: grade} object.
+        
+        Registrations are resolved in one query, all candidates are scored in
+        one pass and upserted with one statement.
+        """
+        candidates = self.parse_results_file(file_content, filename)
+        errors = []
+        
+        index_numbers = [c['index_number'] for c in candidates if c['index_number']]
+        student_ids = [c['student_id'] for c in candidates if c['student_id'] and _is_uuid(c['student_id'])]
+        registrations = self.db.execute_query(
+            """
+            SELECT id, student_id, index_number
+            FROM uneb_registrations
+            WHERE school_id = %s AND exam_type = %s AND exam_year = %s
+              AND (index_number = ANY(%s) OR student_id = ANY(%s::uuid[]))
+            """,
+            (self.school_id, exam_type, exam_year, index_numbers, student_ids),
             fetch=True
-        )
+        ) or []
+        by_index = {r['index_number']: r for r in registrations if r['index_number']}
+        by_student = {str(r['student_id']): r for r in registrations}
+        
+        resolved = {}
+        for n, candidate in enumerate(candidates, start=1):
+            registration = by_index.get(candidate['index_number']) or by_student.get(candidate['student_id'] or '')
+            if not registration:
+                errors.append(f"Row {n}: candidate {candidate['index_number'] or candidate['student_id'] or '?'} is not registered for {exam_type} {exam_year}")
+                continue
+            if not candidate['subject_results']:
+                errors.append(f"Row {n}: no subject grades")
+                continue
+            student_id = str(registration['student_id'])
+            # A later row for the same candidate wins (corrected slips)
+            resolved[student_id] = {
+                "student_id": student_id,
+                "registration_id": registration['id'],
+                "index_number": candidate['index_number'] or registration['index_number'],
+                "subject_results": candidate['subject_results']
+            }
+        
+        results = self._upsert_results(exam_type, exam_year, list(resolved.values())) if resolved else []
         
         return {
             "success": True,
-            "result_id": result[0]['id'],
             "exam_type": exam_type,
-            "aggregate": aggregate,
-            "division": division,
-            **counts
+            "exam_year": exam_year,
+            "rows_read": len(candidates),
+            "imported": len(results),
+            "new_results": sum(1 for r in results if r['inserted']),
+            "updated_results": sum(1 for r in results if not r['inserted']),
+            "errors": errors
+        }
+    
+    @staticmethod
+    def parse_results_file(file_content: Union[bytes, str], filename: str) -> List[Dict[str, Any]]:
+        """Read a CSV/JSON results file into [{index_number, student_id, subject_results}]"""
+        if isinstance(file_content, bytes):
+            file_content = file_content.decode('utf-8-sig', errors='replace')
+        
+        if filename.lower().endswith('.json'):
+            data = json.loads(file_content)
+            rows = data.get('results', []) if isinstance(data, dict) else data
+        else:
+            rows = list(csv.DictReader(io.StringIO(file_content)))
+        
+        candidates = []
+        for row in rows:
+            fields = {
+                str(key).strip().lower().replace(' ', '_'): value
+                for key, value in row.items() if key is not None
+            }
+            index_number = next(
+                (str(fields[col]).strip() for col in RESULT_FILE_INDEX_COLUMNS if fields.get(col)),
+                None
+            )
+            student_id = str(fields['student_id']).strip() if fields.get('student_id') else None
+            
+            if isinstance(fields.get('subject_results'), dict):
+                raw_grades = fields['subject_results'].items()
+            else:
+                # Subject names keep their original spelling
+                raw_grades = (
+                    (str(key).strip(), value) for key, value in row.items()
+                    if key is not None
+                    and str(key).strip().lower().replace(' ', '_') not in RESULT_FILE_META_COLUMNS
+                    and str(key).strip().lower().replace(' ', '_') not in RESULT_FILE_INDEX_COLUMNS
+                )
+            subject_results = {
+                subject: str(grade).strip().upper()
+                for subject, grade in raw_grades
+                if grade is not None and str(grade).strip()
+            }
+            
+            if index_number or student_id:
+                candidates.append({
+                    "index_number": index_number,
+                    "student_id": student_id,
+                    "subject_results": subject_results
+                })
+        return candidates
+    
+    def _score(self, exam_type: str, subject_results: Dict[str, str]) -> Tuple[int, str, Dict[str, int]]:
+        """Aggregate, division and grade counts from the cached grade-point map"""
+        aggregate = self._calculate_aggregate(exam_type, subject_results)
+        return aggregate, self._get_division(exam_type, aggregate), self._count_grades(exam_type, subject_results)
+    
+    def _upsert_results(
+        self,
+        exam_type: str,
+        exam_year: int,
+        candidates: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Score and upsert candidates in one statement, keeping
+        uneb_performance_stats in step with the rows inserted or replaced
+        """
+        scored = []
+        for candidate in candidates:
+            aggregate, division, counts = self._score(exam_type, candidate['subject_results'])
+            scored.append((candidate, aggregate, division, counts))
+        
+        with self.db.transaction() as tx:
+            # Serialises imports and reconciliation for this school so the
+            # deltas below stay exact
+            self._lock_performance_stats(tx)
+            self._seed_performance_stats(tx, exam_type, exam_year)
+            
+            previous = tx.execute(
+                """
+                SELECT student_id, aggregate, division, distinction_count, credit_count
+                FROM uneb_results
+                WHERE exam_type = %s AND exam_year = %s AND student_id = ANY(%s::uuid[])
+                """,
+                (exam_type, exam_year, [str(c['student_id']) for c, _, _, _ in scored])
+            )
+            previous_by_student = {str(row['student_id']): row for row in previous}
+            
+            rows = tx.execute_values(
+                """
+                INSERT INTO uneb_results (
+                    school_id, student_id, registration_id, exam_type, exam_year,
+                    index_number, subject_results, aggregate, division,
+                    distinction_count, credit_count, pass_count, fail_count
+                ) VALUES %s
+                ON CONFLICT (student_id, exam_type, exam_year)
+                DO UPDATE SET
+                    registration_id = COALESCE(EXCLUDED.registration_id, uneb_results.registration_id),
+                    index_number = COALESCE(EXCLUDED.index_number, uneb_results.index_number),
+                    subject_results = EXCLUDED.subject_results,
+                    aggregate = EXCLUDED.aggregate,
+                    division = EXCLUDED.division,
+                    distinction_count = EXCLUDED.distinction_count,
+                    credit_count = EXCLUDED.credit_count,
+                    pass_count = EXCLUDED.pass_count,
+                    fail_count = EXCLUDED.fail_count,
+                    imported_at = CURRENT_TIMESTAMP
+                RETURNING id, student_id, (xmax = 0) AS inserted
+                """,
+                [
+                    (
+                        self.school_id, c['student_id'], c['registration_id'], exam_type, exam_year,
+                        c['index_number'], Json(c['subject_results']), aggregate, division,
+                        counts['distinctions'], counts['credits'], counts['passes'], counts['fails']
+                    )
+                    for c, aggregate, division, counts in scored
+                ],
+                fetch=True
+            )
+            
+            # Stats deltas: add the new rows, take away the rows they replaced
+            delta = {"total_candidates": 0, "aggregate_sum": 0, "aggregate_count": 0,
+                     "division_1": 0, "division_2": 0, "division_3": 0, "division_4": 0,
+                     "total_distinctions": 0, "total_credits": 0}
+            
+            def apply(sign, aggregate, division, distinctions, credits):
+                delta["total_candidates"] += sign
+                if aggregate is not None:
+                    delta["aggregate_sum"] += sign * aggregate
+                    delta["aggregate_count"] += sign
+                bucket = _division_bucket(division)
+                if bucket:
+                    delta[f"division_{bucket}"] += sign
+                delta["total_distinctions"] += sign * (distinctions or 0)
+                delta["total_credits"] += sign * (credits or 0)
+            
+            for c, aggregate, division, counts in scored:
+                old = previous_by_student.get(str(c['student_id']))
+                if old:
+                    apply(-1, old['aggregate'], old['division'], old['distinction_count'], old['credit_count'])
+                apply(1, aggregate, division, counts['distinctions'], counts['credits'])
+            
+            tx.execute(
+                """
+                UPDATE uneb_performance_stats
+                SET total_candidates = total_candidates + %(total_candidates)s,
+                    aggregate_sum = aggregate_sum + %(aggregate_sum)s,
+                    aggregate_count = aggregate_count + %(aggregate_count)s,
+                    division_1 = division_1 + %(division_1)s,
+                    division_2 = division_2 + %(division_2)s,
+                    division_3 = division_3 + %(division_3)s,
+                    division_4 = division_4 + %(division_4)s,
+                    total_distinctions = total_distinctions + %(total_distinctions)s,
+                    total_credits = total_credits + %(total_credits)s,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE school_id = %(school_id)s AND exam_type = %(exam_type)s AND exam_year = %(exam_year)s
+                """,
+                {**delta, "school_id": self.school_id, "exam_type": exam_type, "exam_year": exam_year},
+                fetch=False
+            )
+        
+        returned = {str(row['student_id']): row for row in rows}
+        return [
+            {
+                "result_id": returned[str(c['student_id'])]['id'],
+                "student_id": c['student_id'],
+                "inserted": returned[str(c['student_id'])]['inserted'],
+                "aggregate": aggregate,
+                "division": division,
+                "counts": counts
+            }
+            for c, aggregate, division, counts in scored
+        ]
+    
+    def _lock_performance_stats(self, tx) -> None:
+        tx.execute(
+            "SELECT pg_advisory_xact_lock(hashtext(%s))",
+            (f"uneb_performance_stats:{self.school_id}",)
+        )
+    
+    def _seed_performance_stats(self, tx, exam_type: str, exam_year: int) -> None:
+        """Create the stats row from uneb_results the first time an exam is imported"""
+        tx.execute(
+            f"""
+            INSERT INTO uneb_performance_stats (
+                school_id, exam_type, exam_year, {", ".join(PERFORMANCE_COLUMNS)}
+            )
+            SELECT %s, %s, %s, {PERFORMANCE_TOTALS}
+            FROM uneb_results
+            WHERE school_id = %s AND exam_type = %s AND exam_year = %s
+            ON CONFLICT (school_id, exam_type, exam_year) DO NOTHING
+            """,
+            (self.school_id, exam_type, exam_year) * 2,
+            fetch=False
+        )
+    
+    def reconcile_performance_stats(self, repair: bool = True) -> Dict[str, Any]:
+        """
+        Compare uneb_performance_stats with uneb_results for every exam
+        
+        Imports keep the stats current with deltas; this catches drift from
+        results written or deleted outside _upsert_results, and creates rows
+        for exams imported before the stats table existed.
+        """
+        with self.db.transaction() as tx:
+            self._lock_performance_stats(tx)
+            drift = tx.execute(
+                f"""
+                WITH actual AS (
+                    SELECT exam_type, exam_year, {PERFORMANCE_TOTALS}
+                    FROM uneb_results
+                    WHERE school_id = %s
+                    GROUP BY exam_type, exam_year
+                ),
+                stored AS (
+                    SELECT exam_type, exam_year, {", ".join(PERFORMANCE_COLUMNS)}
+                    FROM uneb_performance_stats
+                    WHERE school_id = %s
+                )
+                SELECT
+                    COALESCE(a.exam_type, s.exam_type) AS exam_type,
+                    COALESCE(a.exam_year, s.exam_year) AS exam_year
+                FROM actual a
+                FULL JOIN stored s
+                    ON s.exam_type = a.exam_type AND s.exam_year = a.exam_year
+                WHERE (a.total_candidates, a.aggregate_sum, a.aggregate_count,
+                       a.division_1, a.division_2, a.division_3, a.division_4,
+                       a.total_distinctions, a.total_credits)
+                      IS DISTINCT FROM
+                      (s.total_candidates, s.aggregate_sum, s.aggregate_count,
+                       s.division_1, s.division_2, s.division_3, s.division_4,
+                       s.total_distinctions, s.total_credits)
+                """,
+                (self.school_id, self.school_id)
+            )
+            
+            if repair and drift:
+                tx.execute(
+                    f"""
+                    INSERT INTO uneb_performance_stats (
+                        school_id, exam_type, exam_year, {", ".join(PERFORMANCE_COLUMNS)}
+                    )
+                    SELECT school_id, exam_type, exam_year, {PERFORMANCE_TOTALS}
+                    FROM uneb_results
+                    WHERE school_id = %s
+                    GROUP BY school_id, exam_type, exam_year
+                    ON CONFLICT (school_id, exam_type, exam_year) DO UPDATE SET
+                        {", ".join(f"{column} = EXCLUDED.{column}" for column in PERFORMANCE_COLUMNS)},
+                        updated_at = CURRENT_TIMESTAMP
+                    """,
+                    (self.school_id,),
+                    fetch=False
+                )
+                tx.execute(
+                    """
+                    DELETE FROM uneb_performance_stats ps
+                    WHERE ps.school_id = %s
+                    AND NOT EXISTS (
+                        SELECT 1 FROM uneb_results r
+                        WHERE r.school_id = ps.school_id
+                        AND r.exam_type = ps.exam_type
+                        AND r.exam_year = ps.exam_year
+                    )
+                    """,
+                    (self.school_id,),
+                    fetch=False
+                )
+        
+        return {
+            "success": True,
+            "exams_mismatched": len(drift),
+            "mismatched": [
+                {"exam_type": row['exam_type'], "exam_year": row['exam_year']}
+                for row in drift
+            ],
+            "repaired": bool(repair and drift)
         }
     
     def get_results(
@@ -392,45 +782,38 @@ class UNEBService:
             'passes': 0,
             'fails': 0
         }
+        categories = GRADE_CATEGORIES.get(exam_type, {})
         
-        for subject, grade in subject_results.items():
-            if exam_type in ['PLE', 'UCE']:
-                if grade in ['D1', 'D2']:
-                    counts['distinctions'] += 1
-                elif grade in ['C3', 'C4', 'C5', 'C6']:
-                    counts['credits'] += 1
-                elif grade in ['P7', 'P8']:
-                    counts['passes'] += 1
-                elif grade == 'F9':
-                    counts['fails'] += 1
-            
-            elif exam_type == 'UACE':
-                if grade in ['A', 'B', 'C']:
-                    counts['distinctions'] += 1
-                elif grade in ['D', 'E']:
-                    counts['credits'] += 1
-                elif grade == 'O':
-                    counts['passes'] += 1
-                elif grade == 'F':
-                    counts['fails'] += 1
+        for grade in subject_results.values():
+            category = categories.get(grade)
+            if category:
+                counts[category] += 1
         
         return counts
     
     def _get_grade_info(self, exam_type: str, grade: str) -> Optional[Dict]:
-        """Get grade information from database"""
-        query = """
-        SELECT points, description
-        FROM uneb_grade_mapping
-        WHERE exam_type = %s AND grade = %s
-        LIMIT 1
-        """
-        
-        result = self.db.execute_query(query, (exam_type, grade), fetch=True)
-        
-        if result:
-            return result[0]
-        
-        return None
+        """Get grade information (points, description) from the cached grade map"""
+        return self._grade_map(exam_type).get(grade)
+    
+    def _grade_map(self, exam_type: str) -> Dict[str, Dict[str, Any]]:
+        """All grades for an exam type, cached for GRADE_MAP_TTL_SECONDS"""
+        cached = _grade_maps.get(exam_type)
+        if cached and time.monotonic() - cached[0] < GRADE_MAP_TTL_SECONDS:
+            return cached[1]
+        
+        rows = self.db.execute_query(
+            "SELECT grade, points, description FROM uneb_grade_mapping WHERE exam_type = %s",
+            (exam_type,),
+            fetch=True
+        ) or []
+        grade_map = {
+            row['grade']: {"points": row['points'], "description": row['description']}
+            for row in rows
+        }
+        if grade_map:
+            with _grade_maps_lock:
+                _grade_maps[exam_type] = (time.monotonic(), grade_map)
+        return grade_map
     
     # ============================================================================
     # ANALYTICS
@@ -441,31 +824,44 @@ class UNEBService:
         exam_type: str,
         exam_year: int
     ) -> Dict[str, Any]:
-        """Get school performance statistics"""
-        query = """
-        SELECT 
-            COUNT(*) as total_candidates,
-            AVG(aggregate) as average_aggregate,
-            COUNT(CASE WHEN division LIKE 'Division 1%' OR division = 'Grade 1' THEN 1 END) as division_1,
-            COUNT(CASE WHEN division LIKE 'Division 2%' OR division = 'Grade 2' THEN 1 END) as division_2,
-            COUNT(CASE WHEN division LIKE 'Division 3%' OR division = 'Grade 3' THEN 1 END) as division_3,
-            COUNT(CASE WHEN division LIKE 'Division 4%' OR division = 'Grade 4' THEN 1 END) as division_4,
-            SUM(distinction_count) as total_distinctions,
-            SUM(credit_count) as total_credits
-        FROM uneb_results
-        WHERE school_id = %s
-        AND exam_type = %s
-        AND exam_year = %s
         """
+        Get school performance statistics
         
-        result = self.db.execute_query(query, (self.school_id, exam_type, exam_year), fetch=True)
-        
-        if result:
+        Read from uneb_performance_stats, which result imports keep current
+        and the reconciliation job repairs; exams without a stats row yet are
+        totalled from uneb_results without writing anything.
+        """
+        params = (self.school_id, exam_type, exam_year)
+        rows = self.db.execute_query(
+            f"""
+            SELECT {", ".join(PERFORMANCE_COLUMNS)}
+            FROM uneb_performance_stats
+            WHERE school_id = %s AND exam_type = %s AND exam_year = %s
+            """,
+            params,
+            fetch=True
+        )
+        if not rows:
+            rows = self.db.execute_query(
+                f"""
+                SELECT {PERFORMANCE_TOTALS}
+                FROM uneb_results
+                WHERE school_id = %s AND exam_type = %s AND exam_year = %s
+                """,
+                params,
+                fetch=True
+            )
+        
+        if rows:
+            stats = {column: rows[0][column] for column in PERFORMANCE_COLUMNS}
+            aggregate_count = stats.pop('aggregate_count')
+            aggregate_sum = stats.pop('aggregate_sum')
             return {
                 "success": True,
                 "exam_type": exam_type,
                 "exam_year": exam_year,
-                **result[0]
+                **stats,
+                "average_aggregate": aggregate_sum / aggregate_count if aggregate_count else None
             }
         
         return {"success": False, "error": "No data found"}
@@ -13,6 +13,14 @@ from datetime import datetime
 import re
 from difflib import SequenceMatcher
 
+from psycopg2.extras import execute_values
+
+
+def _normalize_header(name: str) -> str:
+    """Lowercase and strip everything but letters/digits ("Adm. No" -> "admno")"""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
 class UniversalImporter:
     """Handles messy Excel/CSV imports with intelligent column mapping"""
     
@@ -27,8 +35,32 @@ class UniversalImporter:
         'stream': ['stream', 'section', 'division', 'class_section']
     }
     
-    def __init__(self, school_id: str):
+    # Rows per multi-row INSERT statement
+    IMPORT_CHUNK_SIZE = 1000
+    
+    def __init__(self, school_id: str, db=None):
         self.school_id = school_id
+        self._db = db
+    
+    @property
+    def db(self):
+        # Preview works on the file alone, so only connect when writing
+        if self._db is None:
+            from api.services.database import get_db_manager
+            self._db = get_db_manager()
+        return self._db
+    
+    @classmethod
+    def _variant_index(cls) -> Dict[str, str]:
+        """Normalized header variant -> our field, built once per class"""
+        index = cls.__dict__.get('_VARIANT_INDEX')
+        if index is None:
+            index = {}
+            for our_field, variants in cls.STUDENT_FIELDS.items():
+                for variant in [our_field, *variants]:
+                    index.setdefault(_normalize_header(variant), our_field)
+            cls._VARIANT_INDEX = index
+        return index
         
     def similarity(self, a: str, b: str) -> float:
         """Calculate similarity between two strings"""
@@ -55,7 +87,18 @@ class UniversalImporter:
         mapping = {}
         used_columns = set()
         
+        # Exact matches on the normalized header first: one dict lookup each
+        index = self._variant_index()
+        for col in headers:
+            our_field = index.get(_normalize_header(col))
+            if our_field and our_field not in mapping:
+                mapping[our_field] = col
+                used_columns.add(col)
+        
+        # Fuzzy fallback only for fields still unmapped
         for our_field, variants in self.STUDENT_FIELDS.items():
+            if our_field in mapping:
+                continue
             best_match = None
             best_score = 0.6  # Minimum confidence threshold
             
@@ -184,24 +227,118 @@ class UniversalImporter:
         
         return warnings
     
-    def execute_import(self, file_path: str) -> Dict:
+    def find_conflicts(self, admission_numbers: List[str]) -> List[str]:
+        """Admission numbers that already exist for this school (one query)"""
+        if not admission_numbers:
+            return []
+        rows = self.db.execute_query(
+            """
+            SELECT admission_number FROM students
+            WHERE school_id = %s AND admission_number = ANY(%s)
+            """,
+            (self.school_id, admission_numbers),
+            fetch=True
+        )
+        return [row['admission_number'] for row in rows]
+    
+    def execute_import(self, file_path: str, dry_run: bool = False,
+                       update_existing: bool = False) -> Dict:
         """
         Execute the full import
+        
+        All rows are written in one transaction with chunked multi-row
+        INSERTs. With dry_run nothing is written; the result reports which
+        admission numbers already exist (or repeat inside the file).
+        
+        Args:
+            file_path: CSV file to import
+            dry_run: Only report what would happen
+            update_existing: Overwrite existing students instead of skipping them
+        
         Returns: {
             'success': bool,
             'imported_count': int,
+            'conflicts': [...],
             'errors': [...]
         }
         """
         headers, rows, mapping = self.parse_file(file_path)
         students = self.transform_to_students(rows, mapping)
         
-        # Here you would insert into the database
-        # For now, returning the prepared data
+        # Last row wins for admission numbers repeated inside the file
+        unique: Dict[str, Dict] = {}
+        duplicates_in_file = []
+        for student in students:
+            admission_number = student['admission_number']
+            if admission_number in unique:
+                duplicates_in_file.append(admission_number)
+            unique[admission_number] = student
+        
+        conflicts = self.find_conflicts(list(unique.keys()))
+        errors = [f"Duplicate admission number in file: {a}" for a in dict.fromkeys(duplicates_in_file)]
+        
+        if dry_run:
+            return {
+                'success': True,
+                'dry_run': True,
+                'imported_count': 0,
+                'would_insert': len(unique) - len(conflicts),
+                'would_update': len(conflicts) if update_existing else 0,
+                'conflicts': conflicts,
+                'students': list(unique.values())[:10],
+                'errors': errors
+            }
+        
+        values = [
+            (
+                self.school_id,
+                s['admission_number'],
+                s.get('first_name', ''),
+                s.get('last_name', ''),
+                s.get('date_of_birth'),
+                s.get('gender'),
+                s.get('class_name'),
+                s.get('stream'),
+            )
+            for s in unique.values()
+        ]
+        
+        on_conflict = (
+            """
+            DO UPDATE SET first_name = EXCLUDED.first_name,
+                          last_name = EXCLUDED.last_name,
+                          date_of_birth = COALESCE(EXCLUDED.date_of_birth, students.date_of_birth),
+                          gender = COALESCE(EXCLUDED.gender, students.gender),
+                          class_name = COALESCE(EXCLUDED.class_name, students.class_name),
+                          section = COALESCE(EXCLUDED.section, students.section),
+                          updated_at = CURRENT_TIMESTAMP
+            """
+            if update_existing else "DO NOTHING"
+        )
+        query = f"""
+        INSERT INTO students (
+            school_id, admission_number, first_name, last_name,
+            date_of_birth, gender, class_name, section
+        ) VALUES %s
+        ON CONFLICT (school_id, admission_number) {on_conflict}
+        RETURNING (xmax = 0) AS inserted
+        """
+        
+        written = []
+        with self.db.get_cursor() as cur:
+            for start in range(0, len(values), self.IMPORT_CHUNK_SIZE):
+                chunk = values[start:start + self.IMPORT_CHUNK_SIZE]
+                written.extend(execute_values(cur, query, chunk, page_size=len(chunk), fetch=True))
+        
+        inserted = sum(1 for row in written if row['inserted'])
         
         return {
             'success': True,
-            'imported_count': len(students),
-            'students': students,
-            'errors': []
+            'dry_run': False,
+            'imported_count': inserted,
+            'updated_count': len(written) - inserted,
+            'skipped_count': len(values) - len(written),
+            'conflicts': conflicts,
+            'students': list(unique.values())[:10],
+            'errors': errors
         }
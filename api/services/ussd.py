@@ -3,18 +3,157 @@ USSD Service
 Handles USSD sessions for basic phone access (*123#)
 Allows parents without smartphones to access school info
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+import atexit
+import json
+import queue
+import threading
 import uuid
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from api.core.config import get_settings
 from api.services.database import get_db_manager
 
 
+# Gateways give up after a few seconds. With REDIS_URL set, live session state
+# is kept in Redis (shared by every worker, answered in about a millisecond)
+# and ussd_sessions is only written behind for audit. Without it, the table is
+# the session state and each hop costs a read and a write to the database.
+SESSION_TTL_SECONDS = 300  # Matches ussd_sessions.expires_at
+CHILDREN_CACHE_TTL_SECONDS = 600
+
+
+class USSDSessionStore:
+    """
+    USSD session state and the phone -> children mapping in Redis
+    
+    Keys expire on their own (TTL), so nothing has to sweep them. Children
+    are cached under a generation number; bumping it invalidates every
+    phone's entry at once, on every worker.
+    """
+    
+    def __init__(self, client, ttl_seconds: int = SESSION_TTL_SECONDS,
+                 children_ttl_seconds: int = CHILDREN_CACHE_TTL_SECONDS):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.children_ttl_seconds = children_ttl_seconds
+    
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Active session, or None if unknown/expired"""
+        raw = self.client.get(f"ussd:session:{session_id}")
+        return json.loads(raw) if raw else None
+    
+    def put(self, session_id: str, phone_number: str, current_menu: str,
+            session_data: Optional[Dict] = None) -> None:
+        """Create or replace a session and refresh its expiry"""
+        session = {
+            'phone_number': phone_number,
+            'current_menu': current_menu,
+            'session_data': session_data or {},
+        }
+        self.client.setex(
+            f"ussd:session:{session_id}", self.ttl_seconds, json.dumps(session, default=str)
+        )
+    
+    def update(self, session_id: str, current_menu: str, session_data: Dict) -> None:
+        """Move an existing session to a new menu"""
+        session = self.get(session_id)
+        if session is not None:
+            self.put(session_id, session['phone_number'], current_menu, session_data)
+    
+    def remove(self, session_id: str) -> None:
+        self.client.delete(f"ussd:session:{session_id}")
+    
+    def get_children(self, phone_number: str) -> Optional[list]:
+        raw = self.client.get(self._children_key(phone_number))
+        return json.loads(raw) if raw else None
+    
+    def put_children(self, phone_number: str, children: list) -> None:
+        self.client.setex(
+            self._children_key(phone_number), self.children_ttl_seconds, json.dumps(children, default=str)
+        )
+    
+    def invalidate_children(self) -> None:
+        """Forget every cached phone -> children mapping"""
+        self.client.incr("ussd:children:generation")
+    
+    def _children_key(self, phone_number: str) -> str:
+        generation = self.client.get("ussd:children:generation") or 0
+        return f"ussd:children:{generation}:{phone_number}"
+
+
+class USSDAuditWriter:
+    """Writes ussd_sessions audit rows on a background thread, off the response path"""
+    
+    def __init__(self):
+        self._writes: "queue.Queue[Tuple[str, tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def write(self, query: str, params: tuple) -> None:
+        self._ensure_writer()
+        self._writes.put((query, params))
+    
+    def flush(self) -> None:
+        """Block until every queued write has been attempted"""
+        if self._writer is not None:
+            self._writes.join()
+    
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._drain, name="ussd-audit", daemon=True)
+                self._writer.start()
+    
+    def _drain(self) -> None:
+        while True:
+            query, params = self._writes.get()
+            try:
+                get_db_manager().execute_query(query, params, fetch=False)
+            except Exception as e:
+                print(f"⚠️ USSD session audit write failed: {e}")
+            finally:
+                self._writes.task_done()
+
+
+_session_store: Optional[USSDSessionStore] = None
+_audit_writer = USSDAuditWriter()
+# Worker recycling (--limit-max-requests) exits normally, so queued audit
+# rows are written before the process goes
+atexit.register(_audit_writer.flush)
+
+
+def get_ussd_session_store() -> Optional[USSDSessionStore]:
+    """Shared session store, or None when Redis is not configured"""
+    global _session_store
+    if _session_store is None:
+        redis_url = get_settings().redis_url
+        if not (redis_url and REDIS_AVAILABLE):
+            return None
+        _session_store = USSDSessionStore(redis.Redis.from_url(redis_url, decode_responses=True))
+    return _session_store
+
+
+def invalidate_ussd_children_cache() -> None:
+    """Call after parent/student links change so USSD menus stay accurate"""
+    store = get_ussd_session_store()
+    if store is not None:
+        store.invalidate_children()
+
+
 class USSDService:
     """Service for USSD (*123#) functionality"""
     
     def __init__(self):
         self.db = get_db_manager()
+        self.sessions = get_ussd_session_store()
+        self.audit = _audit_writer
     
     # ============================================================================
     # SESSION MANAGEMENT
@@ -26,15 +165,17 @@ class USSDService:
         
         Returns initial menu
         """
-        # Create session
+        # Create session. Without the shared store the row is the session
+        # state: the gateway's next hop may be served by another worker.
         query = """
         INSERT INTO ussd_sessions (
             session_id, phone_number, current_menu, status
         ) VALUES (%s, %s, 'main_menu', 'active')
-        RETURNING id
+        ON CONFLICT (session_id) DO NOTHING
         """
-        
-        result = self.db.execute_query(query, (session_id, phone_number), fetch=True)
+        self._write(query, (session_id, phone_number))
+        if self.sessions is not None:
+            self.sessions.put(session_id, phone_number, 'main_menu')
         
         # Return main menu
         return {
@@ -54,15 +195,7 @@ class USSDService:
         Returns next menu or result
         """
         # Get current session
-        session_query = """
-        SELECT 
-            id, phone_number, school_id, user_id, 
-            current_menu, session_data
-        FROM ussd_sessions
-        WHERE session_id = %s AND status = 'active'
-        """
-        
-        session = self.db.execute_query(session_query, (session_id,), fetch=True)
+        session = self._load_session(session_id)
         
         if not session:
             return {
@@ -71,14 +204,13 @@ class USSDService:
                 "continues": False
             }
         
-        session = session[0]
         current_menu = session['current_menu']
         phone_number = session['phone_number']
         session_data = session['session_data'] or {}
         
         # Route based on current menu
         if current_menu == 'main_menu':
-            return self._handle_main_menu(session_id, user_input, phone_number)
+            return self._handle_main_menu(session_id, user_input, phone_number, session_data)
         
         elif current_menu == 'select_school':
             return self._handle_school_selection(session_id, user_input, phone_number, session_data)
@@ -125,7 +257,8 @@ class USSDService:
         self,
         session_id: str,
         user_input: str,
-        phone_number: str
+        phone_number: str,
+        session_data: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """Handle main menu selection"""
         
@@ -156,8 +289,11 @@ class USSDService:
                 "continues": False
             }
         
-        # Check if user has children
-        children = self._get_user_children(phone_number)
+        # Check if user has children (already looked up if the parent came
+        # back from child selection)
+        children = (session_data or {}).get('children')
+        if children is None:
+            children = self._get_user_children(phone_number)
         
         if not children:
             return {
@@ -199,7 +335,7 @@ class USSDService:
         """Handle child selection"""
         
         if user_input == '0':
-            self._update_session(session_id, 'main_menu', {})
+            self._update_session(session_id, 'main_menu', {'children': session_data.get('children', [])})
             return {
                 "session_id": session_id,
                 "response": self._get_main_menu(),
@@ -275,7 +411,12 @@ class USSDService:
     # ============================================================================
     
     def _get_user_children(self, phone_number: str) -> list:
-        """Get children for parent's phone number"""
+        """Get children for parent's phone number (cached per phone with Redis)"""
+        if self.sessions is not None:
+            children = self.sessions.get_children(phone_number)
+            if children is not None:
+                return children
+        
         query = """
         SELECT DISTINCT
             s.id as student_id,
@@ -290,7 +431,15 @@ class USSDService:
         ORDER BY s.first_name
         """
         
-        return self.db.execute_query(query, (phone_number,), fetch=True)
+        rows = self.db.execute_query(query, (phone_number,), fetch=True) or []
+        # Kept in session_data, so ids must survive the JSON round trip
+        children = [
+            {**dict(row), 'student_id': str(row['student_id']), 'school_id': str(row['school_id'])}
+            for row in rows
+        ]
+        if self.sessions is not None:
+            self.sessions.put_children(phone_number, children)
+        return children
     
     def _show_attendance(self, session_id: str, session_data: Dict) -> Dict[str, Any]:
         """Show attendance for last 5 days"""
@@ -334,11 +483,10 @@ class USSDService:
         query = """
         SELECT 
             s.first_name, s.last_name, s.class_name,
-            COALESCE(SUM(sf.balance), 0) as total_balance
+            COALESCE(l.balance, 0) as total_balance
         FROM students s
-        LEFT JOIN student_fees sf ON sf.student_id = s.id
+        LEFT JOIN fee_balance_ledger l ON l.student_id = s.id
         WHERE s.id = %s
-        GROUP BY s.id, s.first_name, s.last_name, s.class_name
         """
         
         rows = self.db.execute_query(query, (student_id,), fetch=True)
@@ -484,6 +632,30 @@ class USSDService:
     # SESSION UTILITIES
     # ============================================================================
     
+    def _load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Current state of an active, unexpired session: from the shared store
+        when configured, otherwise one primary key lookup
+        """
+        if self.sessions is not None:
+            return self.sessions.get(session_id)
+        
+        session_query = """
+        SELECT phone_number, current_menu, session_data
+        FROM ussd_sessions
+        WHERE session_id = %s AND status = 'active'
+        AND expires_at > CURRENT_TIMESTAMP
+        """
+        
+        rows = self.db.execute_query(session_query, (session_id,), fetch=True)
+        if not rows:
+            return None
+        
+        session = dict(rows[0])
+        if isinstance(session['session_data'], str):
+            session['session_data'] = json.loads(session['session_data'])
+        return session
+    
     def _update_session(
         self,
         session_id: str,
@@ -495,34 +667,48 @@ class USSDService:
         UPDATE ussd_sessions
         SET current_menu = %s,
             session_data = %s,
-            last_activity = CURRENT_TIMESTAMP
+            last_activity = CURRENT_TIMESTAMP,
+            expires_at = CURRENT_TIMESTAMP + INTERVAL '5 minutes'
         WHERE session_id = %s
         """
-        
-        self.db.execute_query(query, (new_menu, session_data, session_id))
+        self._write(query, (new_menu, json.dumps(session_data, default=str), session_id))
+        if self.sessions is not None:
+            self.sessions.update(session_id, new_menu, session_data)
     
     def _end_session(self, session_id: str) -> None:
         """End USSD session"""
+        if self.sessions is not None:
+            self.sessions.remove(session_id)
+        
         query = """
         UPDATE ussd_sessions
         SET status = 'completed',
             last_activity = CURRENT_TIMESTAMP
         WHERE session_id = %s
         """
-        
-        self.db.execute_query(query, (session_id,))
+        self._write(query, (session_id,))
+    
+    def _write(self, query: str, params: tuple) -> None:
+        """
+        Session row write: queued for audit when Redis holds the state,
+        otherwise written before the response is returned
+        """
+        if self.sessions is not None:
+            self.audit.write(query, params)
+        else:
+            self.db.execute_query(query, params, fetch=False)
     
     def clean_expired_sessions(self) -> int:
-        """Clean up expired sessions (older than 5 minutes)"""
+        """Mark sessions past their expiry as expired, returning how many"""
         query = """
         UPDATE ussd_sessions
         SET status = 'expired'
         WHERE status = 'active'
         AND expires_at < CURRENT_TIMESTAMP
+        RETURNING session_id
         """
         
-        self.db.execute_query(query)
-        return 0  # Return count if needed
+        return len(self.db.execute_query(query, fetch=True) or [])
 
 
 def get_ussd_service() -> USSDService:
@@ -0,0 +1,31 @@
+-- ============================================================================
+-- MIGRATION 015: School-wide Sibling Discount Runs
+-- Term-start batch discounts that can be re-run safely
+-- ============================================================================
+
+-- A fee row gets at most one sibling discount, whichever term's batch or
+-- per-family request applied it, so re-running a batch (or running the next
+-- term's) only discounts fees added since. Replaces the earlier per-term key.
+DROP INDEX IF EXISTS idx_student_discounts_sibling_once;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_student_discounts_sibling_fee
+    ON student_discounts(fee_id)
+    WHERE discount_type = 'sibling';
+
+-- One row per batch run (re-runs log what they newly applied, usually nothing)
+CREATE TABLE IF NOT EXISTS sibling_discount_runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    term VARCHAR(20) NOT NULL,
+    academic_year VARCHAR(20) NOT NULL,
+    families INTEGER DEFAULT 0,
+    students_discounted INTEGER DEFAULT 0,
+    fees_discounted INTEGER DEFAULT 0,
+    total_discount DECIMAL(15, 2) DEFAULT 0,
+    run_by UUID REFERENCES users(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sibling_discount_runs_school
+    ON sibling_discount_runs(school_id, academic_year, term);
+
+COMMENT ON TABLE sibling_discount_runs IS 'Log of school-wide sibling discount batch runs';
@@ -0,0 +1,26 @@
+-- ============================================================================
+-- MIGRATION 016: UNEB Performance Stats
+-- Running per-exam totals so school performance is a single-row read
+-- ============================================================================
+
+-- Maintained incrementally by UNEBService result imports (deltas of the
+-- rows inserted or replaced); seeded from uneb_results on an exam's first
+-- import and repaired by api/jobs/uneb_stats_reconciliation.py
+CREATE TABLE IF NOT EXISTS uneb_performance_stats (
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    exam_type VARCHAR(50) NOT NULL,
+    exam_year INTEGER NOT NULL,
+    total_candidates INTEGER DEFAULT 0,
+    aggregate_sum BIGINT DEFAULT 0,
+    aggregate_count INTEGER DEFAULT 0,
+    division_1 INTEGER DEFAULT 0,
+    division_2 INTEGER DEFAULT 0,
+    division_3 INTEGER DEFAULT 0,
+    division_4 INTEGER DEFAULT 0,
+    total_distinctions INTEGER DEFAULT 0,
+    total_credits INTEGER DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (school_id, exam_type, exam_year)
+);
+
+COMMENT ON TABLE uneb_performance_stats IS 'Incrementally maintained UNEB performance totals per school and exam';
@@ -0,0 +1,233 @@
+-- ============================================================================
+-- MIGRATION 017: Report Snapshots
+-- Month-level rollups behind the government census, enrollment and
+-- financial reports, kept current by triggers and a scheduled refresh
+-- ============================================================================
+
+-- ============================================================================
+-- FEE AMOUNTS
+-- Shared with the fee balance ledger (migration 019)
+-- ============================================================================
+
+-- The amount charged lives in amount_due (migration 003), in total_fees
+-- (consolidated schema, where final_amount overrides it once set) or in
+-- total_amount, depending on when the student_fees table was created
+CREATE OR REPLACE FUNCTION fee_due_amount(fee JSONB)
+RETURNS NUMERIC AS $$
+    SELECT COALESCE(
+        (fee->>'final_amount')::numeric,
+        (fee->>'amount_due')::numeric,
+        (fee->>'total_fees')::numeric,
+        (fee->>'total_amount')::numeric,
+        0
+    );
+$$ LANGUAGE sql IMMUTABLE;
+
+-- The month a fee is reported in: when it falls due, else when it was charged
+CREATE OR REPLACE FUNCTION fee_report_month(fee JSONB)
+RETURNS DATE AS $$
+    SELECT date_trunc('month', COALESCE((fee->>'due_date')::date, (fee->>'created_at')::date))::date;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- REPORT SNAPSHOTS
+-- ============================================================================
+
+-- Students bucketed by enrolment month, class and gender
+CREATE TABLE IF NOT EXISTS enrollment_snapshots (
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    enrolled_month DATE NOT NULL,
+    class_name VARCHAR(100) NOT NULL DEFAULT '',
+    gender VARCHAR(20) NOT NULL DEFAULT '',
+    total_count INTEGER NOT NULL DEFAULT 0,
+    active_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (school_id, enrolled_month, class_name, gender)
+);
+
+-- Fee totals bucketed by the month each fee falls due (the month it was
+-- charged, for fees without a due date)
+CREATE TABLE IF NOT EXISTS fee_snapshots (
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    fee_month DATE NOT NULL,
+    fees_charged DECIMAL(15,2) NOT NULL DEFAULT 0,
+    amount_collected DECIMAL(15,2) NOT NULL DEFAULT 0,
+    outstanding_balance DECIMAL(15,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (school_id, fee_month)
+);
+
+-- Expense totals bucketed by month and category
+CREATE TABLE IF NOT EXISTS expense_snapshots (
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    expense_month DATE NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    total_amount DECIMAL(15,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (school_id, expense_month, category)
+);
+
+-- When each school's snapshots were last rebuilt from the live tables
+CREATE TABLE IF NOT EXISTS report_snapshot_state (
+    school_id UUID PRIMARY KEY REFERENCES schools(id) ON DELETE CASCADE,
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Stored report payloads are looked up by a deterministic key
+-- (e.g. 'annual_census:2025') so re-downloads skip regeneration
+ALTER TABLE government_reports ADD COLUMN IF NOT EXISTS report_key VARCHAR(100);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_government_reports_key
+    ON government_reports(school_id, report_key)
+    WHERE report_key IS NOT NULL;
+
+-- ============================================================================
+-- INCREMENTAL MAINTENANCE
+-- Each trigger removes the old rows' contribution and adds the new one, so
+-- inserts, updates (e.g. payments posted to student_fees) and deletes all
+-- keep the rollups exact between scheduled refreshes.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION enrollment_snapshot_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE enrollment_snapshots
+        SET total_count = total_count - 1,
+            active_count = active_count - (CASE WHEN OLD.status = 'active' THEN 1 ELSE 0 END)
+        WHERE school_id = OLD.school_id
+        AND enrolled_month = date_trunc('month', OLD.created_at)::date
+        AND class_name = COALESCE(OLD.class_name, '')
+        AND gender = COALESCE(OLD.gender, '');
+    END IF;
+
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO enrollment_snapshots (
+            school_id, enrolled_month, class_name, gender, total_count, active_count
+        ) VALUES (
+            NEW.school_id,
+            date_trunc('month', COALESCE(NEW.created_at, CURRENT_TIMESTAMP))::date,
+            COALESCE(NEW.class_name, ''),
+            COALESCE(NEW.gender, ''),
+            1,
+            CASE WHEN NEW.status = 'active' THEN 1 ELSE 0 END
+        )
+        ON CONFLICT (school_id, enrolled_month, class_name, gender) DO UPDATE SET
+            total_count = enrollment_snapshots.total_count + 1,
+            active_count = enrollment_snapshots.active_count + EXCLUDED.active_count;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS students_enrollment_snapshot ON students;
+CREATE TRIGGER students_enrollment_snapshot
+    AFTER INSERT OR DELETE OR UPDATE OF school_id, class_name, gender, status, created_at ON students
+    FOR EACH ROW
+    EXECUTE FUNCTION enrollment_snapshot_apply();
+
+-- student_fees has drifted between deployments (school_id, the amount
+-- column), so rows are read as JSONB, and fees with neither a due date nor a
+-- creation time are skipped instead of failing the write that fired the
+-- trigger. Rows come in as arrays so a statement touching many fees (e.g. the
+-- sibling discount batch) makes one upsert per month bucket rather than one
+-- per fee.
+CREATE OR REPLACE FUNCTION fee_snapshot_add(added JSONB[], removed JSONB[])
+RETURNS VOID AS $$
+    INSERT INTO fee_snapshots (
+        school_id, fee_month, fees_charged, amount_collected, outstanding_balance
+    )
+    SELECT
+        COALESCE((c.fee->>'school_id')::uuid, s.school_id),
+        fee_report_month(c.fee),
+        SUM(c.direction * fee_due_amount(c.fee)),
+        SUM(c.direction * COALESCE((c.fee->>'amount_paid')::numeric, 0)),
+        SUM(c.direction * COALESCE((c.fee->>'balance')::numeric, 0))
+    FROM (
+        SELECT a.fee, 1 AS direction FROM unnest(added) AS a(fee)
+        UNION ALL
+        SELECT r.fee, -1 FROM unnest(removed) AS r(fee)
+    ) c
+    LEFT JOIN students s ON s.id = (c.fee->>'student_id')::uuid
+    WHERE fee_report_month(c.fee) IS NOT NULL
+    AND COALESCE((c.fee->>'school_id')::uuid, s.school_id) IS NOT NULL
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (school_id, fee_month) DO UPDATE SET
+        fees_charged = fee_snapshots.fees_charged + EXCLUDED.fees_charged,
+        amount_collected = fee_snapshots.amount_collected + EXCLUDED.amount_collected,
+        outstanding_balance = fee_snapshots.outstanding_balance + EXCLUDED.outstanding_balance;
+$$ LANGUAGE sql;
+
+-- Statement-level, reading the transition tables declared by each trigger
+CREATE OR REPLACE FUNCTION fee_snapshot_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM fee_snapshot_add(ARRAY(SELECT to_jsonb(n) FROM new_fees n), '{}');
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM fee_snapshot_add(
+            ARRAY(SELECT to_jsonb(n) FROM new_fees n),
+            ARRAY(SELECT to_jsonb(o) FROM old_fees o)
+        );
+    ELSE
+        PERFORM fee_snapshot_add('{}', ARRAY(SELECT to_jsonb(o) FROM old_fees o));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_fees_fee_snapshot ON student_fees;
+DROP TRIGGER IF EXISTS student_fees_fee_snapshot_insert ON student_fees;
+DROP TRIGGER IF EXISTS student_fees_fee_snapshot_update ON student_fees;
+DROP TRIGGER IF EXISTS student_fees_fee_snapshot_delete ON student_fees;
+CREATE TRIGGER student_fees_fee_snapshot_insert
+    AFTER INSERT ON student_fees
+    REFERENCING NEW TABLE AS new_fees
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fee_snapshot_apply();
+CREATE TRIGGER student_fees_fee_snapshot_update
+    AFTER UPDATE ON student_fees
+    REFERENCING OLD TABLE AS old_fees NEW TABLE AS new_fees
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fee_snapshot_apply();
+CREATE TRIGGER student_fees_fee_snapshot_delete
+    AFTER DELETE ON student_fees
+    REFERENCING OLD TABLE AS old_fees
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fee_snapshot_apply();
+
+CREATE OR REPLACE FUNCTION expense_snapshot_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE expense_snapshots
+        SET total_amount = total_amount - COALESCE(OLD.amount, 0)
+        WHERE school_id = OLD.school_id
+        AND expense_month = date_trunc('month', OLD.expense_date)::date
+        AND category = OLD.category;
+    END IF;
+
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO expense_snapshots (school_id, expense_month, category, total_amount)
+        VALUES (
+            NEW.school_id,
+            date_trunc('month', NEW.expense_date)::date,
+            NEW.category,
+            COALESCE(NEW.amount, 0)
+        )
+        ON CONFLICT (school_id, expense_month, category) DO UPDATE SET
+            total_amount = expense_snapshots.total_amount + EXCLUDED.total_amount;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS expenses_expense_snapshot ON expenses;
+CREATE TRIGGER expenses_expense_snapshot
+    AFTER INSERT OR DELETE OR UPDATE OF school_id, category, amount, expense_date ON expenses
+    FOR EACH ROW
+    EXECUTE FUNCTION expense_snapshot_apply();
+
+COMMENT ON TABLE enrollment_snapshots IS 'Student counts per enrolment month, class and gender for government reports';
+COMMENT ON TABLE fee_snapshots IS 'Fee charged / collected / outstanding per due month';
+COMMENT ON TABLE expense_snapshots IS 'Expense totals per month and category';
@@ -0,0 +1,139 @@
+-- ============================================================================
+-- MIGRATION 018: Student Summaries
+-- One row per student with 30-day attendance counters so parent dashboards
+-- read all children in a single lookup (fee totals are joined from the fee
+-- balance ledger, migration 019)
+-- ============================================================================
+
+-- Rows are created with the student (and backfilled below for existing
+-- students) and kept current by the attendance trigger; the 30-day window is
+-- re-based daily by StudentSummaryRebaseJob, so dashboard reads never write.
+CREATE TABLE IF NOT EXISTS student_summaries (
+    student_id UUID PRIMARY KEY REFERENCES students(id) ON DELETE CASCADE,
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    last_attendance_date DATE,
+    last_attendance_status VARCHAR(20),
+    -- Counters cover attendance dated on or after attendance_as_of - 30 days
+    attendance_as_of DATE NOT NULL DEFAULT CURRENT_DATE,
+    present_30d INTEGER NOT NULL DEFAULT 0,
+    absent_30d INTEGER NOT NULL DEFAULT 0,
+    late_30d INTEGER NOT NULL DEFAULT 0,
+    excused_30d INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_student_summaries_school ON student_summaries(school_id);
+
+-- Builds rows from attendance for the given students that have none;
+-- returns how many were created
+CREATE OR REPLACE FUNCTION student_summary_seed(student_ids UUID[])
+RETURNS INTEGER AS $$
+    WITH created AS (
+        INSERT INTO student_summaries (
+            student_id, school_id, last_attendance_date, last_attendance_status, attendance_as_of,
+            present_30d, absent_30d, late_30d, excused_30d, updated_at
+        )
+        SELECT
+            s.id, s.school_id, la.date, la.status, CURRENT_DATE,
+            COALESCE(a.present, 0), COALESCE(a.absent, 0), COALESCE(a.late, 0), COALESCE(a.excused, 0),
+            CURRENT_TIMESTAMP
+        FROM students s
+        LEFT JOIN LATERAL (
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'present') AS present,
+                COUNT(*) FILTER (WHERE status = 'absent') AS absent,
+                COUNT(*) FILTER (WHERE status = 'late') AS late,
+                COUNT(*) FILTER (WHERE status = 'excused') AS excused
+            FROM attendance
+            WHERE student_id = s.id AND date >= CURRENT_DATE - 30
+        ) a ON true
+        LEFT JOIN LATERAL (
+            SELECT date, status
+            FROM attendance
+            WHERE student_id = s.id
+            ORDER BY date DESC
+            LIMIT 1
+        ) la ON true
+        WHERE s.id = ANY(student_ids)
+        ON CONFLICT (student_id) DO NOTHING
+        RETURNING 1
+    )
+    SELECT COUNT(*)::int FROM created;
+$$ LANGUAGE sql;
+
+SELECT student_summary_seed(ARRAY(SELECT id FROM students));
+
+-- ============================================================================
+-- INCREMENTAL MAINTENANCE
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION student_summary_attendance_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE student_summaries
+        SET present_30d = present_30d - (OLD.status = 'present')::int,
+            absent_30d = absent_30d - (OLD.status = 'absent')::int,
+            late_30d = late_30d - (OLD.status = 'late')::int,
+            excused_30d = excused_30d - (OLD.status = 'excused')::int,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE student_id = OLD.student_id
+        AND OLD.date >= attendance_as_of - 30;
+
+        -- The latest row was deleted or moved: take the latest that remains
+        -- (NEW is already visible to this AFTER trigger)
+        UPDATE student_summaries
+        SET (last_attendance_date, last_attendance_status) = (
+                SELECT date, status
+                FROM attendance
+                WHERE student_id = OLD.student_id
+                ORDER BY date DESC
+                LIMIT 1
+            ),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE student_id = OLD.student_id
+        AND OLD.date >= last_attendance_date;
+    END IF;
+
+    IF TG_OP <> 'DELETE' THEN
+        UPDATE student_summaries
+        SET present_30d = present_30d + (NEW.status = 'present' AND NEW.date >= attendance_as_of - 30)::int,
+            absent_30d = absent_30d + (NEW.status = 'absent' AND NEW.date >= attendance_as_of - 30)::int,
+            late_30d = late_30d + (NEW.status = 'late' AND NEW.date >= attendance_as_of - 30)::int,
+            excused_30d = excused_30d + (NEW.status = 'excused' AND NEW.date >= attendance_as_of - 30)::int,
+            last_attendance_status = CASE
+                WHEN last_attendance_date IS NULL OR NEW.date >= last_attendance_date THEN NEW.status
+                ELSE last_attendance_status
+            END,
+            last_attendance_date = GREATEST(last_attendance_date, NEW.date),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE student_id = NEW.student_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- New students get their row in the statement that inserts them
+CREATE OR REPLACE FUNCTION student_summary_student_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM student_summary_seed(ARRAY(SELECT id FROM new_students));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS students_student_summary ON students;
+CREATE TRIGGER students_student_summary
+    AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_students
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION student_summary_student_insert();
+
+DROP TRIGGER IF EXISTS attendance_student_summary ON attendance;
+CREATE TRIGGER attendance_student_summary
+    AFTER INSERT OR DELETE OR UPDATE OF student_id, date, status ON attendance
+    FOR EACH ROW
+    EXECUTE FUNCTION student_summary_attendance_apply();
+
+COMMENT ON TABLE student_summaries IS 'Per-student 30-day attendance for parent dashboards';
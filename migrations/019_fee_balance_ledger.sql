@@ -0,0 +1,133 @@
+-- ============================================================================
+-- MIGRATION 019: Fee Balance Ledger
+-- Running per-student fee totals so balance reads are key lookups instead
+-- of SUM() over student_fees
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS fee_balance_ledger (
+    student_id UUID PRIMARY KEY REFERENCES students(id) ON DELETE CASCADE,
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    total_due DECIMAL(15,2) NOT NULL DEFAULT 0,
+    total_paid DECIMAL(15,2) NOT NULL DEFAULT 0,
+    balance DECIMAL(15,2) NOT NULL DEFAULT 0,
+    fee_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- School totals are summed from the student rows through this index rather
+-- than kept in a per-school row every payment at the school would queue on
+CREATE INDEX IF NOT EXISTS idx_fee_balance_ledger_school ON fee_balance_ledger(school_id);
+
+-- One row per reconciliation run (see api/jobs/fee_ledger_reconciliation.py)
+CREATE TABLE IF NOT EXISTS fee_ledger_reconciliations (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    students_checked INTEGER NOT NULL DEFAULT 0,
+    students_mismatched INTEGER NOT NULL DEFAULT 0,
+    repaired BOOLEAN NOT NULL DEFAULT false,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_fee_ledger_reconciliations_school
+    ON fee_ledger_reconciliations(school_id, created_at DESC);
+
+-- Amounts are read with fee_due_amount (migration 017), which knows the
+-- amount column of each student_fees layout
+
+-- ============================================================================
+-- INCREMENTAL MAINTENANCE
+-- Runs once per statement inside the transaction that writes student_fees,
+-- so assigning fees, recording payments and applying discounts move the
+-- ledger atomically, and a batch touching thousands of fees makes one
+-- upsert per student. Student rows are written in student_id order on every
+-- path, which keeps lock order consistent with reconciliation.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION fee_ledger_add(added JSONB[], removed JSONB[])
+RETURNS VOID AS $$
+    INSERT INTO fee_balance_ledger (student_id, school_id, total_due, total_paid, balance, fee_count)
+    SELECT
+        s.id,
+        s.school_id,
+        SUM(c.direction * fee_due_amount(c.fee)),
+        SUM(c.direction * COALESCE((c.fee->>'amount_paid')::numeric, 0)),
+        SUM(c.direction * COALESCE((c.fee->>'balance')::numeric, 0)),
+        SUM(c.direction)
+    FROM (
+        SELECT a.fee, 1 AS direction FROM unnest(added) AS a(fee)
+        UNION ALL
+        SELECT r.fee, -1 FROM unnest(removed) AS r(fee)
+    ) c
+    JOIN students s ON s.id = (c.fee->>'student_id')::uuid
+    GROUP BY s.id, s.school_id
+    -- Status and date changes do not move money
+    HAVING (
+        SUM(c.direction * fee_due_amount(c.fee)),
+        SUM(c.direction * COALESCE((c.fee->>'amount_paid')::numeric, 0)),
+        SUM(c.direction * COALESCE((c.fee->>'balance')::numeric, 0)),
+        SUM(c.direction)
+    ) <> (0, 0, 0, 0)
+    ORDER BY s.id
+    ON CONFLICT (student_id) DO UPDATE SET
+        total_due = fee_balance_ledger.total_due + EXCLUDED.total_due,
+        total_paid = fee_balance_ledger.total_paid + EXCLUDED.total_paid,
+        balance = fee_balance_ledger.balance + EXCLUDED.balance,
+        fee_count = fee_balance_ledger.fee_count + EXCLUDED.fee_count,
+        updated_at = CURRENT_TIMESTAMP;
+$$ LANGUAGE sql;
+
+-- Statement-level, reading the transition tables declared by each trigger
+CREATE OR REPLACE FUNCTION fee_ledger_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM fee_ledger_add(ARRAY(SELECT to_jsonb(n) FROM new_fees n), '{}');
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM fee_ledger_add(
+            ARRAY(SELECT to_jsonb(n) FROM new_fees n),
+            ARRAY(SELECT to_jsonb(o) FROM old_fees o)
+        );
+    ELSE
+        PERFORM fee_ledger_add('{}', ARRAY(SELECT to_jsonb(o) FROM old_fees o));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_fees_fee_ledger_insert ON student_fees;
+DROP TRIGGER IF EXISTS student_fees_fee_ledger_update ON student_fees;
+DROP TRIGGER IF EXISTS student_fees_fee_ledger_delete ON student_fees;
+CREATE TRIGGER student_fees_fee_ledger_insert
+    AFTER INSERT ON student_fees
+    REFERENCING NEW TABLE AS new_fees
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fee_ledger_apply();
+CREATE TRIGGER student_fees_fee_ledger_update
+    AFTER UPDATE ON student_fees
+    REFERENCING OLD TABLE AS old_fees NEW TABLE AS new_fees
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fee_ledger_apply();
+CREATE TRIGGER student_fees_fee_ledger_delete
+    AFTER DELETE ON student_fees
+    REFERENCING OLD TABLE AS old_fees
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fee_ledger_apply();
+
+-- ============================================================================
+-- SEED
+-- ============================================================================
+
+INSERT INTO fee_balance_ledger (student_id, school_id, total_due, total_paid, balance, fee_count)
+SELECT
+    s.id,
+    s.school_id,
+    COALESCE(SUM(fee_due_amount(to_jsonb(sf))), 0),
+    COALESCE(SUM(sf.amount_paid), 0),
+    COALESCE(SUM(sf.balance), 0),
+    COUNT(*)
+FROM student_fees sf
+JOIN students s ON s.id = sf.student_id
+GROUP BY s.id, s.school_id
+ON CONFLICT (student_id) DO NOTHING;
+
+COMMENT ON TABLE fee_balance_ledger IS 'Running fee totals per student, maintained by trigger on student_fees';
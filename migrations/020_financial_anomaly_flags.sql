@@ -0,0 +1,41 @@
+-- ============================================================================
+-- MIGRATION 020: Financial Anomaly Flags
+-- Deterministic anomaly flags on payments and expenses for the director
+-- dashboard, produced incrementally by FinancialAnomalyDetector
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS financial_anomaly_flags (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    source_table VARCHAR(20) NOT NULL CHECK (source_table IN ('payments', 'expenses')),
+    record_id UUID NOT NULL,
+    anomaly_type VARCHAR(30) NOT NULL CHECK (anomaly_type IN ('duplicate', 'amount_outlier', 'off_hours')),
+    severity VARCHAR(10) NOT NULL DEFAULT 'medium', -- low, medium, high
+    amount DECIMAL(15,2),
+    details JSONB DEFAULT '{}'::jsonb,
+    status VARCHAR(20) NOT NULL DEFAULT 'open', -- open, dismissed, confirmed
+    reviewed_by VARCHAR(255),
+    reviewed_at TIMESTAMP WITH TIME ZONE,
+    detected_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (source_table, record_id, anomaly_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_financial_anomaly_flags_open
+    ON financial_anomaly_flags(school_id, detected_at DESC)
+    WHERE status = 'open';
+
+-- How far each school's rows have been scanned, ordered by (created_at, id)
+CREATE TABLE IF NOT EXISTS financial_anomaly_watermarks (
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    source_table VARCHAR(20) NOT NULL,
+    last_created_at TIMESTAMP NOT NULL,
+    last_id UUID NOT NULL,
+    scanned_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (school_id, source_table)
+);
+
+-- Scans read new rows in (created_at, id) order per school
+CREATE INDEX IF NOT EXISTS idx_payments_school_created ON payments(school_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_expenses_school_created ON expenses(school_id, created_at, id);
+
+COMMENT ON TABLE financial_anomaly_flags IS 'Locally detected duplicate, outlier and off-hours payments/expenses';
@@ -0,0 +1,39 @@
+-- ============================================================================
+-- MIGRATION 021: Text Search Indexes
+-- Trigram GIN indexes behind TextSearch (library catalogue and alumni), plus
+-- browse-order and availability indexes for keyset pagination
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Library catalogue: ranked title/author search
+CREATE INDEX IF NOT EXISTS idx_library_books_title_trgm
+    ON library_books USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_library_books_author_trgm
+    ON library_books USING GIN (author gin_trgm_ops);
+
+-- Alphabetical browsing, and the available-only filter (partial index whose
+-- predicate matches the service's `available_copies > 0` condition)
+CREATE INDEX IF NOT EXISTS idx_library_books_browse
+    ON library_books(school_id, title, id);
+CREATE INDEX IF NOT EXISTS idx_library_books_available
+    ON library_books(school_id, title, id)
+    WHERE available_copies > 0;
+
+-- Alumni: columns written by AlumniService but missing from the original table
+ALTER TABLE alumni ADD COLUMN IF NOT EXISTS graduation_class VARCHAR(50);
+ALTER TABLE alumni ADD COLUMN IF NOT EXISTS university_attended VARCHAR(255);
+ALTER TABLE alumni ADD COLUMN IF NOT EXISTS degree_obtained VARCHAR(255);
+
+-- Expressions must match ALUMNI_SEARCH.fields exactly to be used
+CREATE INDEX IF NOT EXISTS idx_alumni_name_trgm
+    ON alumni USING GIN ((first_name || ' ' || last_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_alumni_occupation_trgm
+    ON alumni USING GIN (current_occupation gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_alumni_employer_trgm
+    ON alumni USING GIN (employer gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_alumni_university_trgm
+    ON alumni USING GIN (university_attended gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_alumni_browse
+    ON alumni(school_id, (COALESCE(graduation_year, 0)) DESC, last_name, id);
@@ -0,0 +1,178 @@
+-- ============================================================================
+-- MIGRATION 022: Global Search Index
+-- One row per searchable student, parent, teacher and receipt, kept current
+-- by triggers, so /api/search answers partial names, phone numbers and
+-- admission/receipt numbers across entity types with one indexed query
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE IF NOT EXISTS search_index (
+    entity_type VARCHAR(20) NOT NULL CHECK (entity_type IN ('student', 'parent', 'teacher', 'receipt')),
+    entity_id UUID NOT NULL,
+    school_id UUID NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,            -- display name, or receipt number
+    subtitle TEXT,                  -- class / relationship / amount, for display
+    name_key TEXT NOT NULL,         -- lower(title), for prefix matches
+    search_text TEXT NOT NULL,      -- lowercased names, numbers and phone keys
+    exact_keys TEXT[] NOT NULL DEFAULT '{}', -- admission/employee/receipt numbers and phone keys
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+-- Substring and similarity matches for terms of 3+ characters
+CREATE INDEX IF NOT EXISTS idx_search_index_text_trgm
+    ON search_index USING GIN (search_text gin_trgm_ops);
+-- Prefix matches for shorter terms
+CREATE INDEX IF NOT EXISTS idx_search_index_prefix
+    ON search_index(school_id, name_key text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_search_index_exact
+    ON search_index USING GIN (exact_keys);
+
+-- National significant number: digits only, without the 256 country code or
+-- a leading 0, so "+256 772 123456" and "0772123456" index the same
+CREATE OR REPLACE FUNCTION search_phone_key(phone TEXT)
+RETURNS TEXT AS $$
+    SELECT NULLIF(
+        ltrim(regexp_replace(regexp_replace(COALESCE(phone, ''), '\D', '', 'g'), '^256(?=\d{9})', ''), '0'),
+        ''
+    );
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Index row for a source row (as JSONB, so columns that differ between
+-- schema versions - e.g. parents.phone / primary_phone - are tolerated).
+-- Returns NULL when the row should not be searchable.
+CREATE OR REPLACE FUNCTION search_document(entity TEXT, r JSONB)
+RETURNS search_index AS $$
+DECLARE
+    doc search_index;
+    full_name TEXT := trim(concat_ws(' ', r->>'first_name', r->>'last_name'));
+    phone TEXT := search_phone_key(COALESCE(r->>'phone', r->>'primary_phone'));
+    alternate TEXT := search_phone_key(r->>'alternate_phone');
+BEGIN
+    doc.entity_type := entity;
+    doc.entity_id := (r->>'id')::uuid;
+    doc.school_id := (r->>'school_id')::uuid;
+    doc.updated_at := CURRENT_TIMESTAMP;
+
+    IF entity = 'student' THEN
+        IF r->>'deleted_at' IS NOT NULL THEN
+            RETURN NULL;
+        END IF;
+        doc.title := full_name;
+        doc.subtitle := concat_ws(' · ', r->>'class_name', r->>'admission_number', NULLIF(r->>'status', 'active'));
+        doc.search_text := concat_ws(' ', full_name, r->>'admission_number', phone);
+        doc.exact_keys := ARRAY[lower(r->>'admission_number'), phone];
+    ELSIF entity = 'parent' THEN
+        doc.title := full_name;
+        doc.subtitle := concat_ws(' · ', r->>'relationship', COALESCE(r->>'phone', r->>'primary_phone'));
+        doc.search_text := concat_ws(' ', full_name, phone, alternate, r->>'email');
+        doc.exact_keys := ARRAY[phone, alternate];
+    ELSIF entity = 'teacher' THEN
+        doc.title := full_name;
+        doc.subtitle := concat_ws(' · ', r->>'employee_id', r->>'phone');
+        doc.search_text := concat_ws(' ', full_name, r->>'employee_id', phone, r->>'email');
+        doc.exact_keys := ARRAY[lower(r->>'employee_id'), phone];
+    ELSIF entity = 'receipt' THEN
+        IF COALESCE(r->>'receipt_number', '') = '' THEN
+            RETURN NULL;
+        END IF;
+        doc.title := r->>'receipt_number';
+        doc.subtitle := concat_ws(' · ', 'UGX ' || (r->>'amount'), r->>'payment_date', r->>'payment_method');
+        doc.search_text := r->>'receipt_number';
+        doc.exact_keys := ARRAY[lower(r->>'receipt_number')];
+    ELSE
+        RETURN NULL;
+    END IF;
+
+    IF doc.school_id IS NULL OR COALESCE(doc.title, '') = '' THEN
+        RETURN NULL;
+    END IF;
+    doc.name_key := lower(doc.title);
+    doc.search_text := lower(doc.search_text);
+    doc.exact_keys := array_remove(doc.exact_keys, NULL);
+    RETURN doc;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION search_index_sync()
+RETURNS TRIGGER AS $$
+DECLARE
+    entity TEXT := TG_ARGV[0];
+    doc search_index;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM search_index WHERE entity_type = entity AND entity_id = OLD.id;
+        RETURN OLD;
+    END IF;
+
+    doc := search_document(entity, to_jsonb(NEW));
+    IF doc.entity_id IS NULL THEN
+        DELETE FROM search_index WHERE entity_type = entity AND entity_id = NEW.id;
+    ELSE
+        INSERT INTO search_index SELECT doc.*
+        ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+            school_id = EXCLUDED.school_id,
+            title = EXCLUDED.title,
+            subtitle = EXCLUDED.subtitle,
+            name_key = EXCLUDED.name_key,
+            search_text = EXCLUDED.search_text,
+            exact_keys = EXCLUDED.exact_keys,
+            updated_at = EXCLUDED.updated_at;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_search_index_students ON students;
+CREATE TRIGGER trg_search_index_students
+    AFTER INSERT OR UPDATE OR DELETE ON students
+    FOR EACH ROW EXECUTE FUNCTION search_index_sync('student');
+
+DROP TRIGGER IF EXISTS trg_search_index_parents ON parents;
+CREATE TRIGGER trg_search_index_parents
+    AFTER INSERT OR UPDATE OR DELETE ON parents
+    FOR EACH ROW EXECUTE FUNCTION search_index_sync('parent');
+
+DROP TRIGGER IF EXISTS trg_search_index_teachers ON teachers;
+CREATE TRIGGER trg_search_index_teachers
+    AFTER INSERT OR UPDATE OR DELETE ON teachers
+    FOR EACH ROW EXECUTE FUNCTION search_index_sync('teacher');
+
+DROP TRIGGER IF EXISTS trg_search_index_payments ON payments;
+CREATE TRIGGER trg_search_index_payments
+    AFTER INSERT OR UPDATE OR DELETE ON payments
+    FOR EACH ROW EXECUTE FUNCTION search_index_sync('receipt');
+
+-- ============================================================================
+-- ROW LEVEL SECURITY
+-- The index copies names and phone numbers out of the tables isolated in
+-- migration 013, so it is isolated the same way
+-- ============================================================================
+
+ALTER TABLE search_index ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Isolate Search Index" ON search_index;
+CREATE POLICY "Isolate Search Index" ON search_index
+    USING (school_id IN (
+        SELECT school_id FROM user_schools WHERE user_id = auth.uid()
+    ));
+
+-- ============================================================================
+-- SEED
+-- ============================================================================
+
+INSERT INTO search_index
+SELECT (d).* FROM (
+    SELECT search_document('student', to_jsonb(s)) AS d FROM students s
+    UNION ALL
+    SELECT search_document('parent', to_jsonb(p)) FROM parents p
+    UNION ALL
+    SELECT search_document('teacher', to_jsonb(t)) FROM teachers t
+    UNION ALL
+    SELECT search_document('receipt', to_jsonb(pm)) FROM payments pm
+) docs
+WHERE (d).entity_id IS NOT NULL
+ON CONFLICT (entity_type, entity_id) DO NOTHING;
+
+COMMENT ON TABLE search_index IS 'Trigger-maintained cross-entity search rows for /api/search';
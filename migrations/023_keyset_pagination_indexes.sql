@@ -0,0 +1,48 @@
+-- ============================================================================
+-- MIGRATION 023: Keyset Pagination Indexes
+-- Composite indexes matching the sort keys of the cursor-paginated list
+-- endpoints, so every page (first or fiftieth) is one index range scan
+-- ============================================================================
+
+-- Library transactions: school_id is written and filtered on by the services
+-- but missing from the original table
+ALTER TABLE library_transactions ADD COLUMN IF NOT EXISTS school_id UUID REFERENCES schools(id) ON DELETE CASCADE;
+
+-- Incidents: occurred_at is written by IncidentOperations.log_incident but
+-- missing from the original table
+ALTER TABLE incidents ADD COLUMN IF NOT EXISTS occurred_at TIMESTAMPTZ;
+
+-- Newest first: (created_at, id) within a school
+CREATE INDEX IF NOT EXISTS idx_students_school_created
+    ON students(school_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_library_transactions_school_created
+    ON library_transactions(school_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_school_created
+    ON audit_logs(school_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_notifications_recipient_created
+    ON notifications(school_id, recipient_id, created_at DESC, id DESC)
+    WHERE recipient_type = 'parent';
+
+-- Incidents: latest occurrence first, undated last (the sentinel must match
+-- INCIDENT_OCCURRED_SORT in api/services/database.py)
+CREATE INDEX IF NOT EXISTS idx_incidents_school_occurred
+    ON incidents(school_id, (COALESCE(occurred_at, TIMESTAMPTZ '0001-01-01 00:00:00+00')) DESC, created_at DESC, id DESC);
+
+-- Overdue fees: earliest due first, undated last (matches OVERDUE_DUE_SORT).
+-- payment_status only exists on the consolidated schema's student_fees
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'student_fees' AND column_name = 'payment_status'
+    ) THEN
+        CREATE INDEX IF NOT EXISTS idx_student_fees_overdue_due
+            ON student_fees((COALESCE(due_date, DATE '9999-12-31')), id)
+            WHERE payment_status = 'overdue';
+    END IF;
+END $$;
+
+-- Low canteen balances, lowest first
+CREATE INDEX IF NOT EXISTS idx_canteen_accounts_school_balance
+    ON student_canteen_accounts(school_id, balance, student_id);
@@ -0,0 +1,275 @@
+"""
+Shared Test Fixtures
+Scripted database fakes for service logic, and a real Postgres for SQL
+
+Logic that lives in Python (result shaping, validation, branching) is tested
+with fake_db. Logic that lives in SQL (set-based inserts, upserts, triggers)
+is tested against Postgres through pg: set TEST_DATABASE_URL to a database the
+tests may create schemas in, otherwise those tests are skipped.
+"""
+import os
+import re
+import sys
+import uuid
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+class FakeDB:
+    """
+    Stand-in for DatabaseManager and its UnitOfWork
+
+    Every statement gets the next of `results` ([] once they run out), or
+    whatever respond(query, params) returns. Statements are recorded in
+    calls with whitespace collapsed. transaction() runs statements through the
+    same script and records whether it committed or rolled back.
+    """
+
+    def __init__(self, *results, respond=None):
+        self.results = list(results)
+        self.respond = respond
+        self.calls = []
+        self.outcome = None
+
+    def execute_query(self, query, params=None, fetch=True):
+        query = " ".join(query.split())
+        self.calls.append((query, params))
+        if self.respond is not None:
+            return self.respond(query, params)
+        return self.results.pop(0) if self.results else []
+
+    def execute(self, query, params=None, fetch=True):
+        return self.execute_query(query, params, fetch)
+
+    def fetch_one(self, query, params=None):
+        rows = self.execute_query(query, params)
+        return rows[0] if rows else None
+
+    def execute_values(self, query, data, template=None, page_size=1000, fetch=False):
+        return self.execute_query(query, list(data), fetch)
+
+    def execute_batch(self, query, data, page_size=100):
+        self.execute_query(query, list(data), False)
+        return len(data)
+
+    def execute_many(self, query, data):
+        return self.execute_batch(query, data)
+
+    @contextmanager
+    def savepoint(self, name=None):
+        yield self
+
+    @contextmanager
+    def transaction(self):
+        try:
+            yield self
+        except Exception:
+            self.outcome = "rolled back"
+            raise
+        self.outcome = "committed"
+
+    @property
+    def statements(self):
+        return [query for query, _ in self.calls]
+
+
+@pytest.fixture
+def fake_db():
+    """FakeDB(*results, respond=None)"""
+    return FakeDB
+
+
+@pytest.fixture
+def make_service():
+    """Build a service around db without running its __init__ (no settings or pool needed)"""
+    def build(service_class, db, school_id="school-1", **attributes):
+        service = service_class.__new__(service_class)
+        service.school_id = school_id
+        service.db = db
+        for name, value in attributes.items():
+            setattr(service, name, value)
+        return service
+    return build
+
+
+def _with_search_path(url: str, schema: str) -> str:
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query))
+    query["options"] = f"-csearch_path={schema},public"
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+@pytest.fixture
+def pg():
+    """
+    DatabaseManager on a fresh schema of TEST_DATABASE_URL, dropped afterwards
+
+    Tests create the tables they exercise with pg.execute_query(DDL,
+    fetch=False), declaring the columns the service reads and writes.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+
+    import psycopg2
+    from api.services.database import DatabaseManager
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(url)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+
+    db = DatabaseManager(_with_search_path(url, schema), min_conn=1, max_conn=4)
+    try:
+        yield db
+    finally:
+        db.close_all_connections()
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+
+@pytest.fixture
+def trigram(pg):
+    """pg with pg_trgm available; skipped where the extension is not installed"""
+    try:
+        pg.execute_query("CREATE EXTENSION IF NOT EXISTS pg_trgm", fetch=False)
+    except Exception as exc:
+        pytest.skip(f"pg_trgm not available: {exc}")
+    return pg
+
+
+# Tables several services share, with the columns the services use
+CORE_TABLES = {
+    "students": """
+        CREATE TABLE students (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            school_id UUID NOT NULL,
+            admission_number VARCHAR(50),
+            first_name VARCHAR(100) NOT NULL,
+            last_name VARCHAR(100) NOT NULL,
+            gender VARCHAR(20),
+            class_name VARCHAR(50),
+            status VARCHAR(20) DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    "parents": """
+        CREATE TABLE parents (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            school_id UUID,
+            first_name VARCHAR(100),
+            last_name VARCHAR(100),
+            phone VARCHAR(50)
+        )
+    """,
+    "student_parents": """
+        CREATE TABLE student_parents (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            student_id UUID NOT NULL,
+            parent_id UUID NOT NULL,
+            UNIQUE (student_id, parent_id)
+        )
+    """,
+    "fee_structures": """
+        CREATE TABLE fee_structures (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            school_id UUID NOT NULL,
+            name VARCHAR(255),
+            amount DECIMAL(15,2),
+            academic_year VARCHAR(20),
+            term VARCHAR(20)
+        )
+    """,
+    "student_fees": """
+        CREATE TABLE student_fees (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            student_id UUID NOT NULL,
+            fee_structure_id UUID,
+            amount_due DECIMAL(15,2),
+            amount_paid DECIMAL(15,2) DEFAULT 0,
+            balance DECIMAL(15,2) NOT NULL,
+            status VARCHAR(20) DEFAULT 'pending',
+            due_date DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+}
+
+
+@pytest.fixture
+def core_tables(pg):
+    """core_tables(*names) creates the named CORE_TABLES in the pg schema"""
+    def create(*names):
+        for name in names:
+            pg.execute_query(CORE_TABLES[name], fetch=False)
+    return create
+
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+CONSOLIDATED_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'database', 'COMPLETE_DATABASE_SCHEMA.sql')
+
+
+@pytest.fixture
+def consolidated(pg):
+    """
+    consolidated(*tables) creates tables as database/COMPLETE_DATABASE_SCHEMA.sql
+    defines them, without their foreign keys
+    """
+    with open(CONSOLIDATED_SCHEMA) as f:
+        schema = f.read()
+
+    def create(*tables):
+        for table in tables:
+            sql = re.search(rf"CREATE TABLE IF NOT EXISTS {table} \(.*?\n\);", schema, re.S).group(0)
+            sql = re.sub(r"REFERENCES \w+\(\w+\)( ON DELETE (CASCADE|SET NULL))?", "", sql)
+            pg.execute_query(sql, fetch=False)
+    return create
+
+
+@pytest.fixture
+def migration(pg):
+    """
+    migration(name, until=None) runs migrations/<name>.sql in the pg schema
+
+    Foreign keys to schools and users are dropped (tests do not create
+    them) and the file is cut at the `-- <until>` section header, e.g.
+    until="ROW LEVEL SECURITY" for sections that need Supabase auth.
+    """
+    def run(name, until=None):
+        with open(os.path.join(MIGRATIONS, f"{name}.sql")) as f:
+            sql = f.read()
+        if until:
+            sql = sql.split(f"-- {until}")[0].rsplit("-- ====", 1)[0]
+        sql = re.sub(r"REFERENCES (schools|users)\(id\)( ON DELETE (CASCADE|SET NULL))?", "", sql)
+        pg.execute_query(sql, fetch=False)
+    return run
+
+
+def new_id() -> str:
+    return str(uuid.uuid4())
+
+
+@pytest.fixture
+def ids():
+    """ids() -> a fresh UUID string"""
+    return new_id
+
+
+@pytest.fixture
+def insert(pg):
+    """insert(table, **columns) -> id of the new row (None for tables without one)"""
+    def add(table, **columns):
+        placeholders = ", ".join(["%s"] * len(columns))
+        rows = pg.execute_query(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) RETURNING *",
+            tuple(columns.values())
+        )
+        return str(rows[0]["id"]) if "id" in rows[0] else None
+    return add
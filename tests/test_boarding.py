@@ -0,0 +1,120 @@
+"""
+Boarding Tests
+Tests for bulk bed creation and set-based dormitory assignment
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.boarding import BoardingService
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+SCHEMA = """
+CREATE TABLE dormitories (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    name VARCHAR(100),
+    dormitory_type VARCHAR(20)
+);
+CREATE TABLE dormitory_beds (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID,
+    dormitory_id UUID NOT NULL,
+    bed_number VARCHAR(50) NOT NULL,
+    student_id UUID,
+    is_occupied BOOLEAN DEFAULT false,
+    assigned_at TIMESTAMP WITH TIME ZONE,
+    UNIQUE (dormitory_id, bed_number)
+);
+"""
+
+
+@pytest.fixture
+def boarding(pg, core_tables, make_service):
+    core_tables("students")
+    pg.execute_query(SCHEMA, fetch=False)
+    return make_service(BoardingService, pg, school_id=SCHOOL)
+
+
+def occupants(pg):
+    rows = pg.execute_query(
+        "SELECT bed_number, student_id FROM dormitory_beds WHERE is_occupied ORDER BY bed_number"
+    )
+    return {row["bed_number"]: str(row["student_id"]) for row in rows}
+
+
+class TestCreateBeds:
+    """Test create_beds"""
+
+    def test_series_skips_existing_beds(self, pg, boarding, insert):
+        dorm = insert("dormitories", school_id=SCHOOL, name="Nile")
+        boarding.create_beds(dorm, 2, start_number=998)
+
+        result = boarding.create_beds(dorm, 3, start_number=998)
+
+        assert result["beds_created"] == 1
+        assert [bed["bed_number"] for bed in result["beds"]] == ["BED-1000"]
+        total = pg.execute_query("SELECT COUNT(*) AS n FROM dormitory_beds")[0]["n"]
+        assert total == 3
+
+    def test_other_schools_dormitory_untouched(self, pg, boarding, insert):
+        dorm = insert("dormitories", school_id=OTHER_SCHOOL, name="Nile")
+
+        assert boarding.create_beds(dorm, 5)["beds_created"] == 0
+
+
+class TestPlanDormitoryAssignment:
+    """Test plan_dormitory_assignment"""
+
+    def add_boys(self, insert):
+        dorm = insert("dormitories", school_id=SCHOOL, name="Nile", dormitory_type="Boys")
+        beds = [insert("dormitory_beds", dormitory_id=dorm, bed_number=f"BED-00{n}") for n in (1, 2)]
+        return dorm, beds
+
+    def test_plan_only_reads(self, pg, boarding, insert):
+        dorm, _ = self.add_boys(insert)
+        ben = insert("students", school_id=SCHOOL, first_name="Ben", last_name="Ato", class_name="S2", gender="M")
+        ann = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato", class_name="S1", gender="Male")
+        insert("students", school_id=SCHOOL, first_name="Eve", last_name="Ato", class_name="S1", gender="F")
+        cal = insert("students", school_id=SCHOOL, first_name="Cal", last_name="Obu", class_name="S3", gender="m")
+
+        result = boarding.plan_dormitory_assignment(dorm)
+
+        # Ordered by class: S1 and S2 get the beds, S3 is left over; girls never planned
+        assert [(a["bed_number"], a["student_id"]) for a in result["assignments"]] == [
+            ("BED-001", ann), ("BED-002", ben)
+        ]
+        assert [s["student_id"] for s in result["unplaced_students"]] == [cal]
+        assert result["assigned_count"] == 0
+        assert occupants(pg) == {}
+
+    def test_apply_assigns_and_rerun_finds_nothing(self, pg, boarding, insert):
+        dorm, _ = self.add_boys(insert)
+        ann = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato", class_name="S1", gender="M")
+
+        result = boarding.plan_dormitory_assignment(dorm, class_names=["S1"], apply=True)
+
+        assert result["assigned_count"] == 1
+        assert result["free_beds_remaining"] == 1
+        assert occupants(pg) == {"BED-001": ann}
+
+        again = boarding.plan_dormitory_assignment(dorm, apply=True)
+        assert again["assignments"] == []
+        assert occupants(pg) == {"BED-001": ann}
+
+    def test_unknown_dormitory(self, boarding, ids):
+        assert boarding.plan_dormitory_assignment(ids()) == {"success": False, "error": "Dormitory not found"}
+
+    def test_full_dormitory_with_nobody_to_place(self, boarding, insert):
+        dorm = insert("dormitories", school_id=SCHOOL, name="Nile")
+
+        result = boarding.plan_dormitory_assignment(dorm)
+
+        assert result["success"] is True
+        assert result["assignments"] == []
@@ -0,0 +1,134 @@
+"""
+Canteen Checkout Tests
+Tests for the single-transaction POS checkout and its rejection paths
+"""
+import sys
+import os
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.canteen import CanteenService
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+SCHEMA = """
+CREATE TABLE student_canteen_accounts (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    balance DECIMAL(12, 2) DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE canteen_items (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    item_name VARCHAR(255) NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    stock_quantity INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE canteen_purchases (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    item_id UUID,
+    item_name VARCHAR(255),
+    quantity INTEGER,
+    unit_price DECIMAL(10, 2),
+    total_amount DECIMAL(12, 2),
+    purchased_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def canteen(pg, make_service):
+    pg.execute_query(SCHEMA, fetch=False)
+    return make_service(CanteenService, pg, school_id=SCHOOL)
+
+
+@pytest.fixture
+def shop(insert, ids):
+    """A student with 10,000 on account, 3 samosas at 500 and 1 juice at 1,500"""
+    student = ids()
+    insert("student_canteen_accounts", school_id=SCHOOL, student_id=student, balance=10000)
+    samosa = insert("canteen_items", school_id=SCHOOL, item_name="Samosa", price=500, stock_quantity=3)
+    juice = insert("canteen_items", school_id=SCHOOL, item_name="Juice", price=1500, stock_quantity=1)
+    return student, samosa, juice
+
+
+def state(pg, student):
+    balance = pg.execute_query(
+        "SELECT balance FROM student_canteen_accounts WHERE student_id = %s", (student,)
+    )[0]["balance"]
+    stock = [row["stock_quantity"] for row in pg.execute_query(
+        "SELECT stock_quantity FROM canteen_items ORDER BY item_name DESC"
+    )]
+    lines = pg.execute_query("SELECT COUNT(*) AS n FROM canteen_purchases")[0]["n"]
+    return balance, stock, lines
+
+
+class TestCheckout:
+    """Test record_purchase"""
+
+    def test_whole_basket_sold(self, pg, canteen, shop):
+        student, samosa, juice = shop
+
+        result = canteen.record_purchase(student, [
+            {"item_id": samosa, "quantity": 2}, {"item_id": juice, "quantity": 1}, {"item_id": samosa, "quantity": 1}
+        ])
+
+        assert result["success"] is True
+        assert result["total_cost"] == 3000.0
+        assert result["new_balance"] == 7000.0
+        # Repeated items are merged into one purchase line
+        assert sorted((line["item_name"], line["quantity"]) for line in result["items_purchased"]) == [
+            ("Juice", 1), ("Samosa", 3)
+        ]
+        assert state(pg, student) == (Decimal("7000"), [3 - 3, 1 - 1], 2)
+
+    def test_insufficient_balance_rolls_back(self, pg, canteen, insert, ids):
+        student = ids()
+        insert("student_canteen_accounts", school_id=SCHOOL, student_id=student, balance=1200)
+        samosa = insert("canteen_items", school_id=SCHOOL, item_name="Samosa", price=500, stock_quantity=4)
+
+        result = canteen.record_purchase(student, [{"item_id": samosa, "quantity": 4}])
+
+        assert result["error"] == "Insufficient balance"
+        assert result["shortfall"] == 800.0
+        assert pg.execute_query("SELECT stock_quantity FROM canteen_items")[0]["stock_quantity"] == 4
+
+    def test_short_stock_rolls_back_and_is_explained(self, pg, canteen, shop):
+        student, samosa, juice = shop
+
+        result = canteen.record_purchase(student, [
+            {"item_id": samosa, "quantity": 1}, {"item_id": juice, "quantity": 2}
+        ])
+
+        assert result == {"success": False, "error": "Insufficient stock for Juice. Available: 1"}
+        assert state(pg, student) == (Decimal("10000"), [3, 1], 0)
+
+    def test_missing_account(self, canteen, shop, ids):
+        _, samosa, _ = shop
+
+        result = canteen.record_purchase(ids(), [{"item_id": samosa, "quantity": 1}])
+
+        assert result == {"success": False, "error": "Student account not found"}
+
+    def test_unknown_item(self, canteen, shop, ids):
+        student, _, _ = shop
+        missing = ids()
+
+        result = canteen.record_purchase(student, [{"item_id": missing, "quantity": 1}])
+
+        assert result == {"success": False, "error": f"Item {missing} not found"}
+
+    def test_empty_basket(self, fake_db, make_service):
+        db = fake_db()
+
+        assert make_service(CanteenService, db).record_purchase("st-1", [])["error"] == "No items in purchase"
+        assert db.calls == []
@@ -0,0 +1,146 @@
+"""
+Command Parser Tests
+Tests for local command grammars and the AI fallback
+"""
+import sys
+import os
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services import command_parser
+from api.services.command_parser import (
+    CONFIDENCE_THRESHOLD, interpret_ai_parse, parse_command
+)
+from api.services.command_intelligence import CommandIntelligenceService
+
+
+@pytest.mark.parametrize("command,intent,entities", [
+    ("Mark John as present today", "mark_attendance",
+     {"student_name": "John", "status": "present", "date": date.today().isoformat()}),
+    ("Mark John Okello absent.", "mark_attendance", {"student_name": "John Okello", "status": "absent"}),
+    ("Mark all students in Primary 5A present", "bulk_mark_attendance",
+     {"class_name": "Primary 5A", "status": "present"}),
+    ("P5 absent yesterday", "bulk_mark_attendance",
+     {"class_name": "P5", "status": "absent", "date": (date.today() - timedelta(days=1)).isoformat()}),
+    ("Record 85 marks for Mary in Math exam", "record_grade",
+     {"student_name": "Mary", "marks": 85.0, "subject": "Math"}),
+    ("Mary scored 72% in English", "record_grade", {"student_name": "Mary", "marks": 72.0, "subject": "English"}),
+    ("Record 85 marks for Mary in Math exam today", "record_grade",
+     {"student_name": "Mary", "marks": 85.0, "subject": "Math", "date": date.today().isoformat()}),
+    ("John paid 50,000 for school fees", "record_payment", {"student_name": "John", "amount": 50000.0}),
+    ("Received payment of UGX 120000 from Sarah Nambi", "record_payment",
+     {"student_name": "Sarah Nambi", "amount": 120000.0}),
+    ("Mary is sick with headache", "record_health_visit", {"student_name": "Mary", "message": "headache"}),
+    ("Report incident: fight in playground", "create_incident", {"message": "fight in playground"}),
+    ("Notify Primary 4 parents \"Trip tomorrow\"", "bulk_send_message",
+     {"class_name": "Primary 4", "message": "Trip tomorrow"}),
+    ("Tell John's parents: see the head teacher", "send_message",
+     {"student_name": "John", "message": "see the head teacher"}),
+])
+def test_grammar_parses(command, intent, entities):
+    parsed = parse_command(command)
+    assert parsed["intent"] == intent
+    assert parsed["entities"] == entities
+    assert parsed["source"] == "grammar"
+    assert parsed["confidence"] >= CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize("command", [
+    "mark the class present",
+    "the class is present",
+    "mark all of them present",
+    "Mark the class present",
+    "Present",
+])
+def test_group_words_are_not_a_student(command):
+    parsed = parse_command(command)
+    assert parsed["source"] == "keywords"
+    assert "student_name" not in parsed["entities"]
+    assert parsed["confidence"] < CONFIDENCE_THRESHOLD
+
+
+class TestConfidence:
+    """Test scoring of weaker parses"""
+
+    def test_keyword_fallback_with_entities_is_confident(self):
+        parsed = parse_command("take attendance, Peter present")
+        assert parsed["source"] == "keywords"
+        assert parsed["intent"] == "mark_attendance"
+        assert parsed["confidence"] >= CONFIDENCE_THRESHOLD
+
+    def test_missing_required_entity_is_not_confident(self):
+        parsed = parse_command("mark all present")
+        assert parsed["intent"] == "bulk_mark_attendance"
+        assert parsed["confidence"] < CONFIDENCE_THRESHOLD
+
+    def test_unknown(self):
+        parsed = parse_command("what is the weather")
+        assert parsed["intent"] == "unknown"
+        assert parsed["confidence"] == 0.0
+
+    def test_repeated_phrasing_is_cached(self):
+        command_parser.clear_cache()
+        parse_command("Mark John as present today")
+        parse_command("Mark  John as present today.")
+        assert command_parser._parse_normalized.cache_info().hits == 1
+
+
+class TestInterpretAIParse:
+    """Test reading intents out of AI responses"""
+
+    def test_nested_json_text(self):
+        content = {"analysis": {"summary": 'Here: {"intent": "record_payment", "entities": {"amount": "5,000", "student_name": "Ann"}}'}}
+        assert interpret_ai_parse(content) == {
+            "intent": "record_payment", "entities": {"amount": 5000.0, "student_name": "Ann"}
+        }
+
+    def test_unknown_intent(self):
+        assert interpret_ai_parse({"intent": "order_pizza"}) is None
+        assert interpret_ai_parse("no json here") is None
+
+
+@pytest.fixture
+def with_clarity(make_service, fake_db):
+    """with_clarity(ai_parse): a service whose Clarity call answers ai_parse, counted in calls"""
+    def build(ai_parse):
+        service = make_service(CommandIntelligenceService, fake_db(), calls=0)
+
+        async def fake_clarity(command):
+            service.calls += 1
+            return ai_parse
+
+        service._parse_with_clarity = fake_clarity
+        return service
+    return build
+
+
+class TestAIFallback:
+    """Test when the service asks Clarity"""
+
+    def setup_method(self):
+        CommandIntelligenceService._ai_parses.clear()
+
+    def test_confident_parse_skips_clarity(self, with_clarity):
+        service = with_clarity(None)
+        parsed = asyncio.run(service._parse_command("Mark John as present"))
+        assert parsed["source"] == "grammar"
+        assert service.calls == 0
+
+    def test_low_confidence_asks_clarity_once(self, with_clarity):
+        service = with_clarity({"intent": "bulk_mark_attendance", "entities": {"class_name": "Primary 2"}})
+        parsed = asyncio.run(service._parse_command("mark all present"))
+        asyncio.run(service._parse_command("mark all present"))
+
+        assert service.calls == 1
+        assert parsed["source"] == "clarity"
+        assert parsed["entities"] == {"status": "present", "class_name": "Primary 2"}
+
+    def test_clarity_without_answer_keeps_local_parse(self, with_clarity):
+        service = with_clarity(None)
+        parsed = asyncio.run(service._parse_command("what is the weather"))
+        assert parsed["intent"] == "unknown"
+        assert parsed["source"] == "keywords"
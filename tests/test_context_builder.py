@@ -0,0 +1,114 @@
+"""
+Context Builder Tests
+Tests for bounded prompt summaries
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.context_builder import ContextBuilder, robust_z_scores
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+SCHEMA = """
+CREATE TABLE payments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    amount DECIMAL(15, 2),
+    payment_method VARCHAR(50),
+    payment_date DATE
+);
+"""
+
+
+@pytest.fixture
+def builder(pg):
+    pg.execute_query(SCHEMA, fetch=False)
+    return ContextBuilder(SCHOOL, pg)
+
+
+class TestRobustZ:
+    """Test modified z-scores"""
+
+    def test_spike_stands_out(self):
+        scores = robust_z_scores([10, 11, 9, 10, 12, 10, 60])
+        assert scores[-1] > 3.5
+        assert all(abs(z) < 3.5 for z in scores[:-1])
+
+    def test_identical_values_fall_back_to_mean_deviation(self):
+        scores = robust_z_scores([500, 500, 500, 500, 5000])
+        assert scores[-1] > 3.5
+
+    def test_constant_series(self):
+        assert robust_z_scores([3, 3, 3]) == [0.0, 0.0, 0.0]
+
+
+class TestSummarize:
+    """Test the SQL summary and its post-processing"""
+
+    def test_totals_percentiles_and_outliers(self, pg, builder):
+        pg.execute_query(
+            """
+            INSERT INTO payments (school_id, amount, payment_method, payment_date)
+            SELECT %s, 10000 + (n %% 5) * 1000, CASE WHEN n %% 4 = 0 THEN 'cash' ELSE 'mobile_money' END,
+                   CURRENT_DATE - n
+            FROM generate_series(1, 40) n
+            """,
+            (SCHOOL,),
+            fetch=False
+        )
+        pg.execute_query(
+            "INSERT INTO payments (school_id, amount, payment_method, payment_date) VALUES "
+            "(%s, 900000, 'bank', CURRENT_DATE), (%s, 5000000, 'bank', CURRENT_DATE), "
+            "(%s, 10000, 'cash', CURRENT_DATE - 200)",
+            (SCHOOL, OTHER_SCHOOL, SCHOOL),
+            fetch=False
+        )
+
+        context = builder.summarize(
+            "payments", "payment_date", days=90,
+            amount_column="amount", category_columns=["payment_method"], outlier_columns=["payment_method"]
+        )
+
+        # Other schools' rows and rows before the period are left out
+        assert context["rows"] == 41
+        assert context["max"] == 900000
+        assert context["percentiles"]["p50"] == 12000
+        assert [(o["amount"], o["payment_method"]) for o in context["outliers"]] == [(900000, "bank")]
+        assert [c["value"] for c in context["by_payment_method"]] == ["mobile_money", "cash", "bank"]
+        assert sum(week["count"] for week in context["weekly"]) == 41
+        assert context["period_days"] == 90
+
+    def test_unusual_weeks(self, pg, builder):
+        for weeks_ago, count in ((4, 5), (3, 6), (2, 5), (1, 40)):
+            pg.execute_query(
+                "INSERT INTO payments (school_id, payment_date) "
+                "SELECT %s, date_trunc('week', CURRENT_DATE)::date - 7 * %s FROM generate_series(1, %s)",
+                (SCHOOL, weeks_ago, count),
+                fetch=False
+            )
+
+        context = builder.summarize("payments", "payment_date", days=60)
+
+        assert [w["count"] for w in context["unusual_weeks"]] == [40]
+        assert "percentiles" not in context
+
+    def test_empty_period(self, builder):
+        context = builder.summarize("payments", "payment_date", days=7, amount_column="amount")
+
+        assert context["rows"] == 0
+        assert context["outliers"] == []
+        assert context["unusual_weeks"] == []
+
+    def test_rejects_non_identifiers(self, fake_db):
+        builder = ContextBuilder("school-1", fake_db())
+        with pytest.raises(ValueError):
+            builder.summarize("payments; DROP TABLE x", "payment_date", days=7)
+
+    def test_render_is_compact(self):
+        assert ContextBuilder.render(a={"rows": 1}) == '{"a":{"rows":1}}'
@@ -0,0 +1,74 @@
+"""
+Data Migration Tests
+Tests for streaming row parsing across CSV, TSV, JSON-lines and XLSX
+"""
+import asyncio
+import io
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.data_migration import DataMigrationService, _batched
+
+
+@pytest.fixture
+def parse(make_service):
+    # Parsing needs neither the database nor Clarity
+    service = make_service(DataMigrationService, None)
+    return lambda content, filename: asyncio.run(service._parse_file(content, filename))
+
+
+class TestStreamingParse:
+    """Test format detection and row streaming"""
+
+    def test_semicolon_csv_dialect_sniffed(self, parse):
+        rows = parse(b"name;amount\nMary;1000\nJohn;2000\n", "legacy.txt")
+        assert rows == [{"name": "Mary", "amount": "1000"}, {"name": "John", "amount": "2000"}]
+
+    def test_tsv_with_quoted_tab(self, parse):
+        rows = parse(b'name\tnote\nMary\t"a\tb"\n', "legacy.tsv")
+        assert rows == [{"name": "Mary", "note": "a\tb"}]
+
+    def test_json_lines(self, parse):
+        rows = parse(b'{"a": 1}\n\n{"a": 2}\n', "export.jsonl")
+        assert rows == [{"a": 1}, {"a": 2}]
+
+    def test_pretty_printed_json_object(self, parse):
+        rows = parse(b'{\n  "name": "Mary",\n  "amount": 1000\n}\n', "record.json")
+        assert rows == [{"name": "Mary", "amount": 1000}]
+
+    def test_json_array(self, parse):
+        rows = parse(b'[\n  {"a": 1},\n  {"a": 2}\n]', "export.json")
+        assert rows == [{"a": 1}, {"a": 2}]
+
+    def test_xlsx_first_sheet(self, parse):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["first_name", "amount"])
+        sheet.append(["Mary", 3000])
+        sheet.append([None, None])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        rows = parse(buffer.getvalue(), "fees.xlsx")
+        assert rows == [{"first_name": "Mary", "amount": "3000"}]
+
+    def test_file_object_is_not_closed(self, parse):
+        upload = io.BytesIO(b"a,b\n1,2\n")
+        rows = parse(upload, "upload.csv")
+
+        assert rows == [{"a": "1", "b": "2"}]
+        assert not upload.closed
+
+
+class TestBatching:
+    """Test fixed-size batching of streamed rows"""
+
+    def test_batches_are_fixed_size(self):
+        sizes = [len(batch) for batch in _batched(({"i": i} for i in range(2500)), 1000)]
+        assert sizes == [1000, 1000, 500]
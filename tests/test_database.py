@@ -1 +1,102 @@
+"""
+Database Manager Tests
+Tests for the unit-of-work transaction API
+"""
+import sys
+import os
+import threading
 
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.database import DatabaseManager
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self.log.append(query)
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self.log)
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+
+class FakePool:
+    def __init__(self):
+        self.log = []
+        self.checkouts = 0
+
+    def getconn(self):
+        self.checkouts += 1
+        return FakeConnection(self.log)
+
+    def putconn(self, conn):
+        pass
+
+
+def _manager():
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.pool = FakePool()
+    db._local = threading.local()
+    return db
+
+
+class TestTransaction:
+    """Test commit / rollback / savepoint behaviour"""
+
+    def test_statements_share_one_connection_and_commit_once(self):
+        db = _manager()
+        with db.transaction() as tx:
+            tx.execute("UPDATE a", fetch=False)
+            tx.execute("UPDATE b", fetch=False)
+
+        assert db.pool.checkouts == 1
+        assert db.pool.log == ["UPDATE a", "UPDATE b", "COMMIT"]
+
+    def test_error_rolls_back_everything(self):
+        db = _manager()
+        with pytest.raises(ValueError):
+            with db.transaction() as tx:
+                tx.execute("UPDATE a", fetch=False)
+                raise ValueError("boom")
+
+        assert db.pool.log == ["UPDATE a", "ROLLBACK"]
+
+    def test_nested_transaction_becomes_savepoint(self):
+        db = _manager()
+        with db.transaction() as outer:
+            outer.execute("UPDATE a", fetch=False)
+            with pytest.raises(ValueError):
+                with db.transaction() as inner:
+                    assert inner is outer
+                    inner.execute("UPDATE b", fetch=False)
+                    raise ValueError("boom")
+
+        assert db.pool.checkouts == 1
+        assert db.pool.log == [
+            "UPDATE a", "SAVEPOINT sp_1", "UPDATE b", "ROLLBACK TO SAVEPOINT sp_1", "COMMIT"
+        ]
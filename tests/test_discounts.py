@@ -0,0 +1,143 @@
+"""
+Discounts Tests
+Tests for the school-wide sibling discount batch
+"""
+import sys
+import os
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.discounts import DiscountsService
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+STUDENT_DISCOUNTS = """
+CREATE TABLE student_discounts (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    fee_id UUID,
+    discount_type VARCHAR(50),
+    discount_amount DECIMAL(12, 2) NOT NULL,
+    reason TEXT,
+    applied_by UUID,
+    term VARCHAR(20),
+    academic_year VARCHAR(20)
+);
+"""
+
+
+@pytest.fixture
+def discounts(pg, core_tables, migration, make_service):
+    core_tables("students", "parents", "student_parents", "fee_structures", "student_fees")
+    pg.execute_query(STUDENT_DISCOUNTS, fetch=False)
+    migration("015_sibling_discount_runs")
+    migration("017_report_snapshots", until="REPORT SNAPSHOTS")
+    migration("019_fee_balance_ledger")
+    return make_service(DiscountsService, pg, school_id=SCHOOL)
+
+
+@pytest.fixture
+def family(insert):
+    """Four children enrolled in order, each owing 100,000, and their parent"""
+    parent = insert("parents", school_id=SCHOOL, first_name="Grace", last_name="Ato")
+    fees = insert("fee_structures", school_id=SCHOOL, name="Tuition", amount=100000, academic_year="2026")
+    children = []
+    for day, name in enumerate(("Ann", "Ben", "Cal", "Dan"), start=1):
+        child = insert("students", school_id=SCHOOL, first_name=name, last_name="Ato",
+                       created_at=f"2020-01-0{day}")
+        insert("student_parents", student_id=child, parent_id=parent)
+        insert("student_fees", student_id=child, fee_structure_id=fees, amount_due=100000, balance=100000)
+        children.append(child)
+    return children, parent
+
+
+def balances(pg, family):
+    children, _ = family
+    rows = pg.execute_query("SELECT student_id, balance FROM student_fees")
+    by_student = {str(row["student_id"]): row["balance"] for row in rows}
+    return [by_student[child] for child in children]
+
+
+class TestSiblingDiscountBatch:
+    """Test apply_sibling_discounts_for_school"""
+
+    def test_dry_run_only_reads(self, pg, discounts, family):
+        result = discounts.apply_sibling_discounts_for_school("Term 1", "2026", dry_run=True)
+
+        assert result == {
+            "success": True, "dry_run": True, "term": "Term 1", "academic_year": "2026",
+            "families": 1, "students_discounted": 3, "fees_discounted": 3,
+            "total_discount_amount": 60000.0
+        }
+        assert balances(pg, family) == [Decimal("100000")] * 4
+        assert pg.execute_query("SELECT COUNT(*) AS n FROM student_discounts")[0]["n"] == 0
+
+    def test_rates_match_per_family_calculation(self, pg, discounts, family):
+        result = discounts.apply_sibling_discounts_for_school("Term 1", "2026")
+
+        # Child #2 10%, #3 20%, #4+ 30%, as in calculate_sibling_discounts
+        assert balances(pg, family) == [Decimal("100000"), Decimal("90000"), Decimal("80000"), Decimal("70000")]
+        assert result["total_discount_amount"] == 60000.0
+
+        runs = pg.execute_query("SELECT id, fees_discounted FROM sibling_discount_runs")
+        assert [(str(run["id"]), run["fees_discounted"]) for run in runs] == [(result["run_id"], 3)]
+
+    def test_rerun_only_discounts_new_fees(self, pg, discounts, family, insert):
+        discounts.apply_sibling_discounts_for_school("Term 1", "2026")
+        uniform = insert("fee_structures", school_id=SCHOOL, name="Uniform", amount=50000, academic_year="2026")
+        insert("student_fees", student_id=family[0][1], fee_structure_id=uniform, amount_due=50000, balance=50000)
+
+        again = discounts.apply_sibling_discounts_for_school("Term 1", "2026")
+
+        assert (again["fees_discounted"], again["total_discount_amount"]) == (1, 5000.0)
+        assert pg.execute_query("SELECT COUNT(*) AS n FROM sibling_discount_runs")[0]["n"] == 2
+
+    def test_other_academic_years_untouched(self, pg, discounts, family):
+        result = discounts.apply_sibling_discounts_for_school("Term 1", "2027")
+
+        assert result["fees_discounted"] == 0
+        assert balances(pg, family) == [Decimal("100000")] * 4
+
+    def test_next_term_does_not_rediscount(self, pg, discounts, family):
+        discounts.apply_sibling_discounts_for_school("Term 1", "2026")
+
+        term_two = discounts.apply_sibling_discounts_for_school("Term 2", "2026")
+
+        assert (term_two["fees_discounted"], term_two["total_discount_amount"]) == (0, 0.0)
+        assert balances(pg, family) == [Decimal("100000"), Decimal("90000"), Decimal("80000"), Decimal("70000")]
+
+
+class TestFamilyDiscounts:
+    """Test calculate_sibling_discounts against the school-wide batch"""
+
+    def test_records_each_fee_and_batch_skips_them(self, pg, discounts, family):
+        _, parent = family
+
+        result = discounts.calculate_sibling_discounts(parent)
+
+        assert result["total_discount_amount"] == 60000.0
+        assert [child["discount_percentage"] for child in result["discounts_applied"]] == [0, 10, 20, 30]
+        assert balances(pg, family) == [Decimal("100000"), Decimal("90000"), Decimal("80000"), Decimal("70000")]
+        rows = pg.execute_query("SELECT fee_id, discount_type, academic_year FROM student_discounts")
+        assert {(row["discount_type"], row["academic_year"]) for row in rows} == {("sibling", "2026")}
+        assert all(row["fee_id"] for row in rows)
+
+        assert discounts.apply_sibling_discounts_for_school("Term 1", "2026")["fees_discounted"] == 0
+        assert discounts.calculate_sibling_discounts(parent)["total_discount_amount"] == 0
+
+    def test_early_payment_discounts_one_fee(self, pg, discounts, family, insert):
+        children, _ = family
+        uniform = insert("student_fees", student_id=children[0], amount_due=50000, balance=50000)
+
+        result = discounts.apply_early_payment_discount(children[0], uniform, 10)
+
+        assert result["new_balance"] == 45000.0
+        rows = pg.execute_query("SELECT balance FROM student_fees WHERE student_id = %s ORDER BY balance", (children[0],))
+        assert [row["balance"] for row in rows] == [Decimal("45000"), Decimal("100000")]
+        recorded = pg.execute_query("SELECT fee_id, discount_type FROM student_discounts")[0]
+        assert (str(recorded["fee_id"]), recorded["discount_type"]) == (uniform, "early_payment")
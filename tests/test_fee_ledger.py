@@ -0,0 +1,197 @@
+"""
+Fee Ledger Tests
+Tests for the trigger-maintained ledger, its reconciliation against
+student_fees, and payments settling the fee row exactly once
+"""
+import sys
+import os
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.database import FeeOperations
+from api.services.fee_ledger import FeeLedgerService
+from api.services.mobile_money import MobileMoneyService
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+FEE_PAYMENTS = """
+CREATE TABLE fee_payments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    student_fee_id UUID,
+    amount DECIMAL(10, 2) NOT NULL,
+    payment_method VARCHAR(50) NOT NULL,
+    transaction_id VARCHAR(255),
+    phone_number VARCHAR(50),
+    payment_reference VARCHAR(255),
+    notes TEXT,
+    received_by VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def ledger(pg, core_tables, migration, make_service):
+    core_tables("students", "student_fees")
+    pg.execute_query(FEE_PAYMENTS, fetch=False)
+    migration("017_report_snapshots", until="REPORT SNAPSHOTS")
+    migration("019_fee_balance_ledger")
+    return make_service(FeeLedgerService, pg, school_id=SCHOOL)
+
+
+@pytest.fixture
+def pupil(insert):
+    """A student with two fees: 100,000 due and 50,000 due (10,000 paid)"""
+    student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+    tuition = insert("student_fees", student_id=student, amount_due=100000, balance=100000)
+    insert("student_fees", student_id=student, amount_due=50000, amount_paid=10000, balance=40000)
+    return student, tuition
+
+
+def ledger_row(pg, student):
+    return pg.execute_query(
+        "SELECT total_due, total_paid, balance, fee_count FROM fee_balance_ledger WHERE student_id = %s",
+        (student,)
+    )[0]
+
+
+class TestLedgerTriggers:
+    """Test that student_fees writes move the ledger"""
+
+    def test_inserts_updates_and_deletes(self, pg, ledger, pupil):
+        student, tuition = pupil
+        assert ledger_row(pg, student) == {
+            "total_due": Decimal("150000"), "total_paid": Decimal("10000"),
+            "balance": Decimal("140000"), "fee_count": 2
+        }
+
+        pg.execute_query("DELETE FROM student_fees WHERE id = %s", (tuition,), fetch=False)
+
+        assert ledger.get_student_balance(student)["balance"] == Decimal("40000")
+        assert ledger.get_school_balance()["total_due"] == Decimal("50000")
+
+
+class TestConsolidatedSchema:
+    """Test the ledger on student_fees as database/COMPLETE_DATABASE_SCHEMA.sql creates it"""
+
+    def test_total_fees_until_final_amount_is_set(self, pg, core_tables, consolidated, migration, insert):
+        core_tables("students")
+        consolidated("student_fees")
+        migration("017_report_snapshots", until="REPORT SNAPSHOTS")
+        migration("019_fee_balance_ledger")
+        student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("student_fees", school_id=SCHOOL, student_id=student, total_fees=100000, balance=100000)
+        insert("student_fees", school_id=SCHOOL, student_id=student, total_fees=50000,
+               final_amount=45000, amount_paid=5000, balance=40000)
+
+        assert ledger_row(pg, student) == {
+            "total_due": Decimal("145000"), "total_paid": Decimal("5000"),
+            "balance": Decimal("140000"), "fee_count": 2
+        }
+
+
+class TestReconcile:
+    """Test drift detection and repair"""
+
+    def test_clean_ledger_is_left_alone(self, pg, ledger, pupil):
+        result = ledger.reconcile()
+
+        assert result["students_checked"] == 1
+        assert result["students_mismatched"] == 0
+        assert result["repaired"] is False
+
+    def test_drifted_students_are_rebuilt(self, pg, ledger, pupil):
+        student, _ = pupil
+        pg.execute_query("UPDATE fee_balance_ledger SET balance = 1, fee_count = 7", fetch=False)
+
+        result = ledger.reconcile()
+
+        assert result["students_mismatched"] == 1
+        assert result["mismatches"][0]["ledger_balance"] == 1.0
+        assert result["mismatches"][0]["detail_balance"] == 140000.0
+        assert result["repaired"] is True
+        assert ledger_row(pg, student)["balance"] == Decimal("140000")
+        assert ledger.reconcile()["students_mismatched"] == 0
+        runs = pg.execute_query("SELECT repaired FROM fee_ledger_reconciliations ORDER BY created_at")
+        assert [run["repaired"] for run in runs] == [True, False]
+
+    def test_missing_ledger_row_is_created(self, pg, ledger, pupil):
+        student, _ = pupil
+        pg.execute_query("DELETE FROM fee_balance_ledger", fetch=False)
+
+        assert ledger.reconcile()["students_mismatched"] == 1
+        assert ledger_row(pg, student)["fee_count"] == 2
+
+    def test_report_only(self, pg, ledger, pupil):
+        student, _ = pupil
+        pg.execute_query("UPDATE fee_balance_ledger SET balance = 1", fetch=False)
+
+        result = ledger.reconcile(repair=False)
+
+        assert result["students_mismatched"] == 1
+        assert result["repaired"] is False
+        assert ledger_row(pg, student)["balance"] == Decimal("1")
+
+
+class FakeMobileMoneyOps:
+    def __init__(self, student_id, student_fee_id):
+        self.transaction = {
+            "school_id": SCHOOL, "student_id": student_id, "student_fee_id": student_fee_id,
+            "provider": "MTN", "reference": "MM-1", "amount": "50000", "status": "awaiting_provider",
+            "msisdn": "256700000000"
+        }
+
+    def get_transaction(self, reference):
+        return dict(self.transaction)
+
+    def update_transaction(self, reference, payload):
+        self.transaction.update({k: v for k, v in payload.items() if v is not None})
+        return dict(self.transaction)
+
+
+class TestRecordPayment:
+    """Test that a payment settles its fee row once, in the payment's transaction"""
+
+    def test_payment_fee_and_ledger_written_together(self, pg, ledger, pupil):
+        student, tuition = pupil
+
+        FeeOperations(pg).record_payment({
+            "student_fee_id": tuition, "student_id": student, "school_id": SCHOOL, "amount": 30000,
+            "payment_method": "cash", "payment_reference": None, "phone_number": None,
+            "transaction_id": None, "notes": None, "received_by": None
+        })
+
+        fee = pg.execute_query("SELECT amount_paid, balance FROM student_fees WHERE id = %s", (tuition,))[0]
+        assert (fee["amount_paid"], fee["balance"]) == (Decimal("30000"), Decimal("70000"))
+        assert ledger_row(pg, student)["total_paid"] == Decimal("40000")
+
+    def test_failed_payment_insert_leaves_fee_untouched(self, pg, ledger, pupil):
+        student, tuition = pupil
+
+        with pytest.raises(Exception):
+            FeeOperations(pg).record_payment({
+                "student_fee_id": tuition, "student_id": student, "school_id": SCHOOL, "amount": 30000,
+                "payment_method": None, "payment_reference": None, "phone_number": None,
+                "transaction_id": None, "notes": None, "received_by": None
+            })
+
+        assert ledger_row(pg, student)["balance"] == Decimal("140000")
+
+    def test_retried_mobile_money_callback_settles_once(self, pg, ledger, pupil):
+        student, tuition = pupil
+        service = MobileMoneyService(
+            SCHOOL, ops=FakeMobileMoneyOps(student, tuition), fees=FeeOperations(pg), settings=object()
+        )
+
+        for _ in range(2):
+            service.acknowledge_callback(provider="MTN", reference="MM-1", status="success", external_reference="X1")
+
+        # Mobile money leaves the fee row to record_payment and posts it once
+        assert pg.execute_query("SELECT COUNT(*) AS n FROM fee_payments")[0]["n"] == 1
+        assert pg.execute_query("SELECT balance FROM student_fees WHERE id = %s", (tuition,))[0]["balance"] == 50000
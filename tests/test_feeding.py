@@ -0,0 +1,117 @@
+"""
+Feeding Tests
+Tests for set-based meal attendance recording
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.feeding import FeedingService
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+SCHEMA = """
+CREATE TABLE meal_attendance (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    meal_type VARCHAR(20) NOT NULL,
+    meal_date DATE NOT NULL,
+    attended BOOLEAN DEFAULT true,
+    UNIQUE (student_id, meal_date, meal_type)
+);
+CREATE TABLE dormitories (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    name VARCHAR(100)
+);
+CREATE TABLE dormitory_beds (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    dormitory_id UUID NOT NULL,
+    bed_number VARCHAR(50) NOT NULL,
+    student_id UUID
+);
+"""
+
+
+@pytest.fixture
+def feeding(pg, core_tables, make_service):
+    core_tables("students")
+    pg.execute_query(SCHEMA, fetch=False)
+    return make_service(FeedingService, pg, school_id=SCHOOL)
+
+
+def meals(pg):
+    rows = pg.execute_query("SELECT student_id, meal_type, attended FROM meal_attendance")
+    return {(str(row["student_id"]), row["meal_type"]): row["attended"] for row in rows}
+
+
+class TestBulkMealAttendance:
+    """Test bulk_record_meal_attendance"""
+
+    def test_only_this_schools_students_recorded(self, pg, feeding, insert, ids):
+        ann = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        ben = insert("students", school_id=SCHOOL, first_name="Ben", last_name="Ato")
+        other = insert("students", school_id=OTHER_SCHOOL, first_name="Cal", last_name="Obu")
+
+        result = feeding.bulk_record_meal_attendance("lunch", "2026-10-19", [ann, ben, other, ids(), ann])
+
+        assert result["students_recorded"] == 2
+        assert meals(pg) == {(ann, "lunch"): True, (ben, "lunch"): True}
+
+    def test_rerun_updates_instead_of_duplicating(self, pg, feeding, insert):
+        ann = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        feeding.bulk_record_meal_attendance("lunch", "2026-10-19", [ann])
+
+        feeding.bulk_record_meal_attendance("lunch", "2026-10-19", [ann], attended=False)
+
+        assert meals(pg) == {(ann, "lunch"): False}
+
+
+class TestGroupMealAttendance:
+    """Test record_group_meal_attendance"""
+
+    def test_class_with_exceptions(self, pg, feeding, insert):
+        ann, ben, cal = (
+            insert("students", school_id=SCHOOL, first_name=name, last_name="Ato", class_name="P5")
+            for name in ("Ann", "Ben", "Cal")
+        )
+        insert("students", school_id=SCHOOL, first_name="Dan", last_name="Ato", class_name="P6")
+        insert("students", school_id=SCHOOL, first_name="Eve", last_name="Ato", class_name="P5", status="left")
+
+        result = feeding.record_group_meal_attendance(
+            "lunch", "2026-10-19", class_name="P5", except_student_ids=[cal]
+        )
+
+        assert (result["students_recorded"], result["attended"], result["absent"]) == (3, 2, 1)
+        assert meals(pg) == {(ann, "lunch"): True, (ben, "lunch"): True, (cal, "lunch"): False}
+
+    def test_dormitory_group(self, pg, feeding, insert):
+        dorm = insert("dormitories", school_id=SCHOOL, name="Nile")
+        ann = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("dormitory_beds", dormitory_id=dorm, bed_number="BED-001", student_id=ann)
+        insert("dormitory_beds", dormitory_id=dorm, bed_number="BED-002")
+
+        result = feeding.record_group_meal_attendance("supper", "2026-10-19", dormitory_id=dorm)
+
+        assert result["students_recorded"] == 1
+        assert meals(pg) == {(ann, "supper"): True}
+
+
+class TestGroupValidation:
+    """Test the group arguments, checked before any query"""
+
+    def test_exactly_one_group_required(self, fake_db, make_service):
+        db = fake_db()
+        service = make_service(FeedingService, db)
+
+        assert service.record_group_meal_attendance("lunch", "2026-10-19")["success"] is False
+        assert service.record_group_meal_attendance(
+            "lunch", "2026-10-19", class_name="P5", dormitory_id="d1"
+        )["success"] is False
+        assert db.calls == []
@@ -0,0 +1,190 @@
+"""
+Financial Anomaly Tests
+Tests for local duplicate, outlier and off-hours detection
+"""
+import sys
+import os
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.financial_anomalies import FinancialAnomalyDetector, detect_anomalies
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+PAYMENTS = """
+CREATE TABLE payments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    amount DECIMAL(15,2) NOT NULL,
+    payment_method VARCHAR(50) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+BASELINE = {"cash": {"grp": "cash", "median": 50000, "scale": 5000, "rows": 40}}
+
+
+def row(id, amount, hour=10, grp="cash", day=14):
+    # 14 Oct 2026 is a Wednesday
+    at = datetime(2026, 10, day, hour, 0)
+    return {"id": id, "amount": amount, "grp": grp, "created_at": at, "entered_at": at}
+
+
+def types(flags):
+    return sorted((f["record_id"], f["anomaly_type"]) for f in flags)
+
+
+class TestDetectAnomalies:
+    """Test the pure detection pass"""
+
+    def test_normal_row_not_flagged(self):
+        assert detect_anomalies([row("a", 52000)], BASELINE, {}) == []
+
+    def test_amount_outlier(self):
+        flags = detect_anomalies([row("a", 75000), row("b", 200000)], BASELINE, {})
+        assert types(flags) == [("a", "amount_outlier"), ("b", "amount_outlier")]
+        assert [f["severity"] for f in flags] == ["medium", "high"]
+        assert flags[0]["details"]["robust_z"] == 5.0
+
+    def test_small_baseline_not_scored(self):
+        baseline = {"cash": dict(BASELINE["cash"], rows=3)}
+        assert detect_anomalies([row("a", 900000)], baseline, {}) == []
+
+    def test_unknown_group_not_scored(self):
+        assert detect_anomalies([row("a", 900000, grp="cheque")], BASELINE, {}) == []
+
+    def test_duplicate(self):
+        duplicates = {"b": {"duplicate_of": "a", "created_at": datetime(2026, 10, 14, 9, 50)}}
+        flags = detect_anomalies([row("b", 50000)], BASELINE, duplicates)
+        assert types(flags) == [("b", "duplicate")]
+        assert flags[0]["details"] == {"duplicate_of": "a", "minutes_apart": 10.0}
+
+    def test_off_hours(self):
+        flags = detect_anomalies(
+            [row("late", 50000, hour=22), row("early", 50000, hour=5), row("sunday", 50000, day=18)],
+            BASELINE, {}
+        )
+        assert types(flags) == [("early", "off_hours"), ("late", "off_hours"), ("sunday", "off_hours")]
+
+
+@pytest.fixture
+def detector(pg, consolidated, migration, make_service):
+    # payments as the migrations create them (TIMESTAMP created_at),
+    # expenses as the consolidated schema does (TIMESTAMPTZ, no vendor_name)
+    pg.execute_query(PAYMENTS, fetch=False)
+    consolidated("expenses")
+    migration("020_financial_anomaly_flags")
+    return make_service(FinancialAnomalyDetector, pg, school_id=SCHOOL)
+
+
+@pytest.fixture
+def kampala(pg):
+    """kampala(hour, minutes=0) -> that time on the most recent Wednesday in
+    Kampala, as a zoneless created_at in the database's zone"""
+    day = date.today() - timedelta(days=1)
+    while day.isoweekday() != 3:
+        day -= timedelta(days=1)
+
+    def at(hour, minutes=0):
+        local = datetime.combine(day, time(hour)) + timedelta(minutes=minutes)
+        return pg.execute_query(
+            "SELECT (%s::timestamp AT TIME ZONE 'Africa/Kampala')::timestamp AS at", (local,)
+        )[0]["at"]
+    return at
+
+
+@pytest.fixture
+def cash_payments(insert, ids, kampala):
+    """Twelve ordinary cash payments on a Wednesday morning"""
+    return [
+        insert("payments", school_id=SCHOOL, student_id=ids(), amount=48000 + 400 * n,
+               payment_method="cash", created_at=kampala(9, 5 * n))
+        for n in range(12)
+    ]
+
+
+def stored_flags(pg):
+    rows = pg.execute_query("SELECT record_id, anomaly_type FROM financial_anomaly_flags")
+    return sorted((str(row["record_id"]), row["anomaly_type"]) for row in rows)
+
+
+class TestScan:
+    """Test incremental scanning"""
+
+    def test_nothing_new_skips_writes(self, pg, detector):
+        result = detector.scan()
+
+        assert result["scanned"] == {"payments": 0, "expenses": 0}
+        assert result["caught_up"]
+        assert pg.execute_query("SELECT COUNT(*) AS n FROM financial_anomaly_watermarks")[0]["n"] == 0
+
+    def test_flags_stored_and_watermark_advanced(self, pg, detector, cash_payments, insert, ids, kampala):
+        outlier = insert("payments", school_id=SCHOOL, student_id=ids(), amount=400000,
+                         payment_method="cash", created_at=kampala(11))
+
+        result = detector.scan(sources=["payments"])
+
+        assert (result["scanned"], result["flagged"]) == ({"payments": 13}, {"payments": 1})
+        assert stored_flags(pg) == [(outlier, "amount_outlier")]
+        watermark = pg.execute_query("SELECT last_id FROM financial_anomaly_watermarks")[0]
+        assert str(watermark["last_id"]) == outlier
+        # A rescan starts after the watermark and finds nothing new
+        assert detector.scan(sources=["payments"])["scanned"] == {"payments": 0}
+
+    def test_duplicates_within_window(self, pg, detector, insert, ids, kampala):
+        student = ids()
+        first = insert("payments", school_id=SCHOOL, student_id=student, amount=50000,
+                       payment_method="cash", created_at=kampala(10))
+        second = insert("payments", school_id=SCHOOL, student_id=student, amount=50000,
+                        payment_method="mobile_money", created_at=kampala(10, 10))
+        insert("payments", school_id=SCHOOL, student_id=student, amount=50000,
+               payment_method="cash", created_at=kampala(12))
+
+        detector.scan(sources=["payments"])
+
+        assert stored_flags(pg) == [(second, "duplicate")]
+        details = pg.execute_query("SELECT details FROM financial_anomaly_flags")[0]["details"]
+        assert details == {"duplicate_of": first, "minutes_apart": 10.0}
+
+    def test_recent_rows_left_for_next_scan(self, pg, detector, insert, ids, kampala):
+        older = insert("payments", school_id=SCHOOL, student_id=ids(), amount=50000,
+                       payment_method="cash", created_at=kampala(10))
+        insert("payments", school_id=SCHOOL, student_id=ids(), amount=50000, payment_method="cash")
+
+        assert detector.scan(sources=["payments"])["scanned"] == {"payments": 1}
+        watermark = pg.execute_query("SELECT last_id FROM financial_anomaly_watermarks")[0]
+        assert str(watermark["last_id"]) == older
+
+    def test_unknown_source(self, fake_db, make_service):
+        with pytest.raises(ValueError):
+            make_service(FinancialAnomalyDetector, fake_db()).scan(sources=["grades"])
+
+    def test_off_hours_in_school_time(self, pg, detector, insert, ids, kampala):
+        evening = insert("payments", school_id=SCHOOL, student_id=ids(), amount=50000,
+                         payment_method="cash", created_at=kampala(21, 30))
+        insert("payments", school_id=SCHOOL, student_id=ids(), amount=50000,
+               payment_method="cash", created_at=kampala(7, 30))
+
+        detector.scan(sources=["payments"])
+
+        assert stored_flags(pg) == [(evening, "off_hours")]
+        details = pg.execute_query("SELECT details FROM financial_anomaly_flags")[0]["details"]
+        assert details["entered_at"].endswith("T21:30:00")
+
+    def test_duplicate_expenses(self, pg, detector, insert, kampala):
+        first = insert("expenses", school_id=SCHOOL, category="supplies", description="Chalk", amount=20000,
+                       expense_date=date.today(), created_at=kampala(10))
+        second = insert("expenses", school_id=SCHOOL, category="supplies", description="Chalk", amount=20000,
+                        expense_date=date.today(), created_at=kampala(10, 5))
+        insert("expenses", school_id=SCHOOL, category="supplies", description="Paper", amount=20000,
+               expense_date=date.today(), created_at=kampala(10, 10))
+
+        assert detector.scan(sources=["expenses"])["scanned"] == {"expenses": 3}
+
+        assert stored_flags(pg) == [(second, "duplicate")]
+        assert pg.execute_query("SELECT details FROM financial_anomaly_flags")[0]["details"]["duplicate_of"] == first
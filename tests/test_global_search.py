@@ -0,0 +1,111 @@
+"""
+Global Search Tests
+Tests for query normalisation and search over the trigger-maintained search_index
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.global_search import GlobalSearchService, phone_key, search_terms
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+SOURCE_TABLES = """
+CREATE TABLE teachers (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    first_name VARCHAR(100),
+    last_name VARCHAR(100),
+    employee_id VARCHAR(50),
+    phone VARCHAR(50),
+    email VARCHAR(255)
+);
+CREATE TABLE payments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    receipt_number VARCHAR(50),
+    amount DECIMAL(15, 2),
+    payment_date DATE,
+    payment_method VARCHAR(50)
+);
+"""
+
+
+@pytest.fixture
+def search(trigram, core_tables, migration, make_service):
+    core_tables("students", "parents")
+    trigram.execute_query(SOURCE_TABLES, fetch=False)
+    # Row level security needs Supabase auth; the triggers are what is tested
+    migration("022_search_index", until="ROW LEVEL SECURITY")
+    return make_service(GlobalSearchService, trigram, school_id=SCHOOL)
+
+
+def hits(result):
+    return [(hit["type"], hit["title"]) for hit in result["hits"]]
+
+
+class TestTerms:
+    """Test query normalisation"""
+
+    @pytest.mark.parametrize("value", ["+256 772 123456", "0772-123-456", "772123456", "256772123456"])
+    def test_phone_formats_share_a_key(self, value):
+        assert phone_key(value) == "772123456"
+
+    def test_phone_query(self):
+        assert search_terms(" 0772 123 ") == {"term": "772123", "exact": ["0772 123", "772123"]}
+
+    def test_name_query(self):
+        assert search_terms("  John   OKELLO ") == {"term": "john okello", "exact": ["john okello"]}
+
+
+class TestSearch:
+    """Test search against the trigger-maintained index"""
+
+    def test_partial_name_across_types(self, search, insert):
+        insert("students", school_id=SCHOOL, first_name="John", last_name="Okello",
+               class_name="P5", admission_number="ADM001")
+        insert("parents", school_id=SCHOOL, first_name="Mary", last_name="Okello", phone="0772123456")
+        insert("teachers", school_id=SCHOOL, first_name="Grace", last_name="Nakato", employee_id="EMP9")
+        insert("students", school_id=OTHER_SCHOOL, first_name="Paul", last_name="Okello")
+
+        result = search.search("okel")
+
+        assert sorted(hits(result)) == [("parent", "Mary Okello"), ("student", "John Okello")]
+        assert hits(search.search("okel", types=["student"])) == [("student", "John Okello")]
+
+    def test_exact_numbers_and_phones_rank_first(self, search, insert):
+        insert("students", school_id=SCHOOL, first_name="Adm", last_name="Okello", admission_number="X1")
+        insert("students", school_id=SCHOOL, first_name="John", last_name="Okello", admission_number="ADM001")
+        insert("parents", school_id=SCHOOL, first_name="Mary", last_name="Okello", phone="+256 772 123456")
+
+        assert hits(search.search("adm001"))[0] == ("student", "John Okello")
+        assert hits(search.search("0772-123-456")) == [("parent", "Mary Okello")]
+
+    def test_short_term_matches_name_prefix(self, search, insert):
+        insert("students", school_id=SCHOOL, first_name="John", last_name="Okello")
+        insert("students", school_id=SCHOOL, first_name="Ann", last_name="Jombo")
+
+        assert hits(search.search("jo")) == [("student", "John Okello")]
+
+    def test_receipts_and_updates_follow_the_source_rows(self, pg, search, insert):
+        insert("payments", school_id=SCHOOL, receipt_number="RCT-2026-0042", amount=50000)
+        student = insert("students", school_id=SCHOOL, first_name="John", last_name="Okello")
+        pg.execute_query("UPDATE students SET last_name = 'Opio' WHERE id = %s", (student,), fetch=False)
+
+        assert hits(search.search("rct-2026-0042")) == [("receipt", "RCT-2026-0042")]
+        assert hits(search.search("okel")) == []
+        assert hits(search.search("opio")) == [("student", "John Opio")]
+
+    def test_empty_query_skips_database(self, fake_db, make_service):
+        db = fake_db()
+        assert make_service(GlobalSearchService, db).search("   ")["hits"] == []
+        assert db.calls == []
+
+    def test_unknown_type(self, fake_db, make_service):
+        with pytest.raises(ValueError):
+            make_service(GlobalSearchService, fake_db()).search("john", types=["vehicle"])
@@ -0,0 +1,173 @@
+"""
+Government Reporting Tests
+Tests for snapshot period detection, snapshot refresh and stored report re-use
+"""
+import sys
+import os
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.government_reporting import GovernmentReportingService, _month_range
+
+
+def stored(saved=None):
+    """respond= for fake_db: serves one stored report"""
+    return lambda query, params: [saved] if saved and "FROM government_reports" in query else []
+
+
+@pytest.fixture
+def service(make_service):
+    return lambda db: make_service(GovernmentReportingService, db)
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+REPORT_TABLES = """
+CREATE TABLE government_reports (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL
+);
+CREATE TABLE expenses (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    amount DECIMAL(15,2) NOT NULL,
+    expense_date DATE NOT NULL
+);
+CREATE TABLE payroll_transactions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    gross_salary DECIMAL(15, 2),
+    payment_date DATE
+);
+"""
+
+
+@pytest.fixture
+def reporting(pg, core_tables, make_service):
+    """The test creates student_fees in the layout it needs, then the snapshots"""
+    core_tables("students")
+    pg.execute_query(REPORT_TABLES, fetch=False)
+    return make_service(GovernmentReportingService, pg, school_id=SCHOOL)
+
+
+@pytest.fixture
+def snapshots(migration):
+    return lambda: migration("017_report_snapshots")
+
+
+@pytest.fixture
+def pupil(insert):
+    return insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato", gender="F",
+                  class_name="P5", created_at="2025-01-10")
+
+
+def fee_months(pg):
+    rows = pg.execute_query(
+        "SELECT fee_month, fees_charged, amount_collected, outstanding_balance FROM fee_snapshots ORDER BY fee_month"
+    )
+    return [(str(row["fee_month"]), *(float(row[k]) for k in list(row)[1:])) for row in rows]
+
+
+class TestRefreshSnapshots:
+    """Test refresh_snapshots and the fee trigger on both student_fees layouts"""
+
+    def test_fees_bucketed_by_due_month(self, pg, reporting, core_tables, snapshots, pupil, insert):
+        core_tables("student_fees")
+        snapshots()
+        insert("student_fees", student_id=pupil, amount_due=100000, amount_paid=40000, balance=60000,
+               due_date="2025-01-31")
+        insert("student_fees", student_id=pupil, amount_due=30000, balance=30000, due_date="2025-03-15")
+        # Undated fees count in the month they were charged
+        insert("student_fees", student_id=pupil, amount_due=5000, balance=5000, created_at="2025-02-03 09:00")
+        triggered = fee_months(pg)
+
+        result = reporting.refresh_snapshots()
+
+        assert result["success"] is True
+        assert (result["enrollment_buckets"], result["fee_buckets"], result["expense_buckets"]) == (1, 3, 0)
+        assert fee_months(pg) == triggered == [
+            ("2025-01-01", 100000.0, 40000.0, 60000.0),
+            ("2025-02-01", 5000.0, 0.0, 5000.0),
+            ("2025-03-01", 30000.0, 0.0, 30000.0),
+        ]
+
+    def test_consolidated_fees_use_total_fees(self, pg, reporting, consolidated, snapshots, pupil, insert):
+        consolidated("student_fees")
+        snapshots()
+        fee = insert("student_fees", school_id=SCHOOL, student_id=pupil, total_fees=80000, balance=80000,
+                     due_date="2025-02-01")
+        pg.execute_query(
+            "UPDATE student_fees SET amount_paid = 30000, balance = 50000 WHERE id = %s", (fee,), fetch=False
+        )
+
+        assert fee_months(pg) == [("2025-02-01", 80000.0, 30000.0, 50000.0)]
+        reporting.refresh_snapshots()
+        assert fee_months(pg) == [("2025-02-01", 80000.0, 30000.0, 50000.0)]
+
+    def test_whole_and_partial_months_agree(self, reporting, core_tables, snapshots, pupil, insert):
+        core_tables("student_fees")
+        snapshots()
+        insert("student_fees", student_id=pupil, amount_due=100000, amount_paid=40000, balance=60000,
+               due_date="2025-01-31")
+        insert("student_fees", student_id=pupil, amount_due=30000, balance=30000, due_date="2025-04-01")
+
+        monthly = reporting.generate_financial_summary_report("2025-01-01", "2025-03-31")["revenue"]
+        live = reporting.generate_financial_summary_report("2025-01-01", "2025-03-30")["revenue"]
+
+        assert monthly == live
+        assert float(live["total_fees_charged"]) == 100000.0
+
+    def test_failed_fee_rollup_keeps_enrollment(self, pg, reporting, core_tables, snapshots, pupil, insert):
+        core_tables("student_fees")
+        snapshots()
+        insert("student_fees", student_id=pupil, amount_due=100000, balance=100000, due_date="2025-01-31")
+        pg.execute_query("DROP FUNCTION fee_snapshot_add(JSONB[], JSONB[])", fetch=False)
+
+        result = reporting.refresh_snapshots()
+
+        assert result["success"] is False
+        assert result["fee_buckets"] is None
+        assert "fee_buckets" in result["errors"]
+        assert result["enrollment_buckets"] == 1
+        # The fee snapshots are left as they were, not emptied
+        assert fee_months(pg) == [("2025-01-01", 100000.0, 0.0, 100000.0)]
+        assert pg.execute_query("SELECT COUNT(*) AS n FROM report_snapshot_state")[0]["n"] == 1
+
+
+class TestMonthRange:
+    """Test which periods can be answered from monthly snapshots"""
+
+    def test_whole_months(self):
+        assert _month_range("2025-01-01", "2025-03-31") == (date(2025, 1, 1), date(2025, 3, 1))
+        assert _month_range("2024-02-01", "2024-02-29") == (date(2024, 2, 1), date(2024, 2, 1))
+
+    def test_partial_months_fall_back(self):
+        assert _month_range("2025-01-15", "2025-03-31") is None
+        assert _month_range("2025-01-01", "2025-03-30") is None
+        assert _month_range("2025-03-01", "2025-01-31") is None
+        assert _month_range("2025-01-01T00:00", "2025-03-31") is None
+
+
+class TestStoredReports:
+    """Test that re-downloads serve the stored payload"""
+
+    def test_saved_report_is_not_regenerated(self, service, fake_db):
+        db = fake_db(respond=stored({"id": "r1", "report_data": {"report_type": "annual_census", "year": 2025}}))
+        result = service(db).get_or_generate_report("annual_census", year=2025)
+
+        assert result["cached"] is True
+        assert result["report"]["year"] == 2025
+        assert len(db.calls) == 1
+
+    def test_report_keys(self):
+        key = GovernmentReportingService.report_key
+        assert key("annual_census", year=2025) == "annual_census:2025"
+        assert key("enrollment", start_date="2025-01-01", end_date="2025-03-31") == "enrollment:2025-01-01:2025-03-31"
+
+    def test_missing_period_is_rejected(self, service, fake_db):
+        result = service(fake_db()).get_or_generate_report("enrollment", start_date="2025-01-01")
+        assert result["success"] is False
@@ -0,0 +1,133 @@
+"""
+OCR Pipeline Tests
+Tests for image pre-shrinking, batch dedup and the OCR results cache
+"""
+import base64
+import io
+import sys
+import os
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services import ocr as ocr_module
+from api.services.ocr import OCRService, OCR_MAX_DIMENSION
+
+
+def _png_base64(size, color):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+class CountingOCRService(OCRService):
+    """OCRService with the provider call replaced by a counter"""
+
+    def __init__(self):
+        self.vision_client = None
+        self.settings = None
+        self.calls = []
+
+    def _clarity_ocr(self, image_bytes):
+        self.calls.append(image_bytes)
+        return {"success": True, "text": f"page-{len(self.calls)}", "confidence": 0.85}
+
+
+class TestImagePreparation:
+    """Test OCR-friendly image preprocessing"""
+
+    def test_large_image_is_shrunk_and_grayscaled(self):
+        raw = base64.b64decode(_png_base64((4000, 3000), (200, 30, 30)))
+        prepared = OCRService.prepare_image(raw)
+
+        with Image.open(io.BytesIO(prepared)) as img:
+            assert img.mode == "L"
+            assert max(img.size) == OCR_MAX_DIMENSION
+
+    def test_photo_reencoded_as_jpeg(self):
+        buffer = io.BytesIO()
+        Image.effect_noise((1200, 900), 40).convert("RGB").save(buffer, format="PNG")
+        raw = buffer.getvalue()
+        prepared = OCRService.prepare_image(raw)
+
+        assert len(prepared) < len(raw)
+        with Image.open(io.BytesIO(prepared)) as img:
+            assert img.format == "JPEG"
+        assert OCRService._image_mime(prepared) == "image/jpeg"
+
+    def test_smaller_original_kept(self):
+        raw = base64.b64decode(_png_base64((40, 30), (255, 255, 255)))
+        assert OCRService.prepare_image(raw) == raw
+
+    def test_unreadable_image_passed_through(self):
+        assert OCRService.prepare_image(b"not-an-image") == b"not-an-image"
+
+
+class TestBatchProcessing:
+    """Test concurrent batch OCR with dedup and caching"""
+
+    def setup_method(self):
+        ocr_module._ocr_cache.clear()
+
+    def test_identical_pages_are_ocrd_once(self):
+        page_a = _png_base64((50, 50), (255, 255, 255))
+        page_b = _png_base64((60, 60), (0, 0, 0))
+        service = CountingOCRService()
+
+        results = service.process_batch([
+            {"id": "1", "image_data": page_a},
+            {"id": "2", "image_data": page_b},
+            {"id": "3", "image_data": f"data:image/png;base64,{page_a}"},
+        ])
+
+        assert len(service.calls) == 2
+        assert [r["document_id"] for r in results] == ["1", "2", "3"]
+        assert results[0]["text"] == results[2]["text"]
+        assert results[2]["cached"] is True
+
+    def test_reuploaded_pages_served_from_cache(self):
+        page = _png_base64((50, 50), (255, 255, 255))
+        CountingOCRService().process_batch([{"id": "1", "image_data": page}])
+
+        service = CountingOCRService()
+        results = service.process_batch([{"id": "2", "image_data": page}])
+
+        assert service.calls == []
+        assert results[0]["success"] is True
+        assert results[0]["cached"] is True
+
+    def test_undecodable_document_reported_without_failing_batch(self):
+        service = CountingOCRService()
+        results = service.process_batch([
+            {"id": "bad", "image_data": "abc"},
+            {"id": "good", "image_data": _png_base64((50, 50), (255, 255, 255))},
+        ])
+
+        assert results[0]["success"] is False
+        assert results[1]["success"] is True
+
+    def test_eviction_during_batch_keeps_cached_result(self, monkeypatch):
+        page = _png_base64((50, 50), (255, 255, 255))
+        CountingOCRService().process_batch([{"id": "1", "image_data": page}])
+
+        # A concurrent batch evicts the entry right after it was found
+        lookup = ocr_module._cache_get
+        def get_then_evict(content_hash):
+            result = lookup(content_hash)
+            ocr_module._ocr_cache.clear()
+            return result
+        monkeypatch.setattr(ocr_module, "_cache_get", get_then_evict)
+
+        results = CountingOCRService().process_batch([{"id": "2", "image_data": page}])
+        assert results[0]["text"] == "page-1"
+        assert results[0]["cached"] is True
+
+    def test_mutating_a_result_leaves_cache_intact(self):
+        service = CountingOCRService()
+        raw = base64.b64decode(_png_base64((50, 50), (255, 255, 255)))
+
+        service._ocr_bytes(raw)["text"] = "changed"
+
+        assert service._ocr_bytes(raw)["text"] == "page-1"
+        assert len(service.calls) == 1
@@ -0,0 +1,222 @@
+"""
+Pagination Tests
+Tests for cursor-paginated list queries and the endpoints built on them
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.pagination import fetch_page
+from api.services.audit import AuditLogger
+from api.services import database
+from api.services.database import FeeOperations, IncidentOperations
+from api.routes import students
+from fastapi import Response
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+INCIDENTS = """
+CREATE TABLE incidents (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    title VARCHAR(255),
+    occurred_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+OVERDUE = """
+ALTER TABLE students
+    ADD COLUMN current_grade VARCHAR(50),
+    ADD COLUMN enrollment_status VARCHAR(20) DEFAULT 'active',
+    ADD COLUMN deleted_at TIMESTAMP;
+ALTER TABLE parents
+    ADD COLUMN primary_phone VARCHAR(50),
+    ADD COLUMN whatsapp_number VARCHAR(50),
+    ADD COLUMN email VARCHAR(255),
+    ADD COLUMN preferred_language VARCHAR(20),
+    ADD COLUMN preferred_contact_method VARCHAR(20);
+ALTER TABLE student_fees ADD COLUMN payment_status VARCHAR(20);
+CREATE TABLE student_parent_relationships (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    student_id UUID NOT NULL,
+    parent_id UUID NOT NULL,
+    is_primary_contact BOOLEAN DEFAULT false
+);
+"""
+
+AUDIT_LOGS = """
+CREATE TABLE audit_logs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID,
+    school_id UUID,
+    action VARCHAR(100),
+    resource_type VARCHAR(100),
+    resource_id VARCHAR(255),
+    changes JSONB,
+    ip_address VARCHAR(50),
+    user_agent TEXT,
+    metadata JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def walk(fetch):
+    """Every page of fetch(cursor), as a list of pages of items"""
+    pages, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        pages.append(page["items"])
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return pages
+        cursor = page["next_cursor"]
+
+
+@pytest.fixture
+def incidents(pg):
+    pg.execute_query(INCIDENTS, fetch=False)
+    return IncidentOperations(pg)
+
+
+class TestFetchPage:
+    """Test the shared keyset page query"""
+
+    def test_pages_cover_every_row_once_newest_first(self, pg, incidents, insert):
+        # Rows created in the same instant are told apart by id
+        for title in ("a", "b", "c", "d", "e"):
+            insert("incidents", school_id=SCHOOL, title=title, created_at="2026-10-19 08:00")
+        insert("incidents", school_id=SCHOOL, title="late", created_at="2026-10-19 09:00")
+        insert("incidents", school_id=OTHER_SCHOOL, title="elsewhere")
+
+        pages = walk(lambda cursor: fetch_page(
+            pg, "SELECT * FROM incidents", ["school_id = %s"], [SCHOOL], limit=2, cursor=cursor
+        ))
+
+        assert [len(page) for page in pages] == [2, 2, 2]
+        rows = [row for page in pages for row in page]
+        assert rows[0]["title"] == "late"
+        assert sorted(row["title"] for row in rows[1:]) == ["a", "b", "c", "d", "e"]
+        ids = [str(row["id"]) for row in rows[1:]]
+        assert ids == sorted(ids, reverse=True)
+
+    def test_qualified_keys(self, pg, insert, ids):
+        pg.execute_query(
+            "CREATE TABLE student_canteen_accounts (student_id UUID PRIMARY KEY, balance DECIMAL(12, 2))",
+            fetch=False
+        )
+        for balance in (300, 100, 200):
+            insert("student_canteen_accounts", student_id=ids(), balance=balance)
+
+        pages = walk(lambda cursor: fetch_page(
+            pg, "SELECT sca.student_id, sca.balance FROM student_canteen_accounts sca", [], [],
+            keys=[("sca.balance", False), ("sca.student_id", False)], limit=1, cursor=cursor
+        ))
+
+        assert [page[0]["balance"] for page in pages] == [100, 200, 300]
+
+    def test_invalid_cursor(self, fake_db):
+        with pytest.raises(ValueError):
+            fetch_page(fake_db(), "SELECT * FROM students", [], [], cursor="bogus")
+
+
+class TestListEndpoints:
+    """Test list methods that return pages"""
+
+    def test_incidents_undated_last(self, incidents, insert):
+        insert("incidents", school_id=SCHOOL, title="undated")
+        insert("incidents", school_id=SCHOOL, title="older", occurred_at="2026-10-01 08:00+03")
+        insert("incidents", school_id=SCHOOL, title="newer", occurred_at="2026-10-18 08:00+03")
+
+        pages = walk(lambda cursor: incidents.list_incidents(SCHOOL, limit=1, cursor=cursor))
+
+        assert [page[0]["title"] for page in pages] == ["newer", "older", "undated"]
+        assert "occurred_sort" not in pages[0][0]
+
+    def test_overdue_fees_undated_last(self, pg, core_tables, insert):
+        core_tables("students", "parents", "student_fees")
+        pg.execute_query(OVERDUE, fetch=False)
+        parent = insert("parents", school_id=SCHOOL, first_name="Grace", primary_phone="0772000000")
+        student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("student_parent_relationships", student_id=student, parent_id=parent, is_primary_contact=True)
+        for due in (None, None, "2026-09-01", "2026-08-01"):
+            insert("student_fees", student_id=student, amount_due=1000, balance=1000,
+                   due_date=due, payment_status="overdue")
+        insert("student_fees", student_id=student, amount_due=1000, balance=1000,
+               due_date="2026-07-01", payment_status="paid")
+
+        fees = FeeOperations(pg)
+        pages = walk(lambda cursor: fees.get_overdue_fees(SCHOOL, limit=1, cursor=cursor))
+
+        due_dates = [str(page[0]["due_date"]) for page in pages]
+        assert due_dates == ["2026-08-01", "2026-09-01", "None", "None"]
+        assert pages[0][0]["primary_phone"] == "0772000000"
+
+    def test_overdue_totals_count_the_listed_fees(self, pg, core_tables, insert):
+        core_tables("students", "parents", "student_fees")
+        pg.execute_query(OVERDUE, fetch=False)
+        parent = insert("parents", school_id=SCHOOL, first_name="Grace")
+        listed = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("student_parent_relationships", student_id=listed, parent_id=parent, is_primary_contact=True)
+        # No primary contact, so nobody can be reminded about this fee
+        unreachable = insert("students", school_id=SCHOOL, first_name="Ben", last_name="Ato")
+        insert("student_parent_relationships", student_id=unreachable, parent_id=parent)
+        for student, balance in ((listed, 400), (listed, 600), (unreachable, 5000)):
+            insert("student_fees", student_id=student, amount_due=balance, balance=balance,
+                   payment_status="overdue")
+
+        fees = FeeOperations(pg)
+        listed_fees = fees.get_overdue_fees(SCHOOL)["items"]
+        totals = fees.get_overdue_totals(SCHOOL)
+
+        assert totals["count"] == len(listed_fees) == 2
+        assert totals["total_overdue_amount"] == sum(fee["balance"] for fee in listed_fees) == 1000
+
+    def test_audit_trail(self, pg, insert, ids, make_service):
+        pg.execute_query(AUDIT_LOGS, fetch=False)
+        user = ids()
+        insert("audit_logs", school_id=SCHOOL, user_id=user, action="login", resource_type="user",
+               changes=json.dumps({"x": 1}), metadata=json.dumps({"k": "v"}))
+        insert("audit_logs", school_id=SCHOOL, user_id=user, action="logout", resource_type="user")
+        insert("audit_logs", school_id=SCHOOL, action="login", created_at="2020-01-01")
+
+        result = make_service(AuditLogger, pg).get_audit_trail(SCHOOL, action="login", limit=20)
+
+        assert len(result["items"]) == 1
+        item = result["items"][0]
+        assert (item["changes"], item["metadata"]) == ({"x": 1}, {"k": "v"})
+        assert isinstance(item["created_at"], str)
+
+
+class TestListStudentsRoute:
+    """Test GET /api/students keeps its list response"""
+
+    def test_list_body_with_cursor_headers(self, pg, monkeypatch, core_tables, insert):
+        core_tables("students")
+        for day, name in enumerate(("Ann", "Ben", "Cal"), start=1):
+            insert("students", school_id=SCHOOL, first_name=name, last_name="Ato", class_name="P5",
+                   created_at=f"2026-01-0{day}")
+        # The route closes its own pool; the fixture closes this one
+        monkeypatch.setattr(pg, "close_all_connections", lambda: None)
+        monkeypatch.setattr(database, "DatabaseManager", lambda: pg)
+
+        response = Response()
+        first = asyncio.run(students.list_students(response, school_id=SCHOOL, current_class="P5", limit=2))
+        assert [row["first_name"] for row in first] == ["Cal", "Ben"]
+        assert response.headers["X-Has-More"] == "true"
+
+        rest = Response()
+        second = asyncio.run(students.list_students(
+            rest, school_id=SCHOOL, current_class="P5", limit=2, cursor=response.headers["X-Next-Cursor"]
+        ))
+        assert [row["first_name"] for row in second] == ["Ann"]
+        assert rest.headers["X-Has-More"] == "false"
+        assert "X-Next-Cursor" not in rest.headers
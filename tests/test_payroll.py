@@ -0,0 +1,102 @@
+"""
+Payroll Tests
+Tests for the whole-school payroll run
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.payroll import PayrollService
+from api.services.tax_engine import get_tax_engine
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+SCHEMA = """
+CREATE TABLE staff_salaries (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    staff_id UUID,
+    gross_salary DECIMAL(15, 2) NOT NULL
+);
+CREATE TABLE payroll_transactions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    staff_id UUID NOT NULL,
+    month VARCHAR(20) NOT NULL,
+    year INTEGER NOT NULL,
+    gross_salary DECIMAL(15, 2),
+    bonus DECIMAL(15, 2) DEFAULT 0,
+    deductions DECIMAL(15, 2) DEFAULT 0,
+    deduction_reason TEXT,
+    paye_tax DECIMAL(15, 2),
+    nssf DECIMAL(15, 2),
+    net_salary DECIMAL(15, 2),
+    payment_status VARCHAR(20) DEFAULT 'pending'
+);
+"""
+
+
+@pytest.fixture
+def payroll(pg, make_service):
+    pg.execute_query(SCHEMA, fetch=False)
+    return make_service(PayrollService, pg, school_id=SCHOOL)
+
+
+def payslips(pg):
+    rows = pg.execute_query(
+        "SELECT staff_id, bonus, deductions, deduction_reason, paye_tax, nssf, net_salary FROM payroll_transactions"
+    )
+    return {str(row.pop("staff_id")): row for row in rows}
+
+
+class TestRunPayroll:
+    """Test run_payroll"""
+
+    def test_every_staff_member_paid(self, pg, payroll, insert, ids):
+        t1, t2 = ids(), ids()
+        insert("staff_salaries", school_id=SCHOOL, staff_id=t1, gross_salary=1000000)
+        insert("staff_salaries", school_id=SCHOOL, staff_id=t2, gross_salary=300000)
+        insert("staff_salaries", school_id=SCHOOL, gross_salary=300000)
+        insert("staff_salaries", school_id=OTHER_SCHOOL, staff_id=ids(), gross_salary=300000)
+
+        result = payroll.run_payroll(
+            "October", 2026, bonuses={t1: 200000}, deductions={t2: 5000}, deduction_reasons={t2: "Loan"}
+        )
+
+        assert result["staff_processed"] == 2
+        assert result["summary"]["staff_count"] == 2
+        slips = payslips(pg)
+        assert set(slips) == {t1, t2}
+        assert (slips[t1]["bonus"], slips[t2]["deductions"], slips[t2]["deduction_reason"]) == (200000, 5000, "Loan")
+
+    def test_amounts_match_single_staff_processing(self, pg, payroll, insert, ids):
+        engine = get_tax_engine()
+        t1 = ids()
+        insert("staff_salaries", school_id=SCHOOL, staff_id=t1, gross_salary=1000000)
+
+        payroll.run_payroll("October", 2026, bonuses={t1: 200000}, deductions={t1: 10000})
+
+        slip = payslips(pg)[t1]
+        # Same arithmetic as process_payroll: bonus taxed, NSSF on gross only
+        paye = engine.calculate_paye(1200000)
+        nssf = engine.calculate_nssf(1000000)["employee"]
+        assert float(slip["paye_tax"]) == pytest.approx(paye, abs=0.01)
+        assert float(slip["nssf"]) == pytest.approx(nssf, abs=0.01)
+        assert float(slip["net_salary"]) == pytest.approx(1200000 - paye - nssf - 10000, abs=0.01)
+
+    def test_rerun_only_pays_new_staff(self, pg, payroll, insert, ids):
+        insert("staff_salaries", school_id=SCHOOL, staff_id=ids(), gross_salary=1000000)
+        payroll.run_payroll("October", 2026)
+        late = ids()
+        insert("staff_salaries", school_id=SCHOOL, staff_id=late, gross_salary=300000)
+
+        result = payroll.run_payroll("October", 2026)
+
+        assert result["staff_processed"] == 1
+        assert result["summary"]["staff_count"] == 2
+        assert payroll.run_payroll("October", 2026)["staff_processed"] == 0
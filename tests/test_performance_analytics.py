@@ -0,0 +1,125 @@
+"""
+Performance Analytics Tests
+Tests for the local per-subject summary and its cache
+"""
+import sys
+import os
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.performance_analytics import PerformanceAnalyticsService, summarize_performance
+
+
+def _rows(subject, percentages, class_mean=None, class_std=None, class_size=0):
+    start = date(2025, 1, 1)
+    return [
+        {"subject": subject, "date": start + timedelta(days=7 * i), "max_marks": 100,
+         "marks_obtained": pct, "percentage": pct,
+         "class_mean": class_mean, "class_std": class_std, "class_size": class_size}
+        for i, pct in enumerate(percentages)
+    ]
+
+
+class TestSummary:
+    """Test per-subject statistics and flags"""
+
+    def test_declining_subject_below_class_is_at_risk(self):
+        rows = _rows("Maths", [70, 60, 50, 40], class_mean=70, class_std=10, class_size=30)
+        rows += _rows("English", [75, 78, 80, 82], class_mean=70, class_std=10, class_size=30)
+        rows.sort(key=lambda r: r["date"])
+
+        summary = summarize_performance(rows)
+        maths = next(s for s in summary["subjects"] if s["subject"] == "Maths")
+
+        assert maths["slope"] == -10.0
+        assert maths["moving_average"] == 50.0
+        assert maths["z_score"] == -1.5
+        assert maths["flags"] == ["declining", "below_class"]
+        assert summary["at_risk_subjects"] == ["Maths"]
+        assert summary["assessments"] == 8
+
+    def test_overall_trend_matches_first_vs_last_five(self):
+        summary = summarize_performance(_rows("Maths", [40, 40, 40, 40, 40, 60, 60, 60, 60, 60]))
+        assert summary["trend"] == "improving"
+
+        assert summarize_performance(_rows("Maths", [50, 60]))["trend"] == "insufficient_data"
+
+    def test_no_class_spread_gives_no_z_score(self):
+        summary = summarize_performance(_rows("Maths", [80], class_mean=80, class_std=0, class_size=1))
+        assert summary["subjects"][0]["z_score"] is None
+        assert summary["at_risk"] is False
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+SCHEMA = """
+CREATE TABLE assessments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    subject VARCHAR(100),
+    class_name VARCHAR(50),
+    date DATE,
+    max_marks DECIMAL(5, 2)
+);
+CREATE TABLE assessment_results (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    assessment_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    marks_obtained DECIMAL(5, 2),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def analytics(pg, make_service):
+    pg.execute_query(SCHEMA, fetch=False)
+    PerformanceAnalyticsService.invalidate()
+    yield make_service(PerformanceAnalyticsService, pg, school_id=SCHOOL, ttl_seconds=3600)
+    PerformanceAnalyticsService.invalidate()
+
+
+@pytest.fixture
+def maths_class(insert, ids):
+    """Four weekly P5 Maths tests: the student falls 70 -> 40, two classmates hold 70 and 90"""
+    student, peers = ids(), [ids(), ids()]
+    tests = []
+    for week, mark in enumerate([70, 60, 50, 40]):
+        test = insert("assessments", school_id=SCHOOL, subject="Maths", class_name="P5",
+                      date=date.today() - timedelta(days=7 * (4 - week)), max_marks=100)
+        insert("assessment_results", assessment_id=test, student_id=student, marks_obtained=mark)
+        insert("assessment_results", assessment_id=test, student_id=peers[0], marks_obtained=70)
+        insert("assessment_results", assessment_id=test, student_id=peers[1], marks_obtained=90)
+        tests.append(test)
+    return student, peers, tests
+
+
+class TestStudentSummary:
+    """Test the results query and the cache around it"""
+
+    def test_compared_with_classmates(self, analytics, maths_class):
+        student, _, _ = maths_class
+
+        rows, summary = analytics.get_student_analytics(student)
+
+        maths = summary["subjects"][0]
+        assert [float(row["percentage"]) for row in rows] == [70, 60, 50, 40]
+        # Class averages 55, 70 and 90: mean 71.67, population std 14.34
+        assert maths["z_score"] == pytest.approx((55 - 71.667) / 14.337, abs=0.01)
+        assert maths["flags"] == ["declining", "below_class"]
+        assert summary["at_risk_subjects"] == ["Maths"]
+
+    def test_recomputed_only_when_marks_change(self, pg, analytics, maths_class, insert):
+        student, peers, tests = maths_class
+        first = analytics.get_student_summary(student)
+
+        # A classmate's mark is not part of the student's fingerprint
+        pg.execute_query("UPDATE assessment_results SET marks_obtained = 10 WHERE student_id = %s",
+                         (peers[1],), fetch=False)
+        assert analytics.get_student_summary(student) == first
+
+        insert("assessment_results", assessment_id=tests[0], student_id=student, marks_obtained=100)
+        assert analytics.get_student_summary(student)["assessments"] == 5
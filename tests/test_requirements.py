@@ -0,0 +1,115 @@
+"""
+Requirements Tests
+Tests for the set-based class submission of school requirements
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.requirements import SchoolRequirementsService
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+SCHEMA = """
+CREATE TABLE school_requirements (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    name VARCHAR(255),
+    requirement_type VARCHAR(50) NOT NULL
+);
+CREATE TABLE student_requirement_submissions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    requirement_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    quantity_submitted INTEGER,
+    amount_paid DECIMAL(15,2),
+    submission_date DATE,
+    payment_date DATE,
+    verified BOOLEAN DEFAULT false,
+    verified_by UUID,
+    verified_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (requirement_id, student_id)
+);
+"""
+
+
+@pytest.fixture
+def requirements(pg, core_tables, make_service):
+    core_tables("students")
+    pg.execute_query(SCHEMA, fetch=False)
+    return make_service(SchoolRequirementsService, pg, school_id=SCHOOL)
+
+
+def submissions(pg):
+    rows = pg.execute_query(
+        "SELECT student_id, quantity_submitted, verified FROM student_requirement_submissions"
+    )
+    return {str(row["student_id"]): (row["quantity_submitted"], row["verified"]) for row in rows}
+
+
+class TestBulkSubmitForClass:
+    """Test bulk_submit_for_class"""
+
+    def test_whole_class_minus_exclusions(self, pg, requirements, insert):
+        req = insert("school_requirements", school_id=SCHOOL, name="Toilet paper", requirement_type="item")
+        ann, ben, cal = (
+            insert("students", school_id=SCHOOL, first_name=name, last_name="Ato", class_name="P5")
+            for name in ("Ann", "Ben", "Cal")
+        )
+        insert("students", school_id=SCHOOL, first_name="Dan", last_name="Ato", class_name="P5", status="left")
+        insert("students", school_id=SCHOOL, first_name="Eve", last_name="Ato", class_name="P6")
+        insert("students", school_id=OTHER_SCHOOL, first_name="Fay", last_name="Obu", class_name="P5")
+
+        result = requirements.bulk_submit_for_class(req, "P5", quantity_submitted=2, exclude_students=[cal])
+
+        assert result["success"] is True
+        assert (result["total_students"], result["new_submissions"], result["updated_submissions"]) == (2, 2, 0)
+        assert submissions(pg) == {ann: (2, False), ben: (2, False)}
+
+    def test_rerun_updates_and_keeps_earlier_values(self, pg, requirements, insert):
+        req = insert("school_requirements", school_id=SCHOOL, name="Toilet paper", requirement_type="item")
+        ann = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato", class_name="P5")
+        requirements.bulk_submit_for_class(req, "P5", quantity_submitted=2)
+
+        result = requirements.bulk_submit_for_class(req, "P5")
+
+        assert (result["new_submissions"], result["updated_submissions"]) == (0, 1)
+        assert submissions(pg) == {ann: (2, False)}
+
+    def test_payment_auto_verifies_fee_requirements(self, pg, requirements, insert):
+        fee = insert("school_requirements", school_id=SCHOOL, name="Trip", requirement_type="fee")
+        item = insert("school_requirements", school_id=SCHOOL, name="Broom", requirement_type="item")
+        ann = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato", class_name="P5")
+
+        paid_fee = requirements.bulk_submit_for_class(fee, "P5", amount_paid=5000)
+        paid_item = requirements.bulk_submit_for_class(item, "P5", amount_paid=5000)
+
+        assert paid_fee["verified_count"] == 1
+        assert paid_item["verified_count"] == 0
+        verified = pg.execute_query(
+            "SELECT requirement_id FROM student_requirement_submissions WHERE verified AND student_id = %s",
+            (ann,)
+        )
+        assert [str(row["requirement_id"]) for row in verified] == [fee]
+
+    def test_other_schools_requirement_not_found(self, requirements, insert):
+        req = insert("school_requirements", school_id=OTHER_SCHOOL, name="Trip", requirement_type="fee")
+
+        assert requirements.bulk_submit_for_class(req, "P5") == {
+            "success": False, "error": "Requirement not found"
+        }
+
+    def test_empty_class_still_succeeds(self, requirements, insert):
+        req = insert("school_requirements", school_id=SCHOOL, name="Trip", requirement_type="fee")
+
+        result = requirements.bulk_submit_for_class(req, "P7")
+
+        assert result["success"] is True
+        assert result["submitted_count"] == 0
@@ -0,0 +1,80 @@
+"""
+Roster Matcher Tests
+Tests for resolving OCR'd names against a class roster
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.roster_matcher import RosterIndex, edit_distance, name_tokens
+
+
+ROSTER = [
+    {"id": "s1", "first_name": "John", "last_name": "Okello"},
+    {"id": "s2", "first_name": "John", "last_name": "Mukasa"},
+    {"id": "s3", "first_name": "Mary", "last_name": "Nakato"},
+    {"id": "s4", "first_name": "Peter", "last_name": "Ssemwogerere"},
+    {"id": "s5", "first_name": "Aisha", "last_name": "Nambi"},
+]
+
+
+def matched_id(result):
+    return result["student"]["id"] if result["status"] == "matched" else None
+
+
+class TestHelpers:
+    """Test normalisation and distance"""
+
+    def test_name_tokens(self):
+        assert name_tokens("  Ólívia  O'Brien-Kato ") == ["olivia", "o", "brien", "kato"]
+
+    def test_edit_distance(self):
+        assert edit_distance("nakato", "nakat0") == 1
+        assert edit_distance("", "abc") == 3
+
+
+class TestMatch:
+    """Test single-name resolution"""
+
+    def setup_method(self):
+        self.roster = RosterIndex(ROSTER)
+
+    def test_exact_and_reordered(self):
+        assert matched_id(self.roster.match("John Okello")) == "s1"
+        assert matched_id(self.roster.match("OKELLO, john")) == "s1"
+
+    def test_ocr_misread(self):
+        assert matched_id(self.roster.match("Mary Nakat0")) == "s3"
+        assert matched_id(self.roster.match("Peter Ssemwogerer")) == "s4"
+
+    def test_initial(self):
+        assert matched_id(self.roster.match("A. Nambi")) == "s5"
+
+    def test_partial_name_is_ambiguous(self):
+        result = self.roster.match("John")
+        assert result["status"] == "ambiguous"
+        assert {c["student_id"] for c in result["candidates"]} == {"s1", "s2"}
+
+    def test_unique_partial_name(self):
+        assert matched_id(self.roster.match("Nakato")) == "s3"
+
+    def test_unmatched(self):
+        assert self.roster.match("Zawadi Achieng")["status"] == "unmatched"
+        assert self.roster.match("")["status"] == "unmatched"
+
+
+class TestResolve:
+    """Test resolving a whole sheet"""
+
+    def test_rows_resolving_to_same_student_are_ambiguous(self):
+        results = RosterIndex(ROSTER).resolve(["John Okello", "Mary Nakato", "J Okello"])
+        assert [r["status"] for r in results] == ["ambiguous", "matched", "ambiguous"]
+        assert results[0]["candidates"][0]["student_id"] == "s1"
+
+    def test_load_uses_one_query(self, fake_db):
+        db = fake_db(ROSTER)
+
+        roster = RosterIndex.load(db, "school-1", "P5")
+        assert len(db.calls) == 1
+        assert matched_id(roster.match("Aisha Nambi")) == "s5"
@@ -0,0 +1,185 @@
+"""
+Student Summary Tests
+Tests for batched dashboard summaries, the triggers that maintain them and
+the daily window rebase
+"""
+import sys
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services import multi_school
+from api.services.multi_school import MultiSchoolService
+from api.services.student_summary import StudentSummaryService, attendance_stats
+
+
+def two_schools(query, params):
+    """respond= for fake_db: two schools with three children each"""
+    if "FROM user_school_access" in query:
+        return [
+            {"school_id": f"school-{n}", "school_name": f"School {n}", "role": "parent",
+             "brand_name": None}
+            for n in range(2)
+        ]
+    if "FROM parent_children_global" in query:
+        return [
+            {"school_id": f"school-{n}", "id": f"child-{n}-{c}", "first_name": "A", "last_name": "B",
+             "class_name": "P5", "admission_number": f"{n}{c}", "photo_url": None,
+             "relationship": "mother", "is_primary": True}
+            for n in range(2) for c in range(3)
+        ]
+    if "student_summaries" in query:
+        return [
+            {"student_id": student_id, "fee_balance": Decimal("1000"), "last_attendance_date": date.today(),
+             "last_attendance_status": "present"}
+            for student_id in params["student_ids"]
+        ]
+    return []
+
+
+class TestAttendanceStats:
+    """Test rate computation from summary counters"""
+
+    def test_rate_and_excused(self):
+        result = attendance_stats({"present_30d": 18, "absent_30d": 1, "late_30d": 1, "excused_30d": 2})
+
+        assert result["stats"] == {"present": 18, "absent": 1, "late": 1, "excused": 2}
+        assert result["attendance_rate"] == 90.0
+
+    def test_no_attendance(self):
+        assert attendance_stats({})["attendance_rate"] == 0
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+ATTENDANCE = """
+CREATE TABLE attendance (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    UNIQUE (student_id, date)
+);
+"""
+
+
+@pytest.fixture
+def tables(pg, core_tables, migration):
+    """Students, attendance, fees and the fee balance ledger, before migration 018"""
+    core_tables("students", "student_fees")
+    pg.execute_query(ATTENDANCE, fetch=False)
+    migration("017_report_snapshots", until="REPORT SNAPSHOTS")
+    migration("019_fee_balance_ledger")
+    return lambda: migration("018_student_summaries")
+
+
+@pytest.fixture
+def summaries(pg, make_service):
+    return make_service(StudentSummaryService, pg)
+
+
+def days_ago(days):
+    return date.today() - timedelta(days=days)
+
+
+def counters(pg, student):
+    return pg.execute_query(
+        """
+        SELECT present_30d, absent_30d, late_30d, attendance_as_of, last_attendance_status
+        FROM student_summaries WHERE student_id = %s
+        """,
+        (student,)
+    )[0]
+
+
+class TestSummaryRows:
+    """Test that rows are seeded and maintained by writes, never by reads"""
+
+    def test_migration_backfills_existing_students(self, pg, tables, insert):
+        student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("attendance", school_id=SCHOOL, student_id=student, date=days_ago(40), status="present")
+        insert("attendance", school_id=SCHOOL, student_id=student, date=days_ago(3), status="late")
+
+        tables()
+
+        row = counters(pg, student)
+        assert (row["present_30d"], row["late_30d"], row["last_attendance_status"]) == (0, 1, "late")
+
+    def test_new_students_and_attendance_flow_in(self, pg, tables, insert):
+        tables()
+        student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("attendance", school_id=SCHOOL, student_id=student, date=days_ago(1), status="present")
+        insert("attendance", school_id=SCHOOL, student_id=student, date=date.today(), status="absent")
+
+        assert (counters(pg, student)["present_30d"], counters(pg, student)["absent_30d"]) == (1, 1)
+
+    def test_reads_do_not_write(self, pg, tables, summaries, insert):
+        tables()
+        student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("student_fees", student_id=student, amount_due=100000, balance=60000)
+        pg.execute_query(
+            "UPDATE student_summaries SET attendance_as_of = CURRENT_DATE - 3, updated_at = '2020-01-01'",
+            fetch=False
+        )
+        missing = insert("students", school_id=SCHOOL, first_name="Ben", last_name="Ato")
+        pg.execute_query("DELETE FROM student_summaries WHERE student_id = %s", (missing,), fetch=False)
+
+        result = summaries.get_summaries([student, missing])
+
+        assert list(result) == [student]
+        assert result[student]["fee_balance"] == Decimal("60000")
+        rows = pg.execute_query("SELECT attendance_as_of, updated_at FROM student_summaries")
+        assert [(row["attendance_as_of"], str(row["updated_at"])[:10]) for row in rows] == [
+            (days_ago(3), "2020-01-01")
+        ]
+
+
+class TestRefresh:
+    """Test the daily rebase of the 30-day window"""
+
+    def test_days_that_left_the_window_are_taken_away(self, pg, tables, summaries, insert):
+        tables()
+        student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        pg.execute_query("UPDATE student_summaries SET attendance_as_of = CURRENT_DATE - 5", fetch=False)
+        # Both count against the old window (from 35 days ago)
+        insert("attendance", school_id=SCHOOL, student_id=student, date=days_ago(32), status="present")
+        insert("attendance", school_id=SCHOOL, student_id=student, date=days_ago(2), status="absent")
+        assert (counters(pg, student)["present_30d"], counters(pg, student)["absent_30d"]) == (1, 1)
+
+        assert summaries.refresh(SCHOOL) == {"school_id": SCHOOL, "created": 0, "rebased": 1}
+
+        row = counters(pg, student)
+        assert (row["present_30d"], row["absent_30d"], row["attendance_as_of"]) == (0, 1, date.today())
+        assert summaries.refresh(SCHOOL)["rebased"] == 0
+
+    def test_missing_rows_are_created(self, pg, tables, summaries, insert):
+        tables()
+        student = insert("students", school_id=SCHOOL, first_name="Ann", last_name="Ato")
+        insert("attendance", school_id=SCHOOL, student_id=student, date=days_ago(1), status="present")
+        pg.execute_query("DELETE FROM student_summaries", fetch=False)
+
+        assert summaries.refresh(SCHOOL)["created"] == 1
+        assert counters(pg, student)["present_30d"] == 1
+
+
+class TestCombinedDashboard:
+    """Test that the cross-school dashboard costs a fixed number of queries"""
+
+    def test_constant_queries_across_schools(self, monkeypatch, fake_db, make_service):
+        db = fake_db(respond=two_schools)
+        summaries = make_service(StudentSummaryService, db)
+        monkeypatch.setattr(multi_school, "get_student_summary_service", lambda: summaries)
+
+        service = make_service(MultiSchoolService, db, user_id="user-1")
+
+        dashboard = service.get_combined_dashboard()
+
+        assert len(db.calls) == 5
+        assert sum(len(s["children"]) for s in dashboard["schools"]) == 6
+        assert dashboard["total_fee_balance"] == 6000
+        assert dashboard["schools"][0]["children"][0]["attendance_today"] == "present"
@@ -0,0 +1,58 @@
+"""
+Tax Engine Tests
+Tests for the compiled PAYE bracket tables and the batch APIs
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.tax_engine import TaxEngine
+
+
+class TestPaye:
+    """Test PAYE band lookup"""
+
+    @pytest.mark.parametrize("income,expected", [
+        (0, 0.0),
+        (235000, 0.0),
+        (335000, 10000.0),
+        (410000, 25000.0),
+        (1000000, 202000.0),
+        (10000000, 2902000.0),
+        (12000000, 3702000.0),
+    ])
+    def test_band_edges(self, income, expected):
+        assert TaxEngine().calculate_paye(income) == pytest.approx(expected)
+
+    def test_many_matches_single(self):
+        engine = TaxEngine()
+        incomes = [0, 200000, 300000, 400000, 2500000, 15000000]
+
+        assert engine.calculate_paye_many(incomes) == [engine.calculate_paye(i) for i in incomes]
+
+    def test_custom_bands_compiled_from_config(self):
+        engine = TaxEngine({
+            "paye_bands": [
+                {"threshold": 100, "rate": 0.0},
+                {"threshold": float('inf'), "rate": 0.5},
+            ],
+            "nssf": {"employee_rate": 0.0, "employer_rate": 0.0},
+        })
+
+        assert engine.calculate_paye(300) == pytest.approx(100.0)
+
+
+class TestNetSalary:
+    """Test batch net salary"""
+
+    def test_many_matches_single(self):
+        engine = TaxEngine()
+        grosses = [300000, 800000]
+
+        batch = engine.calculate_net_salary_many(grosses, deductions=[0, 5000])
+
+        assert batch[0] == engine.calculate_net_salary(300000)
+        assert batch[1] == engine.calculate_net_salary(800000, deductions=5000)
@@ -0,0 +1,131 @@
+"""
+Text Search Tests
+Tests for keyset cursors and the trigram search query builder
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.pagination import (
+    build_page, decode_cursor, encode_cursor, keyset_condition, page_size
+)
+from api.services.text_search import TextSearch, like_escape
+
+
+class TestPagination:
+    """Test cursors and keyset conditions"""
+
+    def test_cursor_round_trip(self):
+        token = encode_cursor(["2026-10-19 08:00:00", "b1", 3])
+        assert "=" not in token
+        assert decode_cursor(token, 3) == ["2026-10-19 08:00:00", "b1", 3]
+
+    def test_invalid_cursor(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor!", 2)
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(["a"]), 2)
+
+    def test_same_direction_uses_row_comparison(self):
+        sql, params = keyset_condition([("created_at", True), ("id", True)], ["t", "x"])
+        assert sql == "(created_at, id) < (%s, %s)"
+        assert params == ["t", "x"]
+
+    def test_mixed_directions_expand(self):
+        sql, params = keyset_condition([("year", True), ("id", False)], [2020, "x"])
+        assert sql == "((year < %s) OR (year = %s AND id > %s))"
+        assert params == [2020, 2020, "x"]
+
+    def test_build_page(self):
+        rows = [{"id": i} for i in range(3)]
+        page = build_page(rows, 2, lambda row: [row["id"]])
+        assert [r["id"] for r in page["items"]] == [0, 1]
+        assert decode_cursor(page["next_cursor"], 1) == [1]
+        assert build_page(rows, 5, lambda row: [row["id"]])["next_cursor"] is None
+
+    def test_page_size_clamped(self):
+        assert page_size(None) == 50
+        assert page_size(10_000) == 200
+        assert page_size(-3) == 1
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+OTHER_SCHOOL = "00000000-0000-0000-0000-00000000000b"
+
+SCHEMA = """
+CREATE TABLE library_books (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    author VARCHAR(255),
+    available_copies INTEGER DEFAULT 1
+);
+"""
+
+ENGINE = TextSearch(
+    table="library_books",
+    columns="id, title",
+    fields=[("title", 1.0), ("author", 0.8)],
+    browse_order=[("title", False)]
+)
+
+
+@pytest.fixture
+def books(pg, insert):
+    """Add books to library_books, returning their ids by title"""
+    pg.execute_query(SCHEMA, fetch=False)
+
+    def add(*titles, school_id=SCHOOL, **columns):
+        return {title: insert("library_books", school_id=school_id, title=title, **columns) for title in titles}
+    return add
+
+
+def titles(page):
+    return [item["title"] for item in page["items"]]
+
+
+class TestTextSearch:
+    """Test searching and paging real rows"""
+
+    def test_like_escape(self):
+        assert like_escape("50%_off\\") == "50\\%\\_off\\\\"
+
+    def test_term_ranks_prefix_matches_first(self, trigram, books):
+        books("Applied Mathematics", "Mathematics for P7", "Biology")
+        books("Mathematics for P7", school_id=OTHER_SCHOOL)
+
+        page = ENGINE.search(trigram, SCHOOL, term="math", limit=1)
+
+        assert titles(page) == ["Mathematics for P7"]
+        assert page["items"][0]["search_rank"] > 0
+        assert page["has_more"] is True
+        rest = ENGINE.search(trigram, SCHOOL, term="math", cursor=page["next_cursor"])
+        assert titles(rest) == ["Applied Mathematics"]
+        assert rest["has_more"] is False
+
+    def test_short_term_matches_prefix_only(self, trigram, books):
+        books("Mathematics for P7", "Applied Mathematics")
+        books("Biology", author="Mark Otim")
+
+        assert sorted(titles(ENGINE.search(trigram, SCHOOL, term="ma"))) == ["Biology", "Mathematics for P7"]
+
+    def test_wildcards_match_literally(self, trigram, books):
+        books("5% Rule", "500 Questions")
+
+        assert titles(ENGINE.search(trigram, SCHOOL, term="5%")) == ["5% Rule"]
+
+    def test_browse_with_cursor_and_filter(self, pg, books):
+        books("Chemistry", "Biology", "Physics")
+        books("Algebra", available_copies=0)
+
+        first = ENGINE.search(pg, SCHOOL, conditions=[("available_copies > %s", (0,))], limit=2)
+        rest = ENGINE.search(
+            pg, SCHOOL, conditions=[("available_copies > %s", (0,))], cursor=first["next_cursor"]
+        )
+
+        assert titles(first) == ["Biology", "Chemistry"]
+        assert titles(rest) == ["Physics"]
+        assert "_k0" not in first["items"][0]
@@ -0,0 +1,143 @@
+"""
+Translation Tests
+Tests for batch translation, message templates and translated broadcasts
+"""
+import sys
+import os
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services import translation
+from api.services.translation import TranslationService
+from api.services.bulk_operations import BulkOperationsService
+from api.routes.translation import BatchTranslationRequest, MAX_BATCH_TEXTS
+
+
+SCHEMA = """
+CREATE TABLE translations (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    text_key VARCHAR(64) NOT NULL,
+    source_language VARCHAR(10) NOT NULL,
+    target_language VARCHAR(10) NOT NULL,
+    source_text TEXT,
+    translated_text TEXT,
+    translation_service VARCHAR(50),
+    confidence_score DECIMAL(3, 2),
+    UNIQUE (text_key, source_language, target_language)
+);
+"""
+
+
+class NoDB:
+    def execute_query(self, *args, **kwargs):
+        raise AssertionError("unexpected query")
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    translation._translation_cache.clear()
+    yield
+    translation._translation_cache.clear()
+
+
+class TestTranslateMany:
+    """Test batch resolution"""
+
+    def test_misses_resolved_and_stored(self, pg, make_service):
+        pg.execute_query(SCHEMA, fetch=False)
+        service = make_service(TranslationService, pg)
+
+        result = service.translate_many(["present today", "absent today", "present today", "see me"], "lg")
+
+        assert result["present today"] == "ali wano leero"
+        assert result["absent today"] == "tali wano leero"
+        assert result["see me"].endswith("(Translation to lg pending)")
+        stored = pg.execute_query("SELECT source_text FROM translations ORDER BY source_text")
+        assert [row["source_text"] for row in stored] == ["absent today", "present today"]
+
+    def test_stored_translations_read_back(self, pg, make_service):
+        pg.execute_query(SCHEMA, fetch=False)
+        make_service(TranslationService, pg).translate_many(["present today"], "sw")
+        translation._translation_cache.clear()
+        pg.execute_query("UPDATE translations SET translated_text = 'yupo leo (imehaririwa)'", fetch=False)
+
+        assert make_service(TranslationService, pg).translate_many(["present today"], "sw") == {
+            "present today": "yupo leo (imehaririwa)"
+        }
+
+    def test_second_batch_served_from_memory(self, fake_db, make_service):
+        service = make_service(TranslationService, fake_db())
+        service.translate_many(["present today"], "sw")
+
+        service.db = NoDB()
+        assert service.translate_many(["present today"], "sw") == {"present today": "yupo leo"}
+
+    def test_keep_untranslated(self, fake_db, make_service):
+        service = make_service(TranslationService, fake_db())
+        assert service.translate_many(["see me"], "lg", keep_untranslated=True) == {"see me": "see me"}
+
+    def test_batch_request_is_capped(self):
+        with pytest.raises(ValidationError):
+            BatchTranslationRequest(texts=["x"] * (MAX_BATCH_TEXTS + 1), target_language="lg")
+
+
+class TestTemplates:
+    """Test pre-translated message templates"""
+
+    def test_templates_never_touch_db(self, make_service):
+        service = make_service(TranslationService, NoDB())
+        assert service.get_attendance_message("Ann", "present", "sw") == "Ann yupo shuleni leo"
+        assert service.get_attendance_message("Ben", "absent", "sw") == "Ben hayupo shuleni leo"
+        assert service.get_attendance_message("Ben", "late", "sw") == ""
+        assert service.get_fee_message("Ann", 50000, "fr") == "Fee balance for Ann: 50,000 UGX"
+
+    def test_language_code(self):
+        assert TranslationService.language_code("Luganda") == "lg"
+        assert TranslationService.language_code(None) == "en"
+        assert TranslationService.language_code("sw") == "sw"
+
+
+class RecordingNotifications:
+    def __init__(self):
+        self.sent = []
+
+    async def send_notification(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+class CountingTranslations(TranslationService):
+    def __init__(self, db):
+        self.db = db
+        self.batches = []
+
+    def translate_many(self, texts, target_language, source_language='en', keep_untranslated=False):
+        self.batches.append(target_language)
+        return super().translate_many(texts, target_language, source_language, keep_untranslated)
+
+
+class TestBroadcast:
+    """Test send_bulk_message localisation"""
+
+    def test_translated_once_per_language(self, fake_db, make_service):
+        parents = [
+            {"id": "p1", "first_name": "A", "last_name": "X", "preferred_language": "lg"},
+            {"id": "p2", "first_name": "B", "last_name": "Y", "preferred_language": "Luganda"},
+            {"id": "p3", "first_name": "C", "last_name": "Z", "preferred_language": "English"},
+        ]
+        service = make_service(
+            BulkOperationsService, fake_db(respond=lambda query, params: parents),
+            notification_service=RecordingNotifications(),
+            translation_service=CountingTranslations(fake_db())
+        )
+
+        result = asyncio.run(service.send_bulk_message("all_parents", "welcome", "school fees"))
+
+        assert result["recipients"] == 3
+        assert sorted(service.translation_service.batches) == ["en", "lg"]
+        messages = {sent["recipient_id"]: (sent["title"], sent["message"]) for sent in service.notification_service.sent}
+        assert messages["p1"] == messages["p2"] == ("tukusanyukidde", "essomero ebisale")
+        assert messages["p3"] == ("welcome", "school fees")
@@ -0,0 +1,203 @@
+"""
+UNEB Results Tests
+Tests for results-file parsing and grade scoring
+"""
+import sys
+import os
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services import uneb as uneb_module
+from api.services.uneb import UNEBService
+
+
+class OfflineUNEBService(UNEBService):
+    """UNEBService without a database; grade maps come from the module cache"""
+
+    def __init__(self):
+        self.school_id = "school-1"
+        self.db = None
+
+
+class TestResultsFile:
+    """Test CSV / JSON results parsing"""
+
+    def test_csv_subject_columns(self):
+        content = (
+            "Index No,Candidate Name,English,Mathematics\n"
+            "001/0001,Nakato Mary,d1,C3\n"
+            "001/0002,Okello John,P7,\n"
+        ).encode()
+
+        candidates = UNEBService.parse_results_file(content, "results.csv")
+
+        assert candidates == [
+            {"index_number": "001/0001", "student_id": None,
+             "subject_results": {"English": "D1", "Mathematics": "C3"}},
+            {"index_number": "001/0002", "student_id": None,
+             "subject_results": {"English": "P7"}},
+        ]
+
+    def test_json_nested_subject_results(self):
+        content = '{"results": [{"index_number": "001/0001", "subject_results": {"English": "D2"}}]}'
+
+        candidates = UNEBService.parse_results_file(content, "results.json")
+
+        assert candidates[0]["subject_results"] == {"English": "D2"}
+
+
+class TestScoring:
+    """Test aggregate, division and grade counts"""
+
+    def setup_method(self):
+        uneb_module._grade_maps['PLE'] = (time.monotonic(), {
+            f"{prefix}{n}": {"points": n, "description": None}
+            for n, prefix in zip(range(1, 10), ["D", "D", "C", "C", "C", "C", "P", "P", "F"])
+        })
+
+    def teardown_method(self):
+        uneb_module._grade_maps.clear()
+
+    def test_ple_division_one(self):
+        aggregate, division, counts = OfflineUNEBService()._score(
+            'PLE', {"English": "D1", "Math": "D2", "Science": "C3", "SST": "D2"}
+        )
+
+        assert aggregate == 8
+        assert division == 'Division 1'
+        assert counts == {'distinctions': 3, 'credits': 1, 'passes': 0, 'fails': 0}
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+SCHEMA = """
+CREATE TABLE uneb_results (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    school_id UUID NOT NULL,
+    student_id UUID NOT NULL,
+    exam_type VARCHAR(50) NOT NULL,
+    exam_year INTEGER NOT NULL,
+    subject_results JSONB NOT NULL DEFAULT '{}',
+    aggregate INTEGER,
+    division VARCHAR(20),
+    distinction_count INTEGER DEFAULT 0,
+    credit_count INTEGER DEFAULT 0,
+    UNIQUE (student_id, exam_type, exam_year)
+);
+CREATE TABLE uneb_performance_stats (
+    school_id UUID NOT NULL,
+    exam_type VARCHAR(50) NOT NULL,
+    exam_year INTEGER NOT NULL,
+    total_candidates INTEGER DEFAULT 0,
+    aggregate_sum BIGINT DEFAULT 0,
+    aggregate_count INTEGER DEFAULT 0,
+    division_1 INTEGER DEFAULT 0,
+    division_2 INTEGER DEFAULT 0,
+    division_3 INTEGER DEFAULT 0,
+    division_4 INTEGER DEFAULT 0,
+    total_distinctions INTEGER DEFAULT 0,
+    total_credits INTEGER DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (school_id, exam_type, exam_year)
+);
+"""
+
+
+@pytest.fixture
+def uneb(pg, make_service):
+    pg.execute_query(SCHEMA, fetch=False)
+    return make_service(UNEBService, pg, school_id=SCHOOL)
+
+
+@pytest.fixture
+def ple_2025(insert, ids):
+    """Two PLE 2025 candidates: aggregates 8 (Division 1) and 12 (Division 2)"""
+    for aggregate, division, distinctions in ((8, "Division 1", 3), (12, "Division 2", 1)):
+        insert("uneb_results", school_id=SCHOOL, student_id=ids(), exam_type="PLE", exam_year=2025,
+               aggregate=aggregate, division=division, distinction_count=distinctions, credit_count=1)
+
+
+def stored_stats(pg):
+    rows = pg.execute_query(
+        "SELECT exam_type, exam_year, total_candidates, division_1 FROM uneb_performance_stats ORDER BY exam_year"
+    )
+    return [tuple(row.values()) for row in rows]
+
+
+class TestGradeMapCache:
+    """Test the grade map cache"""
+
+    def teardown_method(self):
+        uneb_module._grade_maps.clear()
+
+    def test_empty_map_not_cached(self, fake_db, make_service):
+        db = fake_db([], [{"grade": "D1", "points": 1, "description": "Distinction"}])
+        service = make_service(UNEBService, db)
+
+        assert service._grade_map('PLE') == {}
+        assert service._grade_map('PLE') == {"D1": {"points": 1, "description": "Distinction"}}
+        assert service._grade_map('PLE')["D1"]["points"] == 1
+        assert len(db.calls) == 2
+
+    def test_map_reloaded_after_ttl(self, fake_db, make_service):
+        uneb_module._grade_maps['PLE'] = (
+            time.monotonic() - uneb_module.GRADE_MAP_TTL_SECONDS - 1,
+            {"D1": {"points": 9, "description": None}}
+        )
+        db = fake_db([{"grade": "D1", "points": 1, "description": None}])
+
+        assert make_service(UNEBService, db)._grade_map('PLE')["D1"]["points"] == 1
+
+
+class TestSchoolPerformance:
+    """Test get_school_performance"""
+
+    def test_reads_stats_row(self, uneb, insert):
+        insert("uneb_performance_stats", school_id=SCHOOL, exam_type="PLE", exam_year=2025,
+               total_candidates=4, aggregate_sum=40, aggregate_count=4, division_1=2, division_2=2)
+
+        result = uneb.get_school_performance('PLE', 2025)
+
+        assert result["average_aggregate"] == 10
+        assert (result["total_candidates"], result["division_1"]) == (4, 2)
+
+    def test_missing_stats_totalled_without_writing(self, pg, uneb, ple_2025):
+        result = uneb.get_school_performance('PLE', 2025)
+
+        assert result["success"] is True
+        assert (result["total_candidates"], result["division_1"], result["division_2"]) == (2, 1, 1)
+        assert result["average_aggregate"] == 10
+        assert result["total_distinctions"] == 4
+        assert stored_stats(pg) == []
+
+    def test_no_results_is_an_empty_exam(self, uneb):
+        result = uneb.get_school_performance('PLE', 2025)
+
+        assert result["total_candidates"] == 0
+        assert result["average_aggregate"] is None
+
+
+class TestReconcilePerformanceStats:
+    """Test reconcile_performance_stats"""
+
+    def test_drift_repaired(self, pg, uneb, ple_2025, insert):
+        insert("uneb_performance_stats", school_id=SCHOOL, exam_type="PLE", exam_year=2025, total_candidates=7)
+        insert("uneb_performance_stats", school_id=SCHOOL, exam_type="PLE", exam_year=2019, total_candidates=3)
+
+        result = uneb.reconcile_performance_stats()
+
+        assert result["exams_mismatched"] == 2
+        assert result["repaired"] is True
+        # Stale totals rebuilt from uneb_results; exams with no results left are removed
+        assert stored_stats(pg) == [("PLE", 2025, 2, 1)]
+        assert uneb.reconcile_performance_stats()["exams_mismatched"] == 0
+
+    def test_check_only(self, pg, uneb, ple_2025):
+        result = uneb.reconcile_performance_stats(repair=False)
+
+        assert result["mismatched"] == [{"exam_type": "PLE", "exam_year": 2025}]
+        assert result["repaired"] is False
+        assert stored_stats(pg) == []
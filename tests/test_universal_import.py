@@ -0,0 +1,99 @@
+"""
+Universal Import Tests
+Tests for column detection and the dry-run conflict report
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.universal_import import UniversalImporter
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+
+SCHEMA = """
+ALTER TABLE students
+    ADD COLUMN date_of_birth DATE,
+    ADD COLUMN section VARCHAR(50),
+    ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ADD UNIQUE (school_id, admission_number);
+"""
+
+
+@pytest.fixture
+def importer(pg, core_tables, insert):
+    core_tables("students")
+    pg.execute_query(SCHEMA, fetch=False)
+    insert("students", school_id=SCHOOL, admission_number="A1", first_name="Mary", last_name="Old", class_name="P4")
+    return UniversalImporter(SCHOOL, db=pg)
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    csv_file = tmp_path / "students.csv"
+    csv_file.write_text(
+        "admission,first_name,last_name,class\n"
+        "A1,Mary,Nakato,\n"
+        "A2,John,Okello,P5\n"
+        "A3,Ann,Opio,P5\n"
+        "A2,John,Okello,P6\n"
+    )
+    return str(csv_file)
+
+
+def students(pg):
+    rows = pg.execute_query("SELECT admission_number, last_name, class_name FROM students ORDER BY admission_number")
+    return [tuple(row.values()) for row in rows]
+
+
+class TestColumnMapping:
+    """Test header detection"""
+
+    def test_exact_variants_mapped(self):
+        importer = UniversalImporter("school-1")
+        mapping = importer.detect_column_mapping(["Adm. No", "First Name", "Surname", "Sex", "Class"])
+
+        assert mapping == {
+            "admission_number": "Adm. No",
+            "first_name": "First Name",
+            "last_name": "Surname",
+            "gender": "Sex",
+            "class_name": "Class",
+        }
+
+    def test_fuzzy_fallback_for_misspelled_headers(self):
+        importer = UniversalImporter("school-1")
+        mapping = importer.detect_column_mapping(["Admision Numbr", "Frst name"])
+
+        assert mapping["admission_number"] == "Admision Numbr"
+        assert mapping["first_name"] == "Frst name"
+
+
+class TestExecuteImport:
+    """Test conflict reporting and the chunked insert"""
+
+    def test_dry_run_reports_conflicts_without_writing(self, pg, importer, sheet):
+        result = importer.execute_import(sheet, dry_run=True)
+
+        assert result["conflicts"] == ["A1"]
+        assert result["would_insert"] == 2
+        assert result["errors"] == ["Duplicate admission number in file: A2"]
+        assert students(pg) == [("A1", "Old", "P4")]
+
+    def test_existing_students_skipped(self, pg, importer, sheet):
+        importer.IMPORT_CHUNK_SIZE = 2
+
+        result = importer.execute_import(sheet)
+
+        assert (result["imported_count"], result["updated_count"], result["skipped_count"]) == (2, 0, 1)
+        # Last row wins for an admission number repeated in the file
+        assert students(pg) == [("A1", "Old", "P4"), ("A2", "Okello", "P6"), ("A3", "Opio", "P5")]
+
+    def test_update_existing_keeps_unset_fields(self, pg, importer, sheet):
+        result = importer.execute_import(sheet, update_existing=True)
+
+        assert (result["imported_count"], result["updated_count"]) == (2, 1)
+        assert students(pg)[0] == ("A1", "Nakato", "P4")
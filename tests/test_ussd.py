@@ -0,0 +1,177 @@
+"""
+USSD Session Tests
+Tests that session state is shared (Redis, or ussd_sessions without it), so
+any worker can serve a hop
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.services.ussd import USSDService, USSDSessionStore
+
+
+SCHOOL = "00000000-0000-0000-0000-00000000000a"
+PHONE = "+256700000000"
+
+SCHEMA = """
+CREATE TABLE ussd_sessions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    session_id VARCHAR(255) UNIQUE NOT NULL,
+    phone_number VARCHAR(20) NOT NULL,
+    current_menu VARCHAR(100),
+    session_data JSONB DEFAULT '{}'::jsonb,
+    status VARCHAR(20) DEFAULT 'active',
+    last_activity TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP + INTERVAL '5 minutes'
+);
+"""
+
+
+@pytest.fixture
+def family(pg, core_tables, insert):
+    """A parent on PHONE with two active children; returns the parent's links"""
+    core_tables("students", "parents", "student_parents")
+    pg.execute_query(SCHEMA, fetch=False)
+    parent = insert("parents", school_id=SCHOOL, first_name="Grace", last_name="Okello", phone=PHONE)
+    for name, class_name in (("Ann", "P4"), ("Ben", "P2")):
+        child = insert("students", school_id=SCHOOL, first_name=name, last_name="Okello", class_name=class_name)
+        insert("student_parents", student_id=child, parent_id=parent)
+    return parent
+
+
+def unlink_children(pg):
+    pg.execute_query("DELETE FROM student_parents", fetch=False)
+
+
+def session_row(pg, session_id):
+    rows = pg.execute_query(
+        "SELECT current_menu, session_data, status FROM ussd_sessions WHERE session_id = %s", (session_id,)
+    )
+    return rows[0] if rows else None
+
+
+class FakeRedis:
+    """The handful of Redis commands the session store uses (TTL ignored)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+
+class QueuedAudit:
+    """Collects audit writes instead of running them on a thread"""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, query, params):
+        self.writes.append((" ".join(query.split()), params))
+
+
+@pytest.fixture
+def make_worker(make_service):
+    """A USSDService as another worker process would run it"""
+    def build(db, sessions=None):
+        return make_service(USSDService, db, sessions=sessions, audit=QueuedAudit())
+    return build
+
+
+class TestSharedSessionState:
+    """Test hops served by different workers"""
+
+    def test_next_hop_on_another_worker_sees_current_menu(self, pg, family, make_worker):
+        worker_a, worker_b = make_worker(pg), make_worker(pg)
+
+        worker_a.start_session(PHONE, "s1")
+        response = worker_b.handle_input("s1", "2")
+
+        assert response["response"].splitlines()[:3] == ["CON Select child:", "1. Ann Okello (P4)", "2. Ben Okello (P2)"]
+        row = session_row(pg, "s1")
+        assert row["current_menu"] == "select_child"
+        assert row["session_data"]["action"] == "check_fees"
+
+        # Worker A has no stale copy: it reads the menu worker B wrote
+        back = worker_a.handle_input("s1", "0")
+        assert back["response"].startswith("CON Welcome")
+        assert session_row(pg, "s1")["current_menu"] == "main_menu"
+
+    def test_children_carried_in_session_after_back(self, pg, family, make_worker):
+        worker = make_worker(pg)
+
+        worker.start_session(PHONE, "s1")
+        worker.handle_input("s1", "2")
+        worker.handle_input("s1", "0")
+        unlink_children(pg)
+        response = worker.handle_input("s1", "1")
+
+        assert "Select child" in response["response"]
+
+    def test_exit_ends_session(self, pg, family, make_worker):
+        worker = make_worker(pg)
+
+        worker.start_session(PHONE, "s1")
+        worker.handle_input("s1", "0")
+
+        assert session_row(pg, "s1")["status"] == "completed"
+        assert "expired" in worker.handle_input("s1", "1")["response"]
+
+
+class TestRedisSessionState:
+    """Test hops served from the shared Redis store"""
+
+    def test_hops_only_queue_ussd_sessions_audit(self, pg, family, make_worker):
+        store = USSDSessionStore(FakeRedis())
+        worker_a, worker_b = make_worker(pg, store), make_worker(pg, store)
+
+        worker_a.start_session(PHONE, "s1")
+        response = worker_b.handle_input("s1", "2")
+
+        assert "Select child" in response["response"]
+        assert store.get("s1")["current_menu"] == "select_child"
+        assert session_row(pg, "s1") is None
+
+        # The queued writes leave the audit row where the session is
+        for query, params in worker_a.audit.writes + worker_b.audit.writes:
+            pg.execute_query(query, params, fetch=False)
+        assert session_row(pg, "s1")["current_menu"] == "select_child"
+
+        back = worker_a.handle_input("s1", "0")
+        assert back["response"].startswith("CON Welcome")
+
+    def test_children_cached_per_phone_until_links_change(self, pg, family, make_worker):
+        store = USSDSessionStore(FakeRedis())
+        worker = make_worker(pg, store)
+
+        worker.start_session(PHONE, "s1")
+        worker.handle_input("s1", "2")
+        unlink_children(pg)
+        worker.start_session(PHONE, "s2")
+        assert "Select child" in worker.handle_input("s2", "2")["response"]
+
+        store.invalidate_children()
+        worker.start_session(PHONE, "s3")
+        assert "No children found" in worker.handle_input("s3", "2")["response"]
+
+    def test_exit_removes_session(self, pg, family, make_worker):
+        store = USSDSessionStore(FakeRedis())
+        worker = make_worker(pg, store)
+
+        worker.start_session(PHONE, "s1")
+        worker.handle_input("s1", "0")
+
+        assert store.get("s1") is None
+        assert "expired" in worker.handle_input("s1", "1")["response"]